@@ -0,0 +1,5 @@
+"""Performance benchmarks - these are run manually, e.g.
+
+python -m benchmarks.slot_availability
+python -m benchmarks.scheduler --output results.json
+"""
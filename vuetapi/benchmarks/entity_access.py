@@ -0,0 +1,189 @@
+"""Benchmark finding the entities a user can see and tag tasks with.
+
+Compares the original OR of joins over the entities' owners, members,
+parents, children and tasks with the EntityAccess table, for a user
+with thousands of entities, in a throwaway test database.
+
+python -m benchmarks.entity_access --entities 5000 --output after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+from types import SimpleNamespace
+from typing import Dict
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vuet.settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks.scheduler import get_commit, measure
+from core.models.entities.base import Entity
+from core.models.tasks.base import Task
+from core.models.users.user_models import User
+from core.serializers.mixins.task_entities import WithEntitiesSerializerMixin
+from core.utils.categories import Categories
+from core.utils.change_log import log_changes_after
+from core.utils.scheduling.cache import invalidate_users_after
+from core.views.entity_viewsets import EntityReadonlyViewSet
+
+# The number of entities a task is tagged with when validating it
+TAGGED_ENTITIES = 3
+
+
+def original_visible_entities(user: User):
+    """The original EntityReadonlyViewSet queryset"""
+    return Entity.objects.filter(
+        Q(owner=user)
+        | Q(members=user)
+        | Q(parent__owner=user)
+        | Q(parent__members=user)
+        | Q(tasks__members__pk=user.id)
+        | Q(child_entities__members__pk=user.id)
+    ).distinct()
+
+
+def original_validate_entities(user: User, value):
+    """The original WithEntitiesSerializerMixin.validate_entities"""
+    user_member_entities = list(
+        Entity.objects.filter(
+            Q(owner=user)
+            | Q(members=user)
+            | Q(parent__owner=user)
+            | Q(parent__members=user)
+        ).distinct()
+    )
+    return all(entity in user_member_entities for entity in value)
+
+
+class _Validator(WithEntitiesSerializerMixin):
+    instance = None
+
+    def __init__(self, user: User):
+        self.context = {"request": SimpleNamespace(user=user)}
+
+
+def create_entities(user: User, other_user: User, count: int, tasks: int, seed: int):
+    """Create entities owned by, or shared with, the user - some of which
+    are children of others - and tasks tagged with them"""
+    rng = random.Random(seed)
+    entities = []
+    # Invalidate the schedules and log the changes once at the end
+    users = Q(id__in=[user.id, other_user.id])
+    with invalidate_users_after(users), log_changes_after(users):
+        for i in range(count):
+            owner = user if rng.random() < 0.5 else other_user
+            entity = Entity.objects.create(
+                name=f"Entity {i}",
+                owner=owner,
+                category=Categories.PETS.value,
+                parent=rng.choice(entities)
+                if entities and rng.random() < 0.3
+                else None,
+            )
+            entity.members.set([user, other_user] if rng.random() < 0.5 else [owner])
+            entities.append(entity)
+
+        for i in range(tasks):
+            task = Task.objects.create(title=f"Task {i}")
+            task.members.set([user, other_user])
+            task.entities.set(rng.sample(entities, TAGGED_ENTITIES))
+
+    return entities
+
+
+def benchmark(args) -> Dict[str, object]:
+    """Benchmark the original and indexed lookups for a new user"""
+    user = User.objects.create(
+        username="benchmark@vuet.app", phone_number="+447000000000"
+    )
+    other_user = User.objects.create(
+        username="benchmark-other@vuet.app", phone_number="+447000000001"
+    )
+    entities = create_entities(user, other_user, args.entities, args.tasks, args.seed)
+    # A task being tagged with entities the user owns
+    value = random.Random(args.seed).sample(
+        [entity for entity in entities if entity.owner_id == user.id],  # type: ignore
+        TAGGED_ENTITIES,
+    )
+
+    viewset = EntityReadonlyViewSet(request=SimpleNamespace(user=user))
+    validator = _Validator(user)
+    return {
+        "visible_entities": {
+            "original": measure(
+                lambda: list(original_visible_entities(user).values_list("id")),
+                args.repeat,
+            ),
+            "indexed": measure(
+                lambda: list(viewset.get_queryset().values_list("id")), args.repeat
+            ),
+        },
+        "validate_entities": {
+            "original": measure(
+                lambda: original_validate_entities(user, value), args.repeat
+            ),
+            "indexed": measure(lambda: validator.validate_entities(value), args.repeat),
+        },
+    }
+
+
+def parse_args():
+    """Parse the benchmark options"""
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    arg_parser.add_argument("--entities", type=int, default=2000)
+    arg_parser.add_argument("--tasks", type=int, default=500)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument(
+        "--output", help="The file to write the results to (default stdout)"
+    )
+    return arg_parser.parse_args()
+
+
+def run():
+    """Run the benchmark and write the results"""
+    args = parse_args()
+
+    connection.settings_dict["TEST"][
+        "NAME"
+    ] = f"test_{connection.settings_dict['NAME']}_benchmark"
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        results = benchmark(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    output = {
+        "benchmark": "entity_access",
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "entities": args.entities,
+            "tasks": args.tasks,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(output, output_file, indent=2, default=str)
+    else:
+        json.dump(output, sys.stdout, indent=2, default=str)
+        print()
+
+
+if __name__ == "__main__":
+    run()
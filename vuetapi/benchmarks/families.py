@@ -0,0 +1,250 @@
+"""Synthetic families for the benchmarks.
+
+create_family fills the database with a family of the size given by a
+FamilyConfig - members, entities, fixed, flexible and recurring tasks,
+task actions, recurrence overwrites, completion forms, task limits,
+preferred days and blocked categories. The same config and seed always
+create the same family.
+"""
+
+import dataclasses
+import datetime as dt
+import random
+from typing import List
+
+import pytz
+
+from core.models.entities.base import Entity
+from core.models.entities.career import DaysOff
+from core.models.entities.travel import Trip
+from core.models.settings.blocked_days import (
+    BirthdayBlockedCategory,
+    DaysOffBlockedCategory,
+    TripBlockedCategory,
+)
+from core.models.settings.preferred_days import PreferredDays
+from core.models.task_completion_forms.base import TaskCompletionForm
+from core.models.tasks.base import (
+    FixedTask,
+    FlexibleTask,
+    Recurrence,
+    RecurrentTaskOverwrite,
+    Task,
+    TaskAction,
+)
+from core.models.tasks.task_limits import TaskLimit
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+
+utc = pytz.UTC
+
+CATEGORIES = [
+    Categories.PETS.value,
+    Categories.TRANSPORT.value,
+    Categories.EDUCATION.value,
+    Categories.HEALTH_BEAUTY.value,
+]
+RECURRENCES = ["DAILY", "WEEKLY", "MONTHLY", "YEARLY"]
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+
+
+@dataclasses.dataclass
+class FamilyConfig:
+    """The size of a synthetic family"""
+
+    members: int = 4
+    entities_per_member: int = 5
+    fixed_tasks: int = 200
+    flexible_tasks: int = 100
+    # The proportions of the tasks which recur, have an action or
+    # have a completion form
+    recurring: float = 0.2
+    with_actions: float = 0.2
+    completed: float = 0.2
+    # The number of occurrences of recurring tasks which are overwritten
+    overwrites: int = 20
+    trips_per_member: int = 2
+    days_off_per_member: int = 2
+
+    # The tasks are spread over the year from this date
+    start_date: dt.date = dt.date(2023, 1, 1)
+    seed: int = 0
+
+
+class _FamilyFactory:
+    def __init__(self, config: FamilyConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.family = Family.objects.create()
+        self.members: List[User] = []
+        self.entities: List[Entity] = []
+
+        # The engine can only place a flexible task if one of the days in
+        # its window is preferred by all of its members, so the members
+        # share preferences and the windows are at least a week long
+        self.preferred_days = {
+            category: self.rng.sample(WEEKDAYS, 3) for category in CATEGORIES
+        }
+
+    def random_date(self) -> dt.date:
+        return self.config.start_date + dt.timedelta(days=self.rng.randrange(365))
+
+    def random_members(self) -> List[User]:
+        return self.rng.sample(self.members, self.rng.randint(1, len(self.members)))
+
+    def create_members(self):
+        for i in range(self.config.members):
+            member = User.objects.create(
+                username=f"benchmark-{self.family.id}-{i}@vuet.app",
+                phone_number=f"+4470{self.family.id:05d}{i:04d}",
+                family=self.family,
+                dob=dt.date(1980 + i, 1 + i % 12, 1 + i % 28),
+            )
+            self.members.append(member)
+
+            for category in CATEGORIES:
+                TaskLimit.objects.create(
+                    user=member,
+                    category=category,
+                    interval=self.rng.choice(["DAILY", "WEEKLY", "MONTHLY"]),
+                    minutes_limit=self.rng.choice([None, 120, 240]),
+                    tasks_limit=self.rng.choice([None, 3, 5]),
+                )
+                PreferredDays.objects.create(
+                    user=member,
+                    category=category,
+                    **{day: True for day in self.preferred_days[category]},
+                )
+
+            BirthdayBlockedCategory.objects.create(
+                user=member, category=self.rng.choice(CATEGORIES)
+            )
+            TripBlockedCategory.objects.create(
+                user=member, category=self.rng.choice(CATEGORIES)
+            )
+            DaysOffBlockedCategory.objects.create(
+                user=member, category=self.rng.choice(CATEGORIES)
+            )
+
+    def create_entities(self):
+        for member in self.members:
+            for i in range(self.config.entities_per_member):
+                entity = Entity.objects.create(
+                    name=f"Entity {i}",
+                    owner=member,
+                    category=self.rng.choice(CATEGORIES),
+                )
+                entity.members.set(self.random_members())
+                self.entities.append(entity)
+
+            for _ in range(self.config.trips_per_member):
+                start_date = self.random_date()
+                trip = Trip.objects.create(
+                    name="Trip",
+                    owner=member,
+                    start_date=start_date,
+                    end_date=start_date + dt.timedelta(days=self.rng.randint(1, 10)),
+                )
+                trip.members.set([member])
+
+            for _ in range(self.config.days_off_per_member):
+                start_date = self.random_date()
+                days_off = DaysOff.objects.create(
+                    name="Days off",
+                    owner=member,
+                    start_date=start_date,
+                    end_date=start_date + dt.timedelta(days=self.rng.randint(0, 3)),
+                )
+                days_off.members.set([member])
+
+    def add_relations(self, task: Task):
+        task.members.set(self.random_members())
+        task.entities.set([self.rng.choice(self.entities)])
+
+        if self.rng.random() < self.config.recurring:
+            Recurrence.objects.create(
+                task=task,
+                recurrence=self.rng.choice(RECURRENCES),
+                interval_length=self.rng.randint(1, 3),
+            )
+        if self.rng.random() < self.config.with_actions:
+            TaskAction.objects.create(
+                task=task,
+                action_timedelta=dt.timedelta(days=self.rng.randint(1, 7)),
+            )
+        if self.rng.random() < self.config.completed:
+            TaskCompletionForm.objects.create(
+                task=task, complete=True, recurrence_index=None
+            )
+
+    def create_tasks(self):
+        for i in range(self.config.fixed_tasks):
+            start_datetime = dt.datetime.combine(
+                self.random_date(), dt.time(self.rng.randint(7, 20)), tzinfo=utc
+            )
+            task = FixedTask.objects.create(
+                title=f"Fixed task {i}",
+                type=self.rng.choice(["TASK", "APPOINTMENT"]),
+                start_datetime=start_datetime,
+                end_datetime=start_datetime
+                + dt.timedelta(minutes=self.rng.choice([30, 60, 120])),
+            )
+            self.add_relations(task)
+
+        for i in range(self.config.flexible_tasks):
+            earliest_action_date = self.random_date()
+            task = FlexibleTask.objects.create(
+                title=f"Flexible task {i}",
+                type="TASK",
+                earliest_action_date=earliest_action_date,
+                due_date=earliest_action_date
+                + dt.timedelta(days=self.rng.randint(6, 14)),
+                duration=self.rng.choice([15, 30, 60, 120]),
+            )
+            self.add_relations(task)
+
+    def create_overwrites(self):
+        recurrences = list(
+            Recurrence.objects.filter(
+                task__members__family=self.family, task__fixedtask__isnull=False
+            ).distinct()
+        )
+        for _ in range(min(self.config.overwrites, len(recurrences))):
+            recurrence = self.rng.choice(recurrences)
+            recurrence_index = self.rng.randint(1, 10)
+            if RecurrentTaskOverwrite.objects.filter(
+                recurrence=recurrence, recurrence_index=recurrence_index
+            ).exists():
+                continue
+
+            start_datetime = dt.datetime.combine(
+                self.random_date(), dt.time(self.rng.randint(7, 20)), tzinfo=utc
+            )
+            task = FixedTask.objects.create(
+                title="Overwritten task",
+                type="TASK",
+                start_datetime=start_datetime,
+                end_datetime=start_datetime + dt.timedelta(hours=1),
+            )
+            task.members.set(self.random_members())
+            RecurrentTaskOverwrite.objects.create(
+                task=task, recurrence=recurrence, recurrence_index=recurrence_index
+            )
+
+
+def create_family(config: FamilyConfig) -> Family:
+    """Create a synthetic family of the size configured"""
+    factory = _FamilyFactory(config)
+    factory.create_members()
+    factory.create_entities()
+    factory.create_tasks()
+    factory.create_overwrites()
+    return factory.family
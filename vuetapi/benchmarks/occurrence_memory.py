@@ -0,0 +1,143 @@
+"""Benchmark the memory used by the occurrences placed by the scheduling engine.
+
+Compares the original ScheduledTask dicts, each with its own copy of the
+task's fields, with the ScheduledTask records sharing TaskDetails.
+Each format is built in a forked process so that the peak RSS of one
+doesn't hide the other.
+
+python -m benchmarks.occurrence_memory
+"""
+
+import datetime as dt
+import multiprocessing
+import os
+import resource
+import tracemalloc
+from typing import Callable, List
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vuet.settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+from core.utils.scheduling.occurrences import ScheduledTask, TaskDetails
+
+utc = dt.timezone.utc
+
+TASK_COUNT = 100
+OCCURRENCES_PER_TASK = 100
+
+
+def occurrence_datetimes(task_id: int, index: int):
+    """The start and end of an occurrence of a daily task"""
+    start = dt.datetime(2023, 1, 1, 8 + task_id % 10, tzinfo=utc) + dt.timedelta(
+        days=index
+    )
+    return (start, start + dt.timedelta(hours=1))
+
+
+def build_dicts() -> List[dict]:
+    """Build the occurrences in the original dict format"""
+    occurrences = []
+    for task_id in range(TASK_COUNT):
+        for index in range(OCCURRENCES_PER_TASK):
+            (start, end) = occurrence_datetimes(task_id, index)
+            occurrences.append(
+                {
+                    "id": task_id,
+                    "is_complete": False,
+                    "is_partially_complete": False,
+                    "is_ignored": False,
+                    "members": [1, 2],
+                    "entities": [task_id],
+                    "actions": [],
+                    "action_id": None,
+                    "tags": ["SOCIAL_INTERESTS__BIRTHDAY"],
+                    "start_datetime": start,
+                    "end_datetime": end,
+                    "start_date": None,
+                    "end_date": None,
+                    "duration": 60,
+                    "date": None,
+                    "recurrence": task_id,
+                    "recurrence_index": index,
+                    "routine": None,
+                    "title": f"Task {task_id}",
+                    "resourcetype": "FixedTask",
+                    "type": "TASK",
+                    "alerts": {},
+                }
+            )
+    return occurrences
+
+
+def build_records() -> List[ScheduledTask]:
+    """Build the occurrences as records sharing the details of each task"""
+    occurrences = []
+    for task_id in range(TASK_COUNT):
+        details = TaskDetails(
+            id=task_id,
+            title=f"Task {task_id}",
+            tags=("SOCIAL_INTERESTS__BIRTHDAY",),
+            members=(1, 2),
+            entities=(task_id,),
+            actions=(),
+            action_id=None,
+            recurrence=task_id,
+            routine=None,
+            resourcetype="FixedTask",
+            type="TASK",
+        )
+        for index in range(OCCURRENCES_PER_TASK):
+            (start, end) = occurrence_datetimes(task_id, index)
+            occurrences.append(
+                ScheduledTask(
+                    details,
+                    start_datetime=start,
+                    end_datetime=end,
+                    duration=60,
+                    recurrence_index=index,
+                )
+            )
+    return occurrences
+
+
+def measure(build: Callable[[], list], results):
+    """Measure the peak memory used to build the occurrences"""
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    occurrences = build()
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((len(occurrences), peak / 1024, rss_after - rss_before))
+
+
+def run():
+    """Run the benchmark and print the results"""
+    context = multiprocessing.get_context("fork")
+    print(f"Building {TASK_COUNT * OCCURRENCES_PER_TASK} occurrences")
+    print(f"{'format':>8} {'traced peak (KiB)':>18} {'RSS growth (KiB)':>17}")
+
+    measurements = {}
+    for (name, build) in [("dicts", build_dicts), ("records", build_records)]:
+        results = context.Queue()
+        process = context.Process(target=measure, args=(build, results))
+        process.start()
+        (count, peak, rss) = results.get()
+        process.join()
+        assert count == TASK_COUNT * OCCURRENCES_PER_TASK
+        measurements[name] = (peak, rss)
+        print(f"{name:>8} {peak:>18.0f} {rss:>17}")
+
+    (dict_peak, dict_rss) = measurements["dicts"]
+    (record_peak, record_rss) = measurements["records"]
+    print(
+        f"Traced peak reduced by {1 - record_peak / dict_peak:.0%}, "
+        f"RSS growth reduced by {1 - record_rss / max(dict_rss, 1):.0%}"
+    )
+
+
+if __name__ == "__main__":
+    run()
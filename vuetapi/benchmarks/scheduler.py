@@ -0,0 +1,168 @@
+"""Benchmark the SchedulingEngine against synthetic families.
+
+Creates a throwaway test database, fills it with a synthetic family
+(see benchmarks.families) and times SchedulingEngine.__init__,
+schedule_tasks and schedule_entities over a scheduling window, along
+with the number of queries made and the peak memory allocated by each.
+
+The results are written as JSON so that they can be compared between
+commits, e.g.
+
+python -m benchmarks.scheduler --fixed-tasks 500 --output before.json
+"""
+
+import argparse
+import dataclasses
+import datetime as dt
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vuet.settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+import pytz
+from django.db import connection, reset_queries
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from benchmarks.families import FamilyConfig, create_family
+from core.utils.scheduling.scheduler import SchedulingEngine
+
+utc = pytz.UTC
+
+
+def get_commit() -> Optional[str]:
+    """Get the commit being benchmarked, if running from a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(run: Callable[[], object], repeat: int) -> Dict[str, object]:
+    """Time the function provided, then run it once more to count
+    its queries and trace its peak memory allocation"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    # The query log is capped, and may have been filled creating the data
+    reset_queries()
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as queries:
+        run()
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": timings,
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "queries": len(queries.captured_queries),
+        "peak_memory_bytes": peak,
+    }
+
+
+def benchmark(
+    config: FamilyConfig, start_date: dt.datetime, end_date: dt.datetime, repeat: int
+) -> Dict[str, object]:
+    """Benchmark the scheduling engine for a new family of the size configured"""
+    family = create_family(config)
+    user = family.users.order_by("id").first()
+
+    def engine():
+        return SchedulingEngine(user, start_date=start_date, end_date=end_date)
+
+    return {
+        "init": measure(engine, repeat),
+        "schedule_tasks": measure(lambda: engine().schedule_tasks(), repeat),
+        "schedule_entities": measure(lambda: engine().schedule_entities(), repeat),
+    }
+
+
+def parse_args():
+    """Parse the family config and benchmark options"""
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    for field in dataclasses.fields(FamilyConfig):
+        if field.type in (int, float):
+            arg_parser.add_argument(
+                f"--{field.name.replace('_', '-')}",
+                type=field.type,
+                default=field.default,
+            )
+    arg_parser.add_argument(
+        "--days", type=int, default=90, help="The length of the scheduling window"
+    )
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument(
+        "--output", help="The file to write the results to (default stdout)"
+    )
+    return arg_parser.parse_args()
+
+
+def run():
+    """Run the benchmark and write the results"""
+    args = parse_args()
+    config = FamilyConfig(
+        **{
+            field.name: getattr(args, field.name)
+            for field in dataclasses.fields(FamilyConfig)
+            if hasattr(args, field.name)
+        }
+    )
+    start_date = dt.datetime.combine(config.start_date, dt.time.min, tzinfo=utc)
+    end_date = start_date + dt.timedelta(days=args.days)
+
+    connection.settings_dict["TEST"][
+        "NAME"
+    ] = f"test_{connection.settings_dict['NAME']}_benchmark"
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        results = benchmark(config, start_date, end_date, args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    output = {
+        "benchmark": "scheduler",
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "config": {
+            **dataclasses.asdict(config),
+            "window_start": start_date.isoformat(),
+            "window_end": end_date.isoformat(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(output, output_file, indent=2, default=str)
+    else:
+        json.dump(output, sys.stdout, indent=2, default=str)
+        print()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,118 @@
+"""Benchmark the slot availability checks used when placing flexible tasks.
+
+Compares the original linear scan over all placed tasks with the
+IntervalIndex used by the SchedulingEngine, with and without some
+placed tasks lasting a couple of weeks (e.g. holidays).
+
+python -m benchmarks.slot_availability
+"""
+
+import datetime as dt
+import random
+import timeit
+from typing import List, Tuple
+
+from core.utils.scheduling.intervals import IntervalIndex
+
+utc = dt.timezone.utc
+
+PLACED_TASK_COUNTS = [50, 500, 5000]
+CANDIDATE_DAYS = 30
+
+# get_task_placement tries each hour from 8 until 18 on every candidate day
+CANDIDATE_HOURS = range(8, 19)
+
+
+# Holidays and multi-day calendar events placed among the other tasks
+LONG_INTERVAL_COUNT = 10
+
+
+def random_intervals(
+    count: int, long_count: int = 0
+) -> List[Tuple[dt.datetime, dt.datetime]]:
+    """Generate intervals spread over a year, the first `long_count`
+    of which last a couple of weeks"""
+    start_of_year = dt.datetime(2023, 1, 1, tzinfo=utc)
+    intervals = []
+    for i in range(count):
+        start = start_of_year + dt.timedelta(minutes=random.randrange(365 * 24 * 60))
+        if i < long_count:
+            end = start + dt.timedelta(days=14)
+        else:
+            end = start + dt.timedelta(minutes=random.choice([15, 30, 60, 120]))
+        intervals.append((start, end))
+    return intervals
+
+
+def linear_is_slot_available(
+    intervals: List[Tuple[dt.datetime, dt.datetime]],
+    candidate_start_time: dt.datetime,
+    candidate_end_time: dt.datetime,
+):
+    """The original implementation of SchedulingEngine.is_slot_available"""
+    return all(
+        [
+            (candidate_start_time >= end or candidate_end_time <= start)
+            for (start, end) in intervals
+        ]
+    )
+
+
+def candidate_slots() -> List[Tuple[dt.datetime, dt.datetime]]:
+    """The slots checked when placing a task over CANDIDATE_DAYS days"""
+    first_day = dt.datetime(2023, 6, 1, tzinfo=utc)
+    slots = []
+    for day in range(CANDIDATE_DAYS):
+        for hour in CANDIDATE_HOURS:
+            start = first_day + dt.timedelta(days=day, hours=hour)
+            slots.append((start, start + dt.timedelta(minutes=30)))
+    return slots
+
+
+def run_case(count: int, long_count: int, slots):
+    """Time the checks against `count` placed tasks and print the results"""
+    intervals = random_intervals(count, long_count)
+    index = IntervalIndex()
+    for start, end in intervals:
+        index.add(start, end)
+
+    for start, end in slots:
+        assert linear_is_slot_available(intervals, start, end) == (
+            not index.overlaps(start, end)
+        )
+
+    linear = min(
+        timeit.repeat(
+            lambda: [linear_is_slot_available(intervals, *slot) for slot in slots],
+            number=1,
+            repeat=5,
+        )
+    )
+    indexed = min(
+        timeit.repeat(
+            lambda: [index.overlaps(*slot) for slot in slots], number=1, repeat=5
+        )
+    )
+    print(
+        f"{count:>12} {long_count:>6} {linear * 1000:>12.2f} {indexed * 1000:>13.2f} {linear / indexed:>7.0f}x"
+    )
+
+
+def run():
+    """Run the benchmark and print the results"""
+    random.seed(0)
+    slots = candidate_slots()
+
+    print(
+        f"Checking {len(slots)} candidate slots (one placement over {CANDIDATE_DAYS} days)"
+    )
+    print(
+        f"{'placed tasks':>12} {'long':>6} {'linear (ms)':>12} {'indexed (ms)':>13} {'speedup':>8}"
+    )
+    for long_count in [0, LONG_INTERVAL_COUNT]:
+        for count in PLACED_TASK_COUNTS:
+            run_case(count, long_count, slots)
+
+
+if __name__ == "__main__":
+    run()
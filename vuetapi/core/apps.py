@@ -1,4 +1,4 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
 
 
 class CoreConfig(AppConfig):
@@ -6,4 +6,21 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
+        import core.models.changes.signals
+        import core.models.entities.access_signals
+        import core.models.tasks.access_signals
+        import core.models.tasks.signals
         import core.models.users.signals
+
+        # Saving a model subclass only sends signals for the subclass,
+        # so the save receivers are connected to each subclass
+        save_receivers = [
+            *core.models.changes.signals.SAVE_RECEIVERS,
+            *core.models.entities.access_signals.SAVE_RECEIVERS,
+            *core.models.tasks.access_signals.SAVE_RECEIVERS,
+            *core.models.tasks.signals.SAVE_RECEIVERS,
+        ]
+        for model in apps.get_models():
+            for (signal, receiver, senders) in save_receivers:
+                if issubclass(model, senders):
+                    signal.connect(receiver, sender=model)
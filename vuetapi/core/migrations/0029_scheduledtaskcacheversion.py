@@ -0,0 +1,23 @@
+# Generated by Django 4.0.4 on 2026-10-18 11:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_timeblock_members'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledTaskCacheVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.UUIDField(default=uuid.uuid4)),
+                ('family', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_task_cache_version', to='core.family')),
+            ],
+        ),
+    ]
@@ -0,0 +1,166 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:02
+
+import datetime
+from collections import defaultdict
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+# Frozen copies of the recurrence rules (core.utils.scheduling) and of
+# get_next_fire_time (core.utils.reminders) as they were for this migration,
+# stepping through the occurrences one at a time
+
+RELATIVE_DELTAS = {
+    'DAY': relativedelta(days=1),
+    'WEEK': relativedelta(weeks=1),
+    'MONTH': relativedelta(months=1),
+    'YEAR': relativedelta(years=1),
+}
+
+RECURRENCE_DELTAS = {
+    'DAILY': RELATIVE_DELTAS['DAY'],
+    'WEEKLY': RELATIVE_DELTAS['WEEK'],
+    'MONTHLY': RELATIVE_DELTAS['MONTH'],
+    'YEARLY': RELATIVE_DELTAS['YEAR'],
+}
+
+
+def get_next_date(current_date, recurrence):
+    recurrence_type = recurrence.recurrence
+    interval_length = recurrence.interval_length
+
+    if recurrence_type in RECURRENCE_DELTAS:
+        return current_date + (RECURRENCE_DELTAS[recurrence_type] * interval_length)
+
+    previous_date = current_date
+    if recurrence_type == 'MONTH_WEEKLY':
+        week_number = (current_date.day - 1) // 7
+        for _ in range(interval_length):
+            four_weeks_later = previous_date + relativedelta(weeks=4)
+            if previous_date.month == four_weeks_later.month:
+                previous_date = four_weeks_later + RELATIVE_DELTAS['WEEK']
+            elif (four_weeks_later.day - 1) // 7 == week_number:
+                previous_date = four_weeks_later
+            else:
+                previous_date = four_weeks_later + RELATIVE_DELTAS['WEEK']
+        return previous_date
+    if recurrence_type == 'MONTHLY_LAST_WEEK':
+        for _ in range(interval_length):
+            four_weeks_later = previous_date + relativedelta(weeks=4)
+            if four_weeks_later.month == (four_weeks_later + RELATIVE_DELTAS['WEEK']).month:
+                previous_date = four_weeks_later + RELATIVE_DELTAS['WEEK']
+            else:
+                previous_date = four_weeks_later
+        return previous_date
+    if recurrence_type == 'YEAR_MONTH_WEEKLY':
+        week_number = (current_date.day - 1) // 7
+        for _ in range(interval_length):
+            one_year_later = previous_date + relativedelta(weeks=52)
+            if previous_date.month != one_year_later.month:
+                previous_date = one_year_later + RELATIVE_DELTAS['WEEK']
+            elif (one_year_later.day - 1) // 7 == week_number:
+                previous_date = one_year_later
+            else:
+                previous_date = one_year_later + RELATIVE_DELTAS['WEEK']
+        return previous_date
+    if recurrence_type == 'WEEKDAILY':
+        for _ in range(interval_length):
+            if previous_date.weekday() < 4:
+                previous_date = previous_date + RELATIVE_DELTAS['DAY']
+            else:
+                previous_date = previous_date + relativedelta(days=3)
+        return previous_date
+
+    raise ValueError(f'Unknown recurrence type {recurrence_type}')
+
+
+def get_next_occurrence_start(start_datetime, recurrence, overwritten_indexes, after):
+    if not recurrence:
+        return start_datetime if start_datetime > after else None
+
+    earliest = after
+    if recurrence.earliest_occurrence:
+        earliest = max(earliest, recurrence.earliest_occurrence)
+
+    (index, occurrence_start) = (0, start_datetime)
+    while occurrence_start < earliest:
+        occurrence_start = get_next_date(occurrence_start, recurrence)
+        index += 1
+    while occurrence_start <= after or index in overwritten_indexes:
+        occurrence_start = get_next_date(occurrence_start, recurrence)
+        index += 1
+
+    if recurrence.latest_occurrence and occurrence_start >= recurrence.latest_occurrence:
+        return None
+    return occurrence_start
+
+
+def get_next_fire_time(reminder_timedelta, start_datetime, recurrence, overwritten_indexes, after):
+    if not start_datetime:
+        return None
+
+    occurrence_start = get_next_occurrence_start(
+        start_datetime, recurrence, overwritten_indexes, after + reminder_timedelta
+    )
+    return occurrence_start - reminder_timedelta if occurrence_start else None
+
+
+def backfill_next_fire_times(apps, schema_editor):
+    TaskReminder = apps.get_model('core', 'TaskReminder')
+    FixedTask = apps.get_model('core', 'FixedTask')
+    Recurrence = apps.get_model('core', 'Recurrence')
+    RecurrentTaskOverwrite = apps.get_model('core', 'RecurrentTaskOverwrite')
+
+    after = timezone.now() - datetime.timedelta(seconds=settings.REMINDER_JOB_FREQUENCY)
+    last_id = 0
+    while True:
+        reminders = list(TaskReminder.objects.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not reminders:
+            break
+        last_id = reminders[-1].id
+
+        task_ids = {reminder.task_id for reminder in reminders}
+        start_datetimes = dict(
+            FixedTask.objects.filter(task_ptr_id__in=task_ids).values_list('task_ptr_id', 'start_datetime')
+        )
+        recurrences = {
+            recurrence.task_id: recurrence
+            for recurrence in Recurrence.objects.filter(task_id__in=task_ids)
+        }
+        overwritten_indexes = defaultdict(set)
+        for (recurrence_id, recurrence_index) in RecurrentTaskOverwrite.objects.filter(
+            recurrence__task_id__in=task_ids
+        ).values_list('recurrence_id', 'recurrence_index'):
+            overwritten_indexes[recurrence_id].add(recurrence_index)
+
+        for reminder in reminders:
+            recurrence = recurrences.get(reminder.task_id)
+            reminder.next_fire_time = get_next_fire_time(
+                reminder.timedelta,
+                start_datetimes.get(reminder.task_id),
+                recurrence,
+                overwritten_indexes[recurrence.id] if recurrence else set(),
+                after,
+            )
+
+        TaskReminder.objects.bulk_update(reminders, ['next_fire_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_scheduledtaskcacheversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskreminder',
+            name='next_fire_time',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='\n            When the reminder is next due, for the next occurrence of the task.\n            Null if the task has no more occurrences to remind about.\n        ', null=True),
+        ),
+        migrations.RunPython(backfill_next_fire_times, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_taskreminder_next_fire_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('TASK', 'Task'), ('ENTITY', 'Entity')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_log_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['user', 'id'], name='core_change_user_id_ce4e15_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['created_at'], name='core_change_created_c32e93_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def backfill_task_access(apps, schema_editor):
+    from core.utils.task_access import refresh_task_access
+
+    Task = apps.get_model('core', 'Task')
+    task_ids = list(Task.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(task_ids), BATCH_SIZE):
+        refresh_task_access(task_ids[start:start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_changelogentry'),
+        ('external_calendars', '0008_icalevent_ical_rrule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('visibility', models.PositiveSmallIntegerField()),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accesses', to='core.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_accesses', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskaccess',
+            constraint=models.UniqueConstraint(fields=('user', 'task'), name='unique_task_access'),
+        ),
+        migrations.RunPython(backfill_task_access, migrations.RunPython.noop),
+    ]
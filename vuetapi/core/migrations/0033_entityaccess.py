@@ -0,0 +1,40 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def backfill_entity_access(apps, schema_editor):
+    from core.utils.entity_access import refresh_entity_access
+
+    Entity = apps.get_model('core', 'Entity')
+    entity_ids = list(Entity.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(entity_ids), BATCH_SIZE):
+        refresh_entity_access(entity_ids[start:start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_taskaccess'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('access', models.PositiveSmallIntegerField()),
+                ('entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accesses', to='core.entity')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entity_accesses', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='entityaccess',
+            constraint=models.UniqueConstraint(fields=('user', 'entity'), name='unique_entity_access'),
+        ),
+        migrations.RunPython(backfill_entity_access, migrations.RunPython.noop),
+    ]
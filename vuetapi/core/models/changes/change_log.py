@@ -0,0 +1,41 @@
+"""Models for the log of changes synced by the clients"""
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class ChangedObjectType(models.TextChoices):
+    """The types of object whose changes are logged"""
+
+    TASK = "TASK"
+    ENTITY = "ENTITY"
+
+
+class ChangeLogEntry(models.Model):
+    """A change to a task or entity which a user may be able to see.
+
+    The IDs of the entries increase monotonically, so the ID of the last
+    entry a client has synced is its cursor. An entry for an object
+    the user can no longer see (e.g. because it was deleted) is a
+    tombstone for it.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="change_log_entries",
+        null=False,
+        blank=False,
+    )
+    object_type = models.CharField(
+        max_length=10, choices=ChangedObjectType.choices, null=False, blank=False
+    )
+    object_id = models.BigIntegerField(null=False, blank=False)
+    created_at = models.DateTimeField(null=False, blank=False, default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"]),
+            models.Index(fields=["created_at"]),
+        ]
@@ -0,0 +1,150 @@
+"""Change log signals
+
+Log the changes to tasks and entities, and to the objects which are
+serialized with them, for the clients to sync.
+"""
+
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+
+from core.models.entities.base import Entity
+from core.models.settings.family_visibility import FamilyCategoryViewPermission
+from core.models.task_completion_forms.base import TaskCompletionForm
+from core.models.tasks.base import Recurrence, Task, TaskAction, TaskReminder
+from core.models.users.user_models import User
+from core.utils.bulk_delete import bulk_deletion_in_progress
+from core.utils.change_log import log_changes
+from external_calendars.models import ICalIntegration
+
+# The models serialized as part of their task
+TASK_CHILD_MODELS = (Recurrence, TaskAction, TaskCompletionForm, TaskReminder)
+
+
+def _entity_task_ids(entity_ids):
+    return Task.entities.through.objects.filter(entity__in=entity_ids).values_list(
+        "task", flat=True
+    )
+
+
+def _log_instance_changes(instance):
+    if isinstance(instance, Task):
+        log_changes(task_ids=[instance.id])
+    elif isinstance(instance, Entity):
+        log_changes(entity_ids=[instance.id])
+    elif isinstance(instance, TASK_CHILD_MODELS):
+        log_changes(task_ids=[instance.task_id])
+    elif isinstance(instance, FamilyCategoryViewPermission):
+        # The family can see the user's appointments in the category
+        log_changes(
+            task_ids=Task.objects.filter(
+                type="APPOINTMENT",
+                members=instance.user_id,  # type: ignore
+                entities__category=instance.category,
+            ).values_list("id", flat=True)
+        )
+    elif isinstance(instance, ICalIntegration):
+        # Its events may now be shared with the family differently
+        log_changes(task_ids=instance.ical_events.values_list("id", flat=True))
+
+
+def log_changes_post_save(sender, instance, **kwargs):
+    """Log the changes to tasks and entities when they are saved"""
+    _log_instance_changes(instance)
+
+
+def log_changes_user_post_save(sender, instance, **kwargs):
+    """Log the tasks shared with or by the user when they change family,
+    for the user and the family they have left"""
+    # Noted by core.models.users.signals
+    if not getattr(instance, "_family_changed", False):
+        return
+    family_ids = [instance._previous_family_id, instance.family_id]
+    log_changes(
+        task_ids=Task.objects.filter(
+            Q(members=instance.id) | Q(members__family__in=family_ids),
+            type__in=["APPOINTMENT", "ICAL_EVENT"],
+        )
+        .values_list("id", flat=True)
+        .distinct(),
+        user_ids=[
+            instance.id,
+            *User.objects.filter(
+                family__isnull=False, family=instance._previous_family_id
+            ).values_list("id", flat=True),
+        ],
+    )
+
+
+def log_changes_pre_delete(sender, instance, **kwargs):
+    """Log the deletion of tasks and entities, while their
+    relations still exist to work out who could see them"""
+    if isinstance(instance, Entity):
+        # Deleting an entity also changes the entities of its tasks
+        # (which bulk deletions log for all of the entities at once)
+        task_ids = (
+            [] if bulk_deletion_in_progress() else _entity_task_ids([instance.id])
+        )
+        log_changes(task_ids=task_ids, entity_ids=[instance.id])
+    else:
+        _log_instance_changes(instance)
+
+
+def log_changes_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Log the changes to the members and entities of tasks, and the
+    members of entities, including for the users who were removed"""
+    if action not in ["post_add", "post_remove", "pre_clear"]:
+        return
+
+    # Cleared relations are logged before they are cleared,
+    # along with everyone who can see them
+    related_ids = pk_set or set()
+    if sender == Task.members.through:
+        task_ids, user_ids = ([instance.id], related_ids)
+        if reverse:
+            task_ids, user_ids = (related_ids, [instance.id])
+        log_changes(task_ids=task_ids, user_ids=user_ids)
+    elif sender == Task.entities.through:
+        task_ids, entity_ids = ([instance.id], related_ids)
+        if reverse:
+            task_ids, entity_ids = (related_ids, [instance.id])
+        log_changes(task_ids=task_ids, entity_ids=entity_ids)
+    elif sender == Entity.members.through:
+        entity_ids, user_ids = ([instance.id], related_ids)
+        if reverse:
+            entity_ids, user_ids = (related_ids, [instance.id])
+        # The entity's members can see its tasks
+        log_changes(
+            task_ids=_entity_task_ids(entity_ids),
+            entity_ids=entity_ids,
+            user_ids=user_ids,
+        )
+
+
+# The save receivers, which CoreConfig connects to each subclass of their senders
+SAVE_RECEIVERS = [
+    (
+        post_save,
+        log_changes_post_save,
+        (
+            Task,
+            Entity,
+            *TASK_CHILD_MODELS,
+            FamilyCategoryViewPermission,
+            ICalIntegration,
+        ),
+    ),
+]
+
+post_save.connect(log_changes_user_post_save, sender=User)
+
+# Deleting a task or entity subclass (or an integration's events) also
+# deletes, and sends signals for, the underlying Task or Entity rows
+for model in [Task, Entity, *TASK_CHILD_MODELS, FamilyCategoryViewPermission]:
+    pre_delete.connect(log_changes_pre_delete, sender=model)
+
+for through_model in [
+    Task.members.through,
+    Task.entities.through,
+    Entity.members.through,
+]:
+    m2m_changed.connect(log_changes_m2m_changed, sender=through_model)
@@ -0,0 +1,57 @@
+"""Models for which entities each user can see"""
+
+from enum import IntFlag
+
+from django.conf import settings
+from django.db import models
+
+from core.models.entities.base import Entity
+
+
+class EntityAccessKind(IntFlag):
+    """Why an entity is shown to a user"""
+
+    OWNER = 1
+    MEMBER = 2
+    PARENT_OWNER = 4
+    PARENT_MEMBER = 8
+    TASK_MEMBER = 16
+    CHILD_MEMBER = 32
+
+    # The entities a user can edit
+    MEMBERSHIP = OWNER | MEMBER
+    # The entities a user can tag their tasks with
+    TAGGABLE = OWNER | MEMBER | PARENT_OWNER | PARENT_MEMBER
+    VISIBLE = OWNER | MEMBER | PARENT_OWNER | PARENT_MEMBER | TASK_MEMBER | CHILD_MEMBER
+
+
+class EntityAccess(models.Model):
+    """An entity which a user can see, and why (see `EntityAccessKind`).
+
+    This is denormalised from the entity's owner and members, those of its
+    parent and child entities and the members of its tasks, and kept up to
+    date by core.models.entities.access_signals.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="entity_accesses",
+        null=False,
+        blank=False,
+    )
+    entity = models.ForeignKey(
+        Entity,
+        on_delete=models.CASCADE,
+        related_name="accesses",
+        null=False,
+        blank=False,
+    )
+    access = models.PositiveSmallIntegerField(null=False, blank=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "entity"], name="unique_entity_access"
+            )
+        ]
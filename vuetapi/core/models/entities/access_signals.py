@@ -0,0 +1,150 @@
+"""Entity access signals
+
+Keep the stored access to entities (see core.utils.entity_access) up to
+date when anything which decides who can see them changes.
+"""
+
+from django.db.models import Q
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+
+from core.models.entities.base import Entity
+from core.models.tasks.base import Task
+from core.utils.bulk_delete import bulk_deletion_in_progress
+from core.utils.entity_access import refresh_entity_access
+
+
+def _with_relatives(entity_ids):
+    """The entities provided, and their parent and child entities,
+    whose access depends on the entities' owners and members"""
+    entity_ids = set(entity_ids)
+    related_ids = set(entity_ids)
+    for (entity_id, parent_id) in (
+        Entity.objects.non_polymorphic()
+        .filter(Q(id__in=entity_ids) | Q(parent__in=entity_ids))
+        .values_list("id", "parent")
+    ):
+        related_ids.add(entity_id)
+        if parent_id is not None:
+            related_ids.add(parent_id)
+    return related_ids
+
+
+def _task_entity_ids(task_filter: Q):
+    return set(
+        Task.entities.through.objects.filter(task_filter).values_list(
+            "entity", flat=True
+        )
+    )
+
+
+def _get_affected_entity_ids(sender, instance, reverse, pk_set):
+    """Get the entities whose access depends on the relations provided,
+    or all of the instance's relations if `pk_set` is None"""
+    if sender == Entity.members.through:
+        if reverse and pk_set is None:
+            entity_ids = set(
+                Entity.members.through.objects.filter(member=instance.id).values_list(
+                    "entity", flat=True
+                )
+            )
+        elif reverse:
+            entity_ids = pk_set
+        else:
+            entity_ids = [instance.id]
+        return _with_relatives(entity_ids)
+    if sender == Task.entities.through:
+        if reverse:
+            return {instance.id}
+        if pk_set is None:
+            return _task_entity_ids(Q(task=instance.id))
+        return pk_set
+    # Task members
+    if reverse and pk_set is None:
+        return _task_entity_ids(Q(task__members=instance.id))
+    if reverse:
+        return _task_entity_ids(Q(task__in=pk_set))
+    return _task_entity_ids(Q(task=instance.id))
+
+
+def refresh_entity_access_m2m_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Refresh the access to entities when their members, their tasks
+    or the members of their tasks change"""
+    if action == "pre_clear":
+        # The cleared relations are gone by post_clear
+        instance._entity_access_entity_ids = _get_affected_entity_ids(
+            sender, instance, reverse, None
+        )
+    elif action == "post_clear":
+        refresh_entity_access(instance._entity_access_entity_ids)
+    elif action in ["post_add", "post_remove"]:
+        refresh_entity_access(
+            _get_affected_entity_ids(sender, instance, reverse, pk_set)
+        )
+
+
+def refresh_entity_access_pre_save(sender, instance, **kwargs):
+    """Note the entity's parent before it is saved, as moving it to
+    another parent changes the access to both"""
+    if not instance._state.adding:
+        instance._entity_access_previous_parent_id = (
+            Entity.objects.non_polymorphic()
+            .filter(id=instance.id)
+            .values_list("parent", flat=True)
+            .first()
+        )
+
+
+def refresh_entity_access_post_save(sender, instance, **kwargs):
+    """Refresh the access to the entity, its parents and its children"""
+    entity_ids = _with_relatives([instance.id])
+    previous_parent_id = getattr(instance, "_entity_access_previous_parent_id", None)
+    if previous_parent_id is not None:
+        entity_ids.add(previous_parent_id)
+    refresh_entity_access(entity_ids)
+
+
+def refresh_entity_access_pre_delete(sender, instance, **kwargs):
+    """Note the entities whose access depends on the instance, while its
+    relations still exist (deleting it doesn't send m2m_changed)"""
+    if bulk_deletion_in_progress():
+        # The bulk deletion refreshes the affected entities itself
+        return
+    if isinstance(instance, Entity):
+        instance._entity_access_entity_ids = (
+            [instance.parent_id] if instance.parent_id else []  # type: ignore
+        )
+    else:
+        instance._entity_access_entity_ids = _task_entity_ids(Q(task=instance.id))
+
+
+def refresh_entity_access_post_delete(sender, instance, **kwargs):
+    """Refresh the access to the entities noted before the instance was deleted"""
+    refresh_entity_access(getattr(instance, "_entity_access_entity_ids", []))
+
+
+# The save receivers, which CoreConfig connects to each subclass of their senders
+SAVE_RECEIVERS = [
+    (pre_save, refresh_entity_access_pre_save, (Entity,)),
+    (post_save, refresh_entity_access_post_save, (Entity,)),
+]
+
+for model in [Entity, Task]:
+    # Deleting an entity or task subclass also deletes (and sends
+    # signals for) the underlying Entity or Task row
+    pre_delete.connect(refresh_entity_access_pre_delete, sender=model)
+    post_delete.connect(refresh_entity_access_post_delete, sender=model)
+
+for through_model in [
+    Task.members.through,
+    Task.entities.through,
+    Entity.members.through,
+]:
+    m2m_changed.connect(refresh_entity_access_m2m_changed, sender=through_model)
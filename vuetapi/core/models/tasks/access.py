@@ -0,0 +1,55 @@
+"""Models for which tasks each user can see"""
+
+from enum import IntFlag
+
+from django.conf import settings
+from django.db import models
+
+from core.models.tasks.base import Task
+
+
+class TaskVisibility(IntFlag):
+    """Why a task is shown to a user"""
+
+    MEMBER = 1
+    ENTITY_MEMBER = 2
+    SHARED_APPOINTMENT = 4
+    SHARED_CALENDAR = 8
+    # Shown with its title hidden, as it is from another family
+    # member's calendar which is only shared as busy times
+    BUSY = 16
+
+    # The tasks a user can edit, and message about
+    MEMBERSHIP = MEMBER | ENTITY_MEMBER
+    VISIBLE = MEMBER | ENTITY_MEMBER | SHARED_APPOINTMENT | SHARED_CALENDAR
+
+
+class TaskAccess(models.Model):
+    """A task which a user can see, and why (see `TaskVisibility`).
+
+    This is denormalised from the task's members, its entities' members,
+    the family's category view permissions and shared calendars, and kept
+    up to date by core.models.tasks.access_signals, so that the tasks a
+    user can see can be found with a single join.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="task_accesses",
+        null=False,
+        blank=False,
+    )
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name="accesses",
+        null=False,
+        blank=False,
+    )
+    visibility = models.PositiveSmallIntegerField(null=False, blank=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "task"], name="unique_task_access")
+        ]
@@ -0,0 +1,153 @@
+"""Task access signals
+
+Keep the stored access to tasks (see core.utils.task_access) up to date
+when anything which decides who can see them changes.
+"""
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+
+from core.models.entities.base import Entity
+from core.models.settings.family_visibility import FamilyCategoryViewPermission
+from core.models.tasks.access import TaskAccess
+from core.models.tasks.base import Task
+from core.models.users.user_models import User
+from core.utils.bulk_delete import bulk_deletion_in_progress
+from core.utils.task_access import refresh_task_access
+from external_calendars.models import ICalIntegration
+
+
+def _entity_task_ids(entity_ids):
+    return set(
+        Task.entities.through.objects.filter(entity__in=entity_ids).values_list(
+            "task", flat=True
+        )
+    )
+
+
+def _user_task_ids(user_id):
+    """The tasks the user can see, and the tasks they are a member of
+    (which may be shared with their family)"""
+    return set(
+        TaskAccess.objects.filter(user=user_id).values_list("task", flat=True)
+    ) | set(
+        Task.members.through.objects.filter(member=user_id).values_list(
+            "task", flat=True
+        )
+    )
+
+
+def refresh_task_access_post_save(sender, instance, **kwargs):
+    """Refresh the access to tasks when they, or the integrations
+    and permissions which share them, are saved"""
+    if isinstance(instance, Task):
+        refresh_task_access([instance.id])
+    elif isinstance(instance, ICalIntegration):
+        refresh_task_access(instance.ical_events.values_list("id", flat=True))
+
+
+def refresh_task_access_permission_changed(sender, instance, **kwargs):
+    """The family can see the user's appointments in the categories
+    they have shared (which may have been changed from another one)"""
+    refresh_task_access(
+        Task.objects.filter(type="APPOINTMENT", members=instance.user_id).values_list(
+            "id", flat=True
+        )
+    )
+
+
+def refresh_task_access_m2m_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Refresh the access to tasks when their members or entities,
+    or the members of their entities, change"""
+    if action == "pre_clear":
+        # The cleared relations are gone by post_clear
+        if isinstance(instance, Task):
+            instance._task_access_task_ids = [instance.id]
+        elif isinstance(instance, Entity):
+            instance._task_access_task_ids = _entity_task_ids([instance.id])
+        else:
+            instance._task_access_task_ids = _user_task_ids(instance.id)
+        return
+    if action == "post_clear":
+        refresh_task_access(instance._task_access_task_ids)
+        return
+    if action not in ["post_add", "post_remove"]:
+        return
+
+    if sender == Entity.members.through:
+        refresh_task_access(_entity_task_ids(pk_set if reverse else [instance.id]))
+    elif reverse:
+        refresh_task_access(pk_set)
+    else:
+        refresh_task_access([instance.id])
+
+
+def refresh_task_access_user_post_save(sender, instance, **kwargs):
+    """Refresh the tasks shared with or by the user when they change family"""
+    # Noted by core.models.users.signals
+    if not getattr(instance, "_family_changed", False):
+        return
+    refresh_task_access(
+        _user_task_ids(instance.id)
+        | set(
+            Task.objects.filter(
+                type__in=["APPOINTMENT", "ICAL_EVENT"],
+                members__family=instance.family_id,
+            ).values_list("id", flat=True)
+        )
+    )
+
+
+def refresh_task_access_pre_delete(sender, instance, **kwargs):
+    """Note the tasks whose access depends on the instance, while its
+    relations still exist (deleting it doesn't send m2m_changed)"""
+    if bulk_deletion_in_progress():
+        # The bulk deletion refreshes the tasks of all of the entities
+        return
+    if isinstance(instance, Entity):
+        instance._task_access_task_ids = _entity_task_ids([instance.id])
+    elif isinstance(instance, User):
+        instance._task_access_task_ids = set(
+            Task.members.through.objects.filter(member=instance.id).values_list(
+                "task", flat=True
+            )
+        )
+
+
+def refresh_task_access_post_delete(sender, instance, **kwargs):
+    """Refresh the access to the tasks noted before the instance was deleted"""
+    refresh_task_access(getattr(instance, "_task_access_task_ids", []))
+
+
+# The save receivers, which CoreConfig connects to each subclass of their senders
+SAVE_RECEIVERS = [
+    (post_save, refresh_task_access_post_save, (Task, ICalIntegration)),
+]
+
+for model in [Entity, User]:
+    # Deleting an entity subclass also deletes (and sends
+    # signals for) the underlying Entity row
+    pre_delete.connect(refresh_task_access_pre_delete, sender=model)
+    post_delete.connect(refresh_task_access_post_delete, sender=model)
+
+post_save.connect(
+    refresh_task_access_permission_changed, sender=FamilyCategoryViewPermission
+)
+post_delete.connect(
+    refresh_task_access_permission_changed, sender=FamilyCategoryViewPermission
+)
+
+post_save.connect(refresh_task_access_user_post_save, sender=User)
+
+for through_model in [
+    Task.members.through,
+    Task.entities.through,
+    Entity.members.through,
+]:
+    m2m_changed.connect(refresh_task_access_m2m_changed, sender=through_model)
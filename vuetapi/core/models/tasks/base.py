@@ -282,6 +282,15 @@ class TaskReminder(models.Model):
         help_text="The time before a task at which the action needs to be taken",
         default=timedelta(days=1),
     )
+    next_fire_time = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="""
+            When the reminder is next due, for the next occurrence of the task.
+            Null if the task has no more occurrences to remind about.
+        """,
+    )
 
     def __str__(self):
         return f"REMINDER - {self.task.title}"
@@ -0,0 +1,26 @@
+"""Models for caching the output of the scheduling engine"""
+
+import uuid
+
+from django.db import models
+
+from core.models.users.user_models import Family
+
+
+class ScheduledTaskCacheVersion(models.Model):
+    """The current version of the cached schedule for a family.
+
+    Cached schedules are keyed on this version, so replacing it with
+    a new one invalidates every cached schedule for the family. This
+    is stored in the database (rather than the cache itself) so that
+    all of the API processes see an invalidation straight away.
+    """
+
+    family = models.OneToOneField(
+        Family,
+        on_delete=models.CASCADE,
+        related_name="scheduled_task_cache_version",
+        null=False,
+        blank=False,
+    )
+    version = models.UUIDField(null=False, blank=False, default=uuid.uuid4)
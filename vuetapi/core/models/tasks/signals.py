@@ -0,0 +1,265 @@
+"""Task model signals"""
+
+from typing import Iterable, List, Optional
+
+from django.db.models import Model, Q
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+
+from core.models.entities.base import Entity
+from core.models.entities.education import SchoolBreak, SchoolTerm, SchoolYear
+from core.models.routines.routines import Routine
+from core.models.settings.blocked_days import BlockedCategory
+from core.models.settings.family_visibility import FamilyCategoryViewPermission
+from core.models.settings.preferred_days import PreferredDays
+from core.models.task_completion_forms.base import TaskCompletionForm
+from core.models.tasks.base import (
+    Recurrence,
+    RecurrentTaskOverwrite,
+    Task,
+    TaskAction,
+    TaskActionCompletionForm,
+    TaskReminder,
+)
+from core.models.tasks.task_limits import TaskLimit
+from core.models.users.user_models import User
+from core.utils.bulk_delete import bulk_deletion_in_progress
+from core.utils.reminders import update_next_fire_times, update_task_next_fire_times
+from core.utils.scheduling.cache import (
+    invalidate_families,
+    invalidate_users,
+    invalidation_is_deferred,
+)
+from external_calendars.models import ICalIntegration
+
+# Models with a `user` field whose changes only affect that user's schedule
+USER_SETTINGS_MODELS = (
+    BlockedCategory,
+    FamilyCategoryViewPermission,
+    ICalIntegration,
+    PreferredDays,
+    TaskLimit,
+)
+
+
+def _task_users(task_ids: Iterable[int]) -> Q:
+    return Q(tasks__in=task_ids) | Q(entities__tasks__in=task_ids)
+
+
+def _entity_users(entity_ids: Iterable[int]) -> Q:
+    return (
+        Q(entities__in=entity_ids)
+        | Q(owned_entities__in=entity_ids)
+        | Q(tasks__entities__in=entity_ids)
+    )
+
+
+def _routine_users(routine_ids: Iterable[int]) -> Q:
+    return Q(routines__in=routine_ids) | Q(tasks__routine__in=routine_ids)
+
+
+def _get_affected_users(instance: Model) -> Optional[Q]:
+    """Get a filter for the users whose schedules may be changed
+    by a change to the instance provided"""
+    if isinstance(instance, Task):
+        return _task_users([instance.id])
+    if isinstance(instance, (Recurrence, TaskAction, TaskCompletionForm)):
+        return _task_users([instance.task_id])  # type: ignore
+    if isinstance(instance, RecurrentTaskOverwrite):
+        return _task_users(
+            Task.objects.filter(recurrence=instance.recurrence_id).values("id")  # type: ignore
+        )
+    if isinstance(instance, TaskActionCompletionForm):
+        return _task_users(
+            Task.objects.filter(actions=instance.action_id).values("id")  # type: ignore
+        )
+    if isinstance(instance, Entity):
+        return _entity_users([instance.id])
+    if isinstance(instance, SchoolYear):
+        return _entity_users([instance.school_id])  # type: ignore
+    if isinstance(instance, (SchoolTerm, SchoolBreak)):
+        return _entity_users(
+            SchoolYear.objects.filter(id=instance.school_year_id).values("school")  # type: ignore
+        )
+    if isinstance(instance, Routine):
+        return _routine_users([instance.id])
+    if isinstance(instance, USER_SETTINGS_MODELS) and hasattr(instance, "user_id"):
+        return Q(id=instance.user_id)
+    if isinstance(instance, User):
+        return Q(id=instance.id)
+
+    return None
+
+
+def _get_changed_task_ids(instance: Model) -> Optional[List[int]]:
+    """Get the IDs of the tasks changed by a change to the instance provided,
+    or None if the change affects more than the tasks themselves"""
+    if isinstance(instance, Task):
+        return [instance.id]
+    if isinstance(instance, (Recurrence, TaskAction, TaskCompletionForm)):
+        return [instance.task_id]  # type: ignore
+    if isinstance(instance, RecurrentTaskOverwrite):
+        return list(
+            Task.objects.filter(recurrence=instance.recurrence_id).values_list(  # type: ignore
+                "id", flat=True
+            )
+        )
+    if isinstance(instance, TaskActionCompletionForm):
+        return list(
+            Task.objects.filter(actions=instance.action_id).values_list(  # type: ignore
+                "id", flat=True
+            )
+        )
+
+    return None
+
+
+def invalidate_scheduled_tasks_post_save(sender, instance, update_fields, **kwargs):
+    """When anything used by the scheduling engine is saved
+    we should invalidate the affected cached schedules"""
+    # Noted by core.models.users.signals
+    previous_family_id = getattr(instance, "_previous_family_id", None)
+    if previous_family_id:
+        # The user's tasks are no longer scheduled for their previous
+        # family (which invalidating the user below doesn't reach)
+        invalidate_families([previous_family_id])
+
+    if invalidation_is_deferred():
+        return
+
+    if isinstance(instance, User) and update_fields == frozenset(["last_login"]):
+        return
+
+    affected_users = _get_affected_users(instance)
+    if affected_users:
+        invalidate_users(affected_users, _get_changed_task_ids(instance))
+
+
+def invalidate_scheduled_tasks_pre_delete(sender, instance, **kwargs):
+    """Invalidate the affected cached schedules before deleting anything
+    used by the scheduling engine, while its relations still exist"""
+    if invalidation_is_deferred():
+        return
+
+    affected_users = _get_affected_users(instance)
+    if affected_users:
+        invalidate_users(affected_users, _get_changed_task_ids(instance))
+
+
+def invalidate_scheduled_tasks_m2m_changed(
+    sender, instance, action, reverse, model, pk_set, **kwargs
+):
+    """Invalidate the affected cached schedules when task,
+    entity or routine memberships change"""
+    if invalidation_is_deferred() or action not in [
+        "post_add",
+        "post_remove",
+        "pre_clear",
+    ]:
+        return
+
+    affected_users = _get_affected_users(instance)
+    if pk_set:
+        if model == User:
+            related_users = Q(id__in=pk_set)
+        elif issubclass(model, Task):
+            related_users = _task_users(pk_set)
+        elif issubclass(model, Entity):
+            related_users = _entity_users(pk_set)
+        else:
+            related_users = _routine_users(pk_set)
+
+        affected_users = (
+            (affected_users | related_users) if affected_users else related_users
+        )
+
+    # The members and entities of tasks only change the tasks themselves
+    changed_task_ids = None
+    if sender in [Task.members.through, Task.entities.through]:
+        if not reverse:
+            changed_task_ids = [instance.id]
+        elif pk_set:
+            changed_task_ids = list(pk_set)
+
+    if affected_users:
+        invalidate_users(affected_users, changed_task_ids)
+
+
+# The models used by the scheduling engine
+SCHEDULING_MODELS = (
+    Task,
+    Recurrence,
+    RecurrentTaskOverwrite,
+    TaskAction,
+    TaskCompletionForm,
+    TaskActionCompletionForm,
+    Entity,
+    SchoolYear,
+    SchoolTerm,
+    SchoolBreak,
+    Routine,
+    User,
+    *USER_SETTINGS_MODELS,
+)
+
+# The save receivers, which CoreConfig connects to each subclass of their senders
+SAVE_RECEIVERS = [
+    (post_save, invalidate_scheduled_tasks_post_save, SCHEDULING_MODELS),
+]
+
+for model in [
+    *SCHEDULING_MODELS,
+    *BlockedCategory.__subclasses__(),
+]:
+    # Deleting a task or entity subclass also deletes (and sends
+    # signals for) the underlying Task or Entity row
+    pre_delete.connect(invalidate_scheduled_tasks_pre_delete, sender=model)
+
+for through_model in [
+    Task.members.through,
+    Task.entities.through,
+    Entity.members.through,
+    Routine.members.through,
+]:
+    m2m_changed.connect(invalidate_scheduled_tasks_m2m_changed, sender=through_model)
+
+
+def update_reminder_fire_times_post_save(sender, instance, created, **kwargs):
+    """Keep the next fire times of reminders up to date with their tasks"""
+    if isinstance(instance, TaskReminder):
+        update_next_fire_times([instance.id])
+    elif isinstance(instance, Task) and not created:
+        update_task_next_fire_times([instance.id])
+    elif isinstance(instance, (Recurrence, RecurrentTaskOverwrite)):
+        update_reminder_fire_times_post_delete(sender, instance)
+
+
+def update_reminder_fire_times_post_delete(sender, instance, **kwargs):
+    """Update the next fire times of the reminders for a task when its
+    recurrence or overwritten occurrences change"""
+    if bulk_deletion_in_progress():
+        # The bulk deletion updates the tasks which aren't deleted itself
+        return
+    if isinstance(instance, Recurrence):
+        update_task_next_fire_times([instance.task_id])  # type: ignore
+    elif isinstance(instance, RecurrentTaskOverwrite):
+        update_task_next_fire_times(
+            Task.objects.filter(recurrence=instance.recurrence_id).values_list(  # type: ignore
+                "id", flat=True
+            )
+        )
+
+
+SAVE_RECEIVERS.append(
+    (
+        post_save,
+        update_reminder_fire_times_post_save,
+        (TaskReminder, Task, Recurrence, RecurrentTaskOverwrite),
+    )
+)
+for model in [Recurrence, RecurrentTaskOverwrite]:
+    post_delete.connect(update_reminder_fire_times_post_delete, sender=model)
@@ -2,12 +2,14 @@
 
 import logging
 
-from django.conf import settings
-from django.db.models.signals import post_save
-from twilio.rest import Client
+from django.db.models.signals import post_save, pre_save
 
-from notifications.utils.send_notification import send_push_message_if_valid
-from utils.email_client import EmailClient
+from notifications.utils.outbound_jobs import (
+    email_job,
+    enqueue_jobs,
+    push_job,
+    sms_job,
+)
 
 from .user_models import User, UserInvite
 
@@ -18,6 +20,8 @@ def user_invite_post_save(sender, instance, created, **kwargs):
     """When a UserInvite object is created we should send an SMS
     to the associated phone number. Existing users should receive
     a push notification.
+
+    The messages are queued to be sent by the outbound job worker.
     """
     if created:
         invite_type = "family" if instance.family else "circle"
@@ -34,54 +38,85 @@ def user_invite_post_save(sender, instance, created, **kwargs):
             f"{instance.invitee.first_name} {instance.invitee.last_name}"
         )
 
-        sms_client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        email_client = EmailClient()
-        if existing_users.exists():
-            existing_user = existing_users[0]
-
+        idempotency_key = f"user-invite-{instance.id}"
+        jobs = []
+        existing_user = existing_users.first()
+        if existing_user:
             if is_email:
-                email_client.send_email(
-                    "You have been invited to a family",
-                    "family-invite-existing.html",
-                    instance.email,
-                    plaintext_template="family-invite-existing.txt",
-                    data={
-                        "inviter_name": invitee_full_name,
-                        "invitee_name": existing_user.first_name,
-                    },
+                jobs.append(
+                    email_job(
+                        instance.email,
+                        "You have been invited to a family",
+                        "family-invite-existing.html",
+                        plaintext_template="family-invite-existing.txt",
+                        data={
+                            "inviter_name": invitee_full_name,
+                            "invitee_name": existing_user.first_name,
+                        },
+                        idempotency_key=f"{idempotency_key}-email",
+                    )
                 )
             else:
-                sms_client.messages.create(
-                    to=str(instance.phone_number),
-                    from_=settings.TWILIO_FROM_NUMBER,
-                    body=f"Hello {existing_user.first_name}!\n\n{invitee_full_name} has invited you to their Vuet {invite_type}.\nLog in to your account now to join them!",
+                jobs.append(
+                    sms_job(
+                        str(instance.phone_number),
+                        f"Hello {existing_user.first_name}!\n\n{invitee_full_name} has invited you to their Vuet {invite_type}.\nLog in to your account now to join them!",
+                        idempotency_key=f"{idempotency_key}-sms",
+                    )
                 )
 
-            tokens = existing_user.push_tokens.all()
-            for token in tokens:
-                message = (
-                    f"{invitee_full_name} has added you to their family!"
-                    if invite_type == "family"
-                    else f"{invitee_full_name} has added you to their Vuet circle!"
+            message = (
+                f"{invitee_full_name} has added you to their family!"
+                if invite_type == "family"
+                else f"{invitee_full_name} has added you to their Vuet circle!"
+            )
+            jobs.append(
+                push_job(
+                    existing_user.id,
+                    message,
+                    idempotency_key=f"{idempotency_key}-push",
                 )
-                send_push_message_if_valid(token, message)
+            )
         else:
             if is_email:
-                email_client.send_email(
-                    "You have been invited to join Vuet",
-                    "family-invite-new.html",
-                    instance.email,
-                    plaintext_template="family-invite-new.txt",
-                    data={
-                        "inviter_name": invitee_full_name,
-                    },
+                jobs.append(
+                    email_job(
+                        instance.email,
+                        "You have been invited to join Vuet",
+                        "family-invite-new.html",
+                        plaintext_template="family-invite-new.txt",
+                        data={
+                            "inviter_name": invitee_full_name,
+                        },
+                        idempotency_key=f"{idempotency_key}-email",
+                    )
                 )
             else:
-                sms_client.messages.create(
-                    to=str(instance.phone_number),
-                    from_=settings.TWILIO_FROM_NUMBER,
-                    body=f"Hello {instance.first_name}!\n\n{invitee_full_name} has invited you to their Vuet {invite_type}.\n\nDownload the app from the app store now and sign up with the phone number ending {str(instance.phone_number)[-4:]} to join them!",
+                jobs.append(
+                    sms_job(
+                        str(instance.phone_number),
+                        f"Hello {instance.first_name}!\n\n{invitee_full_name} has invited you to their Vuet {invite_type}.\n\nDownload the app from the app store now and sign up with the phone number ending {str(instance.phone_number)[-4:]} to join them!",
+                        idempotency_key=f"{idempotency_key}-sms",
+                    )
                 )
 
+        enqueue_jobs(jobs)
+
+
+def user_family_pre_save(sender, instance, update_fields, **kwargs):
+    """Note whether the user is changing family, and the family they are
+    leaving, for the post_save receivers which depend on the family"""
+    instance._family_changed = False
+    instance._previous_family_id = None
+    if instance._state.adding or (update_fields and "family" not in update_fields):
+        return
+    previous_family_id = (
+        User.objects.filter(id=instance.id).values_list("family", flat=True).first()
+    )
+    if previous_family_id != instance.family_id:
+        instance._family_changed = True
+        instance._previous_family_id = previous_family_id
+
 
 post_save.connect(user_invite_post_save, sender=UserInvite)
+pre_save.connect(user_family_pre_save, sender=User)
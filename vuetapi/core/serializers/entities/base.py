@@ -1,6 +1,6 @@
 """Base entity serializers"""
 import logging
-from typing import cast
+from typing import Optional, cast
 
 from django.contrib.auth import get_user_model
 from django.db.models import Q
@@ -23,6 +23,7 @@ from core.models.entities.base import (
 )
 from core.models.users.user_models import User
 from core.serializers.mixins.members import WithMembersSerializerMixin
+from core.utils.read_plans import ENTITY_READ_PLAN, EntityReadPlan
 
 logger = logging.getLogger(__name__)
 
@@ -48,15 +49,31 @@ class EntityBaseSerializer(WithMembersSerializerMixin, ModelSerializer):
         model = Entity
         fields = "__all__"
 
+    def _get_read_plan(self, instance) -> Optional[EntityReadPlan]:
+        """Get the relations loaded up front for the entity, if it is
+        being listed (see core.utils.read_plans)"""
+        read_plan = self.context.get(ENTITY_READ_PLAN, None)
+        if read_plan and instance.id in read_plan.entity_ids:
+            return read_plan
+        return None
+
     def get_child_entities(self, instance):
         """Get the child entities for an entity"""
+        read_plan = self._get_read_plan(instance)
+        if read_plan:
+            return list(read_plan.child_entity_ids[instance.id])
+
         child_entities = instance.child_entities.order_by("id")
         return [entity.id for entity in child_entities]
 
     def get_parent_name(self, instance):
         """Get the name of the parent entity if it exists"""
-        if not instance.parent:
+        if not instance.parent_id:
             return None
+
+        read_plan = self._get_read_plan(instance)
+        if read_plan:
+            return read_plan.parent_names[instance.parent_id]
         return instance.parent.name
 
     @property
@@ -128,6 +145,10 @@ class ProfessionalEntitySerializer(EntityBaseSerializer):
 
     def get_professional_category(self, instance):
         """Get the professional category for the current user for this entity"""
+        read_plan = self._get_read_plan(instance)
+        if read_plan:
+            return read_plan.professional_category_ids.get(instance.id, None)
+
         mappings = ProfessionalEntityCategoryMapping.objects.filter(
             user=self._user, entity=instance
         )
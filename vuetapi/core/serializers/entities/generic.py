@@ -61,6 +61,8 @@ from core.serializers.entities.pets import (
     VetSerializer,
     WalkerSerializer,
 )
+from core.serializers.read_plans import PlannedListSerializer
+from core.utils.read_plans import ENTITY_READ_PLAN, plan_entity_reads
 
 from .base import EntityBaseSerializer, ProfessionalEntitySerializer
 from .career import CareerGoalSerializer, DaysOffSerializer, EmployeeSerializer
@@ -138,3 +140,11 @@ class EntitySerializer(PolymorphicSerializer):
 
     class Meta:
         ref_name = "EntityPolymorphicSerializer"
+        list_serializer_class = PlannedListSerializer
+
+    def plan_reads(self, entities):
+        """Load the relations of the entities being listed up front"""
+        request = self.context.get("request", None)
+        self.context[ENTITY_READ_PLAN] = plan_entity_reads(
+            entities, request.user if request else None
+        )
@@ -5,7 +5,9 @@ import logging
 from django.db.models import Q
 from rest_framework.serializers import ValidationError
 
+from core.models.entities.access import EntityAccessKind
 from core.models.entities.base import Entity
+from core.utils.entity_access import accessible_entity_ids
 
 logger = logging.getLogger(__name__)
 
@@ -24,18 +26,21 @@ class WithEntitiesSerializerMixin:
         """validate_entities"""
 
         if value:
+            # The entities provided which the user can tag tasks with,
+            # or which the instance is already tagged with
             instance = getattr(self, "instance")
-            current_entities = list(instance.entities.all()) if instance else []
-            user_member_entities = list(
-                Entity.objects.filter(
-                    Q(owner=self._user)
-                    | Q(members=self._user)
-                    | Q(parent__owner=self._user)
-                    | Q(parent__members=self._user)
-                ).distinct()
+            permitted = Q(
+                id__in=accessible_entity_ids(self._user, EntityAccessKind.TAGGABLE)
+            )
+            if instance:
+                permitted |= Q(id__in=instance.entities.values("id"))
+            permitted_ids = set(
+                Entity.objects.filter(id__in=[entity.id for entity in value])
+                .filter(permitted)
+                .values_list("id", flat=True)
             )
             for entity in value:
-                if not entity in user_member_entities + current_entities:
+                if entity.id not in permitted_ids:
                     raise ValidationError(
                         {
                             "message": f"User does not have permissions to tag entity with id {entity.id}",
@@ -0,0 +1,19 @@
+"""Serializers for lists of polymorphic objects"""
+
+from django.db.models import Manager, QuerySet
+from rest_framework.serializers import ListSerializer
+
+from core.utils.read_plans import load_objects
+
+
+class PlannedListSerializer(ListSerializer):
+    """Serializes a list of objects, first loading the relations of all
+    of them which the child serializer reads with its `plan_reads`
+    (see core.utils.read_plans)"""
+
+    def to_representation(self, data):
+        if isinstance(data, Manager):
+            data = data.all()
+        objects = load_objects(data) if isinstance(data, QuerySet) else list(data)
+        self.child.plan_reads(objects)
+        return super().to_representation(objects)
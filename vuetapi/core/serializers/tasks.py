@@ -1,7 +1,7 @@
 """task serializers"""
 
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import cast
 
 from django.forms.models import model_to_dict
@@ -40,7 +40,9 @@ from core.models.tasks.holidays import HolidayTask
 from core.models.tasks.travel import AccommodationTask, TransportTask
 from core.models.users.user_models import User
 from core.serializers.mixins.task_entities import WithEntitiesSerializerMixin
-from core.utils.scheduling.scheduler import SchedulingEngine
+from core.serializers.read_plans import PlannedListSerializer
+from core.utils.read_plans import plan_task_reads
+from core.utils.scheduling.scheduler import SchedulingEngine, ensure_date
 from external_calendars.models import ICalEvent
 
 from .mixins.members import WithMembersSerializerMixin
@@ -75,7 +77,7 @@ class TaskReminderSerializer(ModelSerializer):
 
     class Meta:
         model = TaskReminder
-        fields = "__all__"
+        exclude = ["next_fire_time"]
 
 
 class TaskActionSerializer(ModelSerializer):
@@ -116,12 +118,42 @@ class TaskBaseSerializer(
         model = Task
         fields = "__all__"
 
+    def _get_alert_engine(self, validated_data, task: Task) -> SchedulingEngine:
+        """Get a scheduling engine for checking the alerts on the dates
+        of the task and its actions"""
+        dates = [
+            ensure_date(value)
+            for value in [
+                validated_data.get(field)
+                for field in [
+                    "start_datetime",
+                    "end_datetime",
+                    "start_date",
+                    "end_date",
+                    "date",
+                ]
+            ]
+            if value
+        ]
+        if not dates:
+            return SchedulingEngine(self._user)
+
+        # Allowing a day either side for actions which aren't a whole number of days
+        action_timedeltas = [action.action_timedelta for action in task.actions.all()]
+        start_date = min(dates) - timedelta(days=1)
+        end_date = max(dates) + timedelta(days=1)
+        return SchedulingEngine.for_dates(
+            self._user,
+            min([start_date] + [start_date - delta for delta in action_timedeltas]),
+            max([end_date] + [end_date - delta for delta in action_timedeltas]),
+        )
+
     def create_alerts(self, validated_data, task: Task):
         """Create alerts for the task and validated data provided"""
         categories = list(set([e.category for e in task.entities.all()]))
 
-        # Initialize the scheduling engine
-        engine = SchedulingEngine(self._user)
+        # Initialize the scheduling engine for the dates of the task
+        engine = self._get_alert_engine(validated_data, task)
 
         # Schedule existing tasks
         engine.schedule_tasks()
@@ -539,16 +571,24 @@ class FlexibleFixedTaskSerializer(TaskBaseSerializer):
         members = [m.id for m in validated_data["members"]]
         routine = validated_data.get("routine", None)
 
-        # Initialize the scheduling engine
-        engine = SchedulingEngine(self._user)
+        earliest_action_date = validated_data.pop("earliest_action_date")
+        due_date = validated_data.pop("due_date")
+        duration = validated_data.pop("duration")
+
+        # Initialize the scheduling engine for the dates the task can be placed on
+        engine = SchedulingEngine.for_dates(
+            self._user,
+            earliest_action_date,
+            due_date + timedelta(days=duration // (24 * 60) + 1),
+        )
 
         # Schedule existing tasks
         engine.schedule_tasks()
 
         task_placement = engine.get_task_placement(
-            validated_data.pop("earliest_action_date"),
-            validated_data.pop("due_date"),
-            validated_data.pop("duration"),
+            earliest_action_date,
+            due_date,
+            duration,
             categories,
             validated_data["members"],
             routine,
@@ -589,7 +629,8 @@ class ICalEventSerializer(FixedTaskSerializer):
 
     def get_title(self, instance):
         """get_title"""
-        if (instance.ical_integration.user == self._user) or (
+        user_id = self._user.id if self._user else None
+        if (instance.ical_integration.user_id == user_id) or (
             instance.ical_integration.share_type == "FULL"
         ):
             return instance.title
@@ -615,6 +656,11 @@ class TaskSerializer(PolymorphicSerializer):
 
     class Meta:
         ref_name = "TaskPolymorphicSerializer"
+        list_serializer_class = PlannedListSerializer
+
+    def plan_reads(self, tasks):
+        """Load the relations of the tasks being listed up front"""
+        plan_task_reads(tasks)
 
 
 class RecurrentTaskOverwriteSerializer(ModelSerializer):
@@ -691,6 +737,9 @@ class RecurrentTaskOverwriteSerializer(ModelSerializer):
 class ScheduledTaskSerializer(Serializer):
     """Used to serialize tasks that have been placed
     at a specific start and end time.
+
+    Reads the ScheduledTask records produced by the scheduling engine,
+    whose per-task fields are looked up on their shared TaskDetails.
     """
 
     id = IntegerField(read_only=True)
@@ -0,0 +1,221 @@
+"""Tests for syncing the changes to tasks and entities"""
+
+import datetime as dt
+import io
+
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models.changes.change_log import ChangeLogEntry
+from core.models.entities.base import Entity
+from core.models.tasks.base import Task, TaskReminder
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+from core.utils.change_log import log_changes_after, prune_change_log
+from core.views.change_views import changes
+from external_calendars.models import ICalIntegration
+from external_calendars.utils.ical_stream import iter_components
+
+
+@override_settings(CHANGE_LOG_SETTLE_TIME=0)
+class TestChangesView(TestCase):
+    """Tests for the changes view"""
+
+    def setUp(self):
+        family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456789", family=family
+        )
+        self.family_member = User.objects.create(
+            username="family@test.test", phone_number="+447123456780", family=family
+        )
+        self.other_user = User.objects.create(
+            username="other@test.test", phone_number="+447123456781"
+        )
+
+        self.entity = Entity.objects.create(
+            name="Car", owner=self.user, category=Categories.TRANSPORT.value
+        )
+        self.entity.members.set([self.user, self.family_member])
+        self.tasks = [self.create_task(f"Task {i}", [self.user]) for i in range(3)]
+
+    def create_task(self, title: str, members) -> Task:
+        """create_task"""
+        task = Task.objects.create(title=title)
+        task.members.set(members)
+        return task
+
+    def get_changes(self, cursor=None, user=None):
+        """get_changes"""
+        request = APIRequestFactory().get(
+            "", {"cursor": cursor} if cursor is not None else {}
+        )
+        force_authenticate(request, user or self.user)
+        res = changes(request)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_reset(self):
+        """test_reset"""
+        data = self.get_changes()
+        self.assertTrue(data["reset"])
+        self.assertEqual(
+            sorted(task["title"] for task in data["tasks"]),
+            ["Task 0", "Task 1", "Task 2"],
+        )
+        self.assertEqual([entity["name"] for entity in data["entities"]], ["Car"])
+
+        # Nothing has changed since
+        data = self.get_changes(data["cursor"])
+        self.assertFalse(data["reset"])
+        self.assertEqual(
+            (data["tasks"], data["deleted_tasks"], data["entities"]), ([], [], [])
+        )
+
+    def test_changed_tasks(self):
+        """test_changed_tasks"""
+        cursor = self.get_changes()["cursor"]
+
+        new_task = self.create_task("New task", [self.user])
+        self.tasks[0].title = "Renamed"
+        self.tasks[0].save()
+        TaskReminder.objects.create(task=self.tasks[1], timedelta=dt.timedelta(days=1))
+        deleted_task_id = self.tasks[2].id
+        self.tasks[2].delete()
+        # Changes which the user can't see aren't logged for them
+        self.create_task("Other task", [self.other_user])
+
+        data = self.get_changes(cursor)
+        self.assertEqual(
+            sorted(task["title"] for task in data["tasks"]),
+            ["New task", "Renamed", "Task 1"],
+        )
+        self.assertEqual(
+            [task["reminders"] for task in data["tasks"] if task["id"] == new_task.id],
+            [[]],
+        )
+        self.assertEqual(data["deleted_tasks"], [deleted_task_id])
+        self.assertGreater(data["cursor"], cursor)
+
+        data = self.get_changes(data["cursor"])
+        self.assertEqual((data["tasks"], data["deleted_tasks"]), ([], []))
+
+    def test_removed_members(self):
+        """test_removed_members"""
+        self.tasks[0].members.add(self.family_member)
+        cursor = self.get_changes(user=self.family_member)["cursor"]
+
+        self.tasks[0].members.remove(self.family_member)
+        self.entity.members.remove(self.family_member)
+        data = self.get_changes(cursor, user=self.family_member)
+        self.assertEqual(data["deleted_tasks"], [self.tasks[0].id])
+        self.assertEqual(data["deleted_entities"], [self.entity.id])
+
+    def test_tasks_shared_through_entities(self):
+        """test_tasks_shared_through_entities"""
+        cursor = self.get_changes(user=self.family_member)["cursor"]
+
+        self.tasks[0].entities.add(self.entity)
+        data = self.get_changes(cursor, user=self.family_member)
+        self.assertEqual([task["title"] for task in data["tasks"]], ["Task 0"])
+
+        entity_id = self.entity.id
+        self.entity.delete()
+        data = self.get_changes(data["cursor"], user=self.family_member)
+        self.assertEqual(data["deleted_tasks"], [self.tasks[0].id])
+        self.assertEqual(data["deleted_entities"], [entity_id])
+
+    @override_settings(CHANGE_LOG_SETTLE_TIME=60)
+    def test_unsettled_changes_are_sent_again(self):
+        """test_unsettled_changes_are_sent_again"""
+        ChangeLogEntry.objects.update(created_at=timezone.now() - dt.timedelta(hours=1))
+        cursor = self.get_changes()["cursor"]
+
+        self.tasks[0].save()
+        for _ in range(2):
+            data = self.get_changes(cursor)
+            self.assertEqual([task["id"] for task in data["tasks"]], [self.tasks[0].id])
+            self.assertEqual(data["cursor"], cursor)
+
+    @override_settings(CHANGE_LOG_PAGE_SIZE=2)
+    def test_pages(self):
+        """test_pages"""
+        cursor = self.get_changes()["cursor"]
+        for task in self.tasks:
+            task.save()
+
+        data = self.get_changes(cursor)
+        self.assertTrue(data["more"])
+        self.assertEqual(len(data["tasks"]), 2)
+
+        data = self.get_changes(data["cursor"])
+        self.assertFalse(data["more"])
+        self.assertEqual(len(data["tasks"]), 1)
+
+    def test_stale_cursors(self):
+        """test_stale_cursors"""
+        cursor = self.get_changes()["cursor"]
+        for task in self.tasks:
+            task.save()
+        ChangeLogEntry.objects.update(created_at=timezone.now() - dt.timedelta(days=31))
+
+        prune_change_log()
+        self.assertEqual(ChangeLogEntry.objects.count(), 1)
+        data = self.get_changes(cursor)
+        self.assertTrue(data["reset"])
+        self.assertEqual(len(data["tasks"]), 3)
+
+    def test_invalid_cursor(self):
+        """test_invalid_cursor"""
+        request = APIRequestFactory().get("", {"cursor": "abc"})
+        force_authenticate(request, self.user)
+        self.assertEqual(changes(request).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ical_events(self):
+        """test_ical_events"""
+        cursor = self.get_changes(user=self.family_member)["cursor"]
+
+        integration = ICalIntegration.objects.create(user=self.user, share_type="FULL")
+        feed = io.BytesIO(
+            b"BEGIN:VCALENDAR\r\n"
+            b"BEGIN:VEVENT\r\nUID:1\r\nSUMMARY:Event\r\n"
+            b"DTSTART:20230102T090000Z\r\nDTEND:20230102T100000Z\r\nEND:VEVENT\r\n"
+            b"END:VCALENDAR\r\n"
+        )
+        with log_changes_after(Q(id=self.user.id)):
+            # pylint: disable=protected-access
+            integration._update_ical_events(iter_components(feed))
+
+        # The events are shared with the family
+        data = self.get_changes(cursor, user=self.family_member)
+        self.assertEqual([task["title"] for task in data["tasks"]], ["Event"])
+
+    def test_joining_and_leaving_a_family(self):
+        """test_joining_and_leaving_a_family"""
+        integration = ICalIntegration.objects.create(user=self.user, share_type="FULL")
+        feed = io.BytesIO(
+            b"BEGIN:VCALENDAR\r\n"
+            b"BEGIN:VEVENT\r\nUID:1\r\nSUMMARY:Event\r\n"
+            b"DTSTART:20230102T090000Z\r\nDTEND:20230102T100000Z\r\nEND:VEVENT\r\n"
+            b"END:VCALENDAR\r\n"
+        )
+        with log_changes_after(Q(id=self.user.id)):
+            # pylint: disable=protected-access
+            integration._update_ical_events(iter_components(feed))
+        event_id = integration.ical_events.get().id
+        cursor = self.get_changes(user=self.other_user)["cursor"]
+
+        # The family's shared events are sent to users who join it
+        self.other_user.family = self.user.family
+        self.other_user.save()
+        data = self.get_changes(cursor, user=self.other_user)
+        self.assertEqual([task["title"] for task in data["tasks"]], ["Event"])
+
+        # And deleted for users who leave it
+        self.other_user.family = None
+        self.other_user.save()
+        data = self.get_changes(data["cursor"], user=self.other_user)
+        self.assertEqual(data["deleted_tasks"], [event_id])
@@ -217,7 +217,8 @@ class TestEntityViewSet(BaseTestCase):
             content_type="application/json",
         )
 
-        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual({result["status"] for result in res.json()}, {"deleted"})
 
         # Ensure that these entities don't exist
         for id in [ent["id"] for ent in create_res.json()]:
@@ -0,0 +1,118 @@
+"""Tests for keeping the stored access to entities up to date"""
+
+from django.test import TestCase
+
+from core.models.entities.access import EntityAccess, EntityAccessKind
+from core.models.entities.base import Entity
+from core.models.tasks.base import Task
+from core.models.users.user_models import User
+from core.utils.categories import Categories
+from core.utils.entity_access import compute_entity_access
+
+
+class TestEntityAccess(TestCase):
+    """Tests for the EntityAccess table"""
+
+    def setUp(self):
+        self.owner = User.objects.create(
+            username="owner@test.test", phone_number="+447123456789"
+        )
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456780"
+        )
+        self.parent = Entity.objects.create(
+            name="School", owner=self.owner, category=Categories.EDUCATION.value
+        )
+        self.child = Entity.objects.create(
+            name="Class", owner=self.owner, category=Categories.EDUCATION.value
+        )
+
+    def get_access(self, entity):
+        """Get the stored access to the entity for each user"""
+        return dict(
+            EntityAccess.objects.filter(entity=entity).values_list("user", "access")
+        )
+
+    def assert_access_is_current(self):
+        """The stored access matches the access worked out from scratch"""
+        self.assertEqual(
+            set(EntityAccess.objects.values_list("user", "entity", "access")),
+            {
+                (user_id, entity_id, access)
+                for ((user_id, entity_id), access) in compute_entity_access(
+                    Entity.objects.values_list("id", flat=True)
+                ).items()
+            },
+        )
+
+    def test_owners_and_members(self):
+        """test_owners_and_members"""
+        self.assertEqual(
+            self.get_access(self.parent), {self.owner.id: EntityAccessKind.OWNER}
+        )
+
+        self.parent.members.add(self.user)
+        self.assertEqual(
+            self.get_access(self.parent),
+            {
+                self.owner.id: EntityAccessKind.OWNER,
+                self.user.id: EntityAccessKind.MEMBER,
+            },
+        )
+
+        self.parent.owner = self.user
+        self.parent.save()
+        self.user.entities.clear()
+        self.assertEqual(
+            self.get_access(self.parent), {self.user.id: EntityAccessKind.OWNER}
+        )
+        self.assert_access_is_current()
+
+    def test_parents_and_children(self):
+        """test_parents_and_children"""
+        self.child.members.add(self.user)
+        self.child.parent = self.parent
+        self.child.save()
+        self.assertEqual(
+            self.get_access(self.parent),
+            {
+                self.owner.id: EntityAccessKind.OWNER,
+                self.user.id: EntityAccessKind.CHILD_MEMBER,
+            },
+        )
+
+        self.parent.members.add(self.user)
+        self.assertEqual(
+            self.get_access(self.child)[self.user.id],
+            EntityAccessKind.MEMBER | EntityAccessKind.PARENT_MEMBER,
+        )
+
+        # Moving the child to another parent
+        self.child.parent = None
+        self.child.save()
+        self.assertEqual(
+            self.get_access(self.parent)[self.user.id], EntityAccessKind.MEMBER
+        )
+        self.assert_access_is_current()
+
+        self.child.parent = self.parent
+        self.child.save()
+        self.child.delete()
+        self.assert_access_is_current()
+
+    def test_task_members(self):
+        """test_task_members"""
+        task = Task.objects.create(title="Task")
+        task.entities.add(self.parent)
+        task.members.add(self.user)
+        self.assertEqual(
+            self.get_access(self.parent)[self.user.id], EntityAccessKind.TASK_MEMBER
+        )
+
+        self.user.tasks.clear()
+        self.assertNotIn(self.user.id, self.get_access(self.parent))
+
+        self.user.tasks.add(task)
+        task.delete()
+        self.assertNotIn(self.user.id, self.get_access(self.parent))
+        self.assert_access_is_current()
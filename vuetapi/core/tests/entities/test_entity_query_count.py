@@ -0,0 +1,106 @@
+"""Tests for the number of queries made when listing entities"""
+
+import datetime as dt
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models.categories.categories import ProfessionalCategory
+from core.models.entities.base import (
+    Entity,
+    ProfessionalEntity,
+    ProfessionalEntityCategoryMapping,
+)
+from core.models.entities.lists import List, ListEntry
+from core.models.entities.pets import Pet
+from core.models.entities.transport import Car
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+
+
+class TestEntityListQueryCount(TestCase):
+    """TestEntityListQueryCount"""
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test@test.test",
+            phone_number="+447123456789",
+            family=Family.objects.create(),
+        )
+        self.professional_category = ProfessionalCategory.objects.create(
+            name="Dentists", user=self.user
+        )
+
+    def create_entities(self, num: int):
+        """Create a mixture of entities, with children, for the user"""
+        for i in range(num):
+            parent = Entity.objects.create(
+                name=f"Parent {i}",
+                owner=self.user,
+                category=Categories.TRANSPORT.value,
+            )
+            car = Car.objects.create(
+                name=f"Car {i}",
+                owner=self.user,
+                parent=parent,
+                make="Ford",
+                model="Fiesta",
+                registration=f"AB{i}",
+            )
+            pet = Pet.objects.create(
+                name=f"Pet {i}", owner=self.user, dob=dt.date(2020, 1, 1)
+            )
+            professional = ProfessionalEntity.objects.create(
+                name=f"Dentist {i}", owner=self.user
+            )
+            ProfessionalEntityCategoryMapping.objects.create(
+                entity=professional,
+                user=self.user,
+                category=self.professional_category,
+            )
+            user_list = List.objects.create(
+                name=f"List {i}", owner=self.user, category=Categories.PETS.value
+            )
+            ListEntry.objects.create(list=user_list, title="Entry")
+            for entity in [parent, car, pet, professional, user_list]:
+                entity.members.add(self.user)
+
+    def list_entities(self, url: str):
+        """List the entities, counting the queries"""
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        return (res.json(), len(context.captured_queries))
+
+    def test_query_count_independent_of_entity_count(self):
+        """test_query_count_independent_of_entity_count"""
+        for url in [reverse("entity-list"), reverse("entity-readonly-list")]:
+            self.create_entities(2)
+            (_, few_entities_queries) = self.list_entities(url)
+
+            self.create_entities(20)
+            (entities, many_entities_queries) = self.list_entities(url)
+            self.assertEqual(few_entities_queries, many_entities_queries)
+
+        self.assertEqual(len(entities), Entity.objects.count())
+        for entity in entities:
+            if entity["resourcetype"] == "Car":
+                self.assertTrue(entity["parent_name"].startswith("Parent"))
+            elif entity["resourcetype"] == "Entity":
+                self.assertEqual(
+                    entity["child_entities"],
+                    list(
+                        Entity.objects.filter(parent=entity["id"]).values_list(
+                            "id", flat=True
+                        )
+                    ),
+                )
+            elif entity["resourcetype"] == "ProfessionalEntity":
+                self.assertEqual(
+                    entity["professional_category"], self.professional_category.id
+                )
+            elif entity["resourcetype"] == "List":
+                self.assertEqual(len(entity["list_entries"]), 1)
@@ -17,6 +17,8 @@ from core.models.users.user_models import Family, User
 from core.utils.categories import Categories
 from core.views.entity_viewsets import GuestListInviteViewSet
 from notifications.models import PushToken
+from notifications.utils.outbound_jobs import run_outbound_jobs
+from utils.email_client import OutgoingEmail
 
 utc = pytz.UTC
 
@@ -406,7 +408,7 @@ class TestGuestlistInviteSend(TestCase):
             {"get": "send_for_entity"}
         )
 
-    @patch("core.views.entity_viewsets.send_push_message_if_valid")
+    @patch("notifications.utils.outbound_jobs.send_push_message_if_valid")
     def test_send_invite_to_existing_user(self, msend_message):
         """test_send_invite_to_existing_user"""
         invite = GuestListInvite.objects.create(entity=self.event, user=self.other_user)
@@ -420,6 +422,7 @@ class TestGuestlistInviteSend(TestCase):
         res = self.guestlist_invite_send_view(request, pk=invite.pk)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+        run_outbound_jobs()
 
         invite.refresh_from_db()
         self.assertTrue(invite.sent)
@@ -429,7 +432,7 @@ class TestGuestlistInviteSend(TestCase):
             "You have been invited to an event!",
         )
 
-    @patch("core.views.entity_viewsets.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_send_invite_to_phone(self, mtwilio_client):
         """test_send_invite_to_phone"""
         mtwilio_client.return_value.messages.create = MagicMock()
@@ -445,6 +448,7 @@ class TestGuestlistInviteSend(TestCase):
         res = self.guestlist_invite_send_view(request, pk=invite.pk)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+        run_outbound_jobs()
 
         invite.refresh_from_db()
         self.assertTrue(invite.sent)
@@ -455,10 +459,10 @@ class TestGuestlistInviteSend(TestCase):
             body="You have been invited to an event on Vuet!\n\nDownload the app from the app store now and sign up with this phone number to join in",
         )
 
-    @patch("core.views.entity_viewsets.EmailClient")
+    @patch("notifications.utils.outbound_jobs.EmailClient")
     def test_send_invite_to_email(self, memail):
         """test_send_invite_to_email"""
-        memail.return_value.send_email = MagicMock()
+        memail.return_value.send_many = MagicMock()
 
         test_email = "test@testsetset.test"
         invite = GuestListInvite.objects.create(entity=self.event, email=test_email)
@@ -469,23 +473,29 @@ class TestGuestlistInviteSend(TestCase):
         res = self.guestlist_invite_send_view(request, pk=invite.pk)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+        run_outbound_jobs()
 
         invite.refresh_from_db()
         self.assertTrue(invite.sent)
 
-        memail.return_value.send_email.assert_called_once_with(
-            "You have been invited to an event",
-            "event-invite-new.html",
-            test_email,
-            plaintext_template="event-invite-new.txt",
-        )
-
-    @patch("core.views.entity_viewsets.send_push_message_if_valid")
-    @patch("core.views.entity_viewsets.Client")
-    @patch("core.views.entity_viewsets.EmailClient")
+        memail.return_value.send_many.assert_called_once_with(
+            [
+                OutgoingEmail(
+                    "You have been invited to an event",
+                    "event-invite-new.html",
+                    test_email,
+                    plaintext_template="event-invite-new.txt",
+                    data=None,
+                )
+            ]
+        )
+
+    @patch("notifications.utils.outbound_jobs.send_push_message_if_valid")
+    @patch("notifications.utils.outbound_jobs.Client")
+    @patch("notifications.utils.outbound_jobs.EmailClient")
     def test_send_all_entity_invites(self, memail, mtwilio_client, msend_message):
         """test_send_all_entity_invites"""
-        memail.return_value.send_email = MagicMock()
+        memail.return_value.send_many = MagicMock()
 
         num_email_invites = 7
         email_invites: List[GuestListInvite] = []
@@ -520,12 +530,16 @@ class TestGuestlistInviteSend(TestCase):
         res = self.guestlist_invite_send_for_entity_view(request, pk=self.event.pk)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+        run_outbound_jobs()
 
         for invite in phone_invites + email_invites + user_invites:
             invite.refresh_from_db()
             self.assertTrue(invite.sent)
 
-        self.assertEqual(memail.return_value.send_email.call_count, num_email_invites)
+        # The emails are sent together
+        memail.return_value.send_many.assert_called_once()
+        emails = memail.return_value.send_many.call_args.args[0]
+        self.assertEqual(len(emails), num_email_invites)
         self.assertEqual(
             mtwilio_client.return_value.messages.create.call_count, num_phone_invites
         )
@@ -0,0 +1,101 @@
+"""Tests for the blocked day index used by the scheduling engine"""
+
+import datetime as dt
+
+from dateutil import parser
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models.entities.base import Entity
+from core.models.tasks.base import FlexibleTask, Recurrence
+from core.models.users.user_models import Family, User
+from core.tests.utils.create_blocked_days import create_blocked_days
+from core.utils.categories import Categories
+from core.utils.scheduling.scheduler import SchedulingEngine
+
+
+class TestBlockedDayIndex(TestCase):
+    """TestBlockedDayIndex"""
+
+    def setUp(self):
+        family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447814187441", family=family
+        )
+        entity = Entity.objects.create(
+            name="Test Entity",
+            owner=self.user,
+            category=Categories.TRANSPORT.value,
+        )
+        entity.members.add(self.user)
+
+        task = FlexibleTask.objects.create(
+            title="Daily Task",
+            earliest_action_date=parser.parse("2022-01-01").date(),
+            due_date=parser.parse("2022-01-03").date(),
+            duration=30,
+        )
+        task.entities.add(entity)
+        task.members.add(self.user)
+        Recurrence.objects.create(task=task, recurrence="DAILY")
+
+        create_blocked_days(
+            {
+                "birthdays": {
+                    "date": parser.parse("1990-01-10").date(),
+                    "category": Categories.TRANSPORT.value,
+                },
+                "trips": {
+                    "start_date": parser.parse("2022-02-01").date(),
+                    "end_date": parser.parse("2022-02-03").date(),
+                    "category": Categories.TRANSPORT.value,
+                },
+                "days_off": {
+                    "start_date": parser.parse("2022-02-10").date(),
+                    "end_date": parser.parse("2022-02-10").date(),
+                    "category": Categories.TRANSPORT.value,
+                },
+            },
+            self.user,
+        )
+
+    def _count_scheduling_queries(self, num_days: int) -> int:
+        start = timezone.make_aware(dt.datetime(2022, 1, 1))
+        end = start + dt.timedelta(days=num_days)
+        with CaptureQueriesContext(connection) as context:
+            SchedulingEngine(self.user, start_date=start, end_date=end).schedule_tasks()
+
+        return len(context.captured_queries)
+
+    def test_query_count_independent_of_window(self):
+        """test_query_count_independent_of_window"""
+        self.assertEqual(
+            self._count_scheduling_queries(7), self._count_scheduling_queries(70)
+        )
+
+    def test_blocked_days(self):
+        """test_blocked_days"""
+        engine = SchedulingEngine(self.user)
+        transport = [Categories.TRANSPORT.value]
+        pets = [Categories.PETS.value]
+
+        for date, categories, expected in [
+            ("2022-01-10", transport, True),
+            ("2023-01-10", transport, True),
+            ("2022-01-10", pets, False),
+            ("2022-01-31", transport, False),
+            ("2022-02-01", transport, True),
+            ("2022-02-03", transport, True),
+            ("2022-02-04", transport, False),
+            ("2022-02-10", transport, True),
+            ("2022-02-10", pets, False),
+        ]:
+            self.assertEqual(
+                engine._is_day_blocked(  # pylint: disable=protected-access
+                    parser.parse(date).date(), categories, [self.user]
+                ),
+                expected,
+                date,
+            )
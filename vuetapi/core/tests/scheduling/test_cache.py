@@ -0,0 +1,181 @@
+"""Tests for caching scheduled tasks"""
+
+import datetime as dt
+from unittest import mock
+
+import pytz
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models.tasks.base import FixedTask, FlexibleTask
+from core.models.tasks.task_limits import TaskLimit
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+from core.utils.scheduling.cache import get_cache_stats
+from core.utils.scheduling.scheduler import SchedulingEngine
+
+utc = pytz.UTC
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class TestScheduledTaskCache(TestCase):
+    """TestScheduledTaskCache"""
+
+    url = reverse("scheduled_task-list")
+    params = {
+        "earliest_datetime": "2020-01-01T00:00:00Z",
+        "latest_datetime": "2020-01-31T00:00:00Z",
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456789", family=self.family
+        )
+        self.other_user = User.objects.create(
+            username="other@test.test",
+            phone_number="+447123456780",
+            family=Family.objects.create(),
+        )
+        self.task = FixedTask.objects.create(
+            title="Do something",
+            start_datetime=dt.datetime(2020, 1, 10, 12, 0, tzinfo=utc),
+            end_datetime=dt.datetime(2020, 1, 10, 13, 0, tzinfo=utc),
+        )
+        self.task.members.add(self.user)
+        self.client.force_login(self.user)
+
+    def get_task_titles(self):
+        """Get the titles of the scheduled tasks for the user"""
+        res = self.client.get(self.url, self.params)
+        return [task["title"] for task in res.json()["tasks"]]
+
+    def test_repeat_request_is_cached(self):
+        """test_repeat_request_is_cached"""
+        self.assertEqual(self.get_task_titles(), ["Do something"])
+        self.assertEqual(get_cache_stats(), {"hits": 0, "misses": 1})
+
+        self.assertEqual(self.get_task_titles(), ["Do something"])
+        self.assertEqual(get_cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_task_changes_invalidate_cache(self):
+        """test_task_changes_invalidate_cache"""
+        self.get_task_titles()
+
+        self.task.title = "Do something else"
+        self.task.save()
+        self.assertEqual(self.get_task_titles(), ["Do something else"])
+
+        new_task = FixedTask.objects.create(
+            title="New task",
+            start_datetime=dt.datetime(2020, 1, 11, 12, 0, tzinfo=utc),
+            end_datetime=dt.datetime(2020, 1, 11, 13, 0, tzinfo=utc),
+        )
+        new_task.members.add(self.user)
+        self.assertEqual(self.get_task_titles(), ["Do something else", "New task"])
+
+        new_task.delete()
+        self.assertEqual(self.get_task_titles(), ["Do something else"])
+
+        self.task.members.remove(self.user)
+        self.assertEqual(self.get_task_titles(), [])
+
+        self.assertEqual(get_cache_stats(), {"hits": 0, "misses": 5})
+
+    def test_other_family_changes_keep_cache(self):
+        """test_other_family_changes_keep_cache"""
+        self.get_task_titles()
+
+        other_task = FixedTask.objects.create(
+            title="Other task",
+            start_datetime=dt.datetime(2020, 1, 11, 12, 0, tzinfo=utc),
+            end_datetime=dt.datetime(2020, 1, 11, 13, 0, tzinfo=utc),
+        )
+        other_task.members.add(self.other_user)
+
+        self.assertEqual(self.get_task_titles(), ["Do something"])
+        self.assertEqual(get_cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_change_while_scheduling_is_not_cached(self):
+        """test_change_while_scheduling_is_not_cached"""
+
+        def rename_task_while_scheduling(*args, **kwargs):
+            engine = SchedulingEngine(*args, **kwargs)
+            self.task.title = "Do something else"
+            self.task.save()
+            return engine
+
+        with mock.patch(
+            "core.views.task_viewsets.SchedulingEngine",
+            side_effect=rename_task_while_scheduling,
+        ):
+            self.assertEqual(self.get_task_titles(), ["Do something"])
+
+        # The schedule was cached under the version replaced by the rename
+        self.assertEqual(self.get_task_titles(), ["Do something else"])
+        self.assertEqual(get_cache_stats(), {"hits": 0, "misses": 2})
+
+    def test_family_change_invalidates_previous_family(self):
+        """test_family_change_invalidates_previous_family"""
+        family_member = User.objects.create(
+            username="member@test.test",
+            phone_number="+447123456781",
+            family=self.family,
+        )
+        self.client.force_login(family_member)
+        self.get_task_titles()
+
+        self.user.family = self.other_user.family
+        self.user.save()
+
+        self.get_task_titles()
+        self.assertEqual(get_cache_stats(), {"hits": 0, "misses": 2})
+
+    def test_task_changes_schedule_incrementally(self):
+        """test_task_changes_schedule_incrementally"""
+        flexible_task = FlexibleTask.objects.create(
+            title="Do something flexible",
+            earliest_action_date=dt.date(2020, 1, 10),
+            due_date=dt.date(2020, 1, 10),
+            duration=60,
+        )
+        flexible_task.members.add(self.user)
+        self.client.get(self.url, self.params)
+
+        schedule_tasks_incrementally = SchedulingEngine.schedule_tasks_incrementally
+        with mock.patch.object(
+            SchedulingEngine,
+            "schedule_tasks_incrementally",
+            autospec=True,
+            side_effect=schedule_tasks_incrementally,
+        ) as mock_schedule_incrementally:
+            self.task.start_datetime = dt.datetime(2020, 1, 10, 9, 0, tzinfo=utc)
+            self.task.end_datetime = dt.datetime(2020, 1, 10, 17, 0, tzinfo=utc)
+            self.task.save()
+            incremental_schedule = self.client.get(self.url, self.params).json()
+
+            # Only the changed task is re-placed (along with those depending on it)
+            mock_schedule_incrementally.assert_called_once()
+            (_, _, changed_task_ids) = mock_schedule_incrementally.call_args.args
+            self.assertEqual(changed_task_ids, {self.task.id})
+
+            TaskLimit.objects.create(
+                user=self.user,
+                category=Categories.PETS.value,
+                interval="DAILY",
+                minutes_limit=90,
+            )
+            self.client.get(self.url, self.params)
+
+            # Anything else changing means scheduling from scratch
+            mock_schedule_incrementally.assert_called_once()
+
+        TaskLimit.objects.all().delete()
+        cache.clear()
+        self.assertEqual(
+            self.client.get(self.url, self.params).json(), incremental_schedule
+        )
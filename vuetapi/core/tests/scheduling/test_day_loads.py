@@ -0,0 +1,72 @@
+"""Tests for the day load totals used by the scheduling engine"""
+
+import datetime as dt
+import random
+from collections import defaultdict
+
+from django.test import SimpleTestCase
+
+from core.utils.scheduling.day_loads import DayLoads
+
+START_DATE = dt.date(2023, 1, 1)
+END_DATE = dt.date(2023, 3, 31)
+
+
+class TestDayLoads(SimpleTestCase):
+    """TestDayLoads"""
+
+    def test_totals_match_dicts(self):
+        """test_totals_match_dicts"""
+        rng = random.Random(0)
+        day_loads = DayLoads(START_DATE, END_DATE, [1, 2, 3], [1, 2, 3, 4])
+
+        # Include days outside of the window and unknown users and categories
+        tasks = defaultdict(int)
+        minutes = defaultdict(int)
+        for _ in range(2000):
+            date = START_DATE + dt.timedelta(days=rng.randint(-20, 110))
+            user_id = rng.randint(1, 4)
+            category = rng.randint(1, 5)
+            num_minutes = rng.randint(0, 120)
+
+            day_loads.add(date, user_id, category, tasks=1, minutes=num_minutes)
+            tasks[(date, user_id, category)] += 1
+            minutes[(date, user_id, category)] += num_minutes
+
+        for _ in range(200):
+            start_date = START_DATE + dt.timedelta(days=rng.randint(-20, 110))
+            end_date = start_date + dt.timedelta(days=rng.randint(0, 20))
+            dates = [
+                start_date + dt.timedelta(days=i)
+                for i in range((end_date - start_date).days + 1)
+            ]
+            user_ids = rng.sample([1, 2, 3, 4], rng.randint(1, 4))
+            category = rng.randint(1, 5)
+
+            self.assertEqual(
+                day_loads.tasks_between(start_date, end_date, user_ids[0], category),
+                [tasks[(date, user_ids[0], category)] for date in dates],
+            )
+            self.assertEqual(
+                day_loads.minutes_between(start_date, end_date, user_ids[0], category),
+                [minutes[(date, user_ids[0], category)] for date in dates],
+            )
+            self.assertEqual(
+                day_loads.total_minutes_between(start_date, end_date, user_ids),
+                [
+                    sum(
+                        minutes[(date, user_id, cat)]
+                        for user_id in user_ids
+                        for cat in range(1, 6)
+                    )
+                    for date in dates
+                ],
+            )
+
+    def test_memory_fixed_by_window(self):
+        """test_memory_fixed_by_window"""
+        day_loads = DayLoads(
+            dt.date(2020, 1, 1), dt.date(2030, 12, 31), range(5), range(12)
+        )
+        self.assertEqual(len(day_loads._tasks), 4018 * 5 * 12)
+        self.assertEqual(len(day_loads._day_minutes), 4018 * 5)
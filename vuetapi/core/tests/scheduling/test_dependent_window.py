@@ -0,0 +1,249 @@
+"""Differential tests for scheduling only the window that some dates depend on"""
+
+import datetime as dt
+import random
+
+import pytz
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models.entities.base import Entity
+from core.models.tasks.alerts import ALERT_TYPES
+from core.models.tasks.base import (
+    FixedTask,
+    FlexibleTask,
+    Recurrence,
+    Task,
+    TaskAction,
+)
+from core.models.tasks.task_limits import TaskLimit
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+from core.utils.scheduling.scheduler import (
+    SchedulingEngine,
+    get_scheduled_task_dates,
+)
+
+utc = pytz.UTC
+
+FIRST_DATE = dt.date(2021, 1, 1)
+NUM_DAYS = 3 * 365
+CATEGORIES = [Categories.PETS.value, Categories.TRANSPORT.value]
+
+
+class TestDependentWindow(TestCase):
+    """TestDependentWindow"""
+
+    def setUp(self):
+        self.rng = random.Random(0)
+        family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456789", family=family
+        )
+        self.other_user = User.objects.create(
+            username="other@test.test", phone_number="+447123456780", family=family
+        )
+        self.users = [self.user, self.other_user]
+        self.entities = [
+            Entity.objects.create(
+                name=f"Entity {category}", owner=self.user, category=category
+            )
+            for category in CATEGORIES
+        ]
+        for user in self.users:
+            TaskLimit.objects.create(
+                user=user,
+                category=Categories.PETS.value,
+                interval="DAILY",
+                minutes_limit=90,
+            )
+
+    def random_date(self) -> dt.date:
+        """Get a random date in the years that the tasks are spread over"""
+        return FIRST_DATE + dt.timedelta(days=self.rng.randrange(NUM_DAYS))
+
+    def add_relations(self, task: Task, recurrence_probability: float):
+        """Add random members, entities, actions and maybe a recurrence"""
+        task.members.set(self.rng.sample(self.users, self.rng.randint(1, 2)))
+        task.entities.set([self.rng.choice(self.entities)])
+        if self.rng.random() < 0.3:
+            TaskAction.objects.create(
+                task=task,
+                action_timedelta=dt.timedelta(
+                    days=self.rng.randint(1, 14), hours=self.rng.choice([0, 5])
+                ),
+            )
+        if self.rng.random() < recurrence_probability:
+            Recurrence.objects.create(
+                task=task,
+                recurrence=self.rng.choice(["WEEKLY", "MONTHLY", "YEARLY"]),
+                interval_length=self.rng.randint(1, 3),
+            )
+
+    def create_random_tasks(self):
+        """Create fixed and flexible tasks spread over a few years,
+        with busy clusters of overlapping flexible tasks"""
+        for _ in range(150):
+            start_datetime = dt.datetime.combine(
+                self.random_date(), dt.time(self.rng.randint(7, 20)), tzinfo=utc
+            )
+            task = FixedTask.objects.create(
+                title="Fixed task",
+                start_datetime=start_datetime,
+                end_datetime=start_datetime
+                + dt.timedelta(minutes=self.rng.choice([30, 60, 120, 24 * 60])),
+            )
+            self.add_relations(task, 0.1)
+
+        for _ in range(20):
+            cluster_date = self.random_date()
+            for _ in range(self.rng.randint(1, 8)):
+                earliest_action_date = cluster_date + dt.timedelta(
+                    days=self.rng.randint(-5, 5)
+                )
+                task = FlexibleTask.objects.create(
+                    title="Flexible task",
+                    earliest_action_date=earliest_action_date,
+                    due_date=earliest_action_date
+                    + dt.timedelta(days=self.rng.randint(0, 6)),
+                    duration=self.rng.choice([30, 60, 90, 240]),
+                )
+                self.add_relations(task, 0.05)
+
+    def assert_matches_full_window(self, engine, full_engine, start_date, end_date):
+        """Check the engines place the same tasks and give the same
+        alerts and placements on the dates provided"""
+        dates = {
+            start_date + dt.timedelta(days=i)
+            for i in range((end_date - start_date).days + 1)
+        }
+
+        def placed_on_dates(placing_engine):
+            return sorted(
+                [
+                    task
+                    for task in placing_engine.placed_tasks
+                    if not dates.isdisjoint(get_scheduled_task_dates(task))
+                ],
+                key=lambda task: (
+                    task.id,
+                    task.action_id or 0,
+                    task.recurrence_index or 0,
+                ),
+            )
+
+        self.assertEqual(placed_on_dates(engine), placed_on_dates(full_engine))
+
+        for date in sorted(dates):
+            start_time = dt.datetime.combine(date, dt.time(12), tzinfo=utc)
+            for alert in ALERT_TYPES:
+                for categories in [[CATEGORIES[0]], CATEGORIES]:
+                    self.assertEqual(
+                        engine.get_alerted_users(
+                            alert,
+                            categories,
+                            self.users,
+                            start_time=start_time,
+                            end_time=start_time + dt.timedelta(hours=1),
+                        ),
+                        full_engine.get_alerted_users(
+                            alert,
+                            categories,
+                            self.users,
+                            start_time=start_time,
+                            end_time=start_time + dt.timedelta(hours=1),
+                        ),
+                    )
+
+    def test_matches_full_window(self):
+        """test_matches_full_window"""
+        self.create_random_tasks()
+        full_engine = SchedulingEngine(self.user)
+        full_engine.schedule_tasks()
+
+        for _ in range(15):
+            start_date = self.random_date()
+            end_date = start_date + dt.timedelta(days=self.rng.randint(0, 3))
+            engine = SchedulingEngine.for_dates(self.user, start_date, end_date)
+            engine.schedule_tasks()
+            self.assertLess(engine.end_date - engine.start_date, dt.timedelta(days=365))
+            self.assert_matches_full_window(engine, full_engine, start_date, end_date)
+
+            self.assertEqual(
+                engine.get_task_placement(
+                    start_date, end_date, 60, [CATEGORIES[0]], self.users, None
+                ),
+                full_engine.get_task_placement(
+                    start_date, end_date, 60, [CATEGORIES[0]], self.users, None
+                ),
+            )
+
+    def test_follows_overlapping_flexible_tasks(self):
+        """test_follows_overlapping_flexible_tasks"""
+        # Each of these flexible tasks can be placed on a day that
+        # the next one can be placed on
+        for i in range(10):
+            earliest_action_date = dt.date(2023, 1, 1) + dt.timedelta(days=5 * i)
+            task = FlexibleTask.objects.create(
+                title=f"Flexible task {i}",
+                earliest_action_date=earliest_action_date,
+                due_date=earliest_action_date + dt.timedelta(days=6),
+            )
+            task.members.add(self.user)
+            task.entities.add(self.entities[0])
+
+        engine = SchedulingEngine.for_dates(
+            self.user, dt.date(2023, 2, 15), dt.date(2023, 2, 15)
+        )
+        self.assertLessEqual(engine.start_date.date(), dt.date(2023, 1, 1))
+        self.assertEqual(len(engine.flexible_tasks), 10)
+
+    def test_follows_recurring_flexible_tasks(self):
+        """test_follows_recurring_flexible_tasks"""
+        # Filling the user's daily limit on one day pushes back that day's
+        # occurrence of the recurring task, onto the day that the next
+        # occurrence would otherwise be placed on - and so on
+        fixed_task = FixedTask.objects.create(
+            title="Fixed task",
+            start_datetime=dt.datetime(2023, 1, 5, 9, tzinfo=utc),
+            end_datetime=dt.datetime(2023, 1, 5, 10, 30, tzinfo=utc),
+        )
+        fixed_task.members.add(self.user)
+        fixed_task.entities.add(self.entities[0])
+        recurring_task = FlexibleTask.objects.create(
+            title="Recurring flexible task",
+            earliest_action_date=dt.date(2023, 1, 1),
+            due_date=dt.date(2023, 1, 2),
+            duration=90,
+        )
+        recurring_task.members.add(self.user)
+        recurring_task.entities.add(self.entities[0])
+        Recurrence.objects.create(
+            task=recurring_task,
+            recurrence="DAILY",
+            interval_length=1,
+            latest_occurrence=dt.datetime(2023, 3, 1, tzinfo=utc),
+        )
+
+        full_engine = SchedulingEngine(self.user)
+        full_engine.schedule_tasks()
+
+        date = dt.date(2023, 2, 1)
+        engine = SchedulingEngine.for_dates(self.user, date, date)
+        engine.schedule_tasks()
+        self.assert_matches_full_window(engine, full_engine, date, date)
+
+    def test_query_count_independent_of_history(self):
+        """test_query_count_independent_of_history"""
+        self.create_random_tasks()
+        date = dt.date(2030, 6, 1)
+
+        with CaptureQueriesContext(connection) as context:
+            SchedulingEngine.for_dates(self.user, date, date).schedule_tasks()
+        queries = len(context.captured_queries)
+
+        self.create_random_tasks()
+        with CaptureQueriesContext(connection) as context:
+            SchedulingEngine.for_dates(self.user, date, date).schedule_tasks()
+        self.assertEqual(len(context.captured_queries), queries)
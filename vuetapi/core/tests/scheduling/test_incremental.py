@@ -0,0 +1,240 @@
+"""Differential tests for incremental scheduling against full scheduling runs"""
+
+import datetime as dt
+import pickle
+import random
+from typing import Iterable, List
+from unittest import mock
+
+import pytz
+from django.test import TestCase
+
+from core.models.entities.base import Entity
+from core.models.tasks.base import FixedTask, FlexibleTask, Recurrence, Task
+from core.models.tasks.task_limits import TaskLimit
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+from core.utils.scheduling.scheduler import (
+    PlacementState,
+    SchedulingEngine,
+    SchedulingException,
+)
+
+utc = pytz.UTC
+
+START_DATE = dt.datetime(2023, 1, 1, tzinfo=utc)
+END_DATE = dt.datetime(2023, 3, 1, tzinfo=utc)
+CATEGORIES = [Categories.PETS.value, Categories.TRANSPORT.value]
+
+
+class TestIncrementalScheduling(TestCase):
+    """TestIncrementalScheduling"""
+
+    def setUp(self):
+        self.rng = random.Random(0)
+        family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456789", family=family
+        )
+        self.other_user = User.objects.create(
+            username="other@test.test", phone_number="+447123456780", family=family
+        )
+        self.users = [self.user, self.other_user]
+        self.entities = [
+            Entity.objects.create(
+                name=f"Entity {category}", owner=self.user, category=category
+            )
+            for category in CATEGORIES
+        ]
+        TaskLimit.objects.create(
+            user=self.user,
+            category=Categories.PETS.value,
+            interval="DAILY",
+            minutes_limit=90,
+        )
+
+    def random_date(self) -> dt.date:
+        """Get a random date in the scheduling window"""
+        return START_DATE.date() + dt.timedelta(
+            days=self.rng.randrange((END_DATE - START_DATE).days)
+        )
+
+    def add_relations(self, task: Task):
+        """Add random members, entities and maybe a recurrence to the task"""
+        task.members.set(self.rng.sample(self.users, self.rng.randint(1, 2)))
+        task.entities.set([self.rng.choice(self.entities)])
+        if self.rng.random() < 0.3:
+            Recurrence.objects.create(
+                task=task,
+                recurrence=self.rng.choice(["DAILY", "WEEKLY", "MONTHLY"]),
+                interval_length=self.rng.randint(2, 4),
+            )
+
+    def create_fixed_task(self) -> FixedTask:
+        """Create a random fixed task"""
+        start_datetime = dt.datetime.combine(
+            self.random_date(), dt.time(self.rng.randint(7, 20)), tzinfo=utc
+        )
+        task = FixedTask.objects.create(
+            title="Fixed task",
+            type="TASK",
+            start_datetime=start_datetime,
+            end_datetime=start_datetime
+            + dt.timedelta(minutes=self.rng.choice([30, 60, 120, 24 * 60])),
+        )
+        self.add_relations(task)
+        return task
+
+    def create_flexible_task(self) -> FlexibleTask:
+        """Create a random flexible task"""
+        earliest_action_date = self.random_date()
+        task = FlexibleTask.objects.create(
+            title="Flexible task",
+            type="TASK",
+            earliest_action_date=earliest_action_date,
+            due_date=earliest_action_date + dt.timedelta(days=self.rng.randint(0, 5)),
+            duration=self.rng.choice([30, 60, 90, 240]),
+        )
+        self.add_relations(task)
+        return task
+
+    def change_random_task(self) -> List[int]:
+        """Make a random change to the tasks, returning the changed task IDs"""
+        tasks = list(Task.objects.all())
+        task = self.rng.choice(tasks)
+        change = self.rng.choice(["move", "resize", "members", "delete", "create"])
+
+        if change == "delete":
+            task.delete()
+            return [task.id]
+        if change == "create":
+            new_task = (
+                self.create_fixed_task()
+                if self.rng.random() < 0.5
+                else self.create_flexible_task()
+            )
+            return [new_task.id]
+        if change == "members":
+            task.members.set(self.rng.sample(self.users, self.rng.randint(1, 2)))
+            return [task.id]
+
+        if isinstance(task, FixedTask):
+            if change == "move":
+                shift = dt.timedelta(hours=self.rng.randint(-48, 48))
+                task.start_datetime += shift
+                task.end_datetime += shift
+            else:
+                task.end_datetime = task.start_datetime + dt.timedelta(
+                    minutes=self.rng.choice([15, 45, 180])
+                )
+        elif isinstance(task, FlexibleTask):
+            if change == "move":
+                shift = dt.timedelta(days=self.rng.randint(-3, 3))
+                task.earliest_action_date += shift
+                task.due_date += shift
+            else:
+                task.duration = self.rng.choice([15, 45, 180, 600])
+        task.save()
+        return [task.id]
+
+    def schedule_incrementally(
+        self, state: PlacementState, changed_task_ids: Iterable[int]
+    ):
+        """Schedule incrementally from a persisted state and check the
+        output matches a full run, returning the new state"""
+        state = pickle.loads(pickle.dumps(state))
+        incremental_engine = SchedulingEngine(self.user, START_DATE, END_DATE)
+        incremental_tasks = incremental_engine.schedule_tasks_incrementally(
+            state, changed_task_ids
+        )
+
+        full_engine = SchedulingEngine(self.user, START_DATE, END_DATE)
+        full_tasks = full_engine.schedule_tasks()
+
+        self.assertEqual(incremental_tasks, full_tasks)
+        self.assertEqual(incremental_engine.placed_tasks, full_engine.placed_tasks)
+
+        return incremental_engine.get_placement_state()
+
+    def create_random_tasks(self):
+        """Create a random mixture of fixed and flexible tasks"""
+        for _ in range(15):
+            self.create_fixed_task()
+        for _ in range(25):
+            self.create_flexible_task()
+
+    def test_matches_full_run_after_random_changes(self):
+        """test_matches_full_run_after_random_changes"""
+        self.create_random_tasks()
+        engine = SchedulingEngine(self.user, START_DATE, END_DATE)
+        engine.schedule_tasks()
+        state = engine.get_placement_state()
+
+        for _ in range(25):
+            changed_task_ids = self.change_random_task()
+            state = self.schedule_incrementally(state, changed_task_ids)
+
+    def test_matches_full_run_after_batched_changes(self):
+        """test_matches_full_run_after_batched_changes"""
+        self.create_random_tasks()
+        engine = SchedulingEngine(self.user, START_DATE, END_DATE)
+        engine.schedule_tasks()
+        state = engine.get_placement_state()
+
+        for _ in range(5):
+            changed_task_ids = []
+            for _ in range(4):
+                changed_task_ids += self.change_random_task()
+            state = self.schedule_incrementally(state, changed_task_ids)
+
+    def test_only_replaces_affected_flexible_tasks(self):
+        """test_only_replaces_affected_flexible_tasks"""
+        early_task = FlexibleTask.objects.create(
+            title="Early task",
+            earliest_action_date=dt.date(2023, 1, 2),
+            due_date=dt.date(2023, 1, 4),
+        )
+        early_task.members.add(self.user)
+        late_task = FlexibleTask.objects.create(
+            title="Late task",
+            earliest_action_date=dt.date(2023, 2, 2),
+            due_date=dt.date(2023, 2, 4),
+        )
+        late_task.members.add(self.user)
+
+        engine = SchedulingEngine(self.user, START_DATE, END_DATE)
+        engine.schedule_tasks()
+        state = engine.get_placement_state()
+
+        fixed_task = FixedTask.objects.create(
+            title="Fixed task",
+            start_datetime=dt.datetime(2023, 1, 3, 8, tzinfo=utc),
+            end_datetime=dt.datetime(2023, 1, 3, 10, tzinfo=utc),
+        )
+        fixed_task.members.add(self.user)
+
+        with mock.patch.object(
+            SchedulingEngine,
+            "_place_flexible_task",
+            autospec=True,
+            side_effect=SchedulingEngine._place_flexible_task,
+        ) as place_flexible_task:
+            self.schedule_incrementally(state, [fixed_task.id])
+
+        # Once for the incremental run and once for the full run
+        placed_task_ids = [
+            call.args[1].id for call in place_flexible_task.call_args_list
+        ]
+        self.assertEqual(placed_task_ids.count(early_task.id), 2)
+        self.assertEqual(placed_task_ids.count(late_task.id), 1)
+
+    def test_different_window_not_allowed(self):
+        """test_different_window_not_allowed"""
+        engine = SchedulingEngine(self.user, START_DATE, END_DATE)
+        engine.schedule_tasks()
+        state = engine.get_placement_state()
+
+        with self.assertRaises(SchedulingException):
+            SchedulingEngine(
+                self.user, START_DATE, END_DATE + dt.timedelta(days=1)
+            ).schedule_tasks_incrementally(state, [])
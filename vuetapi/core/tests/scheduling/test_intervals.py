@@ -0,0 +1,112 @@
+"""Tests for the scheduling interval index"""
+
+import datetime as dt
+import random
+
+from django.test import SimpleTestCase
+
+from core.utils.scheduling.intervals import IntervalIndex
+
+utc = dt.timezone.utc
+
+
+class TestIntervalIndex(SimpleTestCase):
+    """TestIntervalIndex"""
+
+    def test_empty_index(self):
+        """test_empty_index"""
+        start = dt.datetime(2023, 1, 1, 8, tzinfo=utc)
+        self.assertFalse(
+            IntervalIndex().overlaps(start, start + dt.timedelta(minutes=30))
+        )
+
+    def test_adjacent_intervals_do_not_overlap(self):
+        """test_adjacent_intervals_do_not_overlap"""
+        index = IntervalIndex()
+        index.add(
+            dt.datetime(2023, 1, 1, 8, tzinfo=utc),
+            dt.datetime(2023, 1, 1, 9, tzinfo=utc),
+        )
+        self.assertFalse(
+            index.overlaps(
+                dt.datetime(2023, 1, 1, 9, tzinfo=utc),
+                dt.datetime(2023, 1, 1, 10, tzinfo=utc),
+            )
+        )
+        self.assertFalse(
+            index.overlaps(
+                dt.datetime(2023, 1, 1, 7, tzinfo=utc),
+                dt.datetime(2023, 1, 1, 8, tzinfo=utc),
+            )
+        )
+        self.assertTrue(
+            index.overlaps(
+                dt.datetime(2023, 1, 1, 8, 59, tzinfo=utc),
+                dt.datetime(2023, 1, 1, 10, tzinfo=utc),
+            )
+        )
+
+    def test_long_interval_overlaps_later_slots(self):
+        """test_long_interval_overlaps_later_slots"""
+        index = IntervalIndex()
+        index.add(
+            dt.datetime(2023, 1, 1, 1, tzinfo=utc),
+            dt.datetime(2023, 1, 5, 23, tzinfo=utc),
+        )
+        index.add(
+            dt.datetime(2023, 1, 3, 8, tzinfo=utc),
+            dt.datetime(2023, 1, 3, 9, tzinfo=utc),
+        )
+        self.assertTrue(
+            index.overlaps(
+                dt.datetime(2023, 1, 4, 12, tzinfo=utc),
+                dt.datetime(2023, 1, 4, 13, tzinfo=utc),
+            )
+        )
+
+    def test_matches_linear_scan(self):
+        """test_matches_linear_scan"""
+        random.seed(0)
+        base = dt.datetime(2023, 1, 1, tzinfo=utc)
+        intervals = []
+        index = IntervalIndex()
+        for _ in range(300):
+            start = base + dt.timedelta(minutes=15 * random.randrange(30 * 24 * 4))
+            end = start + dt.timedelta(minutes=15 * random.randrange(0, 200))
+            intervals.append((start, end))
+            index.add(start, end)
+
+        for _ in range(1000):
+            start = base + dt.timedelta(minutes=15 * random.randrange(30 * 24 * 4))
+            end = start + dt.timedelta(minutes=15 * random.randrange(1, 8))
+            expected = not all(
+                start >= interval_end or end <= interval_start
+                for (interval_start, interval_end) in intervals
+            )
+            self.assertEqual(index.overlaps(start, end), expected)
+
+    def test_matches_linear_scan_with_long_intervals(self):
+        """test_matches_linear_scan_with_long_intervals"""
+        random.seed(0)
+        base = dt.datetime(2023, 1, 1, tzinfo=utc)
+        intervals = []
+        index = IntervalIndex()
+        for i in range(300):
+            start = base + dt.timedelta(minutes=15 * random.randrange(30 * 24 * 4))
+            if i % 50 == 0:
+                # Holidays and multi-day events
+                end = start + dt.timedelta(days=random.randrange(1, 15))
+            else:
+                end = start + dt.timedelta(minutes=15 * random.randrange(0, 8))
+            intervals.append((start, end))
+            index.add(start, end)
+        self.assertEqual(len(index), 300)
+
+        for _ in range(1000):
+            start = base + dt.timedelta(minutes=15 * random.randrange(30 * 24 * 4))
+            end = start + dt.timedelta(minutes=15 * random.randrange(1, 8))
+            expected = not all(
+                start >= interval_end or end <= interval_start
+                for (interval_start, interval_end) in intervals
+            )
+            self.assertEqual(index.overlaps(start, end), expected)
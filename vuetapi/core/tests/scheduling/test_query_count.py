@@ -0,0 +1,140 @@
+"""Tests for the number of queries made when scheduling tasks"""
+
+import datetime as dt
+
+import pytz
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models.entities.base import Entity
+from core.models.entities.education import School, SchoolTerm, SchoolYear
+from core.models.entities.pets import Pet
+from core.models.routines.routines import Routine
+from core.models.tasks.base import FixedTask, FlexibleTask, Recurrence, TaskAction
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+
+utc = pytz.UTC
+
+# The number of queries allowed for listing scheduled tasks,
+# however many tasks and entities there are
+QUERY_BUDGET = 45
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class TestScheduledTaskQueryCount(TestCase):
+    """TestScheduledTaskQueryCount"""
+
+    url = reverse("scheduled_task-list")
+    params = {
+        "earliest_datetime": "2023-01-01T00:00:00Z",
+        "latest_datetime": "2023-03-01T00:00:00Z",
+    }
+
+    def setUp(self):
+        family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456789", family=family
+        )
+        self.other_user = User.objects.create(
+            username="other@test.test", phone_number="+447123456780", family=family
+        )
+        self.outside_user = User.objects.create(
+            username="outside@test.test", phone_number="+447123456781"
+        )
+        self.routine = Routine.objects.create(
+            name="Morning",
+            start_time=dt.time(8),
+            end_time=dt.time(11),
+            monday=True,
+            tuesday=True,
+        )
+        self.routine.members.add(self.user)
+        self.num_created = 0
+
+    def create_tasks_and_entities(self, num: int):
+        """Create a mixture of tasks and entities for the family"""
+        for _ in range(num):
+            i = self.num_created
+            self.num_created += 1
+            date = dt.date(2023, 1, 1) + dt.timedelta(days=i % 50)
+
+            entity = Entity.objects.create(
+                name=f"Entity {i}", owner=self.user, category=Categories.PETS.value
+            )
+            entity.members.add(self.user)
+
+            start_datetime = dt.datetime.combine(date, dt.time(9), tzinfo=utc)
+            fixed_task = FixedTask.objects.create(
+                title=f"Fixed {i}",
+                type="TASK",
+                start_datetime=start_datetime,
+                end_datetime=start_datetime + dt.timedelta(hours=1),
+                routine=self.routine,
+            )
+            fixed_task.members.set([self.user, self.outside_user])
+            fixed_task.entities.add(entity)
+            TaskAction.objects.create(
+                task=fixed_task, action_timedelta=dt.timedelta(days=1)
+            )
+
+            flexible_task = FlexibleTask.objects.create(
+                title=f"Flexible {i}",
+                type="TASK",
+                earliest_action_date=date,
+                due_date=date + dt.timedelta(days=3),
+                duration=60,
+            )
+            flexible_task.members.set([self.user, self.other_user])
+            flexible_task.entities.add(entity)
+            if i % 2:
+                Recurrence.objects.create(
+                    task=flexible_task, recurrence="WEEKLY", interval_length=1
+                )
+
+            pet = Pet.objects.create(
+                name=f"Pet {i}", owner=self.user, dob=date.replace(year=2020)
+            )
+            pet.members.add(self.user)
+
+            school = School.objects.create(name=f"School {i}", owner=self.user)
+            school.members.add(self.user)
+            school_year = SchoolYear.objects.create(
+                school=school,
+                start_date=dt.date(2022, 9, 1),
+                end_date=dt.date(2023, 7, 20),
+                year="2022/23",
+                show_on_calendars=True,
+            )
+            SchoolTerm.objects.create(
+                school_year=school_year,
+                name="Spring term",
+                start_date=dt.date(2023, 1, 5),
+                end_date=dt.date(2023, 3, 30),
+                show_on_calendars=True,
+            )
+
+    def count_queries(self) -> int:
+        """Count the queries made to list the scheduled tasks"""
+        cache.clear()
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(self.url, self.params)
+        self.assertEqual(res.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_count_independent_of_task_count(self):
+        """test_query_count_independent_of_task_count"""
+        self.create_tasks_and_entities(2)
+        few_tasks_queries = self.count_queries()
+
+        self.create_tasks_and_entities(20)
+        many_tasks_queries = self.count_queries()
+
+        self.assertEqual(few_tasks_queries, many_tasks_queries)
+        self.assertLessEqual(many_tasks_queries, QUERY_BUDGET)
@@ -0,0 +1,149 @@
+"""Tests for jumping to the occurrences of a recurrence"""
+
+import datetime as dt
+import random
+import threading
+import time
+from unittest import mock
+from typing import cast
+
+import pytz
+from django.test import SimpleTestCase
+
+from core.models.tasks.base import RECURRENCE_CHOICES, Recurrence, RecurrenceType
+from core.utils.scheduling.recurrences import (
+    CHECKPOINT_FREQUENCY,
+    _CheckpointTable,
+    get_first_occurrence_from,
+    get_next_date,
+)
+
+RECURRENCE_TYPES = [cast(RecurrenceType, choice[0]) for choice in RECURRENCE_CHOICES]
+
+
+def step_to_first_occurrence_from(first_occurrence, recurrence, earliest):
+    """Find the first occurrence by stepping through every occurrence"""
+    index = 0
+    occurrence = first_occurrence
+    while occurrence < earliest:
+        occurrence = get_next_date(occurrence, recurrence)
+        index += 1
+    return (index, occurrence)
+
+
+def random_date(rng: random.Random, start: dt.date, num_days: int) -> dt.date:
+    """Get a random date, favouring the ends of months"""
+    date = start + dt.timedelta(days=rng.randrange(num_days))
+    if rng.random() < 0.3:
+        date = date.replace(day=28) + dt.timedelta(days=rng.randrange(4))
+    return date
+
+
+class TestGetFirstOccurrenceFrom(SimpleTestCase):
+    """TestGetFirstOccurrenceFrom"""
+
+    def test_dates_match_stepping(self):
+        """test_dates_match_stepping"""
+        rng = random.Random(0)
+        for _ in range(500):
+            recurrence = Recurrence(
+                recurrence=rng.choice(RECURRENCE_TYPES),
+                interval_length=rng.randint(1, 4),
+            )
+            first_occurrence = random_date(rng, dt.date(2012, 1, 1), 365 * 6)
+            earliest = random_date(rng, dt.date(2012, 1, 1), 365 * 14)
+
+            self.assertEqual(
+                get_first_occurrence_from(first_occurrence, recurrence, earliest),
+                step_to_first_occurrence_from(first_occurrence, recurrence, earliest),
+                (recurrence.recurrence, recurrence.interval_length, first_occurrence),
+            )
+
+    def test_datetimes_match_stepping(self):
+        """test_datetimes_match_stepping"""
+        rng = random.Random(1)
+        timezones = [pytz.UTC, dt.timezone(dt.timedelta(hours=-11))]
+        for _ in range(500):
+            recurrence = Recurrence(
+                recurrence=rng.choice(RECURRENCE_TYPES),
+                interval_length=rng.randint(1, 4),
+            )
+            first_occurrence = dt.datetime.combine(
+                random_date(rng, dt.date(2012, 1, 1), 365 * 6),
+                dt.time(rng.randrange(24), rng.choice([0, 30])),
+                tzinfo=rng.choice(timezones),
+            )
+            earliest = dt.datetime.combine(
+                random_date(rng, dt.date(2012, 1, 1), 365 * 14),
+                dt.time(rng.randrange(24)),
+                tzinfo=rng.choice(timezones),
+            )
+
+            self.assertEqual(
+                get_first_occurrence_from(first_occurrence, recurrence, earliest),
+                step_to_first_occurrence_from(first_occurrence, recurrence, earliest),
+                (recurrence.recurrence, recurrence.interval_length, first_occurrence),
+            )
+
+    def test_month_end_clamping(self):
+        """test_month_end_clamping"""
+        recurrence = Recurrence(recurrence="MONTHLY", interval_length=1)
+        self.assertEqual(
+            get_first_occurrence_from(
+                dt.date(2021, 1, 31), recurrence, dt.date(2021, 3, 1)
+            ),
+            (2, dt.date(2021, 3, 28)),
+        )
+
+        recurrence = Recurrence(recurrence="YEARLY", interval_length=1)
+        self.assertEqual(
+            get_first_occurrence_from(
+                dt.date(2020, 2, 29), recurrence, dt.date(2024, 1, 1)
+            ),
+            (4, dt.date(2024, 2, 28)),
+        )
+
+
+class TestCheckpointTable(SimpleTestCase):
+    """TestCheckpointTable"""
+
+    def test_concurrent_extension(self):
+        """test_concurrent_extension"""
+        anchor = dt.date(2020, 1, 31)
+        recurrence = Recurrence(recurrence="MONTH_WEEKLY", interval_length=1)
+        expected = [anchor]
+        date = anchor
+        for _ in range(40):
+            for _ in range(CHECKPOINT_FREQUENCY):
+                date = get_next_date(date, recurrence)
+            expected.append(date)
+
+        def get_next_date_switching_threads(date, recurrence):
+            # Let the other threads run part way through extending the table
+            time.sleep(0)
+            return get_next_date(date, recurrence)
+
+        def extend(table: _CheckpointTable, barrier: threading.Barrier, days: int):
+            barrier.wait()
+            table.extend_to(anchor + dt.timedelta(days=days))
+
+        for _ in range(20):
+            table = _CheckpointTable(anchor, "MONTH_WEEKLY", 1)
+            barrier = threading.Barrier(8)
+            threads = [
+                threading.Thread(target=extend, args=(table, barrier, days))
+                for days in range(20 * 365, 28 * 365, 365)
+            ]
+            with mock.patch(
+                "core.utils.scheduling.recurrences.get_next_date",
+                get_next_date_switching_threads,
+            ):
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            self.assertEqual(table.checkpoints, expected[: len(table.checkpoints)])
+            self.assertGreaterEqual(
+                table.checkpoints[-1], anchor + dt.timedelta(days=27 * 365)
+            )
@@ -0,0 +1,128 @@
+"""Tests for which scheduled tasks are shown to the user scheduling them"""
+
+import datetime as dt
+
+import pytz
+from django.test import TestCase
+
+from core.models.entities.base import Entity
+from core.models.settings.family_visibility import FamilyCategoryViewPermission
+from core.models.tasks.base import FixedTask
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+from core.utils.scheduling.scheduler import SchedulingEngine, TaskVisibility
+from external_calendars.models import ICalEvent, ICalIntegration
+
+utc = pytz.UTC
+
+START_DATE = dt.datetime(2023, 1, 1, tzinfo=utc)
+END_DATE = dt.datetime(2023, 2, 1, tzinfo=utc)
+
+
+class TestTaskVisibility(TestCase):
+    """TestTaskVisibility"""
+
+    def setUp(self):
+        family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456789", family=family
+        )
+        self.other_user = User.objects.create(
+            username="other@test.test", phone_number="+447123456780", family=family
+        )
+        self.num_created = 0
+
+    def create_task(
+        self, title: str, members, task_type="TASK", model=FixedTask, **kwargs
+    ):
+        """Create a one hour fixed task on a different day to the others"""
+        self.num_created += 1
+        start_datetime = START_DATE + dt.timedelta(days=self.num_created, hours=9)
+        task = model.objects.create(
+            title=title,
+            type=task_type,
+            start_datetime=start_datetime,
+            end_datetime=start_datetime + dt.timedelta(hours=1),
+            **kwargs,
+        )
+        task.members.set(members)
+        return task
+
+    def create_ical_event(self, title: str, user: User, share_type: str):
+        """create_ical_event"""
+        integration = ICalIntegration.objects.create(user=user, share_type=share_type)
+        return self.create_task(
+            title,
+            [user],
+            task_type="ICAL_EVENT",
+            model=ICalEvent,
+            ical_integration=integration,
+        )
+
+    def test_visibility(self):
+        """test_visibility"""
+        self.create_task("Member", [self.user])
+        self.create_task("Other", [self.other_user])
+
+        entity = Entity.objects.create(
+            name="Car", owner=self.other_user, category=Categories.TRANSPORT.value
+        )
+        entity.members.add(self.user)
+        self.create_task("Entity", [self.other_user]).entities.add(entity)
+
+        other_entity = Entity.objects.create(
+            name="Dog", owner=self.other_user, category=Categories.PETS.value
+        )
+        FamilyCategoryViewPermission.objects.create(
+            user=self.other_user, category=Categories.PETS.value
+        )
+        self.create_task(
+            "Shared appointment", [self.other_user], task_type="APPOINTMENT"
+        ).entities.add(other_entity)
+        self.create_task("Unshared task", [self.other_user]).entities.add(other_entity)
+
+        self.create_ical_event("Own busy calendar", self.user, "BUSY")
+        self.create_ical_event("Full calendar", self.other_user, "FULL")
+        self.create_ical_event("Busy calendar", self.other_user, "BUSY")
+        self.create_ical_event("Private calendar", self.other_user, "OFF")
+
+        engine = SchedulingEngine(self.user, START_DATE, END_DATE)
+        engine.place_fixed_tasks()
+        self.assertEqual(
+            {
+                engine.fixed_tasks_dict[task_id].title: visibility
+                for (task_id, visibility) in engine.task_visibility.items()
+                if visibility
+            },
+            {
+                "Member": TaskVisibility.MEMBER,
+                "Entity": TaskVisibility.ENTITY_MEMBER,
+                "Shared appointment": TaskVisibility.SHARED_APPOINTMENT,
+                "Own busy calendar": TaskVisibility.MEMBER
+                | TaskVisibility.SHARED_CALENDAR,
+                "Full calendar": TaskVisibility.SHARED_CALENDAR,
+                "Busy calendar": TaskVisibility.SHARED_CALENDAR | TaskVisibility.BUSY,
+            },
+        )
+
+        # The visibility is worked out up front
+        with self.assertNumQueries(0):
+            user_tasks = engine._get_user_tasks()  # pylint: disable=protected-access
+        self.assertEqual(
+            [task.title for task in user_tasks],
+            [
+                "Member",
+                "Entity",
+                "Shared appointment",
+                "Own busy calendar",
+                "Full calendar",
+                "BUSY",
+            ],
+        )
+        # Masking the title leaves the engine's own occurrences unchanged
+        self.assertIn("Busy calendar", [task.title for task in engine.placed_tasks])
+        user_tasks_again = engine._get_user_tasks()  # pylint: disable=protected-access
+        self.assertEqual(
+            [task.title for task in user_tasks_again],
+            [task.title for task in user_tasks],
+        )
@@ -0,0 +1,137 @@
+"""Tests for getting scheduled tasks one page at a time"""
+
+import datetime as dt
+
+import pytz
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from core.models.entities.travel import Trip
+from core.models.tasks.base import FixedTask, FlexibleTask, Recurrence
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+
+utc = pytz.UTC
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    SCHEDULED_TASK_PAGE_DAYS=7,
+)
+class TestScheduledTaskPages(TestCase):
+    """TestScheduledTaskPages"""
+
+    url = reverse("scheduled_task-page")
+    list_url = reverse("scheduled_task-list")
+    params = {
+        "earliest_datetime": "2023-01-01T00:00:00Z",
+        "latest_datetime": "2023-01-25T00:00:00Z",
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            username="test@test.test",
+            phone_number="+447123456789",
+            family=Family.objects.create(),
+        )
+        self.client.force_login(self.user)
+
+    def create_fixed_task(self, title: str, start: dt.datetime, end: dt.datetime):
+        """Create a fixed task for the user"""
+        task = FixedTask.objects.create(
+            title=title, start_datetime=start, end_datetime=end
+        )
+        task.members.add(self.user)
+        return task
+
+    def get_pages(self):
+        """Follow the pages from the first page, returning the response data"""
+        pages = [self.client.get(self.url, self.params).json()]
+        while pages[-1]["next"]:
+            pages.append(self.client.get(pages[-1]["next"]).json())
+        return pages
+
+    def test_pages_match_list(self):
+        """test_pages_match_list"""
+        daily_task = self.create_fixed_task(
+            "Daily",
+            dt.datetime(2023, 1, 1, 9, tzinfo=utc),
+            dt.datetime(2023, 1, 1, 10, tzinfo=utc),
+        )
+        Recurrence.objects.create(
+            task=daily_task, recurrence="DAILY", interval_length=1
+        )
+        self.create_fixed_task(
+            "Before the window",
+            dt.datetime(2022, 12, 31, 20, tzinfo=utc),
+            dt.datetime(2023, 1, 1, 2, tzinfo=utc),
+        )
+        self.create_fixed_task(
+            "Across pages",
+            dt.datetime(2023, 1, 7, 20, tzinfo=utc),
+            dt.datetime(2023, 1, 9, 2, tzinfo=utc),
+        )
+        self.create_fixed_task(
+            "On page boundary",
+            dt.datetime(2023, 1, 15, tzinfo=utc),
+            dt.datetime(2023, 1, 15, 1, tzinfo=utc),
+        )
+        trip = Trip.objects.create(
+            name="Trip",
+            owner=self.user,
+            category=Categories.TRAVEL.value,
+            start_date=dt.date(2023, 1, 6),
+            end_date=dt.date(2023, 1, 10),
+        )
+        trip.members.add(self.user)
+
+        pages = self.get_pages()
+        self.assertEqual(len(pages), 4)
+
+        full_schedule = self.client.get(self.list_url, self.params).json()
+        self.assertEqual(
+            [task for page in pages for task in page["tasks"]],
+            full_schedule["tasks"],
+        )
+        self.assertEqual(
+            [entity for page in pages for entity in page["entities"]],
+            full_schedule["entities"],
+        )
+
+    def test_flexible_tasks_across_pages_match_list(self):
+        """test_flexible_tasks_across_pages_match_list"""
+        self.create_fixed_task(
+            "Busy before the page boundary",
+            dt.datetime(2023, 1, 7, 6, tzinfo=utc),
+            dt.datetime(2023, 1, 7, 22, tzinfo=utc),
+        )
+        for i in range(4):
+            task = FlexibleTask.objects.create(
+                title=f"Flexible {i}",
+                earliest_action_date=dt.date(2023, 1, 6 + i % 2),
+                due_date=dt.date(2023, 1, 9),
+                duration=6 * 60,
+            )
+            task.members.add(self.user)
+
+        pages = self.get_pages()
+        full_schedule = self.client.get(self.list_url, self.params).json()
+        self.assertEqual(
+            [task for page in pages for task in page["tasks"]],
+            full_schedule["tasks"],
+        )
+
+    def test_invalid_cursor(self):
+        """test_invalid_cursor"""
+        for cursor in ["not a date", "2023-02-01T00:00:00Z", "2023-01-08T00:00:00"]:
+            res = self.client.get(self.url, {**self.params, "cursor": cursor})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_auth_required(self):
+        """test_auth_required"""
+        self.client.logout()
+        res = self.client.get(self.url, self.params)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
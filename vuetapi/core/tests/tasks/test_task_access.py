@@ -0,0 +1,190 @@
+"""Tests for keeping the stored access to tasks up to date"""
+
+import datetime as dt
+
+import pytz
+from django.test import TestCase
+
+from core.models.entities.base import Entity
+from core.models.settings.family_visibility import FamilyCategoryViewPermission
+from core.models.tasks.access import TaskAccess, TaskVisibility
+from core.models.tasks.base import FixedTask
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+from core.utils.task_access import compute_task_access, visible_task_ids
+from core.views.task_viewsets import get_visible_tasks
+from external_calendars.models import ICalEvent, ICalIntegration
+
+START_DATETIME = dt.datetime(2023, 1, 1, 9, tzinfo=pytz.UTC)
+
+
+class TestTaskAccess(TestCase):
+    """Tests for the TaskAccess table"""
+
+    def setUp(self):
+        self.family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456789", family=self.family
+        )
+        self.family_member = User.objects.create(
+            username="family@test.test",
+            phone_number="+447123456780",
+            family=self.family,
+        )
+        self.other_user = User.objects.create(
+            username="other@test.test", phone_number="+447123456781"
+        )
+        self.entity = Entity.objects.create(
+            name="Dog", owner=self.user, category=Categories.PETS.value
+        )
+
+    def create_task(self, title: str, members, model=FixedTask, **kwargs):
+        """create_task"""
+        task = model.objects.create(
+            title=title,
+            start_datetime=START_DATETIME,
+            end_datetime=START_DATETIME + dt.timedelta(hours=1),
+            **kwargs,
+        )
+        task.members.set(members)
+        return task
+
+    def get_access(self, task):
+        """Get the stored visibility of the task for each user"""
+        return dict(
+            TaskAccess.objects.filter(task=task).values_list("user", "visibility")
+        )
+
+    def assert_access_is_current(self):
+        """The stored access matches the access worked out from scratch"""
+        self.assertEqual(
+            set(TaskAccess.objects.values_list("user", "task", "visibility")),
+            {
+                (user_id, task_id, visibility)
+                for ((user_id, task_id), visibility) in compute_task_access(
+                    FixedTask.objects.values_list("id", flat=True)
+                ).items()
+            },
+        )
+
+    def test_members(self):
+        """test_members"""
+        task = self.create_task("Task", [self.user])
+        self.assertEqual(self.get_access(task), {self.user.id: TaskVisibility.MEMBER})
+
+        task.members.add(self.other_user)
+        self.other_user.tasks.remove(task)
+        self.user.tasks.clear()
+        self.assertEqual(self.get_access(task), {})
+
+        self.other_user.tasks.add(task)
+        self.assertEqual(
+            self.get_access(task), {self.other_user.id: TaskVisibility.MEMBER}
+        )
+        self.assert_access_is_current()
+
+    def test_entity_members(self):
+        """test_entity_members"""
+        task = self.create_task("Task", [self.user])
+        task.entities.add(self.entity)
+        self.entity.members.add(self.other_user)
+        self.assertEqual(
+            self.get_access(task),
+            {
+                self.user.id: TaskVisibility.MEMBER,
+                self.other_user.id: TaskVisibility.ENTITY_MEMBER,
+            },
+        )
+
+        self.other_user.entities.clear()
+        self.assertEqual(self.get_access(task), {self.user.id: TaskVisibility.MEMBER})
+
+        self.entity.members.add(self.other_user)
+        self.entity.delete()
+        self.assertEqual(self.get_access(task), {self.user.id: TaskVisibility.MEMBER})
+        self.assert_access_is_current()
+
+    def test_shared_appointments(self):
+        """test_shared_appointments"""
+        appointment = self.create_task("Vet", [self.user], type="APPOINTMENT")
+        appointment.entities.add(self.entity)
+        self.assertEqual(
+            self.get_access(appointment), {self.user.id: TaskVisibility.MEMBER}
+        )
+
+        permission = FamilyCategoryViewPermission.objects.create(
+            user=self.user, category=Categories.PETS.value
+        )
+        self.assertEqual(
+            self.get_access(appointment),
+            {
+                self.user.id: TaskVisibility.MEMBER | TaskVisibility.SHARED_APPOINTMENT,
+                self.family_member.id: TaskVisibility.SHARED_APPOINTMENT,
+            },
+        )
+
+        # Users who join the family can see it too
+        self.other_user.family = self.family
+        self.other_user.save()
+        self.assertIn(self.other_user.id, self.get_access(appointment))
+        self.assert_access_is_current()
+
+        permission.delete()
+        self.assertEqual(
+            self.get_access(appointment), {self.user.id: TaskVisibility.MEMBER}
+        )
+
+    def test_shared_calendars(self):
+        """test_shared_calendars"""
+        integration = ICalIntegration.objects.create(user=self.user, share_type="OFF")
+        event = self.create_task(
+            "Event",
+            [self.user],
+            model=ICalEvent,
+            type="ICAL_EVENT",
+            ical_integration=integration,
+        )
+        self.assertEqual(self.get_access(event), {self.user.id: TaskVisibility.MEMBER})
+
+        integration.share_type = "BUSY"
+        integration.save()
+        self.assertEqual(
+            self.get_access(event),
+            {
+                self.user.id: TaskVisibility.MEMBER | TaskVisibility.SHARED_CALENDAR,
+                self.family_member.id: TaskVisibility.SHARED_CALENDAR
+                | TaskVisibility.BUSY,
+            },
+        )
+
+        # Users who leave the family can no longer see it
+        self.family_member.family = None
+        self.family_member.save()
+        self.assertNotIn(self.family_member.id, self.get_access(event))
+        self.assert_access_is_current()
+
+    def test_visible_tasks(self):
+        """test_visible_tasks"""
+        own_task = self.create_task("Own task", [self.user])
+        FamilyCategoryViewPermission.objects.create(
+            user=self.family_member, category=Categories.PETS.value
+        )
+        appointment = self.create_task("Vet", [self.family_member], type="APPOINTMENT")
+        appointment.entities.add(self.entity)
+        self.create_task("Other task", [self.other_user])
+
+        self.assertEqual(
+            set(get_visible_tasks(self.user).values_list("id", flat=True)),
+            {own_task.id, appointment.id},
+        )
+        self.assertEqual(
+            set(
+                get_visible_tasks(self.user, shared=False).values_list("id", flat=True)
+            ),
+            {own_task.id},
+        )
+
+        # The tasks are filtered with a single join
+        self.assertNotIn(
+            "JOIN", str(visible_task_ids(self.user).query).split("WHERE")[0]
+        )
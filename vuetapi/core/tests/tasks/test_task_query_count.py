@@ -0,0 +1,95 @@
+"""Tests for the number of queries made when listing tasks"""
+
+import datetime as dt
+
+import pytz
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models.tasks.base import FixedTask, FlexibleTask, Task, TaskAction
+from core.models.tasks.travel import TransportTask
+from core.models.users.user_models import Family, User
+from external_calendars.models import ICalEvent, ICalIntegration
+
+START_DATETIME = dt.datetime(2023, 1, 1, 9, tzinfo=pytz.UTC)
+
+
+class TestTaskListQueryCount(TestCase):
+    """TestTaskListQueryCount"""
+
+    def setUp(self):
+        family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456789", family=family
+        )
+        other_user = User.objects.create(
+            username="other@test.test", phone_number="+447123456780", family=family
+        )
+        self.integration = ICalIntegration.objects.create(
+            user=self.user, share_type="OFF"
+        )
+        self.other_integration = ICalIntegration.objects.create(
+            user=other_user, share_type="BUSY"
+        )
+
+    def create_tasks(self, num: int):
+        """Create a mixture of tasks for the user"""
+        for i in range(num):
+            times = {
+                "start_datetime": START_DATETIME,
+                "end_datetime": START_DATETIME + dt.timedelta(hours=1),
+            }
+            tasks = [
+                Task.objects.create(title=f"Task {i}"),
+                FixedTask.objects.create(title=f"Fixed {i}", **times),
+                TransportTask.objects.create(title=f"Transport {i}", **times),
+                FlexibleTask.objects.create(
+                    title=f"Flexible {i}",
+                    earliest_action_date=START_DATETIME.date(),
+                    due_date=START_DATETIME.date(),
+                    duration=60,
+                ),
+                ICalEvent.objects.create(
+                    title=f"Event {i}",
+                    type="ICAL_EVENT",
+                    ical_integration=self.integration,
+                    **times,
+                ),
+            ]
+            for task in tasks:
+                task.members.add(self.user)
+                TaskAction.objects.create(task=task, action_timedelta=dt.timedelta(1))
+            # Shared with the user as busy
+            ICalEvent.objects.create(
+                title=f"Other event {i}",
+                type="ICAL_EVENT",
+                ical_integration=self.other_integration,
+                **times,
+            )
+
+    def list_tasks(self):
+        """List the tasks, counting the queries"""
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(reverse("task-list"))
+        self.assertEqual(res.status_code, 200)
+        return (res.json(), len(context.captured_queries))
+
+    def test_query_count_independent_of_task_count(self):
+        """test_query_count_independent_of_task_count"""
+        self.create_tasks(2)
+        (_, few_tasks_queries) = self.list_tasks()
+
+        self.create_tasks(20)
+        (tasks, many_tasks_queries) = self.list_tasks()
+        self.assertEqual(few_tasks_queries, many_tasks_queries)
+
+        self.assertEqual(len(tasks), Task.objects.count())
+        titles = {
+            task["title"] for task in tasks if task["resourcetype"] == "ICalEvent"
+        }
+        self.assertIn("Event 0", titles)
+        self.assertIn("BUSY", titles)
+        self.assertNotIn("Other event 0", titles)
@@ -837,6 +837,34 @@ class TestTaskViewSetCreate(BaseTest):
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
+    def test_cannot_create_task_for_other_user_entity(self):
+        """Test that a user cannot create a task for an entity
+        which they can't tag tasks with"""
+        other_user = User.objects.create(
+            username="otheruser@test.test", phone_number="+447123456700"
+        )
+        other_entity = Entity.objects.create(
+            owner=other_user, name="OTHER ENTITY", category=1
+        )
+        request = APIRequestFactory().post(
+            "",
+            {
+                "title": "Test task",
+                "start_datetime": "2022-01-01T10:00:00Z",
+                "end_datetime": "2022-01-01T11:00:00Z",
+                "resourcetype": "FixedTask",
+                "members": [self.user.id],
+                "entities": [self.user_entity.id, other_entity.id],
+            },
+            format="json",
+        )
+
+        force_authenticate(request, user=self.user)
+        res = self.task_create_view(request)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["entities"]["code"], "invalid_entity")
+
     @parameterized.expand(ALERT_TEST_CASES)
     def test_alerts_created(self, _, opts, expected):
         """Test that alerts are created when we create fixed tasks with conflicts"""
@@ -984,7 +1012,11 @@ class TestBulkCreate(BaseTest):
             data=json.dumps({"pk_ids": new_task_ids}),
             content_type="application/json",
         )
-        self.assertEqual(delete_res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(delete_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            delete_res.json(),
+            [{"id": task_id, "status": "deleted"} for task_id in new_task_ids],
+        )
 
         # Ensure that these entities don't exist
         for task_id in new_task_ids:
@@ -0,0 +1,191 @@
+"""Tests for deleting lots of tasks and entities at once"""
+
+import datetime as dt
+
+import pytz
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models.changes.change_log import ChangedObjectType, ChangeLogEntry
+from core.models.entities.access import EntityAccess
+from core.models.entities.base import Entity
+from core.models.task_completion_forms.base import TaskCompletionForm
+from core.models.tasks.access import TaskAccess
+from core.models.tasks.base import FixedTask, Recurrence, Task, TaskAction, TaskReminder
+from core.models.users.user_models import Family, User
+from core.utils.categories import Categories
+from core.utils.entity_access import compute_entity_access
+from core.utils.task_access import compute_task_access
+from core.views.entity_viewsets import EntityViewSet
+from core.views.task_viewsets import TaskViewSet
+
+START_DATETIME = dt.datetime(2023, 1, 1, 9, tzinfo=pytz.UTC)
+
+
+class TestBulkDelete(TestCase):
+    """Tests for the bulk deletion of tasks and entities"""
+
+    def setUp(self):
+        family = Family.objects.create()
+        self.user = User.objects.create(
+            username="test@test.test", phone_number="+447123456789", family=family
+        )
+        self.other_user = User.objects.create(
+            username="other@test.test", phone_number="+447123456780"
+        )
+        self.entity = Entity.objects.create(
+            name="Car", owner=self.user, category=Categories.TRANSPORT.value
+        )
+        self.entity.members.add(self.user)
+
+    def create_task(self, members, entities=()) -> Task:
+        """Create a recurring task with an action, reminder and completion form"""
+        task = FixedTask.objects.create(
+            title="Task",
+            start_datetime=START_DATETIME,
+            end_datetime=START_DATETIME + dt.timedelta(hours=1),
+        )
+        task.members.set(members)
+        task.entities.set(entities)
+        Recurrence.objects.create(task=task, recurrence="WEEKLY")
+        TaskAction.objects.create(task=task, action_timedelta=dt.timedelta(days=1))
+        TaskReminder.objects.create(task=task, timedelta=dt.timedelta(hours=1))
+        TaskCompletionForm.objects.create(task=task, recurrence_index=0)
+        return task
+
+    def create_entity_tree(self, children: int) -> Entity:
+        """Create an entity with children and grandchildren, tagged on tasks"""
+        parent = Entity.objects.create(
+            name="School", owner=self.user, category=Categories.EDUCATION.value
+        )
+        for _ in range(children):
+            child = Entity.objects.create(
+                name="Class",
+                owner=self.user,
+                parent=parent,
+                category=Categories.EDUCATION.value,
+            )
+            child.members.add(self.other_user)
+            grandchild = Entity.objects.create(
+                name="Term",
+                owner=self.user,
+                parent=child,
+                category=Categories.EDUCATION.value,
+            )
+            self.create_task([self.user], [grandchild])
+        return parent
+
+    def delete(self, viewset, pk_ids):
+        """Delete the objects with the IDs provided, counting the queries"""
+        request = APIRequestFactory().delete("", {"pk_ids": pk_ids}, format="json")
+        force_authenticate(request, self.user)
+        with CaptureQueriesContext(connection) as queries:
+            res = viewset.as_view({"delete": "delete"})(request)
+        return (res, len(queries.captured_queries))
+
+    def assert_access_is_current(self):
+        """The stored access matches the access worked out from scratch"""
+        self.assertEqual(
+            set(TaskAccess.objects.values_list("user", "task", "visibility")),
+            {
+                (user_id, task_id, visibility)
+                for ((user_id, task_id), visibility) in compute_task_access(
+                    Task.objects.values_list("id", flat=True)
+                ).items()
+            },
+        )
+        self.assertEqual(
+            set(EntityAccess.objects.values_list("user", "entity", "access")),
+            {
+                (user_id, entity_id, access)
+                for ((user_id, entity_id), access) in compute_entity_access(
+                    Entity.objects.values_list("id", flat=True)
+                ).items()
+            },
+        )
+
+    def test_delete_tasks(self):
+        """test_delete_tasks"""
+        tasks = [self.create_task([self.user], [self.entity]) for _ in range(3)]
+        other_task = self.create_task([self.other_user])
+
+        (res, _) = self.delete(
+            TaskViewSet, [task.id for task in tasks] + [other_task.id, 0]
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [{"id": task.id, "status": "deleted"} for task in tasks]
+            + [
+                {"id": other_task.id, "status": "not_found"},
+                {"id": 0, "status": "not_found"},
+            ],
+        )
+        self.assertEqual(
+            list(Task.objects.values_list("id", flat=True)), [other_task.id]
+        )
+        self.assertEqual(
+            list(Recurrence.objects.values_list("task", flat=True)), [other_task.id]
+        )
+        # The deletions are logged for the users who could see the tasks
+        self.assertEqual(
+            set(
+                ChangeLogEntry.objects.filter(
+                    user=self.user, object_type=ChangedObjectType.TASK
+                ).values_list("object_id", flat=True)
+            ),
+            {task.id for task in tasks},
+        )
+        self.assert_access_is_current()
+
+    def test_delete_tasks_in_constant_queries(self):
+        """test_delete_tasks_in_constant_queries"""
+        tasks = [self.create_task([self.user], [self.entity]) for _ in range(30)]
+        # The user keeps their access to the entity through the remaining task
+        remaining_task = self.create_task([self.user], [self.entity])
+
+        # The first deletion fills the content type cache
+        self.delete(TaskViewSet, [tasks[0].id])
+        (_, few_queries) = self.delete(TaskViewSet, [task.id for task in tasks[1:4]])
+        (_, many_queries) = self.delete(TaskViewSet, [task.id for task in tasks[4:]])
+        self.assertEqual(list(Task.objects.all()), [remaining_task])
+        self.assertEqual(few_queries, many_queries)
+
+    def test_delete_entity_trees(self):
+        """test_delete_entity_trees"""
+        small_tree = self.create_entity_tree(2)
+        large_tree = self.create_entity_tree(10)
+        other_entity = Entity.objects.create(
+            name="Other", owner=self.other_user, category=Categories.PETS.value
+        )
+
+        (res, small_queries) = self.delete(EntityViewSet, [small_tree.id])
+        self.assertEqual(res.data, [{"id": small_tree.id, "status": "deleted"}])
+        (res, large_queries) = self.delete(
+            EntityViewSet, [large_tree.id, other_entity.id]
+        )
+        self.assertEqual(
+            res.data,
+            [
+                {"id": large_tree.id, "status": "deleted"},
+                {"id": other_entity.id, "status": "not_found"},
+            ],
+        )
+
+        self.assertEqual(
+            set(Entity.objects.values_list("id", flat=True)),
+            {self.entity.id, other_entity.id},
+        )
+        # The tasks are kept, but are no longer tagged with the entities
+        self.assertEqual(Task.objects.count(), 12)
+        self.assertFalse(Task.entities.through.objects.exists())
+        self.assertEqual(small_queries, large_queries)
+        self.assert_access_is_current()
+
+    def test_invalid_ids(self):
+        """test_invalid_ids"""
+        (res, _) = self.delete(TaskViewSet, ["abc"])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,168 @@
+"""Tests for sending emails over SMTP"""
+
+import logging
+import smtplib
+import socketserver
+import threading
+import time
+from unittest.mock import patch
+
+from django.template.loader import render_to_string
+from django.test import TestCase
+
+from core.models.emails.emails import Email
+from utils.email_client import EmailClient, OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """Accepts every message, other than those to rejected addresses"""
+
+    def reply(self, line: str):
+        """reply"""
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:  # type: ignore
+            server.connections += 1  # type: ignore
+        # e.g. the TLS handshake and login of a real server
+        time.sleep(server.connection_latency)  # type: ignore
+        self.reply("220 localhost ESMTP")
+
+        while line := self.rfile.readline():
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 localhost")
+            elif command.startswith("RCPT") and "REJECT" in command:
+                self.reply("550 Mailbox unavailable")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with server.lock:  # type: ignore
+                    server.messages += 1  # type: ignore
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """A local SMTP server which counts its connections and messages"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connection_latency: float = 0):
+        super().__init__(("127.0.0.1", 0), SMTPStubHandler)
+        self.connection_latency = connection_latency
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+
+
+class TestEmailClient(TestCase):
+    """Tests for sending emails with the EmailClient"""
+
+    def setUp(self):
+        self.smtp_stub = SMTPStub(connection_latency=0.02)
+        threading.Thread(target=self.smtp_stub.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp_stub.server_close)
+        self.addCleanup(self.smtp_stub.shutdown)
+
+        settings = self.settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.smtp_stub.server_address[1],
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_USE_TLS=False,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.email_client = EmailClient()
+        self.email_client.enabled = True
+        self.email_client.redirect_address = None
+
+    def test_send_many(self):
+        """test_send_many"""
+        emails = [
+            OutgoingEmail(
+                "You have been invited to join Vuet",
+                "family-invite-new.html",
+                f"test{i}@test.test",
+                data={"inviter_name": f"Inviter {i % 2}"},
+            )
+            for i in range(20)
+        ]
+        with patch(
+            "utils.email_client.render_to_string", wraps=render_to_string
+        ) as mrender:
+            errors = self.email_client.send_many(emails)
+
+        self.assertEqual(errors, [None] * 20)
+        self.assertEqual(self.smtp_stub.messages, 20)
+        self.assertEqual(self.smtp_stub.connections, 1)
+        # The template is rendered once for each inviter
+        self.assertEqual(mrender.call_count, 2)
+        self.assertEqual(
+            sorted(Email.objects.values_list("to", flat=True)),
+            sorted(email.to_email for email in emails),
+        )
+
+    def test_failed_emails(self):
+        """test_failed_emails"""
+        emails = [
+            OutgoingEmail("Title", "event-invite-new.html", to_email)
+            for to_email in ["a@test.test", "reject@test.test", "b@test.test"]
+        ]
+        errors = self.email_client.send_many(emails)
+
+        self.assertEqual(errors[0], None)
+        self.assertIsInstance(errors[1], smtplib.SMTPRecipientsRefused)
+        self.assertEqual(errors[2], None)
+        self.assertEqual(self.smtp_stub.messages, 2)
+        self.assertEqual(
+            sorted(Email.objects.values_list("to", flat=True)),
+            ["a@test.test", "b@test.test"],
+        )
+
+        with self.assertRaises(smtplib.SMTPRecipientsRefused):
+            self.email_client.send_email(
+                "Title", "event-invite-new.html", "reject@test.test"
+            )
+
+    def test_throughput(self):
+        """test_throughput"""
+        num_emails = 25
+
+        start = time.monotonic()
+        for i in range(num_emails):
+            self.email_client.send_email(
+                "Title", "event-invite-new.html", f"test{i}@test.test"
+            )
+        one_by_one = time.monotonic() - start
+        self.assertEqual(self.smtp_stub.connections, num_emails)
+
+        start = time.monotonic()
+        self.email_client.send_many(
+            [
+                OutgoingEmail("Title", "event-invite-new.html", f"test{i}@test.test")
+                for i in range(num_emails)
+            ]
+        )
+        batched = time.monotonic() - start
+        self.assertEqual(self.smtp_stub.connections, num_emails + 1)
+        self.assertEqual(self.smtp_stub.messages, 2 * num_emails)
+
+        logger.info(
+            "Sent %s emails/s one by one, %s emails/s with send_many",
+            round(num_emails / one_by_one),
+            round(num_emails / batched),
+        )
+        self.assertLess(batched, one_by_one / 2)
@@ -0,0 +1,113 @@
+"""Tests for reporting errors to Slack"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from utils.error_reporter import ErrorReporter
+from vuet.middleware.handle_errors import HandleErrorsMiddleware
+
+
+def raise_error(message: str = "Error"):
+    """raise_error"""
+    raise ValueError(message)
+
+
+def get_error(message: str = "Error") -> ValueError:
+    """get_error"""
+    try:
+        raise_error(message)
+    except ValueError as exc:
+        return exc
+    raise AssertionError("No error raised")
+
+
+def get_other_error() -> KeyError:
+    """get_other_error"""
+    try:
+        {}["key"]  # pylint: disable=pointless-statement
+    except KeyError as exc:
+        return exc
+    raise AssertionError("No error raised")
+
+
+class TestErrorReporting(SimpleTestCase):
+    """Tests for reporting errors to Slack"""
+
+    def test_errors_are_reported_without_blocking(self):
+        """test_errors_are_reported_without_blocking"""
+        sending = threading.Event()
+        release = threading.Event()
+        messages = []
+
+        def send(text):
+            messages.append(text)
+            sending.set()
+            release.wait()
+
+        reporter = ErrorReporter(send, queue_size=3, window=60, max_messages=10)
+        middleware = HandleErrorsMiddleware(MagicMock())
+        with patch(
+            "vuet.middleware.handle_errors.get_error_reporter", return_value=reporter
+        ):
+            middleware.process_exception(MagicMock(), get_error())
+            self.assertTrue(sending.wait(5))
+
+            # Slack is slow to respond, but the requests aren't held up
+            start = time.monotonic()
+            for _ in range(100):
+                middleware.process_exception(MagicMock(), get_other_error())
+            self.assertLess(time.monotonic() - start, 1)
+
+        release.set()
+        reporter.join()
+        self.assertEqual(len(messages), 2)
+        self.assertIn("ValueError: Error", messages[0])
+        self.assertIn("KeyError: 'key'", messages[1])
+        self.assertIn("97 error reports were dropped", messages[1])
+
+    def test_errors_are_deduplicated(self):
+        """test_errors_are_deduplicated"""
+        # pylint: disable=protected-access
+        send = MagicMock()
+        reporter = ErrorReporter(send, queue_size=10, window=60, max_messages=10)
+
+        # The same error with different messages is only reported once
+        for i in range(5):
+            reporter._add(get_error(f"Error {i}"), 0)
+        reporter._add(get_other_error(), 10)
+        reporter._flush(30)
+        self.assertEqual(send.call_count, 2)
+        self.assertIn("ValueError: Error 0", send.call_args_list[0].args[0])
+        self.assertIn("KeyError", send.call_args_list[1].args[0])
+
+        # The number of times it was raised again is reported after the window
+        reporter._flush(60)
+        self.assertEqual(send.call_count, 3)
+        self.assertTrue(
+            send.call_args.args[0].startswith("Raised 4 more times in 60 seconds:")
+        )
+        self.assertIn("ValueError: Error 0", send.call_args.args[0])
+
+        # ...and then it is reported again
+        reporter._add(get_error(), 61)
+        self.assertEqual(send.call_count, 4)
+        reporter._flush(200)
+        self.assertEqual(send.call_count, 4)
+
+    def test_reports_are_rate_limited(self):
+        """test_reports_are_rate_limited"""
+        # pylint: disable=protected-access
+        send = MagicMock()
+        reporter = ErrorReporter(send, queue_size=10, window=60, max_messages=1)
+
+        reporter._add(get_error(), 0)
+        reporter._add(get_other_error(), 1)
+        reporter._flush(30)
+        self.assertEqual(send.call_count, 1)
+
+        reporter._flush(60)
+        self.assertEqual(send.call_count, 2)
+        self.assertIn("1 error reports were dropped", send.call_args.args[0])
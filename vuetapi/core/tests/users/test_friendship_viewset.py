@@ -13,7 +13,7 @@ utc = pytz.UTC
 
 
 class TestFriendshipViewSetCreate(TestCase):
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_cannot_create_friendship_without_invite(self, _):
         friendship_create_view = FriendshipViewset.as_view({"post": "create"})
 
@@ -41,7 +41,7 @@ class TestFriendshipViewSetCreate(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(res.data["creator"]["code"], "user_not_invited")
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_cannot_accept_friendship_for_someone_else(self, _):
         friendship_create_view = FriendshipViewset.as_view({"post": "create"})
 
@@ -81,7 +81,7 @@ class TestFriendshipViewSetCreate(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(res.data["friend"]["code"], "user_not_friend")
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_can_create_friendship_with_invite(self, _):
         friendship_create_view = FriendshipViewset.as_view({"post": "create"})
 
@@ -118,7 +118,7 @@ class TestFriendshipViewSetCreate(TestCase):
         self.assertEqual(res.data["friend"], friend.id)
         self.assertEqual(res.data["creator"], creator.id)
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_cannot_create_same_friendship_twice(self, _):
         friendship_create_view = FriendshipViewset.as_view({"post": "create"})
 
@@ -170,7 +170,7 @@ class TestFriendshipViewSetCreate(TestCase):
         self.assertEqual(res.data["non_field_errors"][0].code, "unique")
 
     # TODO - fix this and uncomment test
-    # @patch("core.models.users.signals.Client")
+    # @patch("notifications.utils.outbound_jobs.Client")
     # def test_cannot_create_same_friendship_as_reversed(self, _):
     #     friendship_create_view = FriendshipViewset.as_view(
     #         {"post": "create"}
@@ -415,7 +415,7 @@ class TestFriendshipViewSetDelete(TestCase):
 
         self.assertEqual(num_friendships_initial, num_friendships_after_request)
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_deletes_stale_user_invites(self, _):
         friendship_delete_view = FriendshipViewset.as_view({"delete": "destroy"})
 
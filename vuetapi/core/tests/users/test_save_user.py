@@ -2,7 +2,9 @@ import datetime as dt
 import logging
 
 import pytz
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from core.models.tasks.anniversaries import UserBirthdayTask
 from core.models.users.user_models import Family, User
@@ -60,3 +62,19 @@ class TestSaveUser(TestCase):
         self.user_birthday_task.refresh_from_db()
         self.assertEqual(self.user_birthday_task.start_date, new_dob)
         self.assertEqual(self.user_birthday_task.end_date, new_dob)
+
+    def test_previous_family_is_looked_up_once(self):
+        """test_previous_family_is_looked_up_once"""
+        self.user.family = Family.objects.create()
+        with CaptureQueriesContext(connection) as context:
+            self.user.save()
+        self.assertEqual(
+            len(
+                [
+                    query
+                    for query in context.captured_queries
+                    if query["sql"].startswith('SELECT "core_user"."family_id"')
+                ]
+            ),
+            1,
+        )
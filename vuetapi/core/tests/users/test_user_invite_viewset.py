@@ -10,6 +10,9 @@ from rest_framework.test import APIRequestFactory, force_authenticate
 
 from core.models.users.user_models import Family, User, UserInvite
 from core.views.user_viewsets import UserInviteViewSet
+from notifications.models import OutboundJob
+from notifications.utils.outbound_jobs import run_outbound_jobs
+from utils.email_client import OutgoingEmail
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +41,7 @@ class TestUserInviteViewSet(TestCase):
         User.objects.create(phone_number="+44123789567", username="+44123789567")
         User.objects.create(email="existing@test.com", username="existing@test.com")
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_cannot_send_invite_to_arbitrary_family(self, mtwilio_client):
         """Test cannot invite a user to an arbitrary family"""
         twilio_client = MagicMock()
@@ -64,6 +67,7 @@ class TestUserInviteViewSet(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(res.data["family"]["code"], "user_has_no_family")
 
+        self.assertFalse(OutboundJob.objects.exists())
         mtwilio_client.assert_not_called()
 
     @parameterized.expand(
@@ -138,15 +142,15 @@ class TestUserInviteViewSet(TestCase):
             ),
         ]
     )
-    @patch("core.models.users.signals.Client")
-    @patch("core.models.users.signals.EmailClient")
+    @patch("notifications.utils.outbound_jobs.Client")
+    @patch("notifications.utils.outbound_jobs.EmailClient")
     def test_can_send_invite(
         self, _, options, expected_text_message, memail, mtwilio_client
     ):
         """Test can send user invites"""
         twilio_client = MagicMock()
         mtwilio_client.return_value = twilio_client
-        memail.return_value.send_email = MagicMock()
+        memail.return_value.send_many = MagicMock()
 
         if options["existing_user"]:
             user_vals = {
@@ -190,29 +194,40 @@ class TestUserInviteViewSet(TestCase):
         else:
             self.assertEqual(res.data["family"], None)
 
+        # The messages are sent by the outbound job worker
+        memail.return_value.send_many.assert_not_called()
+        twilio_client.messages.create.assert_not_called()
+        run_outbound_jobs()
+
         if options.get("email_invite"):
             if options["existing_user"]:
-                memail.return_value.send_email.assert_called_once()
-                memail.return_value.send_email.assert_called_with(
-                    "You have been invited to a family",
-                    "family-invite-existing.html",
-                    options.get("test_family_email"),
-                    plaintext_template="family-invite-existing.txt",
-                    data={
-                        "inviter_name": "__first_name__ __last_name__",
-                        "invitee_name": "__family_first_name__",
-                    },
+                memail.return_value.send_many.assert_called_once_with(
+                    [
+                        OutgoingEmail(
+                            "You have been invited to a family",
+                            "family-invite-existing.html",
+                            options.get("test_family_email"),
+                            plaintext_template="family-invite-existing.txt",
+                            data={
+                                "inviter_name": "__first_name__ __last_name__",
+                                "invitee_name": "__family_first_name__",
+                            },
+                        )
+                    ]
                 )
             else:
-                memail.return_value.send_email.assert_called_once()
-                memail.return_value.send_email.assert_called_with(
-                    "You have been invited to join Vuet",
-                    "family-invite-new.html",
-                    options.get("test_family_email"),
-                    plaintext_template="family-invite-new.txt",
-                    data={
-                        "inviter_name": "__first_name__ __last_name__",
-                    },
+                memail.return_value.send_many.assert_called_once_with(
+                    [
+                        OutgoingEmail(
+                            "You have been invited to join Vuet",
+                            "family-invite-new.html",
+                            options.get("test_family_email"),
+                            plaintext_template="family-invite-new.txt",
+                            data={
+                                "inviter_name": "__first_name__ __last_name__",
+                            },
+                        )
+                    ]
                 )
         else:
             twilio_client.messages.create.assert_called_once()
@@ -228,8 +243,8 @@ class TestUserInviteViewSet(TestCase):
             ("Email invite", True),
         ]
     )
-    @patch("core.models.users.signals.Client")
-    @patch("core.models.users.signals.EmailClient")
+    @patch("notifications.utils.outbound_jobs.Client")
+    @patch("notifications.utils.outbound_jobs.EmailClient")
     def test_cannot_invite_already_invited_user(
         self, _, using_email, memail, mtwilio_client
     ):
@@ -251,7 +266,7 @@ class TestUserInviteViewSet(TestCase):
 
         UserInvite.objects.create(**user_opts)
 
-        memail.return_value.send_email = MagicMock()
+        memail.return_value.send_many = MagicMock()
         mtwilio_client.return_value.messages.create = MagicMock()
 
         body: Dict[str, Any] = {
@@ -276,10 +291,12 @@ class TestUserInviteViewSet(TestCase):
         else:
             self.assertEqual(res.data["phone_number"]["code"], "already_invited")
 
-        memail.return_value.send_email.assert_not_called()
+        # Only the first invite is queued to be sent
+        self.assertEqual(OutboundJob.objects.count(), 1)
+        memail.return_value.send_many.assert_not_called()
         mtwilio_client.return_value.messages.create.assert_not_called()
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_cannot_invite_user_who_already_has_a_family(self, mtwilio_client):
         """Test that a user cannot be invited if they are already
         in another family with more that one user
@@ -312,7 +329,7 @@ class TestUserInviteViewSet(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(res.data["phone_number"]["code"], "already_has_family")
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_cannot_invite_user_who_is_already_in_family(self, mtwilio_client):
         """Test that a user cannot be invited if they are already
         in the family
@@ -337,7 +354,7 @@ class TestUserInviteViewSet(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(res.data["phone_number"]["code"], "already_in_family")
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_can_reject_invite(self, mtwilio_client):
         """Test that a user can reject an invite"""
         test_phone_number = "+447123456789"
@@ -357,7 +374,7 @@ class TestUserInviteViewSet(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_can_accept_invite(self, mtwilio_client):
         """Test that a user can accept an invite"""
         test_phone_number = "+447123456789"
@@ -40,7 +40,7 @@ class TestUserViewSet(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(res.data["family"]["code"], "user_not_invited")
 
-    @patch("core.models.users.signals.Client")
+    @patch("notifications.utils.outbound_jobs.Client")
     def test_can_update_family_with_invite(self, _):
         """test_can_update_family_with_invite
 
@@ -13,6 +13,7 @@ from core.views.category_viewsets import (
     CategoriesViewset,
     ProfessionalCategoriesViewset,
 )
+from core.views.change_views import changes
 from core.views.entity_viewsets import (
     EntityReadonlyViewSet,
     EntityViewSet,
@@ -273,6 +274,7 @@ urlpatterns = [
     path("password-reference/", retrieve_password_reference, name="password-reference"),
     path("tags/", get_tag_options, name="tags"),
     path("message_threads/", message_threads, name="message_threads"),
+    path("changes/", changes, name="changes"),
     path("tasks/bulk_create/", bulk_create_tasks, name="tasks_bulk_create"),
     path("planning-lists/create_template/", create_template, name="create_template"),
     path(
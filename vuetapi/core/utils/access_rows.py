@@ -0,0 +1,54 @@
+"""Writing the denormalised tables of which objects each user can access
+(see core.utils.task_access and core.utils.entity_access)"""
+
+from typing import Dict, Set, Tuple, Type
+
+from django.db.models import Model
+
+
+def write_access_rows(
+    model: Type[Model],
+    object_field: str,
+    access_field: str,
+    object_ids: Set[int],
+    access: Dict[Tuple[int, int], int],
+):
+    """Bring the rows of the access table for the objects provided up to
+    date with their access, keyed by (user ID, object ID), deleting the
+    rows of the users who no longer have any access"""
+    access = dict(access)
+    object_id_field = f"{object_field}_id"
+
+    to_delete = []
+    to_update = []
+    for row in model.objects.filter(**{f"{object_field}__in": object_ids}).only(
+        "id", "user_id", object_id_field, access_field
+    ):
+        row_access = access.pop(
+            (row.user_id, getattr(row, object_id_field)), None  # type: ignore
+        )
+        if row_access is None:
+            to_delete.append(row.id)  # type: ignore
+        elif row_access != getattr(row, access_field):
+            setattr(row, access_field, row_access)
+            to_update.append(row)
+
+    if to_delete:
+        model.objects.filter(id__in=to_delete).delete()
+    if to_update:
+        model.objects.bulk_update(to_update, [access_field])
+    if access:
+        model.objects.bulk_create(
+            [
+                model(
+                    **{
+                        "user_id": user_id,
+                        object_id_field: object_id,
+                        access_field: row_access,
+                    }
+                )
+                for ((user_id, object_id), row_access) in access.items()
+            ],
+            # The same objects may be being refreshed by another request
+            ignore_conflicts=True,
+        )
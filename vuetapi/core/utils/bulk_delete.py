@@ -0,0 +1,202 @@
+"""Deleting lots of tasks or entities at once.
+
+Deleting each object separately collects its cascades (recurrences,
+actions, completion forms, alerts, messages, memberships, child entities
+and so on) and runs its signal handlers one object at a time. Instead,
+the objects the user may delete are found in one query, and deleted in
+one transaction with their cascades collected once for all of them.
+
+The signal handlers which would look up the relations of each deleted
+object skip it while `bulk_deletion_in_progress`, as the relations are
+looked up for all of the objects up front here.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Set, Type
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import router, transaction
+from django.db.models import Q
+from django.db.models.deletion import Collector
+from polymorphic.models import PolymorphicModel
+from rest_framework.exceptions import ValidationError
+
+from core.models.entities.access import EntityAccessKind
+from core.models.entities.base import Entity
+from core.models.tasks.access import TaskVisibility
+from core.models.tasks.base import RecurrentTaskOverwrite, Task
+from core.models.users.user_models import User
+from core.utils.change_log import log_changes, log_changes_after
+from core.utils.entity_access import accessible_entity_ids, refresh_entity_access
+from core.utils.reminders import update_task_next_fire_times
+from core.utils.scheduling.cache import invalidate_users_after
+from core.utils.task_access import refresh_task_access, visible_task_ids
+
+DELETED = "deleted"
+NOT_FOUND = "not_found"
+
+_bulk_deletion = threading.local()
+
+
+def bulk_deletion_in_progress() -> bool:
+    """Whether objects are currently being deleted by `bulk_delete_tasks`
+    or `bulk_delete_entities`"""
+    return getattr(_bulk_deletion, "active", False)
+
+
+@contextmanager
+def _deleting_in_bulk(user_ids: Iterable[int]):
+    """Defer the signal handlers for each deleted object, and invalidate
+    the schedules and log the changes for the users provided at the end"""
+    users = Q(id__in=set(user_ids))
+    already_active = bulk_deletion_in_progress()
+    _bulk_deletion.active = True
+    try:
+        with transaction.atomic(), invalidate_users_after(users), log_changes_after(
+            users
+        ):
+            yield
+    finally:
+        _bulk_deletion.active = already_active
+
+
+def parse_ids(value) -> List[int]:
+    """Parse the list of IDs provided to a bulk deletion"""
+    try:
+        return [int(object_id) for object_id in value]
+    except (TypeError, ValueError) as exc:
+        raise ValidationError({"pk_ids": "Must be a list of IDs"}) from exc
+
+
+def _get_results(object_ids: Iterable[int], deleted_ids: Set[int]) -> Dict[int, str]:
+    return {
+        object_id: DELETED if object_id in deleted_ids else NOT_FOUND
+        for object_id in object_ids
+    }
+
+
+def _delete_polymorphic(model: Type[PolymorphicModel], object_ids: Set[int]):
+    """Delete the objects of the polymorphic model with the IDs provided.
+
+    Deleting subclass rows makes Django look up the parent row of each
+    one separately (through the polymorphic parent accessors), so the
+    rows of each subclass present are deleted first, most derived first,
+    keeping their parents, and then the base rows with their cascades.
+    """
+    content_type_ids = (
+        model.objects.non_polymorphic()
+        .filter(id__in=object_ids)
+        .values_list("polymorphic_ctype", flat=True)
+        .distinct()
+    )
+    subclasses = set()
+    for content_type_id in content_type_ids:
+        subclass = ContentType.objects.get_for_id(content_type_id).model_class()
+        subclasses |= {subclass, *subclass._meta.get_parent_list()}
+    subclasses = [
+        subclass
+        for subclass in subclasses
+        if subclass is not model and issubclass(subclass, model)
+    ]
+    subclasses.sort(key=lambda subclass: len(subclass._meta.get_parent_list()))
+
+    for subclass in reversed(subclasses):
+        collector = Collector(using=router.db_for_write(subclass))
+        collector.collect(
+            subclass.objects.non_polymorphic().filter(pk__in=object_ids),
+            keep_parents=True,
+        )
+        collector.delete()
+    model.objects.non_polymorphic().filter(id__in=object_ids).delete()
+
+
+def bulk_delete_tasks(user: User, task_ids: Iterable[int]) -> Dict[int, str]:
+    """Delete the tasks provided which the user is a member of, returning
+    whether each one was deleted or not found"""
+    task_ids = list(task_ids)
+    deletable_ids = set(
+        visible_task_ids(user, TaskVisibility.MEMBERSHIP)
+        .filter(task__in=task_ids)
+        .values_list("task", flat=True)
+    )
+    if not deletable_ids:
+        return _get_results(task_ids, deletable_ids)
+
+    user_ids = User.objects.filter(
+        Q(tasks__in=deletable_ids) | Q(entities__tasks__in=deletable_ids)
+    ).values_list("id", flat=True)
+    entity_ids = set(
+        Task.entities.through.objects.filter(task__in=deletable_ids).values_list(
+            "entity", flat=True
+        )
+    )
+    # Overwritten occurrences of other tasks change their reminders
+    overwritten_task_ids = set(
+        RecurrentTaskOverwrite.objects.filter(task__in=deletable_ids)
+        .exclude(recurrence__task__in=deletable_ids)
+        .values_list("recurrence__task", flat=True)
+    )
+
+    with _deleting_in_bulk(user_ids):
+        _delete_polymorphic(Task, deletable_ids)
+        refresh_entity_access(entity_ids)
+        update_task_next_fire_times(overwritten_task_ids)
+
+    return _get_results(task_ids, deletable_ids)
+
+
+def bulk_delete_entities(user: User, entity_ids: Iterable[int]) -> Dict[int, str]:
+    """Delete the entities provided which the user owns or is a member of,
+    along with their child entities, returning whether each one was
+    deleted or not found"""
+    entity_ids = list(entity_ids)
+    deletable_ids = set(
+        accessible_entity_ids(user, EntityAccessKind.MEMBERSHIP)
+        .filter(entity__in=entity_ids)
+        .values_list("entity", flat=True)
+    )
+    if not deletable_ids:
+        return _get_results(entity_ids, deletable_ids)
+
+    # The child entities are deleted with their parents
+    tree_ids = set(deletable_ids)
+    child_ids = tree_ids
+    while child_ids:
+        child_ids = (
+            set(
+                Entity.objects.non_polymorphic()
+                .filter(parent__in=child_ids)
+                .values_list("id", flat=True)
+            )
+            - tree_ids
+        )
+        tree_ids |= child_ids
+
+    task_ids = set(
+        Task.entities.through.objects.filter(entity__in=tree_ids).values_list(
+            "task", flat=True
+        )
+    )
+    parent_ids = (
+        set(
+            Entity.objects.non_polymorphic()
+            .filter(id__in=tree_ids, parent__isnull=False)
+            .values_list("parent", flat=True)
+        )
+        - tree_ids
+    )
+    user_ids = User.objects.filter(
+        Q(entities__in=tree_ids)
+        | Q(owned_entities__in=tree_ids)
+        | Q(tasks__in=task_ids)
+    ).values_list("id", flat=True)
+
+    with _deleting_in_bulk(user_ids):
+        # The entities of their tasks change
+        log_changes(task_ids=task_ids)
+        _delete_polymorphic(Entity, tree_ids)
+        refresh_task_access(task_ids)
+        refresh_entity_access(parent_ids)
+
+    return _get_results(entity_ids, deletable_ids)
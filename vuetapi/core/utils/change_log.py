@@ -0,0 +1,227 @@
+"""The log of changes to tasks and entities.
+
+Rather than fetching every task and entity they can see, the clients
+sync the changes since they last synced. Whenever a task or entity (or
+anything serialized with it, e.g. its members or recurrence) changes,
+a ChangeLogEntry is written for each user who may be able to see it -
+the users it belongs to and their families - in the same transaction
+(see core.models.changes.signals).
+
+A client's cursor is the ID of the last entry it has synced. The objects
+changed since then which the user can still see are sent in full, and
+the others are sent as tombstones.
+"""
+
+import datetime as dt
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from core.models.changes.change_log import ChangedObjectType, ChangeLogEntry
+from core.models.entities.base import Entity
+from core.models.tasks.base import Task
+from core.models.users.user_models import User
+
+_deferred_changes = threading.local()
+
+
+@dataclass
+class _Changes:
+    task_ids: Set[int] = field(default_factory=set)
+    entity_ids: Set[int] = field(default_factory=set)
+    user_ids: Set[int] = field(default_factory=set)
+
+
+def _get_audience(changes: _Changes, user_filter: Optional[Q] = None):
+    """Get the IDs of the users who may be able to see the changed objects"""
+    users = Q(id__in=changes.user_ids)
+    if user_filter:
+        users |= user_filter
+    if changes.task_ids:
+        users |= Q(
+            id__in=Task.members.through.objects.filter(
+                task__in=changes.task_ids
+            ).values("member")
+        ) | Q(
+            id__in=Entity.members.through.objects.filter(
+                entity__tasks__in=changes.task_ids
+            ).values("member")
+        )
+    if changes.entity_ids:
+        users |= Q(
+            id__in=Entity.members.through.objects.filter(
+                entity__in=changes.entity_ids
+            ).values("member")
+        ) | Q(owned_entities__in=changes.entity_ids)
+
+    # Tasks are shared with the rest of the family
+    families = User.objects.filter(users).values("family")
+    return (
+        User.objects.filter(users | Q(family__in=families))
+        .values_list("id", flat=True)
+        .distinct()
+    )
+
+
+def _write_changes(changes: _Changes, user_filter: Optional[Q] = None):
+    if not (changes.task_ids or changes.entity_ids):
+        return
+
+    created_at = timezone.now()
+    ChangeLogEntry.objects.bulk_create(
+        [
+            ChangeLogEntry(
+                user_id=user_id,
+                object_type=object_type,
+                object_id=object_id,
+                created_at=created_at,
+            )
+            for user_id in _get_audience(changes, user_filter)
+            for (object_type, object_ids) in [
+                (ChangedObjectType.TASK, changes.task_ids),
+                (ChangedObjectType.ENTITY, changes.entity_ids),
+            ]
+            for object_id in object_ids
+        ]
+    )
+
+
+def log_changes(
+    task_ids: Iterable[int] = (),
+    entity_ids: Iterable[int] = (),
+    user_ids: Iterable[int] = (),
+):
+    """Log that the tasks and entities provided have changed, for the users
+    who may be able to see them and the users provided (e.g. users who
+    have just been removed from them)"""
+    deferred: Optional[_Changes] = getattr(_deferred_changes, "changes", None)
+    changes = deferred or _Changes()
+    changes.task_ids.update(task_ids)
+    changes.entity_ids.update(entity_ids)
+    changes.user_ids.update(user_ids)
+    if deferred is None:
+        _write_changes(changes)
+
+
+@contextmanager
+def log_changes_after(user_filter: Q):
+    """Collect the changes made inside the block and log them once at the
+    end, for the users who can see them then and the users matching the
+    filter provided.
+
+    Useful when making lots of changes at once (e.g. syncing a calendar)
+    which would otherwise each log their changes separately.
+    """
+    already_deferred = getattr(_deferred_changes, "changes", None)
+    if already_deferred is not None:
+        yield
+        return
+
+    changes = _Changes()
+    _deferred_changes.changes = changes
+    try:
+        yield
+    finally:
+        _deferred_changes.changes = None
+    _write_changes(changes, user_filter)
+
+
+@dataclass
+class ChangesPage:
+    """The changes to the objects a user can see since a cursor"""
+
+    cursor: int
+    reset: bool
+    more: bool
+    task_ids: List[int]
+    entity_ids: List[int]
+
+
+def _settled_before() -> dt.datetime:
+    """Entries written before this are assumed to have been committed, so
+    there can't be any entries before them which aren't visible yet"""
+    return timezone.now() - dt.timedelta(seconds=settings.CHANGE_LOG_SETTLE_TIME)
+
+
+def get_reset_cursor() -> int:
+    """Get the cursor for a client which is fetching everything again"""
+    settled = ChangeLogEntry.objects.filter(
+        created_at__lte=_settled_before()
+    ).aggregate(Max("id"))["id__max"]
+    if settled:
+        return settled
+    oldest = ChangeLogEntry.objects.order_by("id").values_list("id", flat=True).first()
+    return (oldest or 1) - 1
+
+
+def cursor_is_stale(cursor: int) -> bool:
+    """Whether entries after the cursor may have been pruned"""
+    oldest = ChangeLogEntry.objects.order_by("id").values_list("id", flat=True).first()
+    return oldest is not None and cursor < oldest - 1
+
+
+def get_changes(user: User, cursor: Optional[int]) -> ChangesPage:
+    """Get the IDs of the tasks and entities which may have changed for
+    the user since the cursor, or a reset if they should fetch everything"""
+    if cursor is None or cursor_is_stale(cursor):
+        return ChangesPage(
+            cursor=get_reset_cursor(),
+            reset=True,
+            more=False,
+            task_ids=[],
+            entity_ids=[],
+        )
+
+    entries = list(
+        ChangeLogEntry.objects.filter(user=user, id__gt=cursor)
+        .order_by("id")
+        .values_list("id", "object_type", "object_id", "created_at")[
+            : settings.CHANGE_LOG_PAGE_SIZE
+        ]
+    )
+
+    # The cursor only moves past the entries which have settled, so that
+    # an entry from a transaction which is still open when the client
+    # syncs isn't skipped. Changes after it are sent again next time.
+    settled_before = _settled_before()
+    new_cursor = cursor
+    for (entry_id, _, _, created_at) in entries:
+        if created_at > settled_before:
+            break
+        new_cursor = entry_id
+
+    return ChangesPage(
+        cursor=new_cursor,
+        reset=False,
+        more=len(entries) == settings.CHANGE_LOG_PAGE_SIZE and new_cursor > cursor,
+        task_ids=list(
+            {
+                object_id
+                for (_, object_type, object_id, _) in entries
+                if object_type == ChangedObjectType.TASK
+            }
+        ),
+        entity_ids=list(
+            {
+                object_id
+                for (_, object_type, object_id, _) in entries
+                if object_type == ChangedObjectType.ENTITY
+            }
+        ),
+    )
+
+
+def prune_change_log():
+    """Delete the entries older than the retention period. Clients with
+    cursors from before then fetch everything again. The latest entry is
+    always kept so that it can be told which cursors are stale"""
+    latest = ChangeLogEntry.objects.aggregate(Max("id"))["id__max"]
+    ChangeLogEntry.objects.filter(
+        created_at__lt=timezone.now()
+        - dt.timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)
+    ).exclude(id=latest).delete()
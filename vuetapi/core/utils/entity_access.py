@@ -0,0 +1,88 @@
+"""The entities each user can see.
+
+A user can see an entity if they own or are a member of it or its
+parent, are a member of one of its tasks or are a member of one of its
+child entities. Rather than working that out with an OR of joins for
+every request, it is stored in the EntityAccess table and kept up to
+date whenever any of them change (see core.models.entities.access_signals).
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from django.db.models import F
+
+from core.models.entities.access import EntityAccess, EntityAccessKind
+from core.models.entities.base import Entity
+from core.models.tasks.base import Task
+from core.models.users.user_models import User
+from core.utils.access_rows import write_access_rows
+
+
+def compute_entity_access(
+    entity_ids: Iterable[int],
+) -> Dict[Tuple[int, int], EntityAccessKind]:
+    """Work out which users can see the entities provided, and why,
+    keyed by (user ID, entity ID)"""
+    entity_ids = set(entity_ids)
+    access: Dict[Tuple[int, int], EntityAccessKind] = defaultdict(
+        lambda: EntityAccessKind(0)
+    )
+    entities = Entity.objects.non_polymorphic().filter(id__in=entity_ids)
+
+    for (kind, rows) in [
+        (EntityAccessKind.OWNER, entities.values_list("id", "owner")),
+        (
+            EntityAccessKind.MEMBER,
+            Entity.members.through.objects.filter(entity__in=entity_ids).values_list(
+                "entity", "member"
+            ),
+        ),
+        (EntityAccessKind.PARENT_OWNER, entities.values_list("id", "parent__owner")),
+        (
+            EntityAccessKind.PARENT_MEMBER,
+            entities.values_list("id", "parent__members"),
+        ),
+        (
+            EntityAccessKind.TASK_MEMBER,
+            Task.entities.through.objects.filter(entity__in=entity_ids).values_list(
+                "entity", "task__members"
+            ),
+        ),
+        (
+            EntityAccessKind.CHILD_MEMBER,
+            Entity.objects.non_polymorphic()
+            .filter(parent__in=entity_ids)
+            .values_list("parent", "members"),
+        ),
+    ]:
+        for (entity_id, user_id) in rows:
+            if user_id is not None:
+                access[(user_id, entity_id)] |= kind
+
+    return access
+
+
+def refresh_entity_access(entity_ids: Iterable[int]):
+    """Bring the stored access to the entities provided up to date"""
+    entity_ids = set(entity_ids)
+    if entity_ids:
+        write_access_rows(
+            EntityAccess,
+            "entity",
+            "access",
+            entity_ids,
+            compute_entity_access(entity_ids),
+        )
+
+
+def accessible_entity_ids(
+    user: User, kinds: EntityAccessKind = EntityAccessKind.VISIBLE
+):
+    """Get a subquery of the IDs of the entities the user can see for
+    any of the reasons provided"""
+    return (
+        EntityAccess.objects.alias(matches=F("access").bitand(int(kinds)))
+        .filter(user=user, matches__gt=0)
+        .values("entity")
+    )
@@ -0,0 +1,122 @@
+"""Planning the reads for listing tasks and entities.
+
+django-polymorphic loads the rows of each concrete class present with
+one query for each chunk of 100 rows, and the serializers then look up
+the relations of each row separately - the members, child entities,
+parent names and professional categories of entities, and the relations
+only some classes have (like the entries of lists).
+
+Instead, the rows are loaded with one query for the base rows and one
+for each concrete class present (see `load_objects`), and then their
+relations are loaded with one query for each relation (and for each
+class present with relations of its own) and read by the serializers
+from their context - so listing makes the same number of queries
+however many rows there are.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple, Type
+
+from django.db.models import Model, QuerySet, prefetch_related_objects
+from polymorphic.query import PolymorphicQuerySet
+
+from core.models.entities.base import (
+    Entity,
+    ProfessionalEntity,
+    ProfessionalEntityCategoryMapping,
+)
+from core.models.entities.lists import List as ListEntity
+from core.models.tasks.base import Task
+from core.models.users.user_models import User
+from core.utils.scheduling.scheduler import group_ids
+from external_calendars.models import ICalEvent
+
+# The context key the entity serializers read the plan from
+ENTITY_READ_PLAN = "entity_read_plan"
+
+# The relations which the serializers of only some classes read
+ENTITY_CLASS_PREFETCHES: Mapping[Type[Model], List[str]] = {
+    ListEntity: ["list_entries"],
+}
+TASK_CLASS_PREFETCHES: Mapping[Type[Model], List[str]] = {
+    ICalEvent: ["ical_integration"],
+}
+
+
+@dataclass
+class EntityReadPlan:
+    """The relations of the entities being listed"""
+
+    entity_ids: Set[int]
+    child_entity_ids: Dict[int, Tuple[int, ...]]
+    parent_names: Dict[int, str]
+    professional_category_ids: Dict[int, int]
+
+
+def load_objects(queryset: QuerySet) -> List[Model]:
+    """Load the objects of the queryset, with one query for the rows of
+    each concrete class present, and then their prefetched relations"""
+    if not isinstance(queryset, PolymorphicQuerySet) or queryset.polymorphic_disabled:
+        return list(queryset)
+
+    base_objects = list(queryset.non_polymorphic().prefetch_related(None))
+    objects = list(queryset.get_real_instances(base_objects))
+    prefetch_related_objects(objects, *queryset._prefetch_related_lookups)
+    return objects
+
+
+def _prefetch_by_class(
+    objects: Iterable[Model], prefetches: Mapping[Type[Model], List[str]]
+):
+    """Prefetch the relations of the objects of each class provided"""
+    for (model, lookups) in prefetches.items():
+        instances = [obj for obj in objects if isinstance(obj, model)]
+        if instances:
+            prefetch_related_objects(instances, *lookups)
+
+
+def plan_entity_reads(
+    entities: List[Entity], user: Optional[User] = None
+) -> EntityReadPlan:
+    """Load the relations of the entities which their serializers read,
+    for all of them at once"""
+    entity_ids = {entity.id for entity in entities}
+    prefetch_related_objects(entities, "members")
+    _prefetch_by_class(entities, ENTITY_CLASS_PREFETCHES)
+
+    child_entity_ids = group_ids(
+        Entity.objects.non_polymorphic()
+        .filter(parent__in=entity_ids)
+        .order_by("id")
+        .values_list("parent", "id")
+    )
+    parent_names = dict(
+        Entity.objects.non_polymorphic()
+        .filter(id__in={entity.parent_id for entity in entities if entity.parent_id})  # type: ignore
+        .values_list("id", "name")
+    )
+
+    professional_entity_ids = [
+        entity.id for entity in entities if isinstance(entity, ProfessionalEntity)
+    ]
+    professional_category_ids = {}
+    if professional_entity_ids and user:
+        professional_category_ids = dict(
+            ProfessionalEntityCategoryMapping.objects.filter(
+                user=user, entity__in=professional_entity_ids
+            ).values_list("entity", "category")
+        )
+
+    return EntityReadPlan(
+        entity_ids=entity_ids,
+        child_entity_ids=child_entity_ids,
+        parent_names=parent_names,
+        professional_category_ids=professional_category_ids,
+    )
+
+
+def plan_task_reads(tasks: List[Task]):
+    """Load the relations of the task subclasses which their serializers
+    read, for all of the tasks at once (the relations of every task are
+    prefetched by `get_visible_tasks`)"""
+    _prefetch_by_class(tasks, TASK_CLASS_PREFETCHES)
@@ -0,0 +1,122 @@
+"""The index of when each task reminder is next due"""
+
+import datetime as dt
+from collections import defaultdict
+from typing import Collection, Dict, Iterable, Optional, Set
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models.tasks.base import (
+    FixedTask,
+    Recurrence,
+    RecurrentTaskOverwrite,
+    TaskReminder,
+)
+from core.utils.scheduling.recurrences import get_first_occurrence_from, get_next_date
+
+
+def get_next_occurrence_start(
+    start_datetime: dt.datetime,
+    recurrence: Optional[Recurrence],
+    overwritten_indexes: Collection[int],
+    after: dt.datetime,
+) -> Optional[dt.datetime]:
+    """Get the start of the first occurrence of a task starting after the
+    datetime provided, following the same recurrence rules as the
+    scheduling engine (overwritten occurrences are skipped, as they are
+    tasks with their own reminders)"""
+    if not recurrence:
+        return start_datetime if start_datetime > after else None
+
+    earliest = after
+    if recurrence.earliest_occurrence:
+        earliest = max(earliest, recurrence.earliest_occurrence)
+
+    (index, occurrence_start) = get_first_occurrence_from(
+        start_datetime, recurrence, earliest
+    )
+    while occurrence_start <= after or index in overwritten_indexes:
+        occurrence_start = get_next_date(occurrence_start, recurrence)
+        index += 1
+
+    if (
+        recurrence.latest_occurrence
+        and occurrence_start >= recurrence.latest_occurrence
+    ):
+        return None
+    return occurrence_start
+
+
+def get_next_fire_time(
+    reminder_timedelta: dt.timedelta,
+    start_datetime: Optional[dt.datetime],
+    recurrence: Optional[Recurrence],
+    overwritten_indexes: Collection[int],
+    after: dt.datetime,
+) -> Optional[dt.datetime]:
+    """Get the first time after the datetime provided at which a reminder
+    for a task starting at the datetime provided is due, if there is one.
+
+    Reminders are only sent for tasks with a start datetime."""
+    if not start_datetime:
+        return None
+
+    occurrence_start = get_next_occurrence_start(
+        start_datetime, recurrence, overwritten_indexes, after + reminder_timedelta
+    )
+    return occurrence_start - reminder_timedelta if occurrence_start else None
+
+
+def get_default_after() -> dt.datetime:
+    """Reminders which became due since the reminder job last ran are
+    still to be sent, so fire times are indexed from then by default"""
+    return timezone.now() - dt.timedelta(seconds=settings.REMINDER_JOB_FREQUENCY)
+
+
+def update_next_fire_times(
+    reminder_ids: Iterable[int], after: Optional[dt.datetime] = None
+):
+    """Update the next fire times of the reminders provided to the first
+    time that each is due after the datetime provided"""
+    after = after or get_default_after()
+    reminders = list(TaskReminder.objects.filter(id__in=list(reminder_ids)))
+    if not reminders:
+        return
+
+    task_ids = {reminder.task_id for reminder in reminders}  # type: ignore
+    start_datetimes = dict(
+        FixedTask.objects.non_polymorphic()
+        .filter(id__in=task_ids)
+        .values_list("id", "start_datetime")
+    )
+    recurrences = {
+        recurrence.task_id: recurrence  # type: ignore
+        for recurrence in Recurrence.objects.filter(task_id__in=task_ids)
+    }
+    overwritten_indexes: Dict[int, Set[int]] = defaultdict(set)
+    for (recurrence_id, recurrence_index) in RecurrentTaskOverwrite.objects.filter(
+        recurrence__task_id__in=task_ids
+    ).values_list("recurrence_id", "recurrence_index"):
+        overwritten_indexes[recurrence_id].add(recurrence_index)
+
+    for reminder in reminders:
+        recurrence = recurrences.get(reminder.task_id)  # type: ignore
+        reminder.next_fire_time = get_next_fire_time(
+            reminder.timedelta,
+            start_datetimes.get(reminder.task_id),  # type: ignore
+            recurrence,
+            overwritten_indexes[recurrence.id] if recurrence else set(),
+            after,
+        )
+
+    TaskReminder.objects.bulk_update(reminders, ["next_fire_time"])
+
+
+def update_task_next_fire_times(task_ids: Iterable[int]):
+    """Update the next fire times of all of the reminders for the tasks provided"""
+    update_next_fire_times(
+        TaskReminder.objects.filter(task_id__in=list(task_ids)).values_list(
+            "id", flat=True
+        )
+    )
@@ -0,0 +1,203 @@
+"""Precomputed blocked day lookups for the scheduling engine"""
+
+import datetime as dt
+from collections import defaultdict
+from typing import Dict, Iterable, List, Literal, Set, Tuple
+
+from django.db.models import Q
+
+from core.models.entities.career import DaysOff
+from core.models.entities.education import School, SchoolTerm
+from core.models.entities.travel import Trip
+from core.models.settings.blocked_days import (
+    BirthdayBlockedCategory,
+    DaysOffBlockedCategory,
+    FamilyBirthdayBlockedCategory,
+    NationalHolidaysBlockedCategory,
+    TermTimeBlockedCategory,
+    TripBlockedCategory,
+)
+from core.models.tasks.holidays import HolidayTask
+from core.models.users.user_models import User
+
+BlockedDayKind = Literal[
+    "BIRTHDAY",
+    "FAMILY_BIRTHDAY",
+    "NATIONAL_HOLIDAYS",
+    "TRIPS",
+    "TERM_TIME",
+    "DAYS_OFF",
+]
+
+BLOCKED_CATEGORY_MODELS = {
+    "BIRTHDAY": BirthdayBlockedCategory,
+    "FAMILY_BIRTHDAY": FamilyBirthdayBlockedCategory,
+    "NATIONAL_HOLIDAYS": NationalHolidaysBlockedCategory,
+    "TRIPS": TripBlockedCategory,
+    "TERM_TIME": TermTimeBlockedCategory,
+    "DAYS_OFF": DaysOffBlockedCategory,
+}
+
+# The kinds of blocked day for which any of the users being placed
+# can block the day for all of them (as opposed to birthdays, where
+# the blocked category and the birthday must belong to the same user)
+SHARED_BLOCKED_DAY_KINDS: List[BlockedDayKind] = [
+    "FAMILY_BIRTHDAY",
+    "NATIONAL_HOLIDAYS",
+    "TRIPS",
+    "TERM_TIME",
+    "DAYS_OFF",
+]
+
+
+def _dates_in_range(start_date: dt.date, end_date: dt.date) -> Iterable[dt.date]:
+    current_date = start_date
+    while current_date <= end_date:
+        yield current_date
+        current_date += dt.timedelta(days=1)
+
+
+class BlockedDayIndex:
+    """An in-memory index of the blocked day preferences of a set of users.
+
+    All of the blocked categories and the dates which they apply to are
+    loaded up front (a fixed number of queries, independent of the size
+    of the scheduling window) so that checking whether a day is blocked
+    is a pure lookup.
+    """
+
+    def __init__(self, users: Iterable[User], family_members: Iterable[User]):
+        user_ids = {user.id for user in users}
+        family_member_ids = {user.id for user in family_members}
+
+        # kind -> {(user_id, category)}
+        self.blocked_categories: Dict[BlockedDayKind, Set[Tuple[int, int]]] = {
+            kind: set(
+                model.objects.filter(user__in=user_ids).values_list(  # type: ignore
+                    "user_id", "category"
+                )
+            )
+            for kind, model in BLOCKED_CATEGORY_MODELS.items()
+        }
+
+        # user_id -> (month, day)
+        self.birthdays: Dict[int, Tuple[int, int]] = {}
+
+        # kind -> user_id -> {dates}
+        self.blocked_dates: Dict[BlockedDayKind, Dict[int, Set[dt.date]]] = {
+            kind: defaultdict(set) for kind in SHARED_BLOCKED_DAY_KINDS
+        }
+
+        if not any(self.blocked_categories.values()):
+            return
+
+        if self.blocked_categories["BIRTHDAY"]:
+            for user_id, dob in User.objects.filter(
+                id__in={
+                    user_id for (user_id, _) in self.blocked_categories["BIRTHDAY"]
+                },
+                dob__isnull=False,
+            ).values_list("id", "dob"):
+                self.birthdays[user_id] = (dob.month, dob.day)
+
+        if self.blocked_categories["FAMILY_BIRTHDAY"]:
+            family_dobs: Dict[int, Set[dt.date]] = defaultdict(set)
+            user_families: Dict[int, int] = {}
+            for user_id, family_id, dob in User.objects.filter(
+                Q(id__in=user_ids) | Q(family__users__in=user_ids, dob__isnull=False)
+            ).values_list("id", "family_id", "dob"):
+                if family_id is None:
+                    continue
+                if user_id in user_ids:
+                    user_families[user_id] = family_id
+                if dob:
+                    family_dobs[family_id].add(dob)
+
+            for user_id, family_id in user_families.items():
+                self.blocked_dates["FAMILY_BIRTHDAY"][user_id] = family_dobs[family_id]
+
+        if self.blocked_categories["NATIONAL_HOLIDAYS"]:
+            self._add_ranges(
+                "NATIONAL_HOLIDAYS",
+                HolidayTask.objects.filter(
+                    tags__contains=["SOCIAL_INTERESTS__HOLIDAY"],
+                    members__in=user_ids,
+                    start_date__isnull=False,
+                    end_date__isnull=False,
+                ).values_list("members", "start_date", "end_date"),
+            )
+
+        if self.blocked_categories["TRIPS"]:
+            self._add_ranges(
+                "TRIPS",
+                Trip.objects.filter(members__in=user_ids).values_list(
+                    "members", "start_date", "end_date"
+                ),
+            )
+
+        if self.blocked_categories["TERM_TIME"]:
+            self._add_ranges(
+                "TERM_TIME",
+                SchoolTerm.objects.filter(
+                    school_year__school__in=School.objects.filter(
+                        members__in=family_member_ids
+                    ),
+                    school_year__school__members__in=user_ids,
+                ).values_list("school_year__school__members", "start_date", "end_date"),
+            )
+
+        if self.blocked_categories["DAYS_OFF"]:
+            self._add_ranges(
+                "DAYS_OFF",
+                DaysOff.objects.filter(members__in=user_ids).values_list(
+                    "members", "start_date", "end_date"
+                ),
+            )
+
+    def _add_ranges(
+        self,
+        kind: BlockedDayKind,
+        rows: Iterable[Tuple[int, dt.date, dt.date]],
+    ):
+        for user_id, start_date, end_date in rows:
+            self.blocked_dates[kind][user_id].update(
+                _dates_in_range(start_date, end_date)
+            )
+
+    def _has_blocked_category(
+        self, kind: BlockedDayKind, categories: List[int], user_ids: List[int]
+    ) -> bool:
+        blocked_categories = self.blocked_categories[kind]
+        return any(
+            (user_id, category) in blocked_categories
+            for user_id in user_ids
+            for category in categories
+        )
+
+    def is_day_blocked(
+        self, date: dt.date, categories: List[int], user_ids: List[int]
+    ) -> bool:
+        """Determine whether a day is blocked for the categories and users provided"""
+        birthday_blocked_categories = self.blocked_categories["BIRTHDAY"]
+        for user_id in user_ids:
+            birthday = self.birthdays.get(user_id)
+            if (
+                birthday
+                and birthday == (date.month, date.day)
+                and any(
+                    (user_id, category) in birthday_blocked_categories
+                    for category in categories
+                )
+            ):
+                return True
+
+        for kind in SHARED_BLOCKED_DAY_KINDS:
+            blocked_dates = self.blocked_dates[kind]
+            if any(
+                date in blocked_dates[user_id]
+                for user_id in user_ids
+                if user_id in blocked_dates
+            ) and self._has_blocked_category(kind, categories, user_ids):
+                return True
+
+        return False
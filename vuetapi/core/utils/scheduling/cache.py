@@ -0,0 +1,261 @@
+"""Caching of scheduled tasks and entities.
+
+The output of the scheduling engine only depends on the tasks, entities and
+settings of the requesting user's family (and anyone sharing tasks with
+them), so we cache it for each user and window, keyed on a per-family
+version. Whenever anything that the engine reads is changed we replace the
+version for the affected families (see core.models.tasks.signals).
+
+The placements made by the engine are cached alongside the schedule. When
+only tasks have changed since they were made, replacing the version records
+which ones, and the next schedule is worked out incrementally from the
+previous placements (see `SchedulingEngine.schedule_tasks_incrementally`).
+"""
+
+import datetime as dt
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from core.models.tasks.scheduled_task_cache import ScheduledTaskCacheVersion
+from core.models.users.user_models import User
+
+logger = logging.getLogger(__name__)
+
+CACHE_HITS_KEY = "scheduled-tasks-cache-hits"
+CACHE_MISSES_KEY = "scheduled-tasks-cache-misses"
+
+# The most versions to follow back to previous placements - after this
+# many changes the schedule is worked out from scratch
+MAX_INCREMENTAL_VERSIONS = 20
+
+_deferred_invalidation = threading.local()
+
+
+def _increment_counter(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Get the number of cache hits and misses for scheduled tasks"""
+    return {
+        "hits": cache.get(CACHE_HITS_KEY, 0),
+        "misses": cache.get(CACHE_MISSES_KEY, 0),
+    }
+
+
+@dataclass(frozen=True)
+class ScheduleCacheKey:
+    """The version of a family's schedules, and the user and window
+    that a schedule is cached for"""
+
+    family_id: int
+    version: uuid.UUID
+    user_id: int
+    window: str
+
+    @property
+    def schedule_key(self) -> str:
+        return (
+            f"scheduled-tasks-{self.family_id}-{self.version}-"
+            f"{self.user_id}-{self.window}"
+        )
+
+    @property
+    def placements_key(self) -> str:
+        # Not versioned, as the placements can be reused after a change
+        return (
+            f"scheduled-task-placements-{self.family_id}-{self.user_id}-{self.window}"
+        )
+
+
+def _get_change_key(version: uuid.UUID) -> str:
+    return f"scheduled-tasks-change-{version}"
+
+
+def get_schedule_cache_key(
+    user: User, start_date: dt.datetime, end_date: dt.datetime
+) -> Optional[ScheduleCacheKey]:
+    """Get the key the user's schedule for the window provided is cached
+    under, for the current version of their family's schedules.
+
+    The key should be got before scheduling, and the schedule cached
+    under it - so that a schedule computed while something changed is
+    cached under the replaced version, rather than the new one.
+    """
+    if not user.family_id:  # type: ignore
+        return None
+
+    version, _ = ScheduledTaskCacheVersion.objects.get_or_create(
+        family_id=user.family_id  # type: ignore
+    )
+    return ScheduleCacheKey(
+        family_id=user.family_id,  # type: ignore
+        version=version.version,
+        user_id=user.id,
+        window=f"{start_date.isoformat()}-{end_date.isoformat()}",
+    )
+
+
+def get_cached_schedule(cache_key: Optional[ScheduleCacheKey]) -> Optional[Any]:
+    """Get the schedule cached under the key provided, if there is one"""
+    if not cache_key:
+        return None
+
+    cached = cache.get(cache_key.schedule_key)
+    _increment_counter(CACHE_MISSES_KEY if cached is None else CACHE_HITS_KEY)
+    return cached
+
+
+def set_cached_schedule(
+    cache_key: Optional[ScheduleCacheKey],
+    schedule: Any,
+    placement_state: Optional[Any] = None,
+):
+    """Cache the schedule under the key provided, along with the
+    placements it was worked out from"""
+    if not cache_key:
+        return
+
+    cache.set(
+        cache_key.schedule_key, schedule, timeout=settings.SCHEDULED_TASK_CACHE_TIMEOUT
+    )
+    if placement_state is not None:
+        cache.set(
+            cache_key.placements_key,
+            (cache_key.version, placement_state),
+            timeout=settings.SCHEDULED_TASK_CACHE_TIMEOUT,
+        )
+
+
+def _get_changed_task_ids(
+    family_id: int, version: uuid.UUID, previous_version: uuid.UUID
+) -> Optional[Set[int]]:
+    """Get the IDs of the tasks changed between the family's versions
+    provided, or None if anything else may have changed too"""
+    changed_task_ids: Set[int] = set()
+    for _ in range(MAX_INCREMENTAL_VERSIONS):
+        if version == previous_version:
+            return changed_task_ids
+        change = cache.get(_get_change_key(version))
+        if (
+            change is None
+            or change["task_ids"] is None
+            or family_id not in change["previous_versions"]
+        ):
+            return None
+        changed_task_ids.update(change["task_ids"])
+        version = change["previous_versions"][family_id]
+
+    return None
+
+
+def get_cached_placements(
+    cache_key: Optional[ScheduleCacheKey],
+) -> Optional[Tuple[Any, Set[int]]]:
+    """Get the placements cached for a previous version of the schedule
+    and the IDs of the tasks changed since, if only tasks have changed"""
+    if not cache_key:
+        return None
+
+    cached = cache.get(cache_key.placements_key)
+    if cached is None:
+        return None
+
+    (previous_version, placement_state) = cached
+    changed_task_ids = _get_changed_task_ids(
+        cache_key.family_id, cache_key.version, previous_version
+    )
+    if changed_task_ids is None:
+        return None
+    return (placement_state, changed_task_ids)
+
+
+def invalidate_families(
+    family_ids: Iterable[Optional[int]], task_ids: Optional[Iterable[int]] = None
+):
+    """Invalidate the cached schedules for the families provided.
+
+    If only tasks have changed, `task_ids` should be the IDs of the changed
+    tasks, so that the schedules can be worked out incrementally.
+    """
+    family_ids = {family_id for family_id in family_ids if family_id}
+    if not family_ids:
+        return
+
+    version = uuid.uuid4()
+    with transaction.atomic():
+        ScheduledTaskCacheVersion.objects.bulk_create(
+            [
+                ScheduledTaskCacheVersion(family_id=family_id)
+                for family_id in family_ids
+            ],
+            ignore_conflicts=True,
+        )
+        # Locked so that concurrent invalidations record the version each replaced
+        previous_versions = dict(
+            ScheduledTaskCacheVersion.objects.select_for_update()
+            .filter(family_id__in=family_ids)
+            .order_by("family_id")
+            .values_list("family_id", "version")
+        )
+        ScheduledTaskCacheVersion.objects.filter(family_id__in=family_ids).update(
+            version=version
+        )
+
+    cache.set(
+        _get_change_key(version),
+        {
+            "previous_versions": previous_versions,
+            "task_ids": None if task_ids is None else set(task_ids),
+        },
+        timeout=settings.SCHEDULED_TASK_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_users(user_filter: Q, task_ids: Optional[Iterable[int]] = None):
+    """Invalidate the cached schedules for the families of the users matching
+    the filter provided, and the families of anyone who shares a task with them.
+
+    If only tasks have changed, `task_ids` should be the IDs of the changed tasks.
+    """
+    users = User.objects.filter(user_filter)
+    invalidate_families(
+        User.objects.filter(Q(id__in=users) | Q(tasks__members__in=users))
+        .values_list("family_id", flat=True)
+        .distinct(),
+        task_ids,
+    )
+
+
+def invalidation_is_deferred() -> bool:
+    """Whether invalidation is currently deferred by `invalidate_users_after`"""
+    return getattr(_deferred_invalidation, "active", False)
+
+
+@contextmanager
+def invalidate_users_after(user_filter: Q):
+    """Skip the invalidation for each individual change made inside the block
+    and invalidate the users matching the filter provided once at the end.
+
+    Useful when making lots of changes at once (e.g. syncing a calendar)
+    which would otherwise each run their own invalidation queries.
+    """
+    already_deferred = invalidation_is_deferred()
+    _deferred_invalidation.active = True
+    try:
+        yield
+    finally:
+        _deferred_invalidation.active = already_deferred
+        invalidate_users(user_filter)
@@ -0,0 +1,194 @@
+"""Running totals of the tasks placed on each day by the scheduling engine"""
+
+import datetime as dt
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+
+def _ensure_date(date: dt.date | dt.datetime) -> dt.date:
+    return date.date() if isinstance(date, dt.datetime) else date
+
+
+class DayLoads:
+    """The number of tasks and minutes placed on each day
+    for each user and category.
+
+    The totals for the days of the scheduling window are kept in flat
+    arrays indexed by (day offset, user, category), along with the total
+    minutes for each (day offset, user) across all categories, so the
+    memory used is fixed by the size of the window up front. The totals
+    for a range of days are read with strided slices of the arrays rather
+    than a lookup for each day.
+
+    Anything outside of the window or for users and categories not known
+    up front (e.g. actions placed before the start of the window) is kept
+    in dictionaries instead.
+    """
+
+    def __init__(
+        self,
+        start_date: dt.date,
+        end_date: dt.date,
+        user_ids: Iterable[int],
+        categories: Iterable[int],
+    ):
+        self.start_date = start_date
+        self.num_days = max((end_date - start_date).days + 1, 0)
+        self._users = {user_id: i for i, user_id in enumerate(sorted(set(user_ids)))}
+        self._categories = {
+            category: i for i, category in enumerate(sorted(set(categories)))
+        }
+        self._num_users = len(self._users)
+        self._num_categories = len(self._categories)
+
+        size = self.num_days * self._num_users * self._num_categories
+        self._tasks = array("i", [0]) * size
+        self._minutes = array("i", [0]) * size
+        self._day_minutes = array("i", [0]) * (self.num_days * self._num_users)
+
+        self._extra_tasks: Dict[Tuple[dt.date, int, int], int] = defaultdict(int)
+        self._extra_minutes: Dict[Tuple[dt.date, int, int], int] = defaultdict(int)
+        self._extra_day_minutes: Dict[Tuple[dt.date, int], int] = defaultdict(int)
+
+    def _offset(self, date: dt.date) -> int:
+        return (date - self.start_date).days
+
+    def add(
+        self,
+        date: dt.date | dt.datetime,
+        user_id: int,
+        category: int,
+        tasks: int = 0,
+        minutes: int = 0,
+    ):
+        """Add to the totals for the day, user and category"""
+        date = _ensure_date(date)
+        offset = self._offset(date)
+        user = self._users.get(user_id)
+        category_index = self._categories.get(category)
+        if user is None or not 0 <= offset < self.num_days:
+            self._extra_tasks[(date, user_id, category)] += tasks
+            self._extra_minutes[(date, user_id, category)] += minutes
+            self._extra_day_minutes[(date, user_id)] += minutes
+            return
+
+        day_user = offset * self._num_users + user
+        self._day_minutes[day_user] += minutes
+        if category_index is None:
+            self._extra_tasks[(date, user_id, category)] += tasks
+            self._extra_minutes[(date, user_id, category)] += minutes
+            return
+
+        index = day_user * self._num_categories + category_index
+        self._tasks[index] += tasks
+        self._minutes[index] += minutes
+
+    def _category_total(
+        self,
+        totals: array,
+        extra_totals: Dict[Tuple[dt.date, int, int], int],
+        date: dt.date,
+        user_id: int,
+        category: int,
+    ) -> int:
+        offset = self._offset(date)
+        user = self._users.get(user_id)
+        category_index = self._categories.get(category)
+        if user is None or category_index is None or not 0 <= offset < self.num_days:
+            return extra_totals.get((date, user_id, category), 0)
+
+        return totals[
+            (offset * self._num_users + user) * self._num_categories + category_index
+        ]
+
+    def _category_totals_between(
+        self,
+        totals: array,
+        extra_totals: Dict[Tuple[dt.date, int, int], int],
+        start_date: dt.date,
+        end_date: dt.date,
+        user_id: int,
+        category: int,
+    ) -> List[int]:
+        num_days = (end_date - start_date).days + 1
+        if num_days <= 0:
+            return []
+
+        start = self._offset(start_date)
+        user = self._users.get(user_id)
+        category_index = self._categories.get(category)
+        if (
+            user is None
+            or category_index is None
+            or start < 0
+            or start + num_days > self.num_days
+        ):
+            return [
+                self._category_total(
+                    totals,
+                    extra_totals,
+                    start_date + dt.timedelta(days=i),
+                    user_id,
+                    category,
+                )
+                for i in range(num_days)
+            ]
+
+        stride = self._num_users * self._num_categories
+        first = (start * self._num_users + user) * self._num_categories
+        first += category_index
+        return totals[first : first + num_days * stride : stride].tolist()
+
+    def tasks_between(
+        self, start_date: dt.date, end_date: dt.date, user_id: int, category: int
+    ) -> List[int]:
+        """Get the number of tasks on each day between the dates provided
+        (inclusive) for the user and category"""
+        return self._category_totals_between(
+            self._tasks, self._extra_tasks, start_date, end_date, user_id, category
+        )
+
+    def minutes_between(
+        self, start_date: dt.date, end_date: dt.date, user_id: int, category: int
+    ) -> List[int]:
+        """Get the number of minutes on each day between the dates provided
+        (inclusive) for the user and category"""
+        return self._category_totals_between(
+            self._minutes, self._extra_minutes, start_date, end_date, user_id, category
+        )
+
+    def total_minutes_between(
+        self, start_date: dt.date, end_date: dt.date, user_ids: Iterable[int]
+    ) -> List[int]:
+        """Get the total number of minutes on each day between the dates
+        provided (inclusive), summed over all categories and the users"""
+        num_days = (end_date - start_date).days + 1
+        if num_days <= 0:
+            return []
+
+        totals = [0] * num_days
+        start = self._offset(start_date)
+        in_window = start >= 0 and start + num_days <= self.num_days
+        for user_id in user_ids:
+            user = self._users.get(user_id)
+            if user is None or not in_window:
+                user_totals = [
+                    self._day_total(start_date + dt.timedelta(days=i), user_id)
+                    for i in range(num_days)
+                ]
+            else:
+                first = start * self._num_users + user
+                user_totals = self._day_minutes[
+                    first : first + num_days * self._num_users : self._num_users
+                ].tolist()
+            totals = list(map(sum, zip(totals, user_totals)))
+
+        return totals
+
+    def _day_total(self, date: dt.date, user_id: int) -> int:
+        offset = self._offset(date)
+        user = self._users.get(user_id)
+        if user is None or not 0 <= offset < self.num_days:
+            return self._extra_day_minutes.get((date, user_id), 0)
+        return self._day_minutes[offset * self._num_users + user]
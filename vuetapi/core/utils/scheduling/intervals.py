@@ -0,0 +1,69 @@
+"""Interval index used for checking scheduling conflicts"""
+
+import datetime as dt
+from bisect import bisect_left, bisect_right
+from typing import List
+
+# Intervals longer than this (e.g. holidays or multi-day calendar events)
+# are kept apart from the others, so that they don't widen the search
+LONG_INTERVAL = dt.timedelta(hours=6)
+
+
+class _SortedIntervals:
+    """Intervals ordered by their start time, along with the length of
+    the longest interval seen so far"""
+
+    def __init__(self):
+        self.starts: List[dt.datetime] = []
+        self.ends: List[dt.datetime] = []
+        self.max_length = dt.timedelta(0)
+
+    def add(self, start: dt.datetime, end: dt.datetime):
+        """Add the interval"""
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.max_length = max(self.max_length, end - start)
+
+    def overlaps(self, start: dt.datetime, end: dt.datetime) -> bool:
+        """Check whether any of the intervals overlaps the one provided"""
+        lower = bisect_right(self.starts, start - self.max_length)
+        upper = bisect_left(self.starts, end)
+        for i in range(lower, upper):
+            if self.ends[i] > start:
+                return True
+
+        return False
+
+
+class IntervalIndex:
+    """A sorted index of [start, end) datetime intervals.
+
+    Intervals are kept ordered by their start time, along with the length
+    of the longest interval seen so far. Any interval overlapping a query
+    must start after `query_start - longest_interval` and before `query_end`
+    so we only need to look at the intervals in that range, which we can
+    find with a binary search.
+
+    Long intervals are kept in a separate (usually small) list, so that a
+    single one doesn't make every query look at all of the intervals
+    starting within its length.
+    """
+
+    def __init__(self):
+        self._short = _SortedIntervals()
+        self._long = _SortedIntervals()
+
+    def __len__(self):
+        return len(self._short.starts) + len(self._long.starts)
+
+    def add(self, start: dt.datetime, end: dt.datetime):
+        """Add the interval to the index"""
+        if end - start > LONG_INTERVAL:
+            self._long.add(start, end)
+        else:
+            self._short.add(start, end)
+
+    def overlaps(self, start: dt.datetime, end: dt.datetime) -> bool:
+        """Check whether any interval in the index overlaps the one provided"""
+        return self._short.overlaps(start, end) or self._long.overlaps(start, end)
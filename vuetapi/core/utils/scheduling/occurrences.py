@@ -0,0 +1,178 @@
+"""Records for the task occurrences placed by the scheduling engine"""
+
+import datetime as dt
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.models.tasks.alerts import AlertName
+from core.models.users.user_models import User
+from core.utils.tags import TagType
+
+# Shared by the occurrences without any alerts - never mutated
+_NO_ALERTS: Dict[AlertName, List[User]] = {}
+
+
+class TaskDetails:
+    """The fields shared by every scheduled occurrence of a task
+    (or of one of its actions), so that they aren't copied into each one"""
+
+    __slots__ = (
+        "id",
+        "title",
+        "tags",
+        "members",
+        "entities",
+        "actions",
+        "action_id",
+        "recurrence",
+        "routine",
+        "resourcetype",
+        "type",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        tags: Tuple[TagType, ...],
+        members: Tuple[int, ...],
+        entities: Tuple[int, ...],
+        actions: Tuple[int, ...],
+        action_id: Optional[int],
+        recurrence: Optional[int],
+        routine: Optional[int],
+        resourcetype: str,
+        type: str,
+    ):
+        self.id = id
+        self.title = title
+        self.tags = tags
+        self.members = members
+        self.entities = entities
+        self.actions = actions
+        self.action_id = action_id
+        self.recurrence = recurrence
+        self.routine = routine
+        self.resourcetype = resourcetype
+        self.type = type
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __eq__(self, other):
+        if not isinstance(other, TaskDetails):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __getstate__(self):
+        return self._values()
+
+    def __setstate__(self, state):
+        for (field, value) in zip(self.__slots__, state):
+            setattr(self, field, value)
+
+    def copy(self, **changes) -> "TaskDetails":
+        """Copy the details, with the changes provided"""
+        copied = TaskDetails.__new__(TaskDetails)
+        copied.__setstate__(self._values())
+        for (field, value) in changes.items():
+            setattr(copied, field, value)
+        return copied
+
+
+class _TaskDetail:
+    """Reads a field of an occurrence from its shared task details"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, occurrence, owner=None):
+        if occurrence is None:
+            return self
+        return getattr(occurrence.details, self.name)
+
+
+class ScheduledTask:
+    """A scheduled occurrence of a task. Only the fields which vary
+    between occurrences are stored on the record itself."""
+
+    __slots__ = (
+        "details",
+        "start_datetime",
+        "end_datetime",
+        "start_date",
+        "end_date",
+        "date",
+        "duration",
+        "recurrence_index",
+        "is_complete",
+        "is_partially_complete",
+        "is_ignored",
+        "alerts",
+    )
+
+    id = _TaskDetail()
+    title = _TaskDetail()
+    tags = _TaskDetail()
+    members = _TaskDetail()
+    entities = _TaskDetail()
+    actions = _TaskDetail()
+    action_id = _TaskDetail()
+    recurrence = _TaskDetail()
+    routine = _TaskDetail()
+    resourcetype = _TaskDetail()
+    type = _TaskDetail()
+
+    def __init__(
+        self,
+        details: TaskDetails,
+        start_datetime: Optional[dt.datetime] = None,
+        end_datetime: Optional[dt.datetime] = None,
+        start_date: Optional[dt.date] = None,
+        end_date: Optional[dt.date] = None,
+        date: Optional[dt.date] = None,
+        duration: Optional[int] = None,
+        recurrence_index: Optional[int] = None,
+        is_complete: bool = False,
+        is_partially_complete: bool = False,
+        is_ignored: bool = False,
+        alerts: Optional[Dict[AlertName, List[User]]] = None,
+    ):
+        self.details = details
+        self.start_datetime = start_datetime
+        self.end_datetime = end_datetime
+        self.start_date = start_date
+        self.end_date = end_date
+        self.date = date
+        self.duration = duration
+        self.recurrence_index = recurrence_index
+        self.is_complete = is_complete
+        self.is_partially_complete = is_partially_complete
+        self.is_ignored = is_ignored
+        self.alerts = alerts or _NO_ALERTS
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __eq__(self, other):
+        if not isinstance(other, ScheduledTask):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self):
+        return (
+            f"<ScheduledTask {self.id} {self.title!r} "
+            f"{self.start_datetime or self.date or self.start_date}>"
+        )
+
+    def __getstate__(self):
+        return self._values()
+
+    def __setstate__(self, state):
+        for (field, value) in zip(self.__slots__, state):
+            setattr(self, field, value)
+
+    def copy(self) -> "ScheduledTask":
+        """Copy the occurrence, sharing the same task details"""
+        copied = ScheduledTask.__new__(ScheduledTask)
+        copied.__setstate__(self._values())
+        return copied
@@ -0,0 +1,294 @@
+"""Stepping through the occurrences of recurrences"""
+
+import datetime as dt
+import threading
+from bisect import bisect_left
+from calendar import monthrange
+from functools import lru_cache
+from math import gcd
+from typing import Dict, Tuple, TypeVar, cast
+
+from dateutil.relativedelta import relativedelta
+
+from core.models.tasks.base import Recurrence, RecurrenceType
+
+RELATIVE_DELTAS = {
+    "DAY": relativedelta(days=1),
+    "WEEK": relativedelta(weeks=1),
+    "MONTH": relativedelta(months=1),
+    "YEAR": relativedelta(years=1),
+}
+
+recurrence_mappings: Dict[RecurrenceType, relativedelta | None] = {
+    "DAILY": RELATIVE_DELTAS["DAY"],
+    "WEEKLY": RELATIVE_DELTAS["WEEK"],
+    "MONTHLY": RELATIVE_DELTAS["MONTH"],
+    "YEARLY": RELATIVE_DELTAS["YEAR"],
+    "MONTH_WEEKLY": None,
+    "MONTHLY_LAST_WEEK": None,
+    "YEAR_MONTH_WEEKLY": None,
+    "WEEKDAILY": None,
+}
+
+
+class SchedulingException(Exception):
+    """Custom Scheduling error"""
+
+
+def ensure_date(date: dt.date | dt.datetime) -> dt.date:
+    """Ensure that the variable provided is a date - converts it to
+    a date if it is a datetime to start with"""
+    if hasattr(date, "date"):
+        return date.date()
+
+    return date
+
+
+T = TypeVar("T", dt.date, dt.datetime)
+
+
+def get_next_date(current_date: T, recurrence: Recurrence) -> T:
+    """Get the next date after current_date based on the recurrence type provided"""
+    recurrence_type = cast(RecurrenceType, recurrence.recurrence)
+    interval_length = recurrence.interval_length
+
+    recurrence_delta = recurrence_mappings[recurrence_type]
+    if recurrence_delta:
+        return current_date + (recurrence_delta * interval_length)
+    elif recurrence_type == "MONTH_WEEKLY":
+        week_number = (current_date.day - 1) // 7
+
+        previous_date = current_date
+        for _ in range(interval_length):
+            four_weeks_later = previous_date + relativedelta(weeks=4)
+            if previous_date.month == four_weeks_later.month:
+                previous_date = four_weeks_later + RELATIVE_DELTAS["WEEK"]
+                continue
+            else:
+                if (four_weeks_later.day - 1) // 7 == week_number:
+                    previous_date = four_weeks_later
+                    continue
+                else:
+                    previous_date = four_weeks_later + RELATIVE_DELTAS["WEEK"]
+                    continue
+        return previous_date
+    elif recurrence_type == "MONTHLY_LAST_WEEK":
+        previous_date = current_date
+        for _ in range(interval_length):
+            four_weeks_later = previous_date + relativedelta(weeks=4)
+            if (
+                four_weeks_later.month
+                == (four_weeks_later + RELATIVE_DELTAS["WEEK"]).month
+            ):
+                previous_date = four_weeks_later + RELATIVE_DELTAS["WEEK"]
+                continue
+            else:
+                previous_date = four_weeks_later
+                continue
+        return previous_date
+    elif recurrence_type == "YEAR_MONTH_WEEKLY":
+        week_number = (current_date.day - 1) // 7
+
+        previous_date = current_date
+        for _ in range(interval_length):
+            one_year_later = previous_date + relativedelta(weeks=52)
+            if previous_date.month != one_year_later.month:
+                previous_date = one_year_later + RELATIVE_DELTAS["WEEK"]
+                continue
+            else:
+                if (one_year_later.day - 1) // 7 == week_number:
+                    previous_date = one_year_later
+                    continue
+                else:
+                    previous_date = one_year_later + RELATIVE_DELTAS["WEEK"]
+                    continue
+        return previous_date
+    elif recurrence_type == "WEEKDAILY":
+        previous_date = current_date
+        for _ in range(interval_length):
+            day_number = previous_date.weekday()
+            # If day is before Friday then just get next day
+            if day_number < 4:
+                previous_date = previous_date + RELATIVE_DELTAS["DAY"]
+                continue
+            # Otherwise skip over the weekend
+            else:
+                previous_date = previous_date + relativedelta(days=3)
+                continue
+        return previous_date
+
+    raise SchedulingException("Could not calculate next date")
+
+
+def get_next_interval(
+    interval_start_date: T, interval_end_date: T, recurrence: Recurrence
+) -> Tuple[T, T]:
+    """Get the next interval"""
+    next_start = get_next_date(interval_start_date, recurrence)
+    next_end = interval_end_date + (next_start - interval_start_date)
+    return (next_start, next_end)
+
+
+# The number of months between occurrences of the recurrence types
+# which are a fixed number of months apart
+MONTHLY_RECURRENCE_LENGTHS: Dict[RecurrenceType, int] = {
+    "MONTHLY": 1,
+    "YEARLY": 12,
+}
+
+# The number of days between occurrences of the recurrence types
+# which are a fixed number of days apart
+DAILY_RECURRENCE_LENGTHS: Dict[RecurrenceType, int] = {
+    "DAILY": 1,
+    "WEEKLY": 7,
+}
+
+# For the recurrence types which have to be stepped through one occurrence
+# at a time we store every CHECKPOINT_FREQUENCY-th occurrence date
+CHECKPOINT_FREQUENCY = 32
+
+
+def _min_days_in_months(first_year: int, first_month: int, step: int, count: int):
+    """The minimum number of days in the `count` months visited when stepping
+    `step` months at a time from the first month provided (exclusive).
+
+    The list of visited months repeats once we have seen every month of the
+    year we are going to visit, so we can stop early unless we are visiting
+    Februaries (whose length depends on the year). Even then we can stop as
+    soon as we have seen 28 days as no month is shorter than that.
+    """
+    cycle_length = 12 // gcd(step, 12)
+    visits_february = False
+    min_days = 31
+    month_index = first_month - 1
+    for i in range(count):
+        month_index += step
+        month = month_index % 12 + 1
+        visits_february = visits_february or month == 2
+        min_days = min(min_days, monthrange(first_year + month_index // 12, month)[1])
+        if min_days == 28 or (i + 1 >= cycle_length and not visits_february):
+            break
+
+    return min_days
+
+
+def _nth_date(
+    anchor: dt.date, recurrence_type: RecurrenceType, interval_length: int, n: int
+):
+    """Get the date of occurrence n for the recurrence types
+    with a fixed period, without stepping through the occurrences"""
+    if recurrence_type in DAILY_RECURRENCE_LENGTHS:
+        return anchor + dt.timedelta(
+            days=DAILY_RECURRENCE_LENGTHS[recurrence_type] * interval_length * n
+        )
+
+    step = MONTHLY_RECURRENCE_LENGTHS[recurrence_type] * interval_length
+    month_index = anchor.month - 1 + step * n
+    day = anchor.day
+    if day > 28 and n > 0:
+        # Adding a relativedelta of months clamps the day to the end of the
+        # month, and every following occurrence stays on the clamped day
+        day = min(day, _min_days_in_months(anchor.year, anchor.month, step, n))
+
+    return dt.date(anchor.year + month_index // 12, month_index % 12 + 1, day)
+
+
+class _CheckpointTable:
+    """Every CHECKPOINT_FREQUENCY-th occurrence date of a recurrence
+    from an anchor date, extended as far as has been needed so far.
+
+    The tables are shared between the threads of a process, so they are
+    only extended while holding their lock. Checkpoints are only ever
+    appended, so they can be read without it.
+    """
+
+    def __init__(
+        self, anchor: dt.date, recurrence_type: RecurrenceType, interval_length: int
+    ):
+        self.recurrence = Recurrence(
+            recurrence=recurrence_type, interval_length=interval_length
+        )
+        self.checkpoints = [anchor]
+        self._lock = threading.Lock()
+
+    def extend_to(self, date: dt.date):
+        """Extend the table until the last checkpoint is on or after the date provided"""
+        if self.checkpoints[-1] >= date:
+            return
+
+        with self._lock:
+            while self.checkpoints[-1] < date:
+                checkpoint = self.checkpoints[-1]
+                for _ in range(CHECKPOINT_FREQUENCY):
+                    checkpoint = get_next_date(checkpoint, self.recurrence)
+                self.checkpoints.append(checkpoint)
+
+
+@lru_cache(maxsize=2048)
+def _get_checkpoint_table(
+    anchor: dt.date, recurrence_type: RecurrenceType, interval_length: int
+):
+    return _CheckpointTable(anchor, recurrence_type, interval_length)
+
+
+def get_first_occurrence_from(
+    first_occurrence: T, recurrence: Recurrence, earliest: T
+) -> Tuple[int, T]:
+    """Get the index and start of the first occurrence of a recurrence which
+    starts on or after `earliest`, where occurrence 0 starts at `first_occurrence`.
+
+    This gives the same result as stepping through the occurrences with
+    get_next_date, but without having to visit every occurrence in between.
+    """
+    if first_occurrence >= earliest:
+        return (0, first_occurrence)
+
+    recurrence_type = cast(RecurrenceType, recurrence.recurrence)
+    interval_length = recurrence.interval_length
+    anchor = ensure_date(first_occurrence)
+    earliest_date = ensure_date(earliest)
+
+    def occurrence_from_date(date: dt.date) -> T:
+        # The time of day (and timezone) is preserved between occurrences
+        return first_occurrence + (date - anchor)
+
+    if (
+        recurrence_type in DAILY_RECURRENCE_LENGTHS
+        or recurrence_type in MONTHLY_RECURRENCE_LENGTHS
+    ):
+
+        def nth_occurrence(n: int) -> T:
+            return occurrence_from_date(
+                _nth_date(anchor, recurrence_type, interval_length, n)
+            )
+
+        # The nth occurrence can be calculated directly so we
+        # can binary search for the first one after `earliest`
+        lower, upper = 0, 1
+        while nth_occurrence(upper) < earliest:
+            lower, upper = upper, upper * 2
+
+        while upper - lower > 1:
+            middle = (lower + upper) // 2
+            if nth_occurrence(middle) < earliest:
+                lower = middle
+            else:
+                upper = middle
+
+        return (upper, nth_occurrence(upper))
+
+    table = _get_checkpoint_table(anchor, recurrence_type, interval_length)
+    table.extend_to(earliest_date)
+
+    # Start stepping from the last checkpoint safely before the earliest
+    # date - allowing a margin in case the datetimes have different timezones
+    checkpoint_index = max(
+        bisect_left(table.checkpoints, earliest_date - dt.timedelta(days=2)) - 1, 0
+    )
+    index = checkpoint_index * CHECKPOINT_FREQUENCY
+    occurrence = occurrence_from_date(table.checkpoints[checkpoint_index])
+    while occurrence < earliest:
+        occurrence = get_next_date(occurrence, recurrence)
+        index += 1
+
+    return (index, occurrence)
@@ -3,7 +3,17 @@
 import datetime as dt
 import logging
 from collections import defaultdict
-from typing import Dict, List, Literal, Optional, Set, Tuple, TypedDict, TypeVar, cast
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypedDict,
+    cast,
+)
 
 import pytz
 from dateutil.relativedelta import relativedelta
@@ -12,89 +22,46 @@ from django.db.models import Q
 from django.utils import timezone
 
 from core.models.entities.base import Entity
-from core.models.entities.career import DaysOff
 from core.models.entities.education import School, SchoolBreak, SchoolTerm, SchoolYear
 from core.models.entities.pets import Pet
-from core.models.entities.travel import Trip
 from core.models.routines.routines import Routine
-from core.models.settings.blocked_days import (
-    BirthdayBlockedCategory,
-    DaysOffBlockedCategory,
-    FamilyBirthdayBlockedCategory,
-    NationalHolidaysBlockedCategory,
-    TermTimeBlockedCategory,
-    TripBlockedCategory,
-)
-from core.models.settings.family_visibility import FamilyCategoryViewPermission
 from core.models.settings.preferred_days import PreferredDays
 from core.models.task_completion_forms.base import TaskCompletionForm
+from core.models.tasks.access import TaskAccess, TaskVisibility
 from core.models.tasks.alerts import AlertName, Alerts
 from core.models.tasks.base import (
     FixedTask,
     FlexibleTask,
     Recurrence,
-    RecurrenceType,
     RecurrentTaskOverwrite,
+    Task,
     TaskAction,
     TaskActionCompletionForm,
 )
-from core.models.tasks.holidays import HolidayTask
 from core.models.tasks.task_limits import TaskLimit
 from core.models.users.user_models import User
+from core.utils.categories import Categories
+from core.utils.scheduling.blocked_days import BlockedDayIndex
+from core.utils.scheduling.day_loads import DayLoads
+from core.utils.scheduling.intervals import IntervalIndex
+from core.utils.scheduling.occurrences import ScheduledTask, TaskDetails
+from core.utils.scheduling.recurrences import (
+    RELATIVE_DELTAS,
+    SchedulingException,
+    ensure_date,
+    get_first_occurrence_from,
+    get_next_interval,
+)
+from core.utils.scheduling.windows import get_dependent_window
 from core.utils.tags import TagType
-from external_calendars.models import ICalIntegration
+from external_calendars.models import ICalEvent
+from external_calendars.utils.rrules import expand_occurrences, parse_utc
 
 logger = logging.getLogger(__name__)
 
 utc = pytz.UTC
 
 
-RELATIVE_DELTAS = {
-    "DAY": relativedelta(days=1),
-    "WEEK": relativedelta(weeks=1),
-    "MONTH": relativedelta(months=1),
-    "YEAR": relativedelta(years=1),
-}
-
-recurrence_mappings: Dict[RecurrenceType, relativedelta | None] = {
-    "DAILY": RELATIVE_DELTAS["DAY"],
-    "WEEKLY": RELATIVE_DELTAS["WEEK"],
-    "MONTHLY": RELATIVE_DELTAS["MONTH"],
-    "YEARLY": RELATIVE_DELTAS["YEAR"],
-    "MONTH_WEEKLY": None,
-    "MONTHLY_LAST_WEEK": None,
-    "YEAR_MONTH_WEEKLY": None,
-    "WEEKDAILY": None,
-}
-
-
-class ScheduledTask(TypedDict):
-    """We parse all scheduled tasks into this format"""
-
-    id: int
-    is_complete: bool
-    is_partially_complete: bool
-    is_ignored: bool
-    members: List[int]
-    entities: List[int]
-    actions: List[int]
-    action_id: Optional[int]
-    tags: List[TagType]
-    start_datetime: Optional[dt.datetime]
-    end_datetime: Optional[dt.datetime]
-    start_date: Optional[dt.date]
-    end_date: Optional[dt.date]
-    duration: Optional[int]
-    date: Optional[dt.date]
-    recurrence: Optional[int]
-    recurrence_index: Optional[int]
-    routine: Optional[int]
-    title: str
-    resourcetype: str
-    type: str
-    alerts: Dict[AlertName, List[User]]
-
-
 class ScheduledEntity(TypedDict):
     """We parse displayed entities into this format"""
 
@@ -117,17 +84,24 @@ class TaskPlacement(TypedDict):
     alerts: Dict[AlertName, List[User]]
 
 
-class SchedulingException(Exception):
-    """Custom Scheduling error"""
+class PlacementState(TypedDict):
+    """The tasks placed by a run of the scheduling engine, which can be
+    persisted and passed to a later run to only re-place what changed"""
 
+    start_date: dt.datetime
+    end_date: dt.datetime
+    placed_tasks: List[ScheduledTask]
 
-def ensure_date(date: dt.date | dt.datetime) -> dt.date:
-    """Ensure that the variable provided is a date - converts it to
-    a date if it is a datetime to start with"""
-    if hasattr(date, "date"):
-        return date.date()
 
-    return date
+def group_ids(rows: Iterable[Tuple[int, int]]) -> Dict[int, Tuple[int, ...]]:
+    """Group (ID, related ID) pairs into a tuple of related IDs for each ID"""
+    grouped: Dict[int, List[int]] = defaultdict(list)
+    for (object_id, related_id) in rows:
+        grouped[object_id].append(related_id)
+
+    return defaultdict(
+        tuple, {object_id: tuple(ids) for (object_id, ids) in grouped.items()}
+    )
 
 
 def get_dates_between(start_date: dt.date, end_date: dt.date) -> List[dt.date]:
@@ -140,6 +114,24 @@ def get_dates_between(start_date: dt.date, end_date: dt.date) -> List[dt.date]:
     return dates
 
 
+def get_scheduled_task_dates(task: ScheduledTask) -> Set[dt.date]:
+    """Get the dates which a scheduled task takes up. Datetimes are
+    padded by a day either side to allow for timezone differences."""
+    dates: Set[dt.date] = set()
+    if task.start_datetime and task.end_datetime:
+        dates.update(
+            get_dates_between(
+                task.start_datetime.date() - RELATIVE_DELTAS["DAY"],
+                task.end_datetime.date() + RELATIVE_DELTAS["DAY"],
+            )
+        )
+    if task.date:
+        dates.add(ensure_date(task.date))
+    if task.start_date and task.end_date:
+        dates.update(get_dates_between(task.start_date, task.end_date))
+    return dates
+
+
 def get_preferred_weekdays(preferred_day_conf: PreferredDays) -> List[int]:
     """Get the preferred weekdays from a PreferredDays object"""
     preferred_weekdays = []
@@ -161,89 +153,8 @@ def get_preferred_weekdays(preferred_day_conf: PreferredDays) -> List[int]:
     return preferred_weekdays
 
 
-T = TypeVar("T", dt.date, dt.datetime)
-
-
-def get_next_date(current_date: T, recurrence: Recurrence) -> T:
-    """Get the next date after current_date based on the recurrence type provided"""
-    recurrence_type = cast(RecurrenceType, recurrence.recurrence)
-    interval_length = recurrence.interval_length
-
-    recurrence_delta = recurrence_mappings[recurrence_type]
-    if recurrence_delta:
-        return current_date + (recurrence_delta * interval_length)
-    elif recurrence_type == "MONTH_WEEKLY":
-        week_number = (current_date.day - 1) // 7
-
-        previous_date = current_date
-        for _ in range(interval_length):
-            four_weeks_later = previous_date + relativedelta(weeks=4)
-            if previous_date.month == four_weeks_later.month:
-                previous_date = four_weeks_later + RELATIVE_DELTAS["WEEK"]
-                continue
-            else:
-                if (four_weeks_later.day - 1) // 7 == week_number:
-                    previous_date = four_weeks_later
-                    continue
-                else:
-                    previous_date = four_weeks_later + RELATIVE_DELTAS["WEEK"]
-                    continue
-        return previous_date
-    elif recurrence_type == "MONTHLY_LAST_WEEK":
-        previous_date = current_date
-        for _ in range(interval_length):
-            four_weeks_later = previous_date + relativedelta(weeks=4)
-            if (
-                four_weeks_later.month
-                == (four_weeks_later + RELATIVE_DELTAS["WEEK"]).month
-            ):
-                previous_date = four_weeks_later + RELATIVE_DELTAS["WEEK"]
-                continue
-            else:
-                previous_date = four_weeks_later
-                continue
-        return previous_date
-    elif recurrence_type == "YEAR_MONTH_WEEKLY":
-        week_number = (current_date.day - 1) // 7
-
-        previous_date = current_date
-        for _ in range(interval_length):
-            one_year_later = previous_date + relativedelta(weeks=52)
-            if previous_date.month != one_year_later.month:
-                previous_date = one_year_later + RELATIVE_DELTAS["WEEK"]
-                continue
-            else:
-                if (one_year_later.day - 1) // 7 == week_number:
-                    previous_date = one_year_later
-                    continue
-                else:
-                    previous_date = one_year_later + RELATIVE_DELTAS["WEEK"]
-                    continue
-        return previous_date
-    elif recurrence_type == "WEEKDAILY":
-        previous_date = current_date
-        for _ in range(interval_length):
-            day_number = previous_date.weekday()
-            # If day is before Friday then just get next day
-            if day_number < 4:
-                previous_date = previous_date + RELATIVE_DELTAS["DAY"]
-                continue
-            # Otherwise skip over the weekend
-            else:
-                previous_date = previous_date + relativedelta(days=3)
-                continue
-        return previous_date
-
-    raise SchedulingException("Could not calculate next date")
-
-
-def get_next_interval(
-    interval_start_date: T, interval_end_date: T, recurrence: Recurrence
-) -> Tuple[T, T]:
-    """Get the next interval"""
-    next_start = get_next_date(interval_start_date, recurrence)
-    next_end = interval_end_date + (next_start - interval_start_date)
-    return (next_start, next_end)
+DEFAULT_START_DATE = timezone.make_aware(dt.datetime(year=2020, month=1, day=1))
+DEFAULT_END_DATE = timezone.make_aware(dt.datetime(year=2030, month=12, day=31))
 
 
 class SchedulingEngine:
@@ -252,15 +163,10 @@ class SchedulingEngine:
     def __init__(
         self,
         user: User,
-        start_date: dt.datetime = timezone.make_aware(
-            dt.datetime(year=2020, month=1, day=1)
-        ),
-        end_date: dt.datetime = timezone.make_aware(
-            dt.datetime(year=2030, month=12, day=31)
-        ),
+        start_date: dt.datetime = DEFAULT_START_DATE,
+        end_date: dt.datetime = DEFAULT_END_DATE,
     ):
         self.user = user
-        self.user_entities = list(user.entities.all()) if getattr(user, "entities") else []  # type: ignore
 
         self.family_members = (
             list(user.family.users.all()) if (user.family and user.family.users) else []
@@ -278,6 +184,7 @@ class SchedulingEngine:
                 )
                 & (
                     Q(recurrence__isnull=False)
+                    | Q(icalevent__ical_rrule__gt="")
                     | (
                         Q(start_datetime__lt=self.end_date)
                         & Q(end_datetime__gt=self.start_date)
@@ -289,14 +196,7 @@ class SchedulingEngine:
                     )
                 )
             )
-            .select_related(
-                "recurrence",
-            )
-            .prefetch_related(
-                "members",
-                "entities",
-                "actions",
-            )
+            .select_related("recurrence", "routine")
             .distinct()
         )
 
@@ -315,36 +215,16 @@ class SchedulingEngine:
                     )
                 )
             )
-            .select_related(
-                "recurrence",
-            )
-            .prefetch_related(
-                "members",
-                "entities",
-                "actions",
-            )
+            .select_related("recurrence", "routine")
             .distinct()
+            .order_by("id")
         )
 
-        family_entities = Entity.objects.filter(
-            Q(owner__in=self.family_members) | Q(members__in=self.family_members)
-        )
-        self.family_entities_dict: Dict[int, Entity] = {
-            entity.id: entity for entity in family_entities
-        }
-
-        family_category_view_permissions = FamilyCategoryViewPermission.objects.filter(
-            user__in=self.family_members
-        ).distinct()
-
         self.fixed_tasks: List[FixedTask] = list(fixed_tasks)
         self.fixed_tasks_dict: Dict[int, FixedTask] = {
             task.id: task for task in fixed_tasks
         }
         self.flexible_tasks: List[FlexibleTask] = list(flexible_tasks)
-        self.family_category_view_permissions: List[
-            FamilyCategoryViewPermission
-        ] = list(family_category_view_permissions)
 
         recurrence_overwrites_list = list(
             RecurrentTaskOverwrite.objects.filter(
@@ -356,7 +236,7 @@ class SchedulingEngine:
             int, Dict[int, RecurrentTaskOverwrite]
         ] = defaultdict(dict)
         for overwrite in recurrence_overwrites_list:
-            recurrence_overwrites_dict[overwrite.recurrence.id][
+            recurrence_overwrites_dict[overwrite.recurrence_id][  # type: ignore
                 overwrite.recurrence_index
             ] = overwrite
         self.recurrence_overwrites = recurrence_overwrites_dict
@@ -371,6 +251,9 @@ class SchedulingEngine:
             task_actions_dict[action.id] = action
         self.task_actions = task_actions_dict
 
+        self._load_task_relations()
+        self._load_task_visibility()
+
         task_completion_form_list: List[TaskCompletionForm] = list(
             TaskCompletionForm.objects.filter(
                 Q(task__in=self.fixed_tasks) | Q(task__in=self.flexible_tasks)
@@ -417,28 +300,39 @@ class SchedulingEngine:
 
         self.placed_tasks: List[ScheduledTask] = []
         self.placed_national_holidays: List[ScheduledTask] = []
+
+        # The details shared by the scheduled occurrences of each task
+        # (by task ID) and of each task action (by action ID)
+        self.task_details: Dict[int, TaskDetails] = {}
+        self.action_details: Dict[int, TaskDetails] = {}
         self.placed_entities: List[ScheduledEntity] = []
 
+        # Indexes of the datetimes taken up by the placed tasks,
+        # overall and for each member, for checking slot availability
+        self.placed_intervals = IntervalIndex()
+        self.placed_user_intervals: Dict[int, IntervalIndex] = defaultdict(
+            IntervalIndex
+        )
+
         self.preferred_days = list(
             PreferredDays.objects.filter(user__in=self.family_members)
         )
         self.task_limits = list(TaskLimit.objects.filter(user__in=self.family_members))
 
-        # Something like
-        # {
-        #     "2020-01-01": {
-        #         2: {
-        #             "PETS": {
-        #                 "tasks": 10,
-        #                 "minutes": 100
-        #             }
-        #         }
-        #     }
-        # }
-        self.day_task_counts: Dict[
-            dt.date, Dict[int, Dict[int, Dict[Literal["tasks", "minutes"], int]]]
-        ] = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        # (category, user ID) -> daily limit
+        self.daily_task_limits: Dict[Tuple[int, int], TaskLimit] = {
+            (task_limit.category, task_limit.user_id): task_limit  # type: ignore
+            for task_limit in self.task_limits
+            if task_limit.interval == "DAILY"
+        }
+
+        # The number of tasks and minutes placed on each day
+        # for each user and category
+        self.day_loads = DayLoads(
+            self.start_date.date(),
+            self.end_date.date(),
+            self.users_by_id.keys(),
+            [category.value for category in Categories],
         )
 
         single_day_period_entity_types = ["Anniversary"]
@@ -466,31 +360,241 @@ class SchedulingEngine:
                 .distinct()
             )
 
-        self.schools = School.objects.filter(members__in=self.family_members)
-        self.school_years = SchoolYear.objects.filter(school__in=self.schools)
-        self.school_terms = SchoolTerm.objects.filter(school_year__in=self.school_years)
-        self.school_breaks = SchoolBreak.objects.filter(
-            school_year__in=self.school_years
+        self.schools: List[School] = list(
+            School.objects.filter(members__in=self.family_members).distinct()
+        )
+        self.school_member_ids = group_ids(
+            Entity.members.through.objects.filter(
+                entity_id__in=[school.id for school in self.schools]
+            )
+            .order_by("member_id")
+            .values_list("entity_id", "member_id")
+        )
+        self.school_years: List[SchoolYear] = list(
+            SchoolYear.objects.filter(school__in=self.schools).select_related("school")
+        )
+        self.school_terms: List[SchoolTerm] = list(
+            SchoolTerm.objects.filter(school_year__in=self.school_years).select_related(
+                "school_year"
+            )
+        )
+        self.school_breaks: List[SchoolBreak] = list(
+            SchoolBreak.objects.filter(
+                school_year__in=self.school_years
+            ).select_related("school_year")
         )
-
-        self.ical_integrations = ICalIntegration.objects.filter(
-            user__in=self.family_members
-        ).distinct()
 
         self.pets: List[Pet] = list(
-            Pet.objects.filter(members__in=self.family_members).distinct()
+            Pet.objects.filter(members__in=self.family_members)
+            .prefetch_related("members")
+            .distinct()
+        )
+
+        # Flexible tasks may be assigned to members outside of the family,
+        # so their blocked days need to be considered during placement too
+        self.blocked_days = BlockedDayIndex(
+            set(self.family_members)
+            | {
+                self.users_by_id[member_id]
+                for flexible_task in self.flexible_tasks
+                for member_id in self.task_member_ids[flexible_task.id]
+            },
+            self.family_members,
+        )
+
+        # Set when scheduling incrementally - the placements from the
+        # previous run (task ID -> recurrence index -> placements), the
+        # tasks which have changed since and the dates whose placements
+        # may differ from the previous run
+        self.previous_placements: Optional[
+            Dict[int, Dict[Optional[int], List[ScheduledTask]]]
+        ] = None
+        self.changed_task_ids: Set[int] = set()
+        self.changed_dates: Set[dt.date] = set()
+
+    @classmethod
+    def for_dates(
+        cls,
+        user: User,
+        start_date: dt.date | dt.datetime,
+        end_date: dt.date | dt.datetime,
+    ) -> "SchedulingEngine":
+        """Create an engine which only schedules what is needed to check the
+        dates provided (e.g. for alerts or placing a new flexible task),
+        rather than the whole of the default scheduling window.
+
+        The tasks placed on those dates are the same as for an engine with
+        the default window - see `get_dependent_window`.
+        """
+        family_members = (
+            list(user.family.users.all()) if (user.family and user.family.users) else []
+        )
+        (window_start, window_end) = get_dependent_window(
+            family_members,
+            ensure_date(start_date),
+            ensure_date(end_date),
+            DEFAULT_START_DATE,
+            DEFAULT_END_DATE,
+        )
+        return cls(user, start_date=window_start, end_date=window_end)
+
+    def _load_task_relations(self):
+        """Load the IDs of the objects related to each task up front,
+        with one query for each relation rather than for each task"""
+        task_ids = [task.id for task in [*self.fixed_tasks, *self.flexible_tasks]]
+
+        self.task_member_ids = group_ids(
+            Task.members.through.objects.filter(task_id__in=task_ids)
+            .order_by("member_id")
+            .values_list("task_id", "member_id")
+        )
+
+        task_entities = list(
+            Task.entities.through.objects.filter(task_id__in=task_ids)
+            .order_by("entity_id")
+            .values_list("task_id", "entity_id", "entity__category")
         )
+        self.task_entity_ids = group_ids(
+            (task_id, entity_id) for (task_id, entity_id, _) in task_entities
+        )
+        self.task_categories = group_ids(
+            sorted({(task_id, category) for (task_id, _, category) in task_entities})
+        )
+
+        self.task_action_ids = group_ids(
+            (action.task_id, action.id)  # type: ignore
+            for action in sorted(self.task_actions.values(), key=lambda a: a.id)
+        )
+
+        # Tasks may have members outside of the family
+        self.users_by_id: Dict[int, User] = {
+            member.id: member for member in self.family_members
+        }
+        other_member_ids = {
+            member_id
+            for member_ids in self.task_member_ids.values()
+            for member_id in member_ids
+            if member_id not in self.users_by_id
+        }
+        if other_member_ids:
+            for member in User.objects.filter(id__in=other_member_ids):
+                self.users_by_id[member.id] = member
+
+        ical_events = [task for task in self.fixed_tasks if isinstance(task, ICalEvent)]
+
+        # The occurrences of recurring iCal events which are overridden
+        # by other events (with a RECURRENCE-ID) - by integration and UID
+        self.ical_overridden_occurrences: Dict[
+            Tuple[int, str], FrozenSet[dt.datetime]
+        ] = {}
+        recurring_ical_events = [event for event in ical_events if event.ical_rrule]
+        if recurring_ical_events:
+            overridden_occurrences = defaultdict(set)
+            for (integration_id, ical_uid, ical_recurrence_id) in (
+                ICalEvent.objects.filter(
+                    ical_integration_id__in={
+                        event.ical_integration_id for event in recurring_ical_events  # type: ignore
+                    },
+                    ical_uid__in={event.ical_uid for event in recurring_ical_events},
+                )
+                .exclude(ical_recurrence_id="")
+                .values_list("ical_integration_id", "ical_uid", "ical_recurrence_id")
+            ):
+                overridden_occurrences[(integration_id, ical_uid)].add(
+                    parse_utc(ical_recurrence_id)
+                )
+            self.ical_overridden_occurrences = {
+                key: frozenset(occurrences)
+                for (key, occurrences) in overridden_occurrences.items()
+            }
+
+    def _load_task_visibility(self):
+        """Work out which tasks are shown to the user, and which of those
+        are shown as busy, in one query up front (see `TaskVisibility`)"""
+        task_ids = [task.id for task in [*self.fixed_tasks, *self.flexible_tasks]]
+        self.task_visibility: Dict[int, TaskVisibility] = {
+            task_id: TaskVisibility(visibility)
+            for (task_id, visibility) in TaskAccess.objects.filter(
+                user=self.user, task__in=task_ids
+            ).values_list("task", "visibility")
+        }
 
     def unschedule_task(self, task_id: int):
         """Unschedule a task - remove all scheduled tasks for the task ID"""
-        self.placed_tasks = [
-            tsk for tsk in self.placed_tasks if not tsk["id"] == task_id
-        ]
+        self.placed_tasks = [tsk for tsk in self.placed_tasks if not tsk.id == task_id]
 
         self.placed_national_holidays = [
-            tsk for tsk in self.placed_national_holidays if not tsk["id"] == task_id
+            tsk for tsk in self.placed_national_holidays if not tsk.id == task_id
         ]
 
+        self.placed_intervals = IntervalIndex()
+        self.placed_user_intervals = defaultdict(IntervalIndex)
+        for tsk in self.placed_tasks:
+            self._index_task_interval(tsk)
+
+    def _index_task_interval(self, task: ScheduledTask):
+        """Add the datetimes taken up by the task to the slot indexes"""
+        start_datetime = task.start_datetime
+        end_datetime = task.end_datetime
+        if start_datetime and end_datetime:
+            self.placed_intervals.add(start_datetime, end_datetime)
+            for member in task.members:
+                self.placed_user_intervals[member].add(start_datetime, end_datetime)
+
+    def _get_task_details(
+        self,
+        task: Task,
+        resourcetype: str,
+        recurrence: Optional[Recurrence] = None,
+    ) -> TaskDetails:
+        """Get the details shared by all scheduled occurrences of the task"""
+        details = self.task_details.get(task.id)
+        if details is None:
+            details = TaskDetails(
+                id=task.id,
+                title=task.title,
+                tags=tuple(cast(List[TagType], task.tags)),
+                members=self.task_member_ids[task.id],
+                entities=self.task_entity_ids[task.id],
+                actions=self.task_action_ids[task.id],
+                action_id=None,
+                recurrence=recurrence.id if recurrence else None,
+                routine=task.routine_id,  # type: ignore
+                resourcetype=resourcetype,
+                type=task.type,
+            )
+            self.task_details[task.id] = details
+        return details
+
+    def _get_action_details(
+        self, task_details: TaskDetails, action_id: int
+    ) -> TaskDetails:
+        """Get the details shared by all scheduled occurrences of a task action"""
+        details = self.action_details.get(action_id)
+        if details is None:
+            details = TaskDetails(
+                id=task_details.id,
+                title=f"ACTION - {task_details.title}",
+                tags=task_details.tags,
+                members=task_details.members,
+                entities=task_details.entities,
+                actions=(),
+                action_id=action_id,
+                recurrence=None,
+                routine=task_details.routine,
+                resourcetype="TaskAction",
+                type=task_details.type,
+            )
+            self.action_details[action_id] = details
+        return details
+
+    def _reschedule_placements(self, task: Task, placements: List[ScheduledTask]):
+        """Schedule placements of the task carried over from a previous run"""
+        categories = list(self.task_categories[task.id])
+        users = list(self.task_member_ids[task.id])
+        for placement in placements:
+            self.schedule_task(placement.copy(), categories=categories, users=users)
+
     def schedule_task(
         self,
         task: ScheduledTask,
@@ -503,16 +607,17 @@ class SchedulingEngine:
         users = users or []
 
         self.placed_tasks.append(task)
+        self._index_task_interval(task)
 
-        if "SOCIAL_INTERESTS__HOLIDAY" in task["tags"]:
+        if "SOCIAL_INTERESTS__HOLIDAY" in task.tags:
             self.placed_national_holidays.append(task)
 
-        duration_attr = cast(Optional[int], task.get("duration"))
-        date_attr = cast(Optional[dt.date], task.get("date"))
-        start_datetime_attr = cast(Optional[dt.datetime], task.get("start_datetime"))
-        end_datetime_attr = cast(Optional[dt.datetime], task.get("end_datetime"))
-        start_date_attr = cast(Optional[dt.date], task.get("start_date"))
-        end_date_attr = cast(Optional[dt.date], task.get("end_date"))
+        duration_attr = task.duration
+        date_attr = task.date
+        start_datetime_attr = task.start_datetime
+        end_datetime_attr = task.end_datetime
+        start_date_attr = task.start_date
+        end_date_attr = task.end_date
 
         task_dates = None
         if duration_attr and date_attr:
@@ -531,8 +636,6 @@ class SchedulingEngine:
             for date in task_dates:
                 for category in categories:
                     for user in users:
-                        self.day_task_counts[date][user][category]["tasks"] += 1
-
                         if duration_attr:
                             task_duration = duration_attr
                         elif start_datetime_attr and end_datetime_attr:
@@ -556,9 +659,9 @@ class SchedulingEngine:
                             else:
                                 task_duration = 24 * 60
 
-                        self.day_task_counts[date][user][category][
-                            "minutes"
-                        ] += task_duration
+                        self.day_loads.add(
+                            date, user, category, tasks=1, minutes=task_duration
+                        )
 
     def schedule_task_and_actions(
         self,
@@ -567,13 +670,12 @@ class SchedulingEngine:
         users: Optional[List[int]] = None,
     ):
         """schedule_task_and_actions"""
-        task_actions = task["actions"]
-        for action in task_actions:
+        for action in task.actions:
             action_obj = self.task_actions[action]
             action_timedelta = action_obj.action_timedelta
 
             action_recurrence = (
-                -1 if task["recurrence_index"] is None else task["recurrence_index"]
+                -1 if task.recurrence_index is None else task.recurrence_index
             )
             occurrence_completion_forms = self.task_action_completion_forms.get(
                 action_obj.id
@@ -582,46 +684,30 @@ class SchedulingEngine:
             )
 
             self.schedule_task(
-                {
-                    "id": task["id"],
-                    "is_complete": bool(
+                ScheduledTask(
+                    self._get_action_details(task.details, action),
+                    is_complete=bool(
                         occurrence_completion_forms
                         and occurrence_completion_forms[-1].complete
                     ),
-                    "is_partially_complete": False,
-                    "is_ignored": bool(
+                    is_ignored=bool(
                         occurrence_completion_forms
                         and occurrence_completion_forms[-1].ignore
                     ),
-                    "members": task["members"],
-                    "duration": task["duration"],
-                    "entities": task["entities"],
-                    "actions": [],
-                    "action_id": action,
-                    "tags": task["tags"],
-                    "recurrence": None,
-                    "recurrence_index": task["recurrence_index"],
-                    "title": f"ACTION - {task['title']}",
-                    "alerts": {},
-                    "routine": task["routine"],
-                    "resourcetype": "TaskAction",
-                    "type": task["type"],
-                    "start_datetime": task["start_datetime"] - action_timedelta
-                    if task["start_datetime"]
+                    duration=task.duration,
+                    recurrence_index=task.recurrence_index,
+                    start_datetime=task.start_datetime - action_timedelta
+                    if task.start_datetime
                     else None,
-                    "end_datetime": task["end_datetime"] - action_timedelta
-                    if task["end_datetime"]
+                    end_datetime=task.end_datetime - action_timedelta
+                    if task.end_datetime
                     else None,
-                    "date": task["date"] - action_timedelta
-                    if task["date"]
+                    date=task.date - action_timedelta
+                    if task.date
                     else (
-                        task["start_date"] - action_timedelta
-                        if task["start_date"]
-                        else None
+                        task.start_date - action_timedelta if task.start_date else None
                     ),
-                    "start_date": None,
-                    "end_date": None,
-                },
+                ),
                 categories=categories,
                 users=users,
             )
@@ -671,6 +757,35 @@ class SchedulingEngine:
         occurrence_start_date = task_start_date
         occurrence_end_date = task_end_date
         recurrence_index = 0
+
+        # Skip straight to the first occurrence in the timeframe. This is
+        # only safe if exactly one of the time options is set on the task,
+        # otherwise fall back to stepping through every occurrence.
+        time_options = [
+            occurence_start or occurence_end,
+            occurrence_date,
+            occurrence_start_date or occurrence_end_date,
+        ]
+        if len([opt for opt in time_options if opt]) == 1:
+            if occurence_start and occurence_end:
+                (recurrence_index, occurence_start) = get_first_occurrence_from(
+                    occurence_start, recurrence, timeframe_start
+                )
+                occurence_end = occurence_end + (occurence_start - task_start)
+            elif occurrence_date:
+                (recurrence_index, occurrence_date) = get_first_occurrence_from(
+                    occurrence_date, recurrence, timeframe_start.date()
+                )
+            elif occurrence_start_date and occurrence_end_date:
+                # Occurrences which end in the timeframe are included
+                task_length = occurrence_end_date - occurrence_start_date
+                (recurrence_index, occurrence_start_date,) = get_first_occurrence_from(
+                    occurrence_start_date,
+                    recurrence,
+                    timeframe_start.date() - task_length,
+                )
+                occurrence_end_date = occurrence_start_date + task_length
+
         while (
             (occurence_start and (occurence_start < timeframe_end))
             or (occurrence_date and occurrence_date < timeframe_end.date())
@@ -715,41 +830,30 @@ class SchedulingEngine:
                 ) and self.task_completion_forms[task.id].get(recurrence_index)
 
                 self.schedule_task_and_actions(
-                    {
-                        "id": task.id,
-                        "is_complete": bool(
+                    ScheduledTask(
+                        self._get_task_details(task, "FixedTask", recurrence),
+                        is_complete=bool(
                             occurrence_completion_forms
                             and occurrence_completion_forms[-1].complete
                         ),
-                        "is_partially_complete": bool(
+                        is_partially_complete=bool(
                             occurrence_completion_forms
                             and occurrence_completion_forms[-1].partial
                         ),
-                        "is_ignored": bool(
+                        is_ignored=bool(
                             occurrence_completion_forms
                             and occurrence_completion_forms[-1].ignore
                         ),
-                        "members": [m.id for m in task.members.all()],
-                        "start_datetime": occurence_start,
-                        "end_datetime": occurence_end,
-                        "start_date": occurrence_start_date,
-                        "end_date": occurrence_end_date,
-                        "duration": task.duration,
-                        "date": occurrence_date,
-                        "entities": [e.id for e in task.entities.all()],
-                        "actions": [a.id for a in task.actions.all()],
-                        "action_id": None,
-                        "tags": cast(List[TagType], task.tags),
-                        "recurrence": recurrence.id,
-                        "recurrence_index": recurrence_index,
-                        "resourcetype": "FixedTask",
-                        "type": task.type,
-                        "title": task.title,
-                        "alerts": {},
-                        "routine": task.routine.id if task.routine else None,
-                    },
-                    categories=list(set([e.category for e in task.entities.all()])),
-                    users=[m.id for m in task.members.all()],
+                        start_datetime=occurence_start,
+                        end_datetime=occurence_end,
+                        start_date=occurrence_start_date,
+                        end_date=occurrence_end_date,
+                        duration=task.duration,
+                        date=occurrence_date,
+                        recurrence_index=recurrence_index,
+                    ),
+                    categories=list(self.task_categories[task.id]),
+                    users=list(self.task_member_ids[task.id]),
                 )
 
             if occurence_start and occurence_end:
@@ -769,6 +873,66 @@ class SchedulingEngine:
 
         return
 
+    def place_ical_occurrences_between(
+        self, task: ICalEvent, start_datetime: dt.datetime, end_datetime: dt.datetime
+    ):
+        """Place the occurrences of a recurring iCal event which overlap the
+        specified datetimes, by expanding its rules (see `expand_occurrences`).
+
+        The recurrence index of each occurrence is the number of minutes
+        between the event's first occurrence and its start, so that it
+        identifies the occurrence (e.g. for completion forms) without
+        counting all of the occurrences before it, and isn't changed by
+        excluding other occurrences.
+        """
+        if not (task.start_datetime and task.end_datetime):
+            return
+
+        occurrence_starts = expand_occurrences(
+            (task.id, task.ical_hash),
+            task.ical_rrule,
+            task.start_datetime,
+            task.end_datetime,
+            str(task.start_timezone) if task.start_timezone else None,
+            start_datetime,
+            end_datetime,
+            self.ical_overridden_occurrences.get(
+                (task.ical_integration_id, task.ical_uid), frozenset()  # type: ignore
+            ),
+        )
+        duration = task.end_datetime - task.start_datetime
+        for occurrence_start in occurrence_starts:
+            recurrence_index = int(
+                (occurrence_start - task.start_datetime).total_seconds() // 60
+            )
+            occurrence_completion_forms = self.task_completion_forms.get(
+                task.id
+            ) and self.task_completion_forms[task.id].get(recurrence_index)
+
+            self.schedule_task_and_actions(
+                ScheduledTask(
+                    self._get_task_details(task, "FixedTask"),
+                    is_complete=bool(
+                        occurrence_completion_forms
+                        and occurrence_completion_forms[-1].complete
+                    ),
+                    is_partially_complete=bool(
+                        occurrence_completion_forms
+                        and occurrence_completion_forms[-1].partial
+                    ),
+                    is_ignored=bool(
+                        occurrence_completion_forms
+                        and occurrence_completion_forms[-1].ignore
+                    ),
+                    start_datetime=occurrence_start,
+                    end_datetime=occurrence_start + duration,
+                    duration=task.duration,
+                    recurrence_index=recurrence_index,
+                ),
+                categories=list(self.task_categories[task.id]),
+                users=list(self.task_member_ids[task.id]),
+            )
+
     def place_flexible_occurrences_between(
         self,
         task: FlexibleTask,
@@ -813,9 +977,13 @@ class SchedulingEngine:
         if timeframe_start > timeframe_end:
             return
 
-        occurence_start = task_earliest
-        occurence_end = task_due
-        recurrence_index = 0
+        # Skip straight to the first occurrence in the timeframe
+        (recurrence_index, occurence_start) = get_first_occurrence_from(
+            task_earliest,
+            recurrence,
+            max(timeframe_start.date(), self.start_date.date()),
+        )
+        occurence_end = task_due + (occurence_start - task_earliest)
 
         if occurence_start:
             while occurence_start <= min(timeframe_end.date(), self.end_date.date()):
@@ -850,6 +1018,22 @@ class SchedulingEngine:
     def place_fixed_tasks(self):
         """Place the fixed tasks, including recurring tasks"""
         for fixed_task in self.fixed_tasks:
+            if (
+                self.previous_placements is not None
+                and fixed_task.id not in self.changed_task_ids
+                and fixed_task.id in self.previous_placements
+            ):
+                # Fixed tasks don't depend on anything else that is placed
+                for placements in self.previous_placements[fixed_task.id].values():
+                    self._reschedule_placements(fixed_task, placements)
+                continue
+
+            if isinstance(fixed_task, ICalEvent) and fixed_task.ical_rrule:
+                self.place_ical_occurrences_between(
+                    fixed_task, self.start_date, self.end_date
+                )
+                continue
+
             if not hasattr(fixed_task, "recurrence"):
                 task_completion_forms = self.task_completion_forms.get(
                     fixed_task.id
@@ -865,36 +1049,20 @@ class SchedulingEngine:
                 )
 
                 self.schedule_task_and_actions(
-                    {
-                        "id": fixed_task.id,
-                        "is_complete": is_complete,
-                        "is_partially_complete": is_partially_complete,
-                        "is_ignored": is_ignored,
-                        "members": [m.id for m in fixed_task.members.all()],
-                        "start_datetime": fixed_task.start_datetime,
-                        "end_datetime": fixed_task.end_datetime,
-                        "duration": fixed_task.duration,
-                        "date": fixed_task.date,
-                        "start_date": fixed_task.start_date,
-                        "end_date": fixed_task.end_date,
-                        "entities": [e.id for e in fixed_task.entities.all()],
-                        "actions": [a.id for a in fixed_task.actions.all()],
-                        "action_id": None,
-                        "tags": cast(List[TagType], fixed_task.tags),
-                        "recurrence": None,
-                        "recurrence_index": None,
-                        "resourcetype": "FixedTask",
-                        "type": fixed_task.type,
-                        "title": fixed_task.title,
-                        "alerts": {},
-                        "routine": fixed_task.routine.id
-                        if fixed_task.routine
-                        else None,
-                    },
-                    categories=list(
-                        set([e.category for e in fixed_task.entities.all()])
+                    ScheduledTask(
+                        self._get_task_details(fixed_task, "FixedTask"),
+                        is_complete=is_complete,
+                        is_partially_complete=is_partially_complete,
+                        is_ignored=is_ignored,
+                        start_datetime=fixed_task.start_datetime,
+                        end_datetime=fixed_task.end_datetime,
+                        duration=fixed_task.duration,
+                        date=fixed_task.date,
+                        start_date=fixed_task.start_date,
+                        end_date=fixed_task.end_date,
                     ),
-                    users=[m.id for m in fixed_task.members.all()],
+                    categories=list(self.task_categories[fixed_task.id]),
+                    users=list(self.task_member_ids[fixed_task.id]),
                 )
                 continue
 
@@ -963,7 +1131,7 @@ class SchedulingEngine:
                     "end_date": start_date,
                     "start_datetime": None,
                     "end_datetime": None,
-                    "members": [m.id for m in year.school.members.all()],
+                    "members": list(self.school_member_ids[year.school_id]),
                     "title": f"{year.year} {year.school.name} First Day",
                     "resourcetype": "SchoolYearStart",
                     "recurrence_index": None,
@@ -975,7 +1143,7 @@ class SchedulingEngine:
                     "end_date": end_date,
                     "start_datetime": None,
                     "end_datetime": None,
-                    "members": [m.id for m in year.school.members.all()],
+                    "members": list(self.school_member_ids[year.school_id]),
                     "title": f"{year.year} {year.school.name} Last Day",
                     "resourcetype": "SchoolYearEnd",
                     "recurrence_index": None,
@@ -996,9 +1164,9 @@ class SchedulingEngine:
                     "end_date": end_date,
                     "start_datetime": None,
                     "end_datetime": None,
-                    "members": [
-                        m.id for m in school_break.school_year.school.members.all()
-                    ],
+                    "members": list(
+                        self.school_member_ids[school_break.school_year.school_id]
+                    ),
                     "title": school_break.name,
                     "resourcetype": "SchoolBreak",
                     "recurrence_index": None,
@@ -1020,9 +1188,9 @@ class SchedulingEngine:
                         "end_date": start_date,
                         "start_datetime": None,
                         "end_datetime": None,
-                        "members": [
-                            m.id for m in school_term.school_year.school.members.all()
-                        ],
+                        "members": list(
+                            self.school_member_ids[school_term.school_year.school_id]
+                        ),
                         "title": f"{school_term.name} First Day",
                         "resourcetype": "SchoolTermStart",
                         "recurrence_index": None,
@@ -1035,9 +1203,9 @@ class SchedulingEngine:
                         "end_date": end_date,
                         "start_datetime": None,
                         "end_datetime": None,
-                        "members": [
-                            m.id for m in school_term.school_year.school.members.all()
-                        ],
+                        "members": list(
+                            self.school_member_ids[school_term.school_year.school_id]
+                        ),
                         "title": f"{school_term.name} Last Day",
                         "resourcetype": "SchoolTermEnd",
                         "recurrence_index": None,
@@ -1050,9 +1218,9 @@ class SchedulingEngine:
                         "end_date": end_date,
                         "start_datetime": None,
                         "end_datetime": None,
-                        "members": [
-                            m.id for m in school_term.school_year.school.members.all()
-                        ],
+                        "members": list(
+                            self.school_member_ids[school_term.school_year.school_id]
+                        ),
                         "title": school_term.name,
                         "resourcetype": "SchoolTerm",
                         "recurrence_index": None,
@@ -1086,145 +1254,50 @@ class SchedulingEngine:
 
     def _is_day_blocked(self, date: dt.date, categories: List[int], users: List[User]):
         """Determine whether a day is blocked by the blocked day preferences"""
-        birthday_blocked_days = [
-            bd
-            for bd in BirthdayBlockedCategory.objects.filter(user__in=users)
-            if bd.category in categories and bd.user in users
-        ]
-        family_birthday_blocked_days = [
-            bd
-            for bd in FamilyBirthdayBlockedCategory.objects.filter(user__in=users)
-            if bd.category in categories and bd.user in users
-        ]
-        trip_blocked_days = [
-            bd
-            for bd in TripBlockedCategory.objects.filter(user__in=users)
-            if bd.category in categories and bd.user in users
-        ]
-        term_time_blocked_days = [
-            bd
-            for bd in TermTimeBlockedCategory.objects.filter(user__in=users)
-            if bd.category in categories and bd.user in users
-        ]
-        national_holidays_blocked_days = [
-            bd
-            for bd in NationalHolidaysBlockedCategory.objects.filter(user__in=users)
-            if bd.category in categories and bd.user in users
-        ]
-        days_off_blocked_days = [
-            bd
-            for bd in DaysOffBlockedCategory.objects.filter(user__in=users)
-            if bd.category in categories and bd.user in users
-        ]
-
-        if birthday_blocked_days:
-            for user_block in birthday_blocked_days:
-                if (
-                    user_block.user.dob
-                    and (user_block.user.dob.day == date.day)
-                    and (user_block.user.dob.month == date.month)
-                ):
-                    return True
-
-        if family_birthday_blocked_days:
-            if any(
-                [
-                    user.family
-                    and any([member.dob == date for member in user.family.users.all()])
-                    for user in users
-                ]
-            ):
-                return True
-
-        if national_holidays_blocked_days:
-            relevant_holidays = list(
-                HolidayTask.objects.filter(
-                    Q(start_date__lte=date)
-                    & Q(end_date__gte=date)
-                    & Q(tags__contains=["SOCIAL_INTERESTS__HOLIDAY"])
-                    & Q(members__in=users)
-                )
-            )
-            if any(
-                [
-                    hol.start_date
-                    and hol.end_date
-                    and (hol.start_date <= date and hol.end_date >= date)
-                    for hol in relevant_holidays
-                ]
-            ):
-                return True
-
-        if trip_blocked_days:
-            relevant_trips = Trip.objects.filter(members__in=users)
-            if any(
-                [
-                    (trip.start_date <= date and trip.end_date >= date)
-                    for trip in relevant_trips
-                ]
-            ):
-                return True
-
-        if term_time_blocked_days:
-            schools = self.schools.filter(members__in=users)
-            school_years = SchoolYear.objects.filter(school__in=schools)
-            school_terms = SchoolTerm.objects.filter(school_year__in=school_years)
+        return self.blocked_days.is_day_blocked(
+            date, categories, [user.id for user in users]
+        )
 
-            if any(
-                [
-                    (school_term.start_date <= date and school_term.end_date >= date)
-                    for school_term in school_terms
-                ]
-            ):
-                return True
+    def _day_limited_dates(
+        self,
+        start_date: dt.date,
+        end_date: dt.date,
+        categories: List[int],
+        users: List[User],
+    ) -> Set[dt.date]:
+        """Get the dates between the dates provided (inclusive) on which we
+        have reached the day limit for any of the categories / users provided"""
+        limited_dates: Set[dt.date] = set()
+        for category in categories:
+            for user in users:
+                task_limit = self.daily_task_limits.get((category, user.id))
+                if not task_limit:
+                    continue
 
-        if days_off_blocked_days:
-            relevant_days_off = DaysOff.objects.filter(members__in=users)
-            if any(
-                [
-                    (days_off.start_date <= date and days_off.end_date >= date)
-                    for days_off in relevant_days_off
-                ]
-            ):
-                return True
+                for (limit, day_totals) in [
+                    (task_limit.tasks_limit, self.day_loads.tasks_between),
+                    (task_limit.minutes_limit, self.day_loads.minutes_between),
+                ]:
+                    if not limit:
+                        continue
+                    for i, total in enumerate(
+                        day_totals(start_date, end_date, user.id, category)
+                    ):
+                        if total >= limit:
+                            limited_dates.add(start_date + dt.timedelta(days=i))
 
-        return False
+        return limited_dates
 
     def _has_hit_day_limit(
         self, date: dt.date, categories: List[int], users: List[User]
     ):
         """Check whether we have reached the day limit for the day
         and any of the categories / users provided"""
-        task_limits: List[TaskLimit] = [
-            tl
-            for tl in self.task_limits
-            if tl.category in categories and tl.user in users
-        ]
-        daily_task_limits = [tl for tl in task_limits if tl.interval == "DAILY"]
-        daily_limits: Dict[
-            int, Dict[int, Dict[Literal["tasks", "minutes"], Optional[int]]]
-        ] = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
-
-        for lim in daily_task_limits:
-            daily_limits[lim.category][lim.user.id] = {
-                "tasks": lim.tasks_limit,
-                "minutes": lim.minutes_limit,
-            }
+        if not date:
+            return False
 
-        for category in categories:
-            for user in users:
-                cat_task_count = self.day_task_counts[date][user.id][category]["tasks"]
-                cat_minute_count = self.day_task_counts[date][user.id][category][
-                    "minutes"
-                ]
-                cat_task_limit = daily_limits[category][user.id]["tasks"]
-                cat_minutes_limit = daily_limits[category][user.id]["minutes"]
-                if cat_task_limit and (cat_task_count >= cat_task_limit):
-                    return True
-                if cat_minutes_limit and (cat_minute_count >= cat_minutes_limit):
-                    return True
-
-        return False
+        date = ensure_date(date)
+        return bool(self._day_limited_dates(date, date, categories, users))
 
     def _preferred_weekdays(self, categories: List[int], users: List[User]):
         """Get the preferred days for the categories provided.
@@ -1232,10 +1305,11 @@ class SchedulingEngine:
         We return the weekday numbers which are preferred for
         ALL of the categories provide.
         """
+        user_ids = {user.id for user in users}
         preferred_days: List[PreferredDays] = [
             p
             for p in self.preferred_days
-            if p.category in categories and p.user in users
+            if p.category in categories and p.user_id in user_ids  # type: ignore
         ]
         if not preferred_days:
             return list(range(7))
@@ -1248,18 +1322,6 @@ class SchedulingEngine:
 
         return preferred_weekdays
 
-    def _total_minutes_on_day(self, date: dt.date, users: List[User]):
-        """Calculate the total number of minutes placed on the day so far
-        for the users provided
-        """
-        num_mins = 0
-        for user in users:
-            cat_counts = self.day_task_counts[date][user.id].values()
-            for cat_count in cat_counts:
-                num_mins += cat_count["minutes"]
-
-        return num_mins
-
     def _routine_dates(
         self,
         earliest_action_date: dt.datetime | dt.date,
@@ -1306,32 +1368,33 @@ class SchedulingEngine:
         permitted_dates = get_dates_between(
             ensure_date(earliest_action_date), ensure_date(due_date)
         )
+        if not permitted_dates:
+            return []
+
+        day_minutes = self.day_loads.total_minutes_between(
+            permitted_dates[0], permitted_dates[-1], [user.id for user in users]
+        )
         preferred_weekdays = self._preferred_weekdays(categories, users)
         preferred_dates = [
-            date for date in permitted_dates if date.weekday() in preferred_weekdays
+            (minutes, date)
+            for (minutes, date) in zip(day_minutes, permitted_dates)
+            if date.weekday() in preferred_weekdays
         ]
 
-        return sorted(
-            preferred_dates, key=lambda date: self._total_minutes_on_day(date, users)
-        )
+        return [
+            date
+            for (_, date) in sorted(
+                preferred_dates, key=lambda date_minutes: date_minutes[0]
+            )
+        ]
 
     def is_slot_available(
         self, candidate_start_time: dt.datetime, candidate_end_time: dt.datetime
     ):
         """Check whether the slot is available"""
-        if all(
-            [
-                (
-                    candidate_start_time >= task["end_datetime"]
-                    or candidate_end_time <= task["start_datetime"]
-                )
-                for task in self.placed_tasks
-                if task["end_datetime"] and task["start_datetime"]
-            ]
-        ):
-            return True
-
-        return False
+        return not self.placed_intervals.overlaps(
+            candidate_start_time, candidate_end_time
+        )
 
     def is_slot_available_for_user(
         self,
@@ -1340,21 +1403,12 @@ class SchedulingEngine:
         user: User,
     ):
         """Check whether the slot is available for the specific user"""
-        if all(
-            [
-                (
-                    candidate_start_time >= task["end_datetime"]
-                    or candidate_end_time <= task["start_datetime"]
-                )
-                for task in self.placed_tasks
-                if task["end_datetime"]
-                and task["start_datetime"]
-                and user.id in task["members"]
-            ]
-        ):
+        if user.id not in self.placed_user_intervals:
             return True
 
-        return False
+        return not self.placed_user_intervals[user.id].overlaps(
+            candidate_start_time, candidate_end_time
+        )
 
     def get_alerted_users(
         self,
@@ -1457,8 +1511,16 @@ class SchedulingEngine:
         blocked_dates = []
         full_dates = []
 
+        limited_dates = (
+            self._day_limited_dates(
+                min(preferred_dates), max(preferred_dates), categories, users
+            )
+            if preferred_dates
+            else set()
+        )
+
         for action_day in preferred_dates:
-            hit_task_limit = self._has_hit_day_limit(action_day, categories, users)
+            hit_task_limit = action_day in limited_dates
             day_is_blocked = self._is_day_blocked(action_day, categories, users)
 
             if hit_task_limit:
@@ -1580,13 +1642,58 @@ class SchedulingEngine:
         recurrence_index: Optional[int] = None,
     ):
         """Place a flexible task according to the tasks that have already
-        been placed, with the following placement preference order:
+        been placed.
+
+        When scheduling incrementally, the placement from the previous run
+        is reused if the task hasn't changed and nothing that it could
+        depend on (anything placed on the days it could be placed on) has
+        changed either.
         """
+        earliest_action_date = flexible_task.earliest_action_date
+        due_date = flexible_task.due_date
+        if self.previous_placements is None or not (earliest_action_date and due_date):
+            self._place_flexible_task(flexible_task, recurrence, recurrence_index)
+            return
+
+        previous_placements = self.previous_placements.get(flexible_task.id, {}).get(
+            recurrence_index
+        )
+
+        # Candidate slots start at the latest at the end of the day
+        # and may run over into the following days
+        dependent_dates = get_dates_between(
+            ensure_date(earliest_action_date),
+            ensure_date(due_date)
+            + dt.timedelta(days=flexible_task.duration // (24 * 60) + 1),
+        )
+        if (
+            previous_placements is not None
+            and flexible_task.id not in self.changed_task_ids
+            and self.changed_dates.isdisjoint(dependent_dates)
+        ):
+            self._reschedule_placements(flexible_task, previous_placements)
+            return
 
+        num_placed = len(self.placed_tasks)
+        self._place_flexible_task(flexible_task, recurrence, recurrence_index)
+        placements = self.placed_tasks[num_placed:]
+
+        if placements != (previous_placements or []):
+            # Anything placed after this task on these dates may now differ too
+            for placement in placements + (previous_placements or []):
+                self.changed_dates.update(get_scheduled_task_dates(placement))
+
+    def _place_flexible_task(
+        self,
+        flexible_task: FlexibleTask,
+        recurrence: Optional[Recurrence] = None,
+        recurrence_index: Optional[int] = None,
+    ):
+        """Place a flexible task in the best slot given the tasks placed so far"""
         earliest_action_date = flexible_task.earliest_action_date
         due_date = flexible_task.due_date
         if earliest_action_date and due_date:
-            categories = list(set([e.category for e in flexible_task.entities.all()]))
+            categories = list(self.task_categories[flexible_task.id])
             completion_forms = self.task_completion_forms.get(
                 flexible_task.id
             ) and self.task_completion_forms[flexible_task.id].get(
@@ -1613,7 +1720,10 @@ class SchedulingEngine:
                 due_date,
                 flexible_task.duration,
                 categories,
-                list(flexible_task.members.all()),
+                [
+                    self.users_by_id[member_id]
+                    for member_id in self.task_member_ids[flexible_task.id]
+                ],
                 flexible_task.routine,
             )
 
@@ -1623,36 +1733,18 @@ class SchedulingEngine:
                 return
 
             self.schedule_task_and_actions(
-                {
-                    "start_datetime": task_placement["start_datetime"],
-                    "end_datetime": task_placement["end_datetime"],
-                    "start_date": None,
-                    "end_date": None,
-                    "duration": None,
-                    "date": None,
-                    "id": flexible_task.id,
-                    "entities": [e.id for e in flexible_task.entities.all()],
-                    "actions": [a.id for a in flexible_task.actions.all()],
-                    "action_id": None,
-                    "tags": cast(List[TagType], flexible_task.tags),
-                    "is_complete": is_complete,
-                    "is_partially_complete": is_partially_complete,
-                    "is_ignored": is_ignored,
-                    "members": [m.id for m in flexible_task.members.all()],
-                    "recurrence": recurrence.id if recurrence else None,
-                    "recurrence_index": recurrence_index,
-                    "resourcetype": "FlexibleTask",
-                    "type": flexible_task.type,
-                    "title": flexible_task.title,
-                    "alerts": task_placement["alerts"],
-                    "routine": flexible_task.routine.id
-                    if flexible_task.routine
-                    else None,
-                },
-                categories=list(
-                    set([e.category for e in flexible_task.entities.all()])
+                ScheduledTask(
+                    self._get_task_details(flexible_task, "FlexibleTask", recurrence),
+                    start_datetime=task_placement["start_datetime"],
+                    end_datetime=task_placement["end_datetime"],
+                    is_complete=is_complete,
+                    is_partially_complete=is_partially_complete,
+                    is_ignored=is_ignored,
+                    recurrence_index=recurrence_index,
+                    alerts=task_placement["alerts"],
                 ),
-                users=[m.id for m in flexible_task.members.all()],
+                categories=list(self.task_categories[flexible_task.id]),
+                users=list(self.task_member_ids[flexible_task.id]),
             )
             return
 
@@ -1673,65 +1765,84 @@ class SchedulingEngine:
                 self.end_date,
             )
 
+    def get_placement_state(self) -> PlacementState:
+        """Get the tasks placed so far, to pass to `schedule_tasks_incrementally`
+        on a later run"""
+        return {
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "placed_tasks": [task.copy() for task in self.placed_tasks],
+        }
+
     def schedule_tasks(self):
         """Schedule all tasks"""
         self.place_fixed_tasks()
         self.place_flexible_tasks()
+        return self._get_user_tasks()
+
+    def schedule_tasks_incrementally(
+        self, state: PlacementState, changed_task_ids: Iterable[int]
+    ):
+        """Schedule all tasks, reusing the placements from a previous run
+        and only re-placing the tasks that have changed since, along with
+        any flexible tasks whose placement depended on the days they take up.
+
+        The output is the same as `schedule_tasks`, as long as the changed
+        task IDs include any task that has been created, updated or deleted
+        (or had its recurrence, actions or completion forms changed) since
+        the previous run. Changes to anything else (e.g. settings or
+        entities) require a full run.
+        """
+        if (state["start_date"], state["end_date"]) != (
+            self.start_date,
+            self.end_date,
+        ):
+            raise SchedulingException(
+                "Cannot reuse placements from a different scheduling window"
+            )
 
-        user_entity_ids = [ent.id for ent in self.user_entities]
+        self.changed_task_ids = set(changed_task_ids)
+        self.previous_placements = defaultdict(dict)
+        for placed_task in state["placed_tasks"]:
+            self.previous_placements[placed_task.id].setdefault(
+                placed_task.recurrence_index, []
+            ).append(placed_task)
+            if placed_task.id in self.changed_task_ids:
+                self.changed_dates.update(get_scheduled_task_dates(placed_task))
+
+        self.place_fixed_tasks()
 
+        # Fixed tasks are all placed before any flexible tasks so only
+        # the flexible tasks can depend on where the changed ones are now
         for placed_task in self.placed_tasks:
-            if (
-                placed_task["id"] in self.fixed_tasks_dict
-                and hasattr(
-                    self.fixed_tasks_dict[placed_task["id"]], "ical_integration"
-                )
-                and not (
-                    self.fixed_tasks_dict[placed_task["id"]].ical_integration.user
-                    == self.user
-                )
-                and self.fixed_tasks_dict[placed_task["id"]].ical_integration.share_type
-                == "BUSY"
-            ):
-                placed_task["title"] = "BUSY"
+            if placed_task.id in self.changed_task_ids:
+                self.changed_dates.update(get_scheduled_task_dates(placed_task))
+
+        self.place_flexible_tasks()
+        return self._get_user_tasks()
+
+    def _get_user_tasks(self):
+        """Get the placed tasks which should be shown to the user"""
+        user_tasks = []
+        # The details are shared with the engine's other occurrences (and
+        # its placement state), so are masked on copies
+        busy_details: Dict[Tuple[int, Optional[int]], TaskDetails] = {}
+        for placed_task in self.placed_tasks:
+            visibility = self.task_visibility.get(placed_task.id, 0)
+            if visibility & TaskVisibility.VISIBLE:
+                if visibility & TaskVisibility.BUSY:
+                    key = (placed_task.id, placed_task.action_id)
+                    if key not in busy_details:
+                        busy_details[key] = placed_task.details.copy(title="BUSY")
+                    placed_task = placed_task.copy()
+                    placed_task.details = busy_details[key]
+                user_tasks.append(placed_task)
 
         return sorted(
-            [
-                t
-                for t in self.placed_tasks
-                if self.user.id in t["members"]
-                or any([e in user_entity_ids for e in t["entities"]])
-                or (  # Shared appointments
-                    self.fixed_tasks_dict.get(t["id"])
-                    and self.fixed_tasks_dict[t["id"]].type == "APPOINTMENT"
-                    and any(
-                        [
-                            perm.user.id in t["members"]
-                            and perm.category
-                            in [
-                                ent.category
-                                for ent in [
-                                    self.family_entities_dict[ent_id]
-                                    for ent_id in t["entities"]
-                                ]
-                            ]
-                            for perm in self.family_category_view_permissions
-                        ]
-                    )
-                )
-                or (  # Shared External Calendars
-                    self.fixed_tasks_dict.get(t["id"])
-                    and self.fixed_tasks_dict[t["id"]].type == "ICAL_EVENT"
-                    and hasattr(self.fixed_tasks_dict[t["id"]], "ical_integration")
-                    and (
-                        self.fixed_tasks_dict[t["id"]].ical_integration.share_type
-                        in ["FULL", "BUSY"]
-                    )
-                )
-            ],
-            key=lambda t: t.get("start_datetime")
+            user_tasks,
+            key=lambda t: t.start_datetime
             or timezone.make_aware(
-                dt.datetime.combine(t.get("date") or t.get("start_date"), dt.time.min)
+                dt.datetime.combine(t.date or t.start_date, dt.time.min)
             ),
         )
 
@@ -0,0 +1,226 @@
+"""Narrowing the scheduling window to the dates that matter for a check"""
+
+import datetime as dt
+from typing import Iterable, List, Tuple
+
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from core.models.tasks.base import FixedTask, FlexibleTask, TaskAction
+from core.models.users.user_models import User
+from core.utils.scheduling.recurrences import (
+    get_first_occurrence_from,
+    get_next_date,
+)
+
+# Margin for datetimes in different timezones falling on different dates
+MARGIN = dt.timedelta(days=1)
+
+
+def _family_tasks_filter(family_members: Iterable[User]) -> Q:
+    return Q(entities__members__in=family_members) | Q(members__in=family_members)
+
+
+def _latest_placement(due_date: dt.date, duration: int) -> dt.date:
+    # Candidate slots run from the start of the day and may
+    # run over into the following days
+    return due_date + dt.timedelta(days=duration // (24 * 60) + 1)
+
+
+def _max_recurring_span(family_tasks: Q) -> dt.timedelta:
+    """Get the longest time that an occurrence of a recurring fixed task
+    can start before a day that it is placed on"""
+    max_span = dt.timedelta(0)
+    for (start_datetime, end_datetime, start_date, end_date) in (
+        FixedTask.objects.filter(
+            family_tasks,
+            Q(recurrence__isnull=False) | Q(icalevent__ical_rrule__gt=""),
+        )
+        .values_list("start_datetime", "end_datetime", "start_date", "end_date")
+        .distinct()
+    ):
+        if start_datetime and end_datetime:
+            max_span = max(max_span, end_datetime - start_datetime)
+        if start_date and end_date:
+            max_span = max(max_span, end_date - start_date)
+
+    return max_span
+
+
+def _follow_occurrences(
+    task: FlexibleTask,
+    start: dt.date,
+    end: dt.date,
+    bounds: Tuple[dt.date, dt.date],
+) -> Tuple[dt.date, dt.date]:
+    """Extend the dates provided to the dates of every occurrence of the
+    recurring flexible task which could be placed on them, and so on for
+    the occurrences which could be placed on those dates (within the bounds)"""
+    earliest_action_date = task.earliest_action_date
+    recurrence = task.recurrence
+    # Every occurrence can be placed on the same number of days
+    span = _latest_placement(task.due_date, task.duration) - earliest_action_date
+    latest_occurrence = (
+        recurrence.latest_occurrence.date() + MARGIN
+        if recurrence.latest_occurrence
+        else None
+    )
+
+    def can_occur(occurrence_start: dt.date) -> bool:
+        return occurrence_start <= min(end, bounds[1]) and (
+            latest_occurrence is None or occurrence_start <= latest_occurrence
+        )
+
+    (_, occurrence_start) = get_first_occurrence_from(
+        earliest_action_date, recurrence, start - span
+    )
+    if not can_occur(occurrence_start):
+        return (start, end)
+
+    # Follow the occurrences which could be placed on the dates back...
+    while occurrence_start < start and start > bounds[0]:
+        start = occurrence_start
+        (_, occurrence_start) = get_first_occurrence_from(
+            earliest_action_date, recurrence, start - span
+        )
+
+    # ...and forward
+    (_, occurrence_start) = get_first_occurrence_from(
+        earliest_action_date, recurrence, max(end - span, start)
+    )
+    while can_occur(occurrence_start):
+        end = max(end, occurrence_start + span)
+        occurrence_start = get_next_date(occurrence_start, recurrence)
+
+    return (start, end)
+
+
+def _follow_recurring_flexible_tasks(
+    tasks: List[FlexibleTask],
+    start: dt.date,
+    end: dt.date,
+    action_timedeltas: Tuple[dt.timedelta, dt.timedelta],
+    bounds: Tuple[dt.date, dt.date],
+) -> Tuple[dt.date, dt.date]:
+    """Extend the dates provided until they include every occurrence of the
+    recurring flexible tasks which could be placed on them (or have actions
+    on them)"""
+    (min_timedelta, max_timedelta) = action_timedeltas
+    while True:
+        (tasks_start, tasks_end) = (start + min_timedelta, end + max_timedelta)
+        (new_start, new_end) = (tasks_start, tasks_end)
+        for task in tasks:
+            (new_start, new_end) = _follow_occurrences(task, new_start, new_end, bounds)
+
+        if new_start >= tasks_start and new_end <= tasks_end:
+            return (start, end)
+        (start, end) = (min(start, new_start), max(end, new_end))
+
+
+def get_dependent_window(
+    family_members: Iterable[User],
+    start_date: dt.date,
+    end_date: dt.date,
+    earliest: dt.datetime,
+    latest: dt.datetime,
+) -> Tuple[dt.datetime, dt.datetime]:
+    """Get the scheduling window needed to place everything that can end
+    up on the dates provided the same way as scheduling the whole window
+    from `earliest` to `latest`.
+
+    That is anything taking up the dates, including the actions of tasks
+    on later (or earlier) dates, and every flexible task which could be
+    placed on the dates - along with everything that its own placement
+    depends on, and so on.
+
+    Occurrences of recurring flexible tasks are followed the same way as
+    other flexible tasks, so the window includes any earlier occurrences
+    that their placement depends on.
+    """
+    family_members = list(family_members)
+    family_tasks = _family_tasks_filter(family_members)
+
+    action_timedeltas = TaskAction.objects.filter(
+        Q(task__entities__members__in=family_members)
+        | Q(task__members__in=family_members)
+    ).aggregate(
+        min_timedelta=Min("action_timedelta"), max_timedelta=Max("action_timedelta")
+    )
+    min_timedelta = min(
+        action_timedeltas["min_timedelta"] or dt.timedelta(0), dt.timedelta(0)
+    )
+    max_timedelta = max(
+        action_timedeltas["max_timedelta"] or dt.timedelta(0), dt.timedelta(0)
+    )
+
+    max_duration = (
+        FlexibleTask.objects.filter(family_tasks, recurrence__isnull=True).aggregate(
+            max_duration=Max("duration")
+        )["max_duration"]
+        or 0
+    )
+    max_span = _max_recurring_span(family_tasks)
+    recurring_flexible_tasks = list(
+        FlexibleTask.objects.filter(
+            family_tasks,
+            recurrence__isnull=False,
+            earliest_action_date__isnull=False,
+            due_date__isnull=False,
+        )
+        .select_related("recurrence")
+        .distinct()
+    )
+
+    # The dates whose placements must match scheduling the whole window
+    # and the dates of the tasks whose actions can be placed on them
+    (start, end) = (start_date, end_date)
+    seen_task_ids = set()
+    while True:
+        (start, end) = _follow_recurring_flexible_tasks(
+            recurring_flexible_tasks,
+            start,
+            end,
+            (min_timedelta, max_timedelta),
+            (earliest.date() - MARGIN, latest.date() + MARGIN),
+        )
+        (tasks_start, tasks_end) = (start + min_timedelta, end + max_timedelta)
+
+        # Flexible tasks which could be placed on the dates, whose
+        # placement depends on everything else on the dates they could
+        # be placed on
+        flexible_tasks = (
+            FlexibleTask.objects.filter(
+                family_tasks,
+                recurrence__isnull=True,
+                earliest_action_date__lte=tasks_end,
+                due_date__gte=tasks_start
+                - dt.timedelta(days=max_duration // (24 * 60) + 1),
+            )
+            .exclude(id__in=seen_task_ids)
+            .values_list("id", "earliest_action_date", "due_date", "duration")
+            .distinct()
+        )
+
+        extended = False
+        for (task_id, earliest_action_date, due_date, duration) in flexible_tasks:
+            latest_placement = _latest_placement(due_date, duration)
+            if latest_placement < tasks_start:
+                continue
+            seen_task_ids.add(task_id)
+            if earliest_action_date < start or latest_placement > end:
+                (start, end) = (
+                    min(start, earliest_action_date),
+                    max(end, latest_placement),
+                )
+                extended = True
+
+        if not extended:
+            break
+
+    window_start = timezone.make_aware(
+        dt.datetime.combine(tasks_start - max_span - MARGIN, dt.time.min)
+    )
+    window_end = timezone.make_aware(
+        dt.datetime.combine(tasks_end + MARGIN, dt.time.min)
+    )
+    return (max(window_start, earliest), min(window_end, latest))
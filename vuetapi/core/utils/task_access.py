@@ -0,0 +1,153 @@
+"""The tasks each user can see.
+
+Whether a user can see a task depends on the task's members, the members
+of its entities, the category view permissions of the task's members'
+families and the share types of calendar integrations. Rather than
+working that out with an OR of joins for every request, it is stored
+in the TaskAccess table and kept up to date whenever any of them change
+(see core.models.tasks.access_signals), so that the tasks a user can
+see can be filtered with a single indexed join.
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.db.models import F
+
+from core.models.tasks.access import TaskAccess, TaskVisibility
+from core.models.tasks.base import Task
+from core.models.users.user_models import User
+from core.utils.access_rows import write_access_rows
+
+_deferred_refresh = threading.local()
+
+
+def _get_audiences(owners: Iterable[Tuple[int, Optional[int]]]):
+    """Get the IDs of the users each (user ID, family ID) pair is shared
+    with - the users in their family, or just the user if they have none"""
+    owners = set(owners)
+    family_users = defaultdict(set)
+    for (user_id, family_id) in User.objects.filter(
+        family__in={family_id for (_, family_id) in owners if family_id}
+    ).values_list("id", "family"):
+        family_users[family_id].add(user_id)
+
+    return {
+        (user_id, family_id): family_users[family_id] if family_id else {user_id}
+        for (user_id, family_id) in owners
+    }
+
+
+def compute_task_access(
+    task_ids: Iterable[int],
+) -> Dict[Tuple[int, int], TaskVisibility]:
+    """Work out which users can see the tasks provided, and why,
+    keyed by (user ID, task ID)"""
+    task_ids = set(task_ids)
+    access: Dict[Tuple[int, int], TaskVisibility] = defaultdict(
+        lambda: TaskVisibility(0)
+    )
+
+    for (task_id, user_id) in Task.members.through.objects.filter(
+        task__in=task_ids
+    ).values_list("task", "member"):
+        access[(user_id, task_id)] |= TaskVisibility.MEMBER
+
+    for (task_id, user_id) in Task.entities.through.objects.filter(
+        task__in=task_ids, entity__members__isnull=False
+    ).values_list("task", "entity__members"):
+        access[(user_id, task_id)] |= TaskVisibility.ENTITY_MEMBER
+
+    # Appointments whose members have shared the category of one of
+    # the appointment's entities with their family
+    shared_appointments = set(
+        Task.entities.through.objects.filter(
+            task__in=task_ids,
+            task__type="APPOINTMENT",
+            task__members__family_category_view_permissions__category=F(
+                "entity__category"
+            ),
+        ).values_list("task", "task__members", "task__members__family")
+    )
+    # Events from calendars shared with the family (the family
+    # can only see when the events are if they are shared as busy)
+    shared_events = list(
+        Task.objects.non_polymorphic()
+        .filter(
+            id__in=task_ids,
+            type="ICAL_EVENT",
+            fixedtask__icalevent__ical_integration__share_type__in=["FULL", "BUSY"],
+        )
+        .values_list(
+            "id",
+            "fixedtask__icalevent__ical_integration__user",
+            "fixedtask__icalevent__ical_integration__user__family",
+            "fixedtask__icalevent__ical_integration__share_type",
+        )
+    )
+
+    audiences = _get_audiences(
+        [
+            *((user_id, family_id) for (_, user_id, family_id) in shared_appointments),
+            *((user_id, family_id) for (_, user_id, family_id, _) in shared_events),
+        ]
+    )
+    for (task_id, owner_id, family_id) in shared_appointments:
+        for user_id in audiences[(owner_id, family_id)]:
+            access[(user_id, task_id)] |= TaskVisibility.SHARED_APPOINTMENT
+
+    for (task_id, owner_id, family_id, share_type) in shared_events:
+        for user_id in audiences[(owner_id, family_id)]:
+            access[(user_id, task_id)] |= TaskVisibility.SHARED_CALENDAR
+            if share_type == "BUSY" and user_id != owner_id:
+                access[(user_id, task_id)] |= TaskVisibility.BUSY
+
+    return access
+
+
+def _write_task_access(task_ids: Set[int]):
+    write_access_rows(
+        TaskAccess, "task", "visibility", task_ids, compute_task_access(task_ids)
+    )
+
+
+def refresh_task_access(task_ids: Iterable[int]):
+    """Bring the stored access to the tasks provided up to date"""
+    deferred: Optional[Set[int]] = getattr(_deferred_refresh, "task_ids", None)
+    if deferred is not None:
+        deferred.update(task_ids)
+        return
+
+    task_ids = set(task_ids)
+    if task_ids:
+        _write_task_access(task_ids)
+
+
+@contextmanager
+def refresh_task_access_after():
+    """Collect the tasks whose access changes inside the block and
+    refresh them all at once at the end (e.g. when syncing a calendar)"""
+    if getattr(_deferred_refresh, "task_ids", None) is not None:
+        yield
+        return
+
+    task_ids: Set[int] = set()
+    _deferred_refresh.task_ids = task_ids
+    try:
+        yield
+    finally:
+        _deferred_refresh.task_ids = None
+    if task_ids:
+        _write_task_access(task_ids)
+
+
+def visible_task_ids(user: User, visibility: TaskVisibility = TaskVisibility.VISIBLE):
+    """Get a subquery of the IDs of the tasks the user can see for
+    any of the reasons provided"""
+    return (
+        TaskAccess.objects.alias(matches=F("visibility").bitand(int(visibility)))
+        .filter(user=user, matches__gt=0)
+        .values("task")
+    )
@@ -0,0 +1,65 @@
+"""Change views"""
+
+from typing import cast
+
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from core.models.users.user_models import User
+from core.serializers.entities.generic import EntitySerializer
+from core.serializers.tasks import TaskSerializer
+from core.utils.change_log import get_changes
+from core.views.entity_viewsets import get_visible_entities
+from core.views.task_viewsets import get_visible_tasks
+
+
+@api_view(["GET"])
+def changes(request):
+    """Get the tasks and entities which have changed since the cursor.
+
+    The tasks and entities the user can still see are returned in full,
+    and the IDs of the others are returned as deleted. If there isn't a
+    cursor, or it is too old, every task and entity the user can see is
+    returned with `reset` set, and the client should replace the ones it
+    has. While `more` is set, there are more changes to fetch with the
+    new cursor.
+    """
+    user = cast(User, request.user)
+    cursor = request.query_params.get("cursor")
+    try:
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        return Response(
+            {"cursor": "The cursor must be an integer"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    page = get_changes(user, cursor)
+    tasks = get_visible_tasks(user)
+    entities = get_visible_entities(user)
+    if not page.reset:
+        tasks = tasks.filter(id__in=page.task_ids)
+        entities = entities.filter(id__in=page.entity_ids)
+
+    serialized_tasks = TaskSerializer(
+        tasks, many=True, context={"request": request}
+    ).data
+    serialized_entities = EntitySerializer(
+        entities, many=True, context={"request": request}
+    ).data
+    visible_task_ids = {task["id"] for task in serialized_tasks}
+    visible_entity_ids = {entity["id"] for entity in serialized_entities}
+
+    return Response(
+        {
+            "cursor": page.cursor,
+            "reset": page.reset,
+            "more": page.more,
+            "tasks": serialized_tasks,
+            "deleted_tasks": sorted(set(page.task_ids) - visible_task_ids),
+            "entities": serialized_entities,
+            "deleted_entities": sorted(set(page.entity_ids) - visible_entity_ids),
+        },
+        status=status.HTTP_200_OK,
+    )
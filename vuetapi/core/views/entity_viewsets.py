@@ -1,9 +1,9 @@
 """Entity viewsets"""
 
 import logging
-from typing import cast
+from typing import List, Optional, cast
 
-from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import status
@@ -12,8 +12,8 @@ from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
-from twilio.rest import Client
 
+from core.models.entities.access import EntityAccessKind
 from core.models.entities.base import Entity
 from core.models.entities.education import SchoolBreak, SchoolTerm, SchoolYear
 from core.models.entities.social import GuestListInvite
@@ -28,12 +28,26 @@ from core.serializers.entities.guestlists import (
     GuestListInviteInviteeSerializer,
     GuestListInviteSerializer,
 )
-from notifications.utils.send_notification import send_push_message_if_valid
-from utils.email_client import EmailClient
+from core.utils.bulk_delete import bulk_delete_entities, parse_ids
+from core.utils.entity_access import accessible_entity_ids
+from notifications.models import OutboundJob
+from notifications.utils.outbound_jobs import (
+    email_job,
+    enqueue_jobs,
+    push_job,
+    sms_job,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def get_visible_entities(user: User):
+    """Get the entities the user owns or is a member of"""
+    return Entity.objects.filter(
+        id__in=accessible_entity_ids(user, EntityAccessKind.MEMBERSHIP)
+    )
+
+
 class EntityReadonlyViewSet(ReadOnlyModelViewSet):
     """EntityReadonlyViewSet
 
@@ -55,17 +69,9 @@ class EntityReadonlyViewSet(ReadOnlyModelViewSet):
     ordering = ["pk"]
 
     def get_queryset(self):
-        return (
-            Entity.objects.all()
-            .filter(
-                Q(owner=self.request.user)
-                | (Q(members=self.request.user))
-                | (Q(parent__owner=self.request.user))
-                | (Q(parent__members=self.request.user))
-                | (Q(tasks__members__pk=self.request.user.id))
-                | (Q(child_entities__members__pk=self.request.user.id))
-            )
-            .distinct()
+        user = cast(User, self.request.user)
+        return Entity.objects.filter(
+            id__in=accessible_entity_ids(user, EntityAccessKind.VISIBLE)
         )
 
 
@@ -82,11 +88,7 @@ class EntityViewSet(ModelViewSet):
     ordering = ["pk"]
 
     def get_queryset(self):
-        return (
-            Entity.objects.all()
-            .filter(Q(owner=self.request.user) | (Q(members=self.request.user)))
-            .distinct()
-        )
+        return get_visible_entities(cast(User, self.request.user))
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -98,13 +100,19 @@ class EntityViewSet(ModelViewSet):
         return super().get_serializer(*args, **kwargs)
 
     def delete(self, request, pk=None):
-        """Delete an entity"""
+        """Delete one or multiple entities"""
         pk_ids = request.data.get("pk_ids", None)
         if pk_ids:
-            for i in pk_ids:
-                get_object_or_404(Entity, pk=int(i)).delete()
-        else:
-            get_object_or_404(Entity, pk=pk).delete()
+            results = bulk_delete_entities(cast(User, request.user), parse_ids(pk_ids))
+            return Response(
+                [
+                    {"id": entity_id, "status": result}
+                    for (entity_id, result) in results.items()
+                ],
+                status=status.HTTP_200_OK,
+            )
+
+        get_object_or_404(Entity, pk=pk).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -156,39 +164,43 @@ class SchoolTermViewSet(ModelViewSet):
         )
 
 
-def send_invite(invite: GuestListInvite):
-    """Sends the invite in the most appropriate way"""
+def get_invite_job(invite: GuestListInvite) -> Optional[OutboundJob]:
+    """Gets the job to send the invite in the most appropriate way"""
+    idempotency_key = f"guest-list-invite-{invite.id}"
     if invite.email:
-        email_client = EmailClient()
-        email_client.send_email(
+        return email_job(
+            invite.email,
             "You have been invited to an event",
             "event-invite-new.html",
-            invite.email,
             plaintext_template="event-invite-new.txt",
+            idempotency_key=idempotency_key,
         )
 
-        invite.sent = True
-        invite.save()
+    if invite.phone_number:
+        return sms_job(
+            str(invite.phone_number),
+            "You have been invited to an event on Vuet!\n\nDownload the app from the app store now and sign up with this phone number to join in",
+            idempotency_key=idempotency_key,
+        )
 
-    elif invite.phone_number:
-        sms_client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        sms_client.messages.create(
-            to=str(invite.phone_number),
-            from_=settings.TWILIO_FROM_NUMBER,
-            body="You have been invited to an event on Vuet!\n\nDownload the app from the app store now and sign up with this phone number to join in",
+    if invite.user_id:  # type: ignore
+        return push_job(
+            invite.user_id,  # type: ignore
+            "You have been invited to an event!",
+            idempotency_key=idempotency_key,
         )
 
-        invite.sent = True
-        invite.save()
+    return None
 
-    elif invite.user:
-        tokens = invite.user.push_tokens.all()
-        for token in tokens:
-            message = "You have been invited to an event!"
-            send_push_message_if_valid(token, message)
 
-        invite.sent = True
-        invite.save()
+@transaction.atomic
+def send_invites(invites: List[GuestListInvite]):
+    """Queues the invites to be sent by the outbound job worker"""
+    jobs = {invite.id: get_invite_job(invite) for invite in invites}
+    enqueue_jobs([job for job in jobs.values() if job])
+    GuestListInvite.objects.filter(
+        id__in=[invite_id for (invite_id, job) in jobs.items() if job]
+    ).update(sent=True)
 
 
 class GuestListInviteViewSet(ModelViewSet):
@@ -217,7 +229,7 @@ class GuestListInviteViewSet(ModelViewSet):
                 {"error": "Invite already sent"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        send_invite(invite)
+        send_invites([invite])
 
         return Response({"success": True}, status=status.HTTP_200_OK)
 
@@ -226,8 +238,7 @@ class GuestListInviteViewSet(ModelViewSet):
         """Action to send all unsent invites for an entity"""
         invites = list(GuestListInvite.objects.filter(entity=pk, sent=False).all())
 
-        for invite in invites:
-            send_invite(invite)
+        send_invites(invites)
 
         return Response({"success": True}, status=status.HTTP_200_OK)
 
@@ -10,13 +10,25 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from core.models.entities.base import Entity
 from core.models.messages.base import Message
+from core.models.tasks.access import TaskVisibility
 from core.models.users.user_models import User
 from core.serializers.messages import MessageSerializer
+from core.utils.task_access import visible_task_ids
 
 logger = logging.getLogger(__name__)
 
 
+def _get_visible_messages(user: User):
+    """Get the messages about the entities and tasks the user is a member of"""
+    entity_ids = Entity.members.through.objects.filter(member=user).values("entity")
+    task_ids = visible_task_ids(user, TaskVisibility.MEMBERSHIP)
+    return Message.objects.filter(
+        Q(entity__in=entity_ids) | Q(task__in=task_ids) | Q(action__task__in=task_ids)
+    )
+
+
 class MessageViewset(ModelViewSet):
     """Messages Viewset"""
 
@@ -27,24 +39,7 @@ class MessageViewset(ModelViewSet):
 
     def get_queryset(self):
         user = cast(User, self.request.user)
-        return (
-            Message.objects.filter(
-                (Q(entity__isnull=False) & Q(entity__members=user))
-                | (
-                    Q(task__isnull=False)
-                    & (Q(task__members=user) | Q(task__entities__members=user))
-                )
-                | (
-                    Q(action__task__isnull=False)
-                    & (
-                        Q(action__task__members=user)
-                        | Q(action__task__entities__members=user)
-                    )
-                )
-            )
-            .distinct()
-            .order_by("id")
-        )
+        return _get_visible_messages(user).order_by("id")
 
 
 @api_view(["GET"])
@@ -52,20 +47,7 @@ def message_threads(request):
     """Get all threads with messages"""
     user = cast(User, request.user)
     latest_messages = (
-        Message.objects.filter(
-            (Q(entity__isnull=False) & Q(entity__members=user))
-            | (
-                Q(task__isnull=False)
-                & (Q(task__members=user) | Q(task__entities__members=user))
-            )
-            | (
-                Q(action__isnull=False)
-                & (
-                    Q(action__task__members=user)
-                    | Q(action__task__entities__members=user)
-                )
-            )
-        )
+        _get_visible_messages(user)
         .order_by("entity", "task", "action", "recurrence_index", "-created_at")
         .distinct(
             "entity",
@@ -1,21 +1,23 @@
 """Task viewsets"""
+import datetime as dt
 import logging
-import operator
-from functools import reduce
 from typing import cast
 
 from dateutil import parser
+from django.conf import settings
 from django.db.models import Q
 from django.forms import model_to_dict
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.mixins import CreateModelMixin
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.viewsets import GenericViewSet, ModelViewSet, ViewSet
 
-from core.models.settings.family_visibility import FamilyCategoryViewPermission
+from core.models.tasks.access import TaskVisibility
 from core.models.tasks.base import Recurrence, RecurrentTaskOverwrite, Task, TaskAction
 from core.models.users.user_models import User
 from core.serializers.tasks import (
@@ -27,8 +29,16 @@ from core.serializers.tasks import (
     TaskActionSerializer,
     TaskSerializer,
 )
+from core.utils.bulk_delete import bulk_delete_tasks, parse_ids
+from core.utils.scheduling.cache import (
+    get_cached_placements,
+    get_cached_schedule,
+    get_schedule_cache_key,
+    set_cached_schedule,
+)
 from core.utils.scheduling.scheduler import SchedulingEngine
-from external_calendars.models import ICalIntegration
+from core.utils.scheduling.windows import get_dependent_window
+from core.utils.task_access import visible_task_ids
 
 # from silk.profiling.profiler import silk_profile  # type: ignore
 
@@ -36,6 +46,21 @@ from external_calendars.models import ICalIntegration
 logger = logging.getLogger(__name__)
 
 
+def get_visible_tasks(user: User, shared: bool = True):
+    """Get the tasks the user can see. Unless `shared` is False, these
+    include the family's appointments and calendar events shared with them"""
+    visibility = TaskVisibility.VISIBLE if shared else TaskVisibility.MEMBERSHIP
+    return Task.objects.prefetch_related(
+        "members",
+        "entities",
+        "routine",
+        "reminders",
+        "actions",
+        "completion_form",
+        "recurrence",
+    ).filter(id__in=visible_task_ids(user, visibility))
+
+
 class TaskViewSet(ModelViewSet):
     """TaskViewSet"""
 
@@ -46,52 +71,7 @@ class TaskViewSet(ModelViewSet):
 
     def get_queryset(self):
         user = cast(User, self.request.user)
-        family = user.family
-
-        task_filter = Q(entities__members=self.request.user) | Q(
-            members=self.request.user
-        )
-
-        if self.request.method == "GET" and family:
-            family_category_view_permissions = (
-                FamilyCategoryViewPermission.objects.filter(user__in=family.users.all())
-            )
-
-            if family_category_view_permissions:
-                task_filter |= Q(type="APPOINTMENT") & reduce(
-                    operator.or_,
-                    (
-                        Q(members=perm.user, entities__category=perm.category)
-                        for perm in family_category_view_permissions
-                    ),
-                )
-
-            family_ical_integrations = ICalIntegration.objects.filter(
-                user__in=family.users.all(), share_type__in=["FULL", "BUSY"]
-            )
-
-            if family_ical_integrations:
-                shared_ical_events = []
-                for integration in list(family_ical_integrations):
-                    shared_ical_events += [
-                        event.id for event in list(integration.ical_events.all())
-                    ]
-
-                task_filter |= Q(id__in=shared_ical_events)
-
-        return (
-            Task.objects.prefetch_related(
-                "members",
-                "entities",
-                "routine",
-                "reminders",
-                "actions",
-                "completion_form",
-                "recurrence",
-            )
-            .filter(task_filter)
-            .distinct()
-        )
+        return get_visible_tasks(user, shared=self.request.method == "GET")
 
     # @silk_profile(name="List scheduled tasks")
     def list(self, *args, **kwargs):
@@ -101,10 +81,16 @@ class TaskViewSet(ModelViewSet):
         """Delete one or multiple tasks"""
         pk_ids = request.data.get("pk_ids", None)
         if pk_ids:
-            for i in pk_ids:
-                get_object_or_404(Task, pk=int(i)).delete()
-        else:
-            get_object_or_404(Task, pk=pk).delete()
+            results = bulk_delete_tasks(cast(User, request.user), parse_ids(pk_ids))
+            return Response(
+                [
+                    {"id": task_id, "status": result}
+                    for (task_id, result) in results.items()
+                ],
+                status=status.HTTP_200_OK,
+            )
+
+        get_object_or_404(Task, pk=pk).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -222,6 +208,17 @@ class RecurrentTaskUpdateAfterViewSet(ViewSet):
         return Response(parsed_new_task, status=status.HTTP_201_CREATED)
 
 
+def get_serialized_start(item) -> dt.datetime:
+    """Get the start of a serialized scheduled task or entity"""
+    if item.get("start_datetime"):
+        return parser.parse(item["start_datetime"])
+    return timezone.make_aware(
+        dt.datetime.combine(
+            parser.parse(item.get("date") or item["start_date"]).date(), dt.time.min
+        )
+    )
+
+
 class ScheduledTaskViewSet(ViewSet):
     """ScheduledTaskViewSet"""
 
@@ -270,20 +267,133 @@ class ScheduledTaskViewSet(ViewSet):
         earliest_datetime = parser.parse(earliest_datetime_string)
         latest_datetime = parser.parse(latest_datetime_string)
 
+        schedule = self._get_schedule(request.user, earliest_datetime, latest_datetime)
+        return Response(schedule, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"])
+    def page(self, request):
+        """Get the scheduled tasks and entities one page at a time.
+
+        The window between earliest_datetime and latest_datetime is split
+        into consecutive pages of SCHEDULED_TASK_PAGE_DAYS days, so any
+        window size can be requested without scheduling the whole window
+        at once. Each page schedules the window that the placements on its
+        dates depend on (see `get_dependent_window`), so that the pages
+        match scheduling the whole window - e.g. a flexible task which could
+        be placed on either side of a page boundary is on exactly one page.
+
+        Each page contains the tasks and entities starting within the page
+        (and for the first page, those starting before the window too),
+        sorted by start time, along with the URL of the next page if there
+        is one. The cursor of a page is the datetime that it starts at.
+        """
+        earliest_datetime_string = request.GET.get("earliest_datetime")
+        latest_datetime_string = request.GET.get("latest_datetime")
+
+        if not earliest_datetime_string:
+            return Response(
+                {"message": "earliest_datetime required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not latest_datetime_string:
+            return Response(
+                {"message": "latest_datetime required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        earliest_datetime = parser.parse(earliest_datetime_string)
+        latest_datetime = parser.parse(latest_datetime_string)
+
+        page_start = earliest_datetime
+        cursor = request.GET.get("cursor")
+        if cursor:
+            try:
+                page_start = parser.parse(cursor)
+            except (ValueError, OverflowError):
+                page_start = None
+            if not (
+                page_start
+                and page_start.tzinfo
+                and earliest_datetime <= page_start < latest_datetime
+            ):
+                return Response(
+                    {"message": "Invalid cursor"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        page_end = min(
+            page_start + dt.timedelta(days=settings.SCHEDULED_TASK_PAGE_DAYS),
+            latest_datetime,
+        )
+        is_first_page = page_start == earliest_datetime
+        is_last_page = page_end == latest_datetime
+
+        def on_page(item):
+            start = get_serialized_start(item)
+            return (is_first_page or start >= page_start) and (
+                is_last_page or start < page_end
+            )
+
+        family_members = (
+            list(request.user.family.users.all()) if request.user.family else []
+        )
+        (window_start, window_end) = get_dependent_window(
+            family_members,
+            page_start.date(),
+            page_end.date(),
+            earliest_datetime,
+            latest_datetime,
+        )
+        schedule = self._get_schedule(request.user, window_start, window_end)
+        next_url = None
+        if not is_last_page:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", page_end.isoformat()
+            )
+
+        return Response(
+            {
+                "tasks": [task for task in schedule["tasks"] if on_page(task)],
+                "entities": [
+                    entity for entity in schedule["entities"] if on_page(entity)
+                ],
+                "next": next_url,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def _get_schedule(
+        self, user: User, start_datetime: dt.datetime, end_datetime: dt.datetime
+    ):
+        """Get the serialized tasks and entities scheduled between the
+        datetimes provided, from the cache if possible - or if only tasks
+        have changed since they were last scheduled, by only re-placing
+        the changed tasks and those which depended on them"""
+        cache_key = get_schedule_cache_key(user, start_datetime, end_datetime)
+        cached_schedule = get_cached_schedule(cache_key)
+        if cached_schedule is not None:
+            return cached_schedule
+
         engine = SchedulingEngine(
-            request.user, start_date=earliest_datetime, end_date=latest_datetime
+            user, start_date=start_datetime, end_date=end_datetime
         )
 
-        placed_tasks = engine.schedule_tasks()
+        cached_placements = get_cached_placements(cache_key)
+        if cached_placements is not None:
+            (placement_state, changed_task_ids) = cached_placements
+            placed_tasks = engine.schedule_tasks_incrementally(
+                placement_state, changed_task_ids
+            )
+        else:
+            placed_tasks = engine.schedule_tasks()
         parsed_tasks = ScheduledTaskSerializer(placed_tasks, many=True).data
 
         placed_entitites = engine.schedule_entities()
         parsed_entities = ScheduledEntitySerializer(placed_entitites, many=True).data
 
-        return Response(
-            {"tasks": parsed_tasks, "entities": parsed_entities},
-            status=status.HTTP_200_OK,
-        )
+        schedule = {"tasks": parsed_tasks, "entities": parsed_entities}
+        set_cached_schedule(cache_key, schedule, engine.get_placement_state())
+        return schedule
 
 
 class TaskActionViewSet(ModelViewSet):
@@ -295,10 +405,10 @@ class TaskActionViewSet(ModelViewSet):
     ]
 
     def get_queryset(self):
+        user = cast(User, self.request.user)
         return TaskAction.objects.filter(
-            Q(task__members=self.request.user)
-            | Q(task__entities__members=self.request.user)
-        ).distinct()
+            task__in=visible_task_ids(user, TaskVisibility.MEMBERSHIP)
+        )
 
 
 @api_view(["POST"])
@@ -0,0 +1,43 @@
+# Generated by Django 4.0.4 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('external_calendars', '0006_icalintegration_share_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='icalevent',
+            name='ical_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='icalevent',
+            name='ical_recurrence_id',
+            field=models.CharField(blank=True, default='', max_length=63),
+        ),
+        migrations.AddField(
+            model_name='icalevent',
+            name='ical_uid',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='icalintegration',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', help_text='A hash of the feed content when its events were last updated', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='icalintegration',
+            name='etag',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='icalintegration',
+            name='last_modified',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.4 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+def resync_events(apps, schema_editor):
+    # Clear the hashes so that every event is rewritten with its rules
+    # (and RECURRENCE-ID in UTC) the next time that its feed is synced
+    ICalEvent = apps.get_model('external_calendars', 'ICalEvent')
+    ICalIntegration = apps.get_model('external_calendars', 'ICalIntegration')
+    ICalEvent.objects.update(ical_hash='')
+    ICalIntegration.objects.update(content_hash='', etag='', last_modified='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('external_calendars', '0007_ical_sync_validators'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='icalevent',
+            name='ical_rrule',
+            field=models.TextField(blank=True, default='', help_text='The RRULE, RDATE and EXDATE lines of a recurring event, which are expanded when it is scheduled'),
+        ),
+        migrations.RunPython(resync_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('external_calendars', '0008_icalevent_ical_rrule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='icalintegration',
+            name='horizon_start',
+            field=models.DateField(blank=True, help_text='The start of the sync horizon when its events were last updated', null=True),
+        ),
+    ]
@@ -1,26 +1,32 @@
 "External calendar models"
 
+import datetime as dt
+import hashlib
 import logging
+from typing import Dict, Iterable, List, Set, Tuple
 
 import icalendar  # type: ignore
-import requests
-from dateutil.relativedelta import relativedelta
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
 
-from core.models.tasks.base import FixedTask, Recurrence
+from core.models.tasks.base import FixedTask, Recurrence, Task
 from core.models.users.user_models import User
+from core.utils.change_log import log_changes, log_changes_after
+from core.utils.scheduling.cache import invalidate_users_after
+from core.utils.task_access import refresh_task_access, refresh_task_access_after
+from external_calendars.utils.fetch_ical import FetchedICal, fetch_ical
+from external_calendars.utils.ical_stream import get_event_end, iter_events
+from external_calendars.utils.rrules import (
+    format_utc,
+    get_rule_text,
+    get_timezone_name,
+)
 
 logger = logging.getLogger(__name__)
 
 
-FREQUENCY_DELTA_MAPPINGS = {
-    "DAILY": relativedelta(days=1),
-    "WEEKLY": relativedelta(weeks=1),
-    "MONTHLY": relativedelta(months=1),
-    "YEARLY": relativedelta(years=1),
-}
-
-
 ICAL_TYPE_CHOICES = [
     ("UNKNOWN", "Unknown"),
     ("GOOGLE", "Google"),
@@ -35,6 +41,14 @@ ICAL_SHARE_CHOICES = [
 ]
 
 
+def get_sync_horizon(now: dt.datetime) -> Tuple[dt.datetime, dt.datetime]:
+    """The start and end of the period which events are imported from"""
+    return (
+        now - dt.timedelta(days=settings.ICAL_SYNC_PAST_DAYS),
+        now + dt.timedelta(days=settings.ICAL_SYNC_FUTURE_DAYS),
+    )
+
+
 class ICalIntegration(models.Model):
     """ICalIntegration"""
 
@@ -65,54 +79,208 @@ class ICalIntegration(models.Model):
         blank=True,
     )
 
+    etag = models.CharField(blank=True, default="", max_length=255)
+    last_modified = models.CharField(blank=True, default="", max_length=255)
+    content_hash = models.CharField(
+        blank=True,
+        default="",
+        max_length=64,
+        help_text="A hash of the feed content when its events were last updated",
+    )
+    horizon_start = models.DateField(
+        blank=True,
+        null=True,
+        help_text="The start of the sync horizon when its events were last updated",
+    )
+
     def sync_ical(self):
         """sync_ical"""
         if self.ical_url:
-            res = requests.get(self.ical_url, timeout=60)
-            calendar = icalendar.Calendar.from_ical(res.content)
-
-            self.ical_events.all().delete()
-            for event in calendar.walk("VEVENT"):
-                start_dt = event.get("DTSTART").dt
-                end_dt = event.get("DTEND").dt
-                ical_event = ICalEvent.objects.create(
-                    title=event.get("SUMMARY"),
-                    start_datetime=start_dt,
-                    end_datetime=end_dt,
-                    ical_integration=self,
-                    type="ICAL_EVENT",
-                )
-                ical_event.members.set([self.user])
-
-                rrule = event.get("RRULE")
-                if rrule:
-                    for i, freq in enumerate(rrule.get("FREQ")):
-                        until = (
-                            rrule.get("UNTIL")[i]
-                            if rrule.get("UNTIL") and (len(rrule.get("UNTIL")) > i)
-                            else None
-                        )
-                        count = (
-                            rrule.get("COUNT")[i]
-                            if rrule.get("COUNT") and (len(rrule.get("COUNT")) > i)
-                            else None
-                        )
-                        interval = (
-                            rrule.get("INTERVAL")[i]
-                            if rrule.get("INTERVAL")
-                            and (len(rrule.get("INTERVAL")) > i)
-                            else 1
-                        )
-
-                        if count and freq and not until:
-                            until = end_dt + (FREQUENCY_DELTA_MAPPINGS[freq] * count)
-
-                        Recurrence.objects.create(
-                            task=ical_event,
-                            interval_length=interval,
-                            recurrence=freq,
-                            latest_occurrence=until,
-                        )
+            self.update_from_fetched(fetch_ical(self.ical_url, *self.get_validators()))
+
+    def get_validators(self) -> Tuple[str, str]:
+        """The ETag and Last-Modified headers of the feed, to only fetch it
+        if it has changed - unless the sync horizon has moved since its
+        events were last updated, as they have to be updated anyway"""
+        (horizon_start, _) = get_sync_horizon(timezone.now())
+        if horizon_start.date() != self.horizon_start:
+            return ("", "")
+        return (self.etag, self.last_modified)
+
+    def update_from_fetched(self, fetched: FetchedICal):
+        """Update the events from the feed fetched, if it or the sync
+        horizon has changed"""
+        try:
+            if fetched.content is not None:
+                content_hash = fetched.content_hash
+                (horizon_start, horizon_end) = get_sync_horizon(timezone.now())
+                if (
+                    content_hash != self.content_hash
+                    or horizon_start.date() != self.horizon_start
+                ):
+                    events = iter_events(fetched.content, horizon_start, horizon_end)
+
+                    # Invalidate the cached schedules, log the changes and
+                    # refresh who can see the events once rather than for each
+                    with invalidate_users_after(Q(id=self.user_id)), log_changes_after(
+                        Q(id=self.user_id)
+                    ), refresh_task_access_after():
+                        self._update_ical_events(events)
+                    self.content_hash = content_hash
+                    self.horizon_start = horizon_start.date()
+        finally:
+            fetched.close()
+
+        self.etag = fetched.etag
+        self.last_modified = fetched.last_modified
+        # Updated without saving, as the schedules only depend on the events
+        ICalIntegration.objects.filter(id=self.id).update(
+            etag=self.etag,
+            last_modified=self.last_modified,
+            content_hash=self.content_hash,
+            horizon_start=self.horizon_start,
+        )
+
+    @transaction.atomic
+    def _update_ical_events(self, events: Iterable[icalendar.Event]):
+        """Update the events to match those provided, only touching the
+        events which have been added, changed or removed so that the IDs
+        of the others stay the same.
+
+        The changed events are written in batches as they are read.
+        """
+        existing_events: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        # The events imported before their UIDs were stored can't be
+        # matched to the feed's events, so are replaced
+        legacy_ids = []
+        for (
+            event_id,
+            ical_uid,
+            ical_recurrence_id,
+            ical_hash,
+        ) in self.ical_events.values_list(
+            "id", "ical_uid", "ical_recurrence_id", "ical_hash"
+        ):
+            if ical_uid:
+                existing_events[(ical_uid, ical_recurrence_id)] = (event_id, ical_hash)
+            else:
+                legacy_ids.append(event_id)
+
+        seen_keys: Set[Tuple[str, str]] = set()
+        batch: List[ParsedICalEvent] = []
+        for event in events:
+            parsed_event = ParsedICalEvent(event)
+            if parsed_event.key in seen_keys:
+                continue
+            seen_keys.add(parsed_event.key)
+
+            existing_event = existing_events.get(parsed_event.key)
+            if existing_event and existing_event[1] == parsed_event.hash:
+                continue
+
+            batch.append(parsed_event)
+            if len(batch) >= settings.ICAL_SYNC_BATCH_SIZE:
+                self._write_ical_events(batch, existing_events)
+                batch = []
+
+        if batch:
+            self._write_ical_events(batch, existing_events)
+
+        removed_ids = legacy_ids + [
+            event_id
+            for (key, (event_id, _)) in existing_events.items()
+            if key not in seen_keys
+        ]
+        if removed_ids:
+            ICalEvent.objects.filter(id__in=removed_ids).delete()
+
+    def _write_ical_events(
+        self,
+        parsed_events: List["ParsedICalEvent"],
+        existing_events: Dict[Tuple[str, str], Tuple[int, str]],
+    ):
+        """Update or create the ICalEvents for a batch of parsed events"""
+        changed_events = {}
+        new_events = []
+        for parsed_event in parsed_events:
+            if parsed_event.key in existing_events:
+                changed_events[existing_events[parsed_event.key][0]] = parsed_event
+            else:
+                new_events.append(parsed_event)
+
+        if changed_events:
+            updated_events = list(ICalEvent.objects.filter(id__in=changed_events))
+            for ical_event in updated_events:
+                changed_events[ical_event.id].update(ical_event)
+            ICalEvent.objects.bulk_update(updated_events, ParsedICalEvent.FIELDS)
+            # The events imported before their rules were stored
+            Recurrence.objects.filter(task_id__in=changed_events).delete()
+
+        created_event_ids = []
+        for parsed_event in new_events:
+            # Multi-table inherited models can't be created in bulk
+            ical_event = ICalEvent(ical_integration=self, type="ICAL_EVENT")
+            parsed_event.update(ical_event)
+            ical_event.save()
+            created_event_ids.append(ical_event.id)
+
+        Task.members.through.objects.bulk_create(
+            [
+                Task.members.through(task_id=event_id, member_id=self.user_id)
+                for event_id in created_event_ids
+            ]
+        )
+        # The bulk updates don't send signals
+        log_changes(task_ids=[*changed_events, *created_event_ids])
+        refresh_task_access(created_event_ids)
+
+
+class ParsedICalEvent:
+    """The fields of an ICalEvent parsed from a VEVENT"""
+
+    FIELDS = [
+        "title",
+        "start_datetime",
+        "end_datetime",
+        "start_timezone",
+        "ical_uid",
+        "ical_recurrence_id",
+        "ical_rrule",
+        "ical_hash",
+    ]
+
+    def __init__(self, event: icalendar.Event):
+        self.event = event
+
+        # DTSTAMP is the time that the feed was generated for some providers
+        event.pop("DTSTAMP", None)
+        self.hash = hashlib.sha256(event.to_ical()).hexdigest()
+
+        self.uid = str(event.get("UID", "")) or self.hash
+        recurrence_id = event.get("RECURRENCE-ID")
+        self.recurrence_id = format_utc(recurrence_id.dt) if recurrence_id else ""
+
+        self.title = str(event.get("SUMMARY", ""))
+        self.start_datetime = event.get("DTSTART").dt
+        self.end_datetime = get_event_end(event)
+        self.start_timezone = get_timezone_name(self.start_datetime)
+        self.rrule = get_rule_text(event)
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """The key identifying the event within its feed"""
+        return (self.uid, self.recurrence_id)
+
+    def update(self, ical_event: "ICalEvent"):
+        """Set the fields of the ICalEvent to those of the parsed event"""
+        ical_event.title = self.title
+        ical_event.start_datetime = self.start_datetime
+        ical_event.end_datetime = self.end_datetime
+        ical_event.start_timezone = self.start_timezone
+        ical_event.ical_uid = self.uid
+        ical_event.ical_recurrence_id = self.recurrence_id
+        ical_event.ical_rrule = self.rrule
+        ical_event.ical_hash = self.hash
 
 
 class ICalEvent(FixedTask, models.Model):
@@ -125,3 +293,15 @@ class ICalEvent(FixedTask, models.Model):
         null=False,
         blank=False,
     )
+
+    # The UID and RECURRENCE-ID (in UTC) of the VEVENT, which identify
+    # the event within the feed, and a hash of its content
+    ical_uid = models.CharField(blank=True, default="", max_length=255)
+    ical_recurrence_id = models.CharField(blank=True, default="", max_length=63)
+    ical_hash = models.CharField(blank=True, default="", max_length=64)
+    ical_rrule = models.TextField(
+        blank=True,
+        default="",
+        help_text="The RRULE, RDATE and EXDATE lines of a recurring event,"
+        " which are expanded when it is scheduled",
+    )
@@ -1,12 +1,12 @@
 """External calendar serializers"""
 
-import icalendar  # type: ignore
-import requests
 from rest_framework.serializers import ModelSerializer, ValidationError
 
 from core.serializers.mixins.validate_user import ValidateUserMixin
 
 from .models import ICalIntegration
+from .utils.fetch_ical import fetch_ical
+from .utils.ical_stream import get_calendar_properties
 
 
 class ICalIntegrationSerializer(ValidateUserMixin, ModelSerializer):
@@ -14,7 +14,7 @@ class ICalIntegrationSerializer(ValidateUserMixin, ModelSerializer):
 
     class Meta:
         model = ICalIntegration
-        fields = "__all__"
+        exclude = ["etag", "last_modified", "content_hash", "horizon_start"]
         extra_kwargs = {"ical_url": {"write_only": True}}
 
     def create(self, validated_data, *args, **kwargs):
@@ -23,9 +23,9 @@ class ICalIntegrationSerializer(ValidateUserMixin, ModelSerializer):
         new_integration = None
 
         try:
-            res = requests.get(ical_url, timeout=60)
-            calendar = icalendar.Calendar.from_ical(res.content)
-            ical_name = calendar.get("X-WR-CALNAME")
+            fetched = fetch_ical(ical_url)
+            calendar = get_calendar_properties(fetched.content)
+            ical_name = calendar.get("X-WR-CALNAME", "")
             ical_type = "UNKNOWN"
             if "google" in calendar.get("PRODID", "").lower():
                 ical_type = "GOOGLE"
@@ -40,7 +40,7 @@ class ICalIntegrationSerializer(ValidateUserMixin, ModelSerializer):
 
         if new_integration:
             try:
-                new_integration.sync_ical()
+                new_integration.update_from_fetched(fetched)
                 return new_integration
             except Exception as exc:
                 new_integration.delete()
@@ -0,0 +1,181 @@
+"""Tests for scheduling the occurrences of recurring iCal events"""
+
+import datetime as dt
+import io
+
+import pytz
+from django.test import TestCase
+
+from core.models.task_completion_forms.base import TaskCompletionForm
+from core.models.users.user_models import Family, User
+from core.utils.scheduling.scheduler import SchedulingEngine
+from external_calendars.models import ICalEvent, ICalIntegration
+from external_calendars.utils import rrules
+from external_calendars.utils.ical_stream import iter_components
+
+utc = pytz.UTC
+london = pytz.timezone("Europe/London")
+
+# A Monday
+START = dt.datetime(2023, 1, 2, 9, tzinfo=utc)
+
+
+def vevent(uid: str, dtstart: str, extra: str = "") -> str:
+    """A one hour VEVENT"""
+    return (
+        "BEGIN:VEVENT\r\n"
+        f"UID:{uid}\r\n"
+        f"SUMMARY:{uid}\r\n"
+        f"DTSTART{dtstart}\r\n"
+        "DURATION:PT1H\r\n"
+        f"{extra}"
+        "END:VEVENT\r\n"
+    )
+
+
+class TestICalRRules(TestCase):
+    """Tests for expanding the rules of iCal events when scheduling"""
+
+    def setUp(self):
+        rrules._expand.cache_clear()  # pylint: disable=protected-access
+        family = Family.objects.create()
+        self.user = User.objects.create(phone_number="+447123456789", family=family)
+        self.ical = ICalIntegration.objects.create(user=self.user)
+
+    def import_events(self, *events: str):
+        """Update the integration's events to those provided"""
+        feed = io.BytesIO(
+            ("BEGIN:VCALENDAR\r\n" + "".join(events) + "END:VCALENDAR\r\n").encode()
+        )
+        # pylint: disable=protected-access
+        self.ical._update_ical_events(iter_components(feed))
+
+    def get_occurrences(self, start: dt.datetime, end: dt.datetime):
+        """Get the title, start and recurrence index of the occurrences
+        scheduled between the datetimes"""
+        engine = SchedulingEngine(self.user, start, end)
+        engine.schedule_tasks()
+        return sorted(
+            (task.title, task.start_datetime, task.recurrence_index)
+            for task in engine.placed_tasks
+        )
+
+    def test_byday_and_count(self):
+        """test_byday_and_count"""
+        self.import_events(
+            vevent(
+                "meeting",
+                ":20230102T090000Z",
+                "RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=5\r\n",
+            )
+        )
+        occurrences = self.get_occurrences(START, START + dt.timedelta(days=30))
+        self.assertEqual(
+            [start for (_, start, _) in occurrences],
+            [START + dt.timedelta(days=days) for days in [0, 2, 7, 9, 14]],
+        )
+        # The recurrence index is the minutes since the first occurrence
+        self.assertEqual(
+            [index for (_, _, index) in occurrences],
+            [days * 24 * 60 for days in [0, 2, 7, 9, 14]],
+        )
+
+    def test_only_the_window_is_expanded(self):
+        """test_only_the_window_is_expanded"""
+        self.import_events(
+            vevent(
+                "daily",
+                ":20130102T090000Z",
+                "RRULE:FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR\r\n",
+            )
+        )
+        occurrences = self.get_occurrences(START, START + dt.timedelta(days=7))
+        self.assertEqual(
+            [start for (_, start, _) in occurrences],
+            [START + dt.timedelta(days=days) for days in range(5)],
+        )
+        # An occurrence overlapping the start of the window is included
+        occurrences = self.get_occurrences(
+            START + dt.timedelta(minutes=30), START + dt.timedelta(hours=2)
+        )
+        self.assertEqual([start for (_, start, _) in occurrences], [START])
+
+    def test_excluded_and_overridden_occurrences(self):
+        """test_excluded_and_overridden_occurrences"""
+        self.import_events(
+            vevent(
+                "weekly",
+                ":20230102T090000Z",
+                "RRULE:FREQ=WEEKLY\r\nEXDATE:20230109T090000Z\r\n",
+            ),
+            vevent(
+                "weekly",
+                ":20230117T120000Z",
+                "RECURRENCE-ID:20230116T090000Z\r\n",
+            ),
+        )
+        occurrences = self.get_occurrences(START, START + dt.timedelta(days=21))
+        self.assertEqual(
+            [(title, start) for (title, start, _) in occurrences],
+            [
+                ("weekly", START),
+                ("weekly", START + dt.timedelta(days=15, hours=3)),
+            ],
+        )
+
+    def test_occurrences_keep_their_local_time(self):
+        """test_occurrences_keep_their_local_time"""
+        self.import_events(
+            vevent(
+                "local",
+                ";TZID=Europe/London:20230320T090000",
+                "RRULE:FREQ=WEEKLY;UNTIL=20230403T080000Z\r\n",
+            )
+        )
+        occurrences = self.get_occurrences(START, START + dt.timedelta(days=120))
+        self.assertEqual(
+            [start.astimezone(london).time() for (_, start, _) in occurrences],
+            [dt.time(9)] * 3,
+        )
+        # The clocks go forward on the 26th of March
+        self.assertEqual(
+            [start.astimezone(utc).hour for (_, start, _) in occurrences],
+            [9, 8, 8],
+        )
+
+    def test_completion_forms(self):
+        """test_completion_forms"""
+        self.import_events(
+            vevent("weekly", ":20230102T090000Z", "RRULE:FREQ=WEEKLY\r\n")
+        )
+        event = ICalEvent.objects.get()
+        TaskCompletionForm.objects.create(
+            task=event, recurrence_index=7 * 24 * 60, complete=True
+        )
+
+        engine = SchedulingEngine(self.user, START, START + dt.timedelta(days=14))
+        engine.schedule_tasks()
+        self.assertEqual(
+            [task.is_complete for task in engine.placed_tasks], [False, True]
+        )
+
+    def test_expansions_are_memoised(self):
+        """test_expansions_are_memoised"""
+        self.import_events(
+            vevent("weekly", ":20230102T090000Z", "RRULE:FREQ=WEEKLY\r\n")
+        )
+        window = (START, START + dt.timedelta(days=14))
+        self.get_occurrences(*window)
+        self.get_occurrences(*window)
+        cache_info = rrules._expand.cache_info()  # pylint: disable=protected-access
+        self.assertEqual((cache_info.hits, cache_info.misses), (1, 1))
+
+        # A changed event is expanded again
+        self.import_events(
+            vevent("weekly", ":20230102T100000Z", "RRULE:FREQ=WEEKLY\r\n")
+        )
+        occurrences = self.get_occurrences(*window)
+        self.assertEqual(
+            [start for (_, start, _) in occurrences],
+            [START + dt.timedelta(hours=1), START + dt.timedelta(days=7, hours=1)],
+        )
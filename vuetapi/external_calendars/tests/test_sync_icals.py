@@ -0,0 +1,380 @@
+"""Tests for syncing iCal integrations against a local iCal server"""
+
+import datetime as dt
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytz
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models.tasks.base import Recurrence
+from core.models.users.user_models import User
+from external_calendars.models import ICalEvent, ICalIntegration
+from external_calendars.utils.sync_icals import sync_icals
+
+
+utc = pytz.UTC
+
+# Events are imported if they are within a year or so of the sync
+START = dt.datetime.combine(
+    dt.date.today() + dt.timedelta(days=30), dt.time(10), tzinfo=utc
+)
+
+
+def ical_datetime(days: int = 0) -> str:
+    """The iCal DATE-TIME for the number of days after START"""
+    return (START + dt.timedelta(days=days)).strftime("%Y%m%dT%H%M%SZ")
+
+
+def vevent(uid: str, summary: str, days: int = 0, extra: str = "") -> str:
+    """A one hour VEVENT starting the number of days after START"""
+    return (
+        "BEGIN:VEVENT\r\n"
+        f"UID:{uid}\r\n"
+        "DTSTAMP:20230101T000000Z\r\n"
+        f"SUMMARY:{summary}\r\n"
+        f"DTSTART:{ical_datetime(days)}\r\n"
+        "DURATION:PT1H\r\n"
+        f"{extra}"
+        "END:VEVENT\r\n"
+    )
+
+
+def vcalendar(*events: str) -> bytes:
+    """vcalendar"""
+    return (
+        "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Test//Test//EN\r\n"
+        + "".join(events)
+        + "END:VCALENDAR\r\n"
+    ).encode()
+
+
+class ICalHandler(BaseHTTPRequestHandler):
+    """Serves the feeds set on the server, with ETags"""
+
+    def do_GET(self):
+        """do_GET"""
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.path not in self.server.feeds:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        content = self.server.feeds[self.path]
+        etag = f'"{hash(content)}"'
+        if self.server.use_etags and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        if self.server.use_etags:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class TestSyncICals(TestCase):
+    """Tests for syncing iCal integrations"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ICalHandler)
+        self.server.requests = []
+        self.server.feeds = {}
+        self.server.use_etags = True
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.user = User.objects.create(phone_number="+447123456789")
+        self.events = [
+            vevent("one", "Event one", 0),
+            vevent("two", "Event two", 1),
+            vevent("three", "Event three", 2, "RRULE:FREQ=WEEKLY;INTERVAL=2\r\n"),
+        ]
+
+    def create_integration(self, path: str) -> ICalIntegration:
+        """create_integration"""
+        return ICalIntegration.objects.create(
+            user=self.user,
+            ical_url=f"http://127.0.0.1:{self.server.server_port}{path}",
+        )
+
+    def get_events(self, ical: ICalIntegration):
+        """Get the ID, UID and title of each event for the integration"""
+        return list(
+            ical.ical_events.order_by("ical_uid").values_list("id", "ical_uid", "title")
+        )
+
+    def test_sync_creates_events(self):
+        """test_sync_creates_events"""
+        self.server.feeds["/cal.ics"] = vcalendar(*self.events)
+        ical = self.create_integration("/cal.ics")
+        ical.sync_ical()
+
+        self.assertEqual(
+            [(uid, title) for (_, uid, title) in self.get_events(ical)],
+            [("one", "Event one"), ("three", "Event three"), ("two", "Event two")],
+        )
+        for event in ical.ical_events.all():
+            self.assertEqual(list(event.members.all()), [self.user])
+
+        # The rules are stored on the event rather than as a Recurrence
+        self.assertEqual(
+            list(ical.ical_events.order_by("ical_uid").values_list("ical_rrule")),
+            [("",), ("RRULE:FREQ=WEEKLY;INTERVAL=2",), ("",)],
+        )
+        self.assertFalse(Recurrence.objects.exists())
+
+    def test_unchanged_feeds_are_skipped(self):
+        """test_unchanged_feeds_are_skipped"""
+        self.server.feeds["/cal.ics"] = vcalendar(*self.events)
+        ical = self.create_integration("/cal.ics")
+        ical.sync_ical()
+        events = self.get_events(ical)
+
+        # The feed isn't downloaded again if it has the same ETag
+        ical.sync_ical()
+        self.assertEqual(self.server.requests[-1][1]["If-None-Match"], ical.etag)
+        self.assertEqual(self.get_events(ical), events)
+
+        # Or updated if it has the same content, other than its DTSTAMPs
+        self.server.use_etags = False
+        self.server.feeds["/cal.ics"] = vcalendar(
+            *[
+                event.replace("20230101T000000Z", "20240101T000000Z")
+                for event in self.events
+            ]
+        )
+        with self.assertNumQueries(1):
+            ical.sync_ical()
+        self.assertEqual(self.get_events(ical), events)
+
+    def test_only_changed_events_are_updated(self):
+        """test_only_changed_events_are_updated"""
+        self.server.feeds["/cal.ics"] = vcalendar(*self.events)
+        ical = self.create_integration("/cal.ics")
+        ical.sync_ical()
+        ((one_id, _, _), (three_id, _, _), (two_id, _, _)) = self.get_events(ical)
+
+        self.server.feeds["/cal.ics"] = vcalendar(
+            self.events[0],
+            vevent("three", "Event three moved", 3),
+            vevent("four", "Event four", 4),
+        )
+        ical.sync_ical()
+
+        ((four_id, _, _), *events) = self.get_events(ical)
+        self.assertEqual(
+            events,
+            [
+                (one_id, "one", "Event one"),
+                (three_id, "three", "Event three moved"),
+            ],
+        )
+        self.assertNotIn(four_id, [one_id, two_id, three_id])
+        self.assertFalse(ICalEvent.objects.filter(id=two_id).exists())
+        self.assertFalse(Recurrence.objects.exists())
+
+    def test_events_imported_before_uids_were_stored_are_replaced(self):
+        """test_events_imported_before_uids_were_stored_are_replaced"""
+        self.server.feeds["/cal.ics"] = vcalendar(*self.events)
+        ical = self.create_integration("/cal.ics")
+        # As the events were left by the migration which added their UIDs
+        legacy_ids = [
+            ICalEvent.objects.create(
+                title=title,
+                type="ICAL_EVENT",
+                ical_integration=ical,
+                start_datetime=START,
+                end_datetime=START + dt.timedelta(hours=1),
+            ).id
+            for title in ["Event one", "Event two", "Event three"]
+        ]
+
+        ical.sync_ical()
+        events = self.get_events(ical)
+        self.assertEqual(
+            [(uid, title) for (_, uid, title) in events],
+            [("one", "Event one"), ("three", "Event three"), ("two", "Event two")],
+        )
+        self.assertFalse(ICalEvent.objects.filter(id__in=legacy_ids).exists())
+
+    def test_sync_icals(self):
+        """test_sync_icals"""
+        icals = []
+        for i in range(5):
+            self.server.feeds[f"/{i}.ics"] = vcalendar(vevent(f"{i}", f"Event {i}"))
+            icals.append(self.create_integration(f"/{i}.ics"))
+        # A missing feed doesn't stop the others from syncing
+        missing = self.create_integration("/missing.ics")
+
+        sync_icals()
+
+        for (i, ical) in enumerate(icals):
+            self.assertEqual(
+                [title for (_, _, title) in self.get_events(ical)], [f"Event {i}"]
+            )
+        self.assertEqual(self.get_events(missing), [])
+
+    def test_events_outside_horizon_are_skipped(self):
+        """test_events_outside_horizon_are_skipped"""
+        self.server.feeds["/cal.ics"] = vcalendar(
+            vevent("past", "Past", -5 * 365),
+            vevent("future", "Future", 5 * 365),
+            vevent("recent", "Recent", -100),
+            vevent(
+                "recurring",
+                "Recurring",
+                -5 * 365,
+                "RRULE:FREQ=YEARLY\r\n",
+            ),
+            vevent(
+                "ended",
+                "Ended",
+                -5 * 365,
+                f"RRULE:FREQ=WEEKLY;UNTIL={ical_datetime(-4 * 365)}\r\n",
+            ),
+        )
+        ical = self.create_integration("/cal.ics")
+        ical.sync_ical()
+
+        self.assertEqual(
+            [uid for (_, uid, _) in self.get_events(ical)], ["recent", "recurring"]
+        )
+
+    def test_events_are_updated_when_horizon_moves(self):
+        """test_events_are_updated_when_horizon_moves"""
+        now = timezone.now()
+        # Ends a few days after the start of the horizon, and starts a few
+        # days after its end
+        self.server.feeds["/cal.ics"] = vcalendar(
+            vevent("old", "Old", -30 - 365 + 3),
+            vevent("new", "New", -30 + 2 * 365 + 3),
+        )
+        ical = self.create_integration("/cal.ics")
+        ical.sync_ical()
+        self.assertEqual([uid for (_, uid, _) in self.get_events(ical)], ["old"])
+
+        # The feed is fetched again, even though it has the same ETag
+        with patch(
+            "external_calendars.models.timezone.now",
+            return_value=now + dt.timedelta(days=5),
+        ):
+            ical.sync_ical()
+        self.assertNotIn("If-None-Match", self.server.requests[-1][1])
+        self.assertEqual([uid for (_, uid, _) in self.get_events(ical)], ["new"])
+
+    def test_excluded_and_overridden_occurrences(self):
+        """test_excluded_and_overridden_occurrences"""
+        self.server.feeds["/cal.ics"] = vcalendar(
+            vevent(
+                "weekly",
+                "Weekly",
+                0,
+                "RRULE:FREQ=WEEKLY;BYDAY=MO,TH;COUNT=10\r\n"
+                f"EXDATE:{ical_datetime(7)},{ical_datetime(21)}\r\n",
+            ),
+            vevent(
+                "weekly",
+                "Weekly moved",
+                15,
+                f"RECURRENCE-ID:{ical_datetime(14)}\r\n",
+            ),
+        )
+        ical = self.create_integration("/cal.ics")
+        ical.sync_ical()
+
+        weekly = ical.ical_events.get(title="Weekly")
+        self.assertEqual(
+            weekly.ical_rrule,
+            "RRULE:FREQ=WEEKLY;COUNT=10;BYDAY=MO,TH\n"
+            f"EXDATE:{ical_datetime(7)},{ical_datetime(21)}",
+        )
+        moved = ical.ical_events.get(title="Weekly moved")
+        self.assertEqual(moved.start_datetime, START + dt.timedelta(days=15))
+        self.assertEqual(moved.ical_uid, "weekly")
+        self.assertEqual(moved.ical_recurrence_id, ical_datetime(14))
+        self.assertEqual(moved.ical_rrule, "")
+
+        # Removing the override removes its event
+        self.server.feeds["/cal.ics"] = vcalendar(
+            vevent(
+                "weekly",
+                "Weekly",
+                0,
+                f"RRULE:FREQ=WEEKLY\r\nEXDATE:{ical_datetime(28)}\r\n",
+            ),
+        )
+        ical.sync_ical()
+        self.assertEqual(
+            list(ical.ical_events.values_list("id", "ical_rrule")),
+            [(weekly.id, f"RRULE:FREQ=WEEKLY\nEXDATE:{ical_datetime(28)}")],
+        )
+
+    @override_settings(ICAL_SYNC_BATCH_SIZE=3, ICAL_SPOOL_MAX_SIZE=1024)
+    def test_large_feeds_are_written_in_batches(self):
+        """test_large_feeds_are_written_in_batches"""
+        self.server.feeds["/cal.ics"] = vcalendar(
+            *[vevent(f"{i:02d}", f"Event {i}", i) for i in range(20)]
+        )
+        ical = self.create_integration("/cal.ics")
+        ical.sync_ical()
+        events = self.get_events(ical)
+        self.assertEqual(len(events), 20)
+
+        self.server.feeds["/cal.ics"] = vcalendar(
+            *[
+                vevent(f"{i:02d}", f"Event {i}" + (" changed" if i % 2 else ""), i)
+                for i in range(20)
+            ]
+        )
+        with CaptureQueriesContext(connection) as context:
+            ical.sync_ical()
+
+        # The 10 changed events are updated in batches of 3
+        self.assertEqual(
+            len(
+                [
+                    query
+                    for query in context.captured_queries
+                    if query["sql"].startswith('UPDATE "core_task"')
+                ]
+            ),
+            4,
+        )
+        self.assertEqual(
+            [event_id for (event_id, _, _) in self.get_events(ical)],
+            [event_id for (event_id, _, _) in events],
+        )
+
+    def test_custom_timezones(self):
+        """test_custom_timezones"""
+        self.server.feeds["/cal.ics"] = vcalendar(
+            "BEGIN:VTIMEZONE\r\n"
+            "TZID:Custom/Plus Two\r\n"
+            "BEGIN:STANDARD\r\n"
+            "DTSTART:19700101T000000\r\n"
+            "TZOFFSETFROM:+0200\r\n"
+            "TZOFFSETTO:+0200\r\n"
+            "END:STANDARD\r\n"
+            "END:VTIMEZONE\r\n",
+            vevent("one", "Event one").replace(
+                f"DTSTART:{ical_datetime()}",
+                f"DTSTART;TZID=Custom/Plus Two:{ical_datetime()[:-1]}",
+            ),
+        )
+        ical = self.create_integration("/cal.ics")
+        ical.sync_ical()
+        self.assertEqual(
+            ical.ical_events.get().start_datetime, START - dt.timedelta(hours=2)
+        )
@@ -0,0 +1,86 @@
+"""Fetching iCal feeds"""
+
+import dataclasses
+import hashlib
+import tempfile
+from functools import lru_cache
+from typing import IO, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+@dataclasses.dataclass
+class FetchedICal:
+    """The response to fetching an iCal feed.
+
+    `content` is the feed, spooled to a temporary file, or None if the
+    feed hasn't changed since it was last fetched.
+    """
+
+    content: Optional[IO[bytes]]
+    etag: str = ""
+    last_modified: str = ""
+
+    @property
+    def content_hash(self) -> str:
+        """A hash of the feed content, ignoring the DTSTAMP lines which
+        some providers (e.g. Google) set to the time of the request"""
+        content_hash = hashlib.sha256()
+        if self.content:
+            self.content.seek(0)
+            for line in self.content:
+                if not line.startswith(b"DTSTAMP"):
+                    content_hash.update(line.rstrip(b"\r\n"))
+            self.content.seek(0)
+        return content_hash.hexdigest()
+
+    def close(self):
+        """close"""
+        if self.content:
+            self.content.close()
+
+
+@lru_cache(maxsize=None)
+def get_session() -> requests.Session:
+    """Get the session shared by all iCal fetches, whose connection pool
+    is large enough for the concurrent fetches made by `sync_icals`"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=settings.ICAL_SYNC_CONCURRENCY)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_ical(url: str, etag: str = "", last_modified: str = "") -> FetchedICal:
+    """Fetch an iCal feed, unless it hasn't changed since the response with
+    the ETag and Last-Modified headers provided.
+
+    The feed is read from the connection in chunks, and large feeds are
+    spooled to disk rather than held in memory.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with get_session().get(
+        url, headers=headers, timeout=settings.ICAL_FETCH_TIMEOUT, stream=True
+    ) as res:
+        if res.status_code == 304:
+            return FetchedICal(content=None, etag=etag, last_modified=last_modified)
+
+        res.raise_for_status()
+        # pylint: disable=consider-using-with
+        content = tempfile.SpooledTemporaryFile(max_size=settings.ICAL_SPOOL_MAX_SIZE)
+        for chunk in res.iter_content(chunk_size=64 * 1024):
+            content.write(chunk)
+        content.seek(0)
+
+        return FetchedICal(
+            content=content,
+            etag=res.headers.get("ETag", ""),
+            last_modified=res.headers.get("Last-Modified", ""),
+        )
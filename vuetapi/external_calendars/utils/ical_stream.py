@@ -0,0 +1,116 @@
+"""Reading iCal feeds one component at a time.
+
+icalendar.Calendar.from_ical builds the whole calendar before any event
+can be processed, and multi-year exports can be tens of megabytes. These
+functions read a feed line by line instead, only parsing one VEVENT (or
+VTIMEZONE) at a time, so the memory used doesn't grow with the feed.
+"""
+
+import datetime as dt
+from typing import IO, Dict, Iterator, List, Optional
+
+import icalendar  # type: ignore
+import pytz
+
+utc = pytz.UTC
+
+# The components which are parsed - VTIMEZONEs are parsed so that
+# icalendar can resolve the custom TZIDs used by the events
+PARSED_COMPONENTS = {b"VEVENT", b"VTIMEZONE"}
+
+
+def get_calendar_properties(file: IO[bytes]) -> Dict[str, str]:
+    """Read the properties of the calendar itself (e.g. PRODID and
+    X-WR-CALNAME), which come before any of its components"""
+    properties: Dict[str, str] = {}
+    name = None
+    file.seek(0)
+    for (i, line) in enumerate(file):
+        line = line.rstrip(b"\r\n")
+        if i == 0 and line.lstrip(b"\xef\xbb\xbf").upper() != b"BEGIN:VCALENDAR":
+            raise ValueError("Not an iCalendar feed")
+        if line.startswith(b"BEGIN:"):
+            if i > 0:
+                break
+        elif line[:1] in (b" ", b"\t"):
+            # A continuation of the previous line
+            if name:
+                properties[name] += line[1:].decode("utf-8", "replace")
+        elif b":" in line:
+            (name_and_params, _, value) = line.partition(b":")
+            name = name_and_params.split(b";")[0].decode().upper()
+            properties[name] = value.decode("utf-8", "replace")
+    file.seek(0)
+    return properties
+
+
+def iter_components(file: IO[bytes]) -> Iterator[icalendar.cal.Component]:
+    """Parse the VEVENTs and VTIMEZONEs of a calendar one at a time"""
+    depth = 0
+    block: Optional[List[bytes]] = None
+    for line in file:
+        if line.startswith(b"BEGIN:"):
+            depth += 1
+            if depth == 2:
+                block = [] if line[6:].strip().upper() in PARSED_COMPONENTS else None
+
+        if block is not None:
+            block.append(line)
+
+        if line.startswith(b"END:"):
+            depth -= 1
+            if depth == 1 and block is not None:
+                yield icalendar.cal.Component.from_ical(b"".join(block))
+                block = None
+
+
+def as_datetime(value: dt.date) -> dt.datetime:
+    """Get an aware datetime for a DATE or DATE-TIME value, treating
+    dates and floating times as UTC"""
+    if not isinstance(value, dt.datetime):
+        return dt.datetime.combine(value, dt.time.min, tzinfo=utc)
+    if value.tzinfo is None:
+        return utc.localize(value)
+    return value
+
+
+def get_event_end(event: icalendar.Event) -> dt.date:
+    """Get the end of an event from its DTEND or DURATION"""
+    start = event.get("DTSTART").dt
+    if event.get("DTEND"):
+        return event.get("DTEND").dt
+    if event.get("DURATION"):
+        return start + event.get("DURATION").dt
+    return start
+
+
+def in_horizon(
+    event: icalendar.Event, horizon_start: dt.datetime, horizon_end: dt.datetime
+) -> bool:
+    """Whether any of an event's occurrences may fall within the horizon.
+
+    This includes the overridden occurrences of recurring events, which
+    have a RECURRENCE-ID and their own DTSTART.
+    """
+    if as_datetime(event.get("DTSTART").dt) > horizon_end:
+        return False
+
+    rrule = event.get("RRULE")
+    if rrule:
+        until = rrule.get("UNTIL")
+        return not until or as_datetime(until[0]) >= horizon_start
+
+    return as_datetime(get_event_end(event)) >= horizon_start
+
+
+def iter_events(
+    file: IO[bytes], horizon_start: dt.datetime, horizon_end: dt.datetime
+) -> Iterator[icalendar.Event]:
+    """Parse the VEVENTs of a calendar one at a time, skipping the events
+    entirely outside of the horizon"""
+    file.seek(0)
+    for component in iter_components(file):
+        if component.name == "VEVENT" and in_horizon(
+            component, horizon_start, horizon_end
+        ):
+            yield component
@@ -0,0 +1,152 @@
+"""Expanding the recurrence rules of imported calendar events.
+
+The RRULE, RDATE and EXDATE properties of a recurring VEVENT are stored
+on its ICalEvent as they are (other than their datetimes being converted
+to UTC), rather than being mapped onto a Recurrence, so that rules such
+as BYDAY, BYMONTHDAY, BYSETPOS and COUNT aren't lost.
+
+The occurrences are only expanded when they are scheduled, for the
+window being scheduled, and the expansions are memoised per event and
+window so that rescheduling the same window doesn't expand them again.
+"""
+
+import datetime as dt
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import icalendar  # type: ignore
+import pytz
+from dateutil.rrule import rruleset, rrulestr
+
+from external_calendars.utils.ical_stream import as_datetime
+
+utc = pytz.UTC
+
+UTC_FORMAT = "%Y%m%dT%H%M%SZ"
+
+# The number of (event, window) expansions kept by each process
+EXPANSION_CACHE_SIZE = 4096
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def format_utc(value: dt.date) -> str:
+    """Format a DATE or DATE-TIME value as a UTC iCal DATE-TIME"""
+    return as_datetime(value).astimezone(utc).strftime(UTC_FORMAT)
+
+
+def parse_utc(value: str) -> dt.datetime:
+    """Parse a UTC iCal DATE-TIME formatted by `format_utc`"""
+    return dt.datetime.strptime(value, UTC_FORMAT).replace(tzinfo=utc)
+
+
+def get_rule_text(event: icalendar.Event) -> str:
+    """Get the RRULE, RDATE and EXDATE lines of an event, with their
+    datetimes in UTC, or an empty string if the event doesn't recur"""
+    lines: List[str] = []
+    for rrule in _as_list(event.get("RRULE")):
+        rrule = icalendar.vRecur(rrule)
+        if rrule.get("UNTIL"):
+            rrule["UNTIL"] = [
+                as_datetime(until).astimezone(utc) for until in rrule["UNTIL"]
+            ]
+        lines.append(f"RRULE:{rrule.to_ical().decode()}")
+
+    for name in ("RDATE", "EXDATE"):
+        values = [
+            # RDATEs may be PERIODs, which occur at their start
+            format_utc(value.dt[0] if isinstance(value.dt, tuple) else value.dt)
+            for prop in _as_list(event.get(name))
+            for value in prop.dts
+        ]
+        if values:
+            lines.append(f"{name}:{','.join(values)}")
+
+    if not any(line.startswith(("RRULE", "RDATE")) for line in lines):
+        return ""
+    return "\n".join(lines)
+
+
+def get_timezone_name(start: dt.date) -> Optional[str]:
+    """Get the name of the timezone of an event's DTSTART, if it is one
+    that can be used to expand its occurrences"""
+    tzinfo = getattr(start, "tzinfo", None)
+    name = getattr(tzinfo, "zone", None) or getattr(tzinfo, "key", None)
+    if not name or name == "UTC":
+        return None
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        # e.g. a custom VTIMEZONE - expanded in UTC instead
+        return None
+    return name
+
+
+def get_ruleset(
+    rule_text: str, start: dt.datetime, timezone_name: Optional[str] = None
+) -> rruleset:
+    """Parse the rule text of an event starting at `start`.
+
+    The rules are applied to the wall clock time of the event's timezone
+    so that its occurrences stay at the same local time across DST.
+    """
+    if timezone_name:
+        start = start.astimezone(ZoneInfo(timezone_name))
+    return rrulestr(rule_text, dtstart=start, forceset=True)
+
+
+@lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def _expand(
+    event_key: Tuple[int, str],
+    rule_text: str,
+    start: dt.datetime,
+    duration: dt.timedelta,
+    timezone_name: Optional[str],
+    window_start: dt.datetime,
+    window_end: dt.datetime,
+    excluded: FrozenSet[dt.datetime],
+) -> Tuple[dt.datetime, ...]:
+    # pylint: disable=unused-argument,too-many-arguments
+    ruleset = get_ruleset(rule_text, start, timezone_name)
+    for exdate in excluded:
+        ruleset.exdate(exdate)
+    return tuple(
+        occurrence.astimezone(utc)
+        for occurrence in ruleset.between(window_start - duration, window_end, inc=True)
+        if occurrence < window_end and occurrence + duration > window_start
+    )
+
+
+def expand_occurrences(
+    event_key: Tuple[int, str],
+    rule_text: str,
+    start: dt.datetime,
+    end: dt.datetime,
+    timezone_name: Optional[str],
+    window_start: dt.datetime,
+    window_end: dt.datetime,
+    excluded: FrozenSet[dt.datetime] = frozenset(),
+) -> Tuple[dt.datetime, ...]:
+    """Get the starts of an event's occurrences which overlap the window.
+
+    event_key: identifies the event and its version (e.g. its ID and
+        hash), which the expansions are memoised by along with the window
+    excluded: the starts of the occurrences which are excluded, e.g.
+        those overridden by other events with a RECURRENCE-ID
+    """
+    # pylint: disable=too-many-arguments
+    return _expand(
+        event_key,
+        rule_text,
+        start,
+        end - start,
+        timezone_name,
+        window_start,
+        window_end,
+        excluded,
+    )
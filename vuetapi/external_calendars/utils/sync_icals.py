@@ -1,10 +1,32 @@
 """sync_icals"""
 
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
 from external_calendars.models import ICalIntegration
+from external_calendars.utils.fetch_ical import fetch_ical
+
+logger = logging.getLogger(__name__)
 
 
 def sync_icals():
-    """sync_icals"""
-    ical_integrations = ICalIntegration.objects.all()
-    for ical in ical_integrations:
-        ical.sync_ical()
+    """Sync all of the iCal integrations.
+
+    The feeds are fetched concurrently, with conditional requests so that
+    unchanged feeds aren't downloaded again, and the events are updated
+    (on this thread) as each fetch completes.
+    """
+    ical_integrations = list(ICalIntegration.objects.exclude(ical_url=""))
+    with ThreadPoolExecutor(max_workers=settings.ICAL_SYNC_CONCURRENCY) as executor:
+        fetches = {
+            executor.submit(fetch_ical, ical.ical_url, *ical.get_validators()): ical
+            for ical in ical_integrations
+        }
+        for fetch in as_completed(fetches):
+            ical = fetches[fetch]
+            try:
+                ical.update_from_fetched(fetch.result())
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Failed to sync ICalIntegration %s", ical.id)
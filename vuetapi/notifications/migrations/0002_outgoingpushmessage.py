@@ -0,0 +1,34 @@
+# Generated by Django 4.0.4 on 2026-10-18 11:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingPushMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('body', models.TextField()),
+                ('data', models.JSONField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('DELIVERED', 'Delivered'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt', models.DateTimeField(blank=True, help_text='When a PENDING message is next due to be sent', null=True)),
+                ('ticket_id', models.CharField(blank=True, default='', max_length=100)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('push_token', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_messages', to='notifications.pushtoken')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='outgoingpushmessage',
+            index=models.Index(fields=['status', 'next_attempt'], name='notificatio_status_1a681d_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.0.4 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_outgoingpushmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('EMAIL', 'Email'), ('SMS', 'Sms'), ('PUSH', 'Push')], max_length=10)),
+                ('payload', models.JSONField()),
+                ('idempotency_key', models.CharField(blank=True, help_text='Jobs with the same key are only queued once', max_length=255, null=True, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt', models.DateTimeField(blank=True, help_text='When a PENDING job is next due to be sent', null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='outboundjob',
+            index=models.Index(fields=['kind', 'status', 'next_attempt'], name='notificatio_kind_0baeb6_idx'),
+        ),
+    ]
@@ -17,3 +17,98 @@ class PushToken(models.Model):
     )
     active = models.BooleanField(null=False, blank=False, default=True)
     last_active = models.DateTimeField(null=True, blank=True, auto_now=True)
+
+
+class PushMessageStatus(models.TextChoices):
+    """PushMessageStatus"""
+
+    PENDING = "PENDING"
+    SENT = "SENT"
+    DELIVERED = "DELIVERED"
+    FAILED = "FAILED"
+
+
+class OutgoingPushMessage(models.Model):
+    """A push message in the outbox.
+
+    Messages are PENDING until the push server accepts them, then SENT
+    until their push receipt is checked, after which they are DELIVERED
+    or FAILED.
+    """
+
+    push_token = models.ForeignKey(
+        PushToken, on_delete=models.CASCADE, related_name="outgoing_messages"
+    )
+    body = models.TextField()
+    data = models.JSONField(null=True, blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=PushMessageStatus.choices,
+        default=PushMessageStatus.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When a PENDING message is next due to be sent",
+    )
+    ticket_id = models.CharField(max_length=100, blank=True, default="")
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt"])]
+
+
+class OutboundJobKind(models.TextChoices):
+    """The provider that an outbound job is sent through"""
+
+    EMAIL = "EMAIL"
+    SMS = "SMS"
+    PUSH = "PUSH"
+
+
+class OutboundJobStatus(models.TextChoices):
+    """OutboundJobStatus"""
+
+    PENDING = "PENDING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class OutboundJob(models.Model):
+    """A message (e.g. an invite) queued to be sent by `run_outbound_jobs`
+    rather than inside the request which created it.
+
+    Jobs are PENDING until they are sent (DONE) or have failed too many
+    times (FAILED). A job being sent has its next attempt pushed back,
+    so that it is retried if the worker sending it dies.
+    """
+
+    kind = models.CharField(max_length=10, choices=OutboundJobKind.choices)
+    payload = models.JSONField()
+    idempotency_key = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        unique=True,
+        help_text="Jobs with the same key are only queued once",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=OutboundJobStatus.choices,
+        default=OutboundJobStatus.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When a PENDING job is next due to be sent",
+    )
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["kind", "status", "next_attempt"])]
@@ -0,0 +1,181 @@
+"""Tests for the outbound job queue"""
+
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from twilio.base.exceptions import TwilioRestException
+
+from core.models.users.user_models import User
+from notifications.models import OutboundJob, OutboundJobStatus, PushToken
+from notifications.utils.outbound_jobs import (
+    email_job,
+    enqueue_jobs,
+    push_job,
+    run_outbound_jobs,
+    sms_job,
+)
+from utils.email_client import OutgoingEmail
+
+
+@patch("notifications.utils.outbound_jobs.Client")
+class TestOutboundJobs(TestCase):
+    """Tests for queueing and sending outbound jobs"""
+
+    def test_idempotency_keys(self, mtwilio_client):
+        """test_idempotency_keys"""
+        enqueue_jobs([sms_job("+447123456789", "Hello", idempotency_key="key")])
+        enqueue_jobs(
+            [
+                sms_job("+447123456789", "Hello", idempotency_key="key"),
+                sms_job("+447123456789", "Hello again"),
+            ]
+        )
+        self.assertEqual(OutboundJob.objects.count(), 2)
+
+        run_outbound_jobs()
+        self.assertEqual(mtwilio_client.return_value.messages.create.call_count, 2)
+
+    @patch("notifications.utils.outbound_jobs.EmailClient")
+    @patch("notifications.utils.outbound_jobs.send_push_message_if_valid")
+    def test_jobs_are_sent_by_provider(self, msend_push, memail, mtwilio_client):
+        """test_jobs_are_sent_by_provider"""
+        user = User.objects.create(phone_number="+447123456789")
+        push_tokens = [
+            PushToken.objects.create(token=f"ExponentPushToken[{i}]", user=user)
+            for i in range(2)
+        ]
+        enqueue_jobs(
+            [
+                email_job(
+                    "test@test.test",
+                    "Title",
+                    "template.html",
+                    data={"name": "Test"},
+                ),
+                sms_job("+447123456780", "Hello"),
+                push_job(user.id, "Push"),
+            ]
+        )
+
+        run_outbound_jobs()
+
+        memail.return_value.send_many.assert_called_once_with(
+            [
+                OutgoingEmail(
+                    "Title",
+                    "template.html",
+                    "test@test.test",
+                    plaintext_template=None,
+                    data={"name": "Test"},
+                )
+            ]
+        )
+        mtwilio_client.return_value.messages.create.assert_called_once()
+        self.assertEqual(
+            [call.args for call in msend_push.call_args_list],
+            [(push_token, "Push") for push_token in push_tokens],
+        )
+        self.assertEqual(
+            set(OutboundJob.objects.values_list("status", flat=True)),
+            {OutboundJobStatus.DONE},
+        )
+
+    def test_failed_jobs_are_retried_with_backoff(self, mtwilio_client):
+        """test_failed_jobs_are_retried_with_backoff"""
+        mtwilio_client.return_value.messages.create.side_effect = [
+            TwilioRestException(503, "uri"),
+            TwilioRestException(429, "uri"),
+            MagicMock(),
+        ]
+        enqueue_jobs([sms_job("+447123456789", "Hello")])
+        now = timezone.now()
+
+        run_outbound_jobs(now=now)
+        job = OutboundJob.objects.get()
+        self.assertEqual(job.status, OutboundJobStatus.PENDING)
+        self.assertEqual(job.next_attempt, now + timedelta(minutes=1))
+
+        # Not due yet
+        run_outbound_jobs(now=now + timedelta(seconds=30))
+        self.assertEqual(mtwilio_client.return_value.messages.create.call_count, 1)
+
+        run_outbound_jobs(now=now + timedelta(minutes=1))
+        job = OutboundJob.objects.get()
+        self.assertEqual(job.next_attempt, now + timedelta(minutes=3))
+
+        run_outbound_jobs(now=now + timedelta(minutes=3))
+        job = OutboundJob.objects.get()
+        self.assertEqual(job.status, OutboundJobStatus.DONE)
+        self.assertEqual(job.attempts, 3)
+
+    @override_settings(OUTBOUND_JOB_MAX_ATTEMPTS=2)
+    def test_jobs_fail(self, mtwilio_client):
+        """test_jobs_fail"""
+
+        def create(to, **_):
+            if to == "invalid":
+                raise TwilioRestException(400, "uri", msg="Invalid number")
+            raise TwilioRestException(500, "uri")
+
+        mtwilio_client.return_value.messages.create.side_effect = create
+        enqueue_jobs([sms_job("invalid", "Hello"), sms_job("+447123456789", "Hello")])
+        now = timezone.now()
+
+        # Jobs which can't succeed fail straight away, the others
+        # fail once they have been attempted too many times
+        run_outbound_jobs(now=now)
+        self.assertEqual(
+            list(
+                OutboundJob.objects.order_by("id").values_list("status", "last_error")
+            ),
+            [
+                (OutboundJobStatus.FAILED, "Invalid number"),
+                (OutboundJobStatus.PENDING, "HTTP 500 error: "),
+            ],
+        )
+        run_outbound_jobs(now=now + timedelta(minutes=1))
+        self.assertEqual(
+            set(OutboundJob.objects.values_list("status", flat=True)),
+            {OutboundJobStatus.FAILED},
+        )
+
+    def test_claimed_jobs_are_only_sent_again_after_the_lease(self, mtwilio_client):
+        """test_claimed_jobs_are_only_sent_again_after_the_lease"""
+        enqueue_jobs([sms_job("+447123456789", "Hello")])
+        now = timezone.now()
+        # As if another worker had claimed the job and died
+        OutboundJob.objects.update(next_attempt=now + timedelta(minutes=10))
+
+        run_outbound_jobs(now=now)
+        mtwilio_client.return_value.messages.create.assert_not_called()
+
+        run_outbound_jobs(now=now + timedelta(minutes=10))
+        mtwilio_client.return_value.messages.create.assert_called_once()
+
+    @override_settings(OUTBOUND_SMS_CONCURRENCY=3, OUTBOUND_JOB_BATCH_SIZE=5)
+    def test_sms_concurrency_is_limited(self, mtwilio_client):
+        """test_sms_concurrency_is_limited"""
+        lock = threading.Lock()
+        sending = [0]
+        max_sending = [0]
+
+        def create(**_):
+            with lock:
+                sending[0] += 1
+                max_sending[0] = max(max_sending[0], sending[0])
+            time.sleep(0.05)
+            with lock:
+                sending[0] -= 1
+
+        mtwilio_client.return_value.messages.create.side_effect = create
+        enqueue_jobs([sms_job("+447123456789", f"Hello {i}") for i in range(12)])
+
+        run_outbound_jobs()
+        self.assertEqual(mtwilio_client.return_value.messages.create.call_count, 12)
+        self.assertEqual(max_sending[0], 3)
+        # The client is shared by each batch of messages
+        self.assertEqual(mtwilio_client.call_count, 3)
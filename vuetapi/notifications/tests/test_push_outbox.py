@@ -0,0 +1,378 @@
+"""Tests for sending push messages through the outbox, against a fake Expo push server"""
+
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models.users.user_models import User
+from notifications.models import OutgoingPushMessage, PushMessageStatus, PushToken
+from notifications.utils.send_notification import (
+    batch_push_messages,
+    check_push_receipts,
+    send_push_message,
+    send_queued_push_messages,
+)
+
+
+class FakeExpoHandler(BaseHTTPRequestHandler):
+    """Responds like the Expo push API"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        """do_POST"""
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, body))
+
+        if self.server.failures:
+            self.server.failures -= 1
+            self.respond(503, b"Service Unavailable")
+        elif self.path.endswith("/push/send") and any(
+            message["body"] in self.server.invalid_bodies for message in body
+        ):
+            self.respond(
+                400,
+                json.dumps(
+                    {"errors": [{"code": "VALIDATION_ERROR", "message": "Invalid"}]}
+                ).encode(),
+            )
+        elif self.path.endswith("/push/send"):
+            self.respond_json(
+                {
+                    "data": [
+                        {
+                            "status": "error",
+                            "message": "Not registered",
+                            "details": {"error": "DeviceNotRegistered"},
+                        }
+                        if message["to"] in self.server.unregistered_tokens
+                        else {"status": "ok", "id": f"ticket-{message['to']}"}
+                        for message in body
+                    ]
+                }
+            )
+        else:
+            self.respond_json(
+                {
+                    "data": {
+                        ticket_id: {
+                            "status": "error",
+                            "message": "Not registered",
+                            "details": {"error": "DeviceNotRegistered"},
+                        }
+                        if ticket_id in self.server.failed_receipts
+                        else {"status": "ok"}
+                        for ticket_id in body["ids"]
+                        if ticket_id not in self.server.missing_receipts
+                    }
+                }
+            )
+
+    def respond_json(self, data):
+        """respond_json"""
+        self.respond(200, json.dumps(data).encode())
+
+    def respond(self, status, body):
+        """respond"""
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class TestPushOutbox(TestCase):
+    """Tests for the push message outbox"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeExpoHandler)
+        self.server.requests = []
+        self.server.failures = 0
+        self.server.invalid_bodies = set()
+        self.server.unregistered_tokens = set()
+        self.server.failed_receipts = set()
+        self.server.missing_receipts = set()
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        settings_override = override_settings(
+            EXPO_PUSH_HOST=f"http://127.0.0.1:{self.server.server_port}"
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.user = User.objects.create(phone_number="+447123456789")
+        self.push_tokens = [
+            PushToken.objects.create(token=f"ExponentPushToken[{i}]", user=self.user)
+            for i in range(3)
+        ]
+
+    def test_send_push_message(self):
+        """test_send_push_message"""
+        send_push_message(self.push_tokens[0], "MESSAGE", extra={"id": 1})
+
+        self.assertEqual(
+            self.server.requests,
+            [
+                (
+                    "/--/api/v2/push/send",
+                    [
+                        {
+                            "to": "ExponentPushToken[0]",
+                            "body": "MESSAGE",
+                            "data": {"id": 1},
+                        }
+                    ],
+                )
+            ],
+        )
+        message = OutgoingPushMessage.objects.get()
+        self.assertEqual(message.status, PushMessageStatus.SENT)
+        self.assertEqual(message.ticket_id, "ticket-ExponentPushToken[0]")
+        self.assertEqual(message.attempts, 1)
+
+    def test_batched_messages_are_sent_together(self):
+        """test_batched_messages_are_sent_together"""
+        with batch_push_messages():
+            for push_token in self.push_tokens:
+                send_push_message(push_token, "MESSAGE")
+            self.assertEqual(self.server.requests, [])
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(self.server.requests[0][1]), 3)
+        self.assertEqual(
+            OutgoingPushMessage.objects.filter(status=PushMessageStatus.SENT).count(),
+            3,
+        )
+
+    def test_messages_are_chunked(self):
+        """test_messages_are_chunked"""
+        with batch_push_messages():
+            for i in range(150):
+                send_push_message(self.push_tokens[i % 3], f"MESSAGE {i}")
+
+        self.assertEqual(
+            [len(messages) for (_, messages) in self.server.requests], [100, 50]
+        )
+
+    def test_transient_failures_are_retried_with_backoff(self):
+        """test_transient_failures_are_retried_with_backoff"""
+        self.server.failures = 2
+        now = timezone.now()
+        OutgoingPushMessage.objects.create(
+            push_token=self.push_tokens[0], body="MESSAGE", next_attempt=now
+        )
+
+        send_queued_push_messages(now=now)
+        message = OutgoingPushMessage.objects.get()
+        self.assertEqual(message.status, PushMessageStatus.PENDING)
+        self.assertEqual(message.next_attempt, now + timedelta(minutes=1))
+
+        # Not due yet
+        send_queued_push_messages(now=now + timedelta(seconds=30))
+        self.assertEqual(len(self.server.requests), 1)
+
+        send_queued_push_messages(now=now + timedelta(minutes=1))
+        message = OutgoingPushMessage.objects.get()
+        self.assertEqual(message.status, PushMessageStatus.PENDING)
+        self.assertEqual(message.next_attempt, now + timedelta(minutes=3))
+
+        send_queued_push_messages(now=now + timedelta(minutes=3))
+        message = OutgoingPushMessage.objects.get()
+        self.assertEqual(message.status, PushMessageStatus.SENT)
+        self.assertEqual(message.attempts, 3)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_claimed_messages_are_sent_once_the_lease_is_up(self):
+        """test_claimed_messages_are_sent_once_the_lease_is_up"""
+        now = timezone.now()
+        OutgoingPushMessage.objects.create(
+            push_token=self.push_tokens[0], body="MESSAGE", next_attempt=now
+        )
+        # As if another worker had claimed the message and died
+        OutgoingPushMessage.objects.update(next_attempt=now + timedelta(minutes=10))
+
+        send_queued_push_messages(now=now)
+        self.assertEqual(self.server.requests, [])
+
+        send_queued_push_messages(now=now + timedelta(minutes=10))
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(
+            OutgoingPushMessage.objects.get().status, PushMessageStatus.SENT
+        )
+
+    @override_settings(PUSH_BATCH_SIZE=40)
+    def test_queued_messages_are_sent_in_batches(self):
+        """test_queued_messages_are_sent_in_batches"""
+        now = timezone.now()
+        OutgoingPushMessage.objects.bulk_create(
+            [
+                OutgoingPushMessage(
+                    push_token=self.push_tokens[i % 3],
+                    body=f"MESSAGE {i}",
+                    next_attempt=now,
+                )
+                for i in range(100)
+            ]
+        )
+
+        send_queued_push_messages(now=now)
+        self.assertEqual(
+            [len(messages) for (_, messages) in self.server.requests], [40, 40, 20]
+        )
+        self.assertEqual(
+            list(
+                OutgoingPushMessage.objects.values_list(
+                    "attempts", flat=True
+                ).distinct()
+            ),
+            [1],
+        )
+        self.assertFalse(
+            OutgoingPushMessage.objects.filter(
+                status=PushMessageStatus.PENDING
+            ).exists()
+        )
+
+    @override_settings(PUSH_MAX_ATTEMPTS=2)
+    def test_messages_fail_after_max_attempts(self):
+        """test_messages_fail_after_max_attempts"""
+        self.server.failures = 2
+        now = timezone.now()
+        OutgoingPushMessage.objects.create(
+            push_token=self.push_tokens[0], body="MESSAGE", next_attempt=now
+        )
+
+        send_queued_push_messages(now=now)
+        send_queued_push_messages(now=now + timedelta(minutes=1))
+        message = OutgoingPushMessage.objects.get()
+        self.assertEqual(message.status, PushMessageStatus.FAILED)
+        self.assertIsNone(message.next_attempt)
+
+    def test_rejected_batches_are_sent_one_at_a_time(self):
+        """test_rejected_batches_are_sent_one_at_a_time"""
+        self.server.invalid_bodies = {"INVALID"}
+        with batch_push_messages():
+            for body in ["MESSAGE 0", "INVALID", "MESSAGE 1"]:
+                send_push_message(self.push_tokens[0], body)
+
+        self.assertEqual(
+            [len(messages) for (_, messages) in self.server.requests], [3, 1, 1, 1]
+        )
+        self.assertEqual(
+            list(
+                OutgoingPushMessage.objects.order_by("id").values_list("body", "status")
+            ),
+            [
+                ("MESSAGE 0", PushMessageStatus.SENT),
+                ("INVALID", PushMessageStatus.FAILED),
+                ("MESSAGE 1", PushMessageStatus.SENT),
+            ],
+        )
+
+    def test_unregistered_devices_are_deactivated(self):
+        """test_unregistered_devices_are_deactivated"""
+        self.server.unregistered_tokens = {"ExponentPushToken[0]"}
+        with batch_push_messages():
+            for push_token in self.push_tokens:
+                send_push_message(push_token, "MESSAGE")
+
+        self.assertEqual(
+            list(PushToken.objects.order_by("id").values_list("active", flat=True)),
+            [False, True, True],
+        )
+        self.assertEqual(
+            OutgoingPushMessage.objects.get(push_token=self.push_tokens[0]).status,
+            PushMessageStatus.FAILED,
+        )
+
+    def test_check_push_receipts(self):
+        """test_check_push_receipts"""
+        with batch_push_messages():
+            for push_token in self.push_tokens:
+                send_push_message(push_token, "MESSAGE")
+        self.server.failed_receipts = {"ticket-ExponentPushToken[1]"}
+        self.server.missing_receipts = {"ticket-ExponentPushToken[2]"}
+
+        # Receipts aren't checked until they're due
+        check_push_receipts()
+        self.assertEqual(len(self.server.requests), 1)
+
+        check_push_receipts(now=timezone.now() + timedelta(minutes=15))
+        self.assertEqual(
+            self.server.requests[-1],
+            (
+                "/--/api/v2/push/getReceipts",
+                {"ids": [f"ticket-ExponentPushToken[{i}]" for i in range(3)]},
+            ),
+        )
+        self.assertEqual(
+            list(
+                OutgoingPushMessage.objects.order_by("id").values_list(
+                    "status", flat=True
+                )
+            ),
+            [
+                PushMessageStatus.DELIVERED,
+                PushMessageStatus.FAILED,
+                PushMessageStatus.SENT,
+            ],
+        )
+        self.assertEqual(
+            list(PushToken.objects.order_by("id").values_list("active", flat=True)),
+            [True, False, True],
+        )
+
+        # Messages without receipts fail once the receipts have expired
+        check_push_receipts(now=timezone.now() + timedelta(days=1))
+        self.assertEqual(
+            OutgoingPushMessage.objects.get(push_token=self.push_tokens[2]).status,
+            PushMessageStatus.FAILED,
+        )
+
+    @override_settings(PUSH_BATCH_SIZE=2)
+    def test_push_receipts_are_checked_in_batches(self):
+        """test_push_receipts_are_checked_in_batches"""
+        now = timezone.now()
+        OutgoingPushMessage.objects.bulk_create(
+            [
+                OutgoingPushMessage(
+                    push_token=self.push_tokens[0],
+                    body=f"MESSAGE {i}",
+                    status=PushMessageStatus.SENT,
+                    ticket_id=f"ticket-{i}",
+                    sent_at=now - timedelta(minutes=30 - i),
+                )
+                for i in range(5)
+            ]
+        )
+        # Messages without receipts don't stop the later ones being checked
+        self.server.missing_receipts = {"ticket-0", "ticket-1", "ticket-3"}
+
+        check_push_receipts(now=now)
+        self.assertEqual(
+            [body["ids"] for (_, body) in self.server.requests],
+            [["ticket-0", "ticket-1"], ["ticket-2", "ticket-3"], ["ticket-4"]],
+        )
+        self.assertEqual(
+            list(
+                OutgoingPushMessage.objects.order_by("id").values_list(
+                    "status", flat=True
+                )
+            ),
+            [
+                PushMessageStatus.SENT,
+                PushMessageStatus.SENT,
+                PushMessageStatus.DELIVERED,
+                PushMessageStatus.SENT,
+                PushMessageStatus.DELIVERED,
+            ],
+        )
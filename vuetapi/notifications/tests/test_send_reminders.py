@@ -1,7 +1,12 @@
 import django
 from django.utils import timezone
 
-from core.models.tasks.base import FixedTask, TaskReminder
+from core.models.tasks.base import (
+    FixedTask,
+    Recurrence,
+    RecurrentTaskOverwrite,
+    TaskReminder,
+)
 from notifications.utils.send_reminders import send_due_reminders
 
 django.setup()
@@ -13,7 +18,9 @@ from unittest.mock import patch
 import pytz
 from dateutil.tz import tzlocal
 from django.contrib.auth.hashers import make_password
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIRequestFactory, force_authenticate
 
@@ -54,3 +61,114 @@ class TestSendReminders(TestCase):
             self.push_token,
             f"REMINDER - {task.title} {task.start_datetime.strftime('%H:%M GMT on %d/%m/%Y')}",
         )
+
+    @patch("notifications.utils.send_reminders.send_push_message_if_valid")
+    def test_send_due_reminders_for_recurring_task(self, msend_message):
+        """test_send_due_reminders_for_recurring_task"""
+        start_datetime = datetime(2020, 1, 1, 9, 0, tzinfo=utc)
+        task = FixedTask.objects.create(
+            title="Recurring Task",
+            start_datetime=start_datetime,
+            end_datetime=start_datetime + timedelta(minutes=15),
+        )
+        task.members.set([self.user])
+        recurrence = Recurrence.objects.create(task=task, recurrence="WEEKLY")
+        reminder = TaskReminder.objects.create(task=task, timedelta=timedelta(hours=1))
+
+        now = timezone.now()
+        reminder.refresh_from_db()
+        occurrence_start = reminder.next_fire_time + reminder.timedelta
+        self.assertGreater(occurrence_start, now)
+        self.assertLessEqual(occurrence_start, now + timedelta(weeks=1, hours=1))
+        self.assertEqual(occurrence_start.weekday(), start_datetime.weekday())
+
+        # Overwritten occurrences are tasks with their own reminders
+        overwrite_task = FixedTask.objects.create(
+            title="Overwrite",
+            start_datetime=occurrence_start,
+            end_datetime=occurrence_start + timedelta(minutes=15),
+        )
+        overwrite = RecurrentTaskOverwrite.objects.create(
+            task=overwrite_task,
+            recurrence=recurrence,
+            recurrence_index=(occurrence_start - start_datetime).days // 7,
+        )
+        reminder.refresh_from_db()
+        self.assertEqual(
+            reminder.next_fire_time + reminder.timedelta,
+            occurrence_start + timedelta(weeks=1),
+        )
+        overwrite.delete()
+        reminder.refresh_from_db()
+        self.assertEqual(reminder.next_fire_time + reminder.timedelta, occurrence_start)
+
+        # Nothing is sent until the reminder is due
+        send_due_reminders(now=reminder.next_fire_time - timedelta(minutes=1))
+        msend_message.assert_not_called()
+
+        send_due_reminders(now=reminder.next_fire_time + timedelta(minutes=1))
+        msend_message.assert_called_once_with(
+            self.push_token,
+            f"REMINDER - {task.title} {occurrence_start.strftime('%H:%M GMT on %d/%m/%Y')}",
+        )
+
+        # The reminder moves on to the next occurrence
+        reminder.refresh_from_db()
+        self.assertEqual(
+            reminder.next_fire_time + reminder.timedelta,
+            occurrence_start + timedelta(weeks=1),
+        )
+
+    @patch("notifications.utils.send_reminders.send_push_message_if_valid")
+    def test_overdue_reminders_are_skipped(self, msend_message):
+        """test_overdue_reminders_are_skipped"""
+        now = timezone.now()
+        task = FixedTask.objects.create(
+            title="Fixed Task",
+            start_datetime=now + timedelta(days=1),
+            end_datetime=now + timedelta(days=1, minutes=15),
+        )
+        task.members.set([self.user])
+        reminder = TaskReminder.objects.create(task=task, timedelta=timedelta(hours=1))
+
+        send_due_reminders(now=now + timedelta(days=1))
+        msend_message.assert_not_called()
+
+        reminder.refresh_from_db()
+        self.assertIsNone(reminder.next_fire_time)
+
+    @patch("notifications.utils.send_reminders.send_push_message_if_valid")
+    def test_query_count_independent_of_tasks(self, msend_message):
+        """test_query_count_independent_of_tasks"""
+        now = timezone.now()
+
+        def create_tasks():
+            for i in range(10):
+                task = FixedTask.objects.create(
+                    title="Future Task",
+                    start_datetime=now + timedelta(days=10 + i),
+                    end_datetime=now + timedelta(days=10 + i, minutes=15),
+                )
+                task.members.set([self.user])
+                TaskReminder.objects.create(task=task, timedelta=timedelta(days=1))
+
+            task = FixedTask.objects.create(
+                title="Due Task",
+                start_datetime=now + timedelta(days=1),
+                end_datetime=now + timedelta(days=1, minutes=15),
+            )
+            task.members.set([self.user])
+            TaskReminder.objects.create(task=task, timedelta=timedelta(days=1))
+
+        create_tasks()
+        with CaptureQueriesContext(connection) as context:
+            send_due_reminders(now=now + timedelta(minutes=1))
+        queries = len(context.captured_queries)
+        self.assertEqual(msend_message.call_count, 1)
+
+        create_tasks()
+        create_tasks()
+        with CaptureQueriesContext(connection) as context:
+            send_due_reminders(now=now + timedelta(minutes=2))
+        self.assertEqual(len(context.captured_queries), queries)
+        self.assertEqual(msend_message.call_count, 3)
@@ -0,0 +1,224 @@
+"""Outbound jobs
+
+Invites and other messages sent in response to a request are queued as
+OutboundJobs, in the request's transaction, rather than being sent to
+the email, SMS and push providers inside the request. That way a slow
+provider can't hold up the web workers.
+
+`run_outbound_jobs` (run every minute by the cron worker) sends the jobs
+which are due in batches for each provider. Emails are sent one after
+another over a single SMTP connection, SMS messages a few at a time,
+and push messages through the push outbox in a single batch. Jobs which fail are retried with backoff.
+"""
+
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from twilio.base.exceptions import TwilioRestException
+from twilio.rest import Client
+
+from notifications.models import (
+    OutboundJob,
+    OutboundJobKind,
+    OutboundJobStatus,
+    PushToken,
+)
+from notifications.utils.send_notification import (
+    batch_push_messages,
+    send_push_message_if_valid,
+)
+from utils.email_client import EmailClient, OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+OUTBOUND_JOB_FIELDS = [
+    "status",
+    "attempts",
+    "next_attempt",
+    "last_error",
+    "completed_at",
+]
+
+
+class PermanentJobError(Exception):
+    """A job has failed in a way that sending it again won't fix"""
+
+
+def email_job(
+    to_email: str,
+    title: str,
+    template: str,
+    plaintext_template: Optional[str] = None,
+    data: Optional[dict] = None,
+    idempotency_key: Optional[str] = None,
+) -> OutboundJob:
+    """A job to send an email using `EmailClient.send_many`"""
+    return OutboundJob(
+        kind=OutboundJobKind.EMAIL,
+        payload={
+            "to": to_email,
+            "title": title,
+            "template": template,
+            "plaintext_template": plaintext_template,
+            "data": data,
+        },
+        idempotency_key=idempotency_key,
+    )
+
+
+def sms_job(
+    phone_number: str, body: str, idempotency_key: Optional[str] = None
+) -> OutboundJob:
+    """A job to send an SMS message"""
+    return OutboundJob(
+        kind=OutboundJobKind.SMS,
+        payload={"to": phone_number, "body": body},
+        idempotency_key=idempotency_key,
+    )
+
+
+def push_job(
+    user_id: int, message: str, idempotency_key: Optional[str] = None
+) -> OutboundJob:
+    """A job to send a push message to each of a user's devices"""
+    return OutboundJob(
+        kind=OutboundJobKind.PUSH,
+        payload={"user": user_id, "message": message},
+        idempotency_key=idempotency_key,
+    )
+
+
+def enqueue_jobs(jobs: Iterable[OutboundJob]):
+    """Queue the jobs to be sent by the worker. Jobs with the same
+    idempotency key as a job which has already been queued are ignored"""
+    now = timezone.now()
+    jobs = list(jobs)
+    for job in jobs:
+        job.next_attempt = now
+    OutboundJob.objects.bulk_create(jobs, ignore_conflicts=True)
+
+
+def _send_emails(jobs: List[OutboundJob]) -> Dict[int, Exception]:
+    errors = EmailClient().send_many(
+        [
+            OutgoingEmail(
+                job.payload["title"],
+                job.payload["template"],
+                job.payload["to"],
+                plaintext_template=job.payload["plaintext_template"],
+                data=job.payload["data"],
+            )
+            for job in jobs
+        ]
+    )
+    return {job.id: error for (job, error) in zip(jobs, errors) if error}
+
+
+def _send_sms_messages(jobs: List[OutboundJob]) -> Dict[int, Exception]:
+    sms_client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+    def send(job: OutboundJob) -> Optional[Exception]:
+        try:
+            sms_client.messages.create(
+                to=job.payload["to"],
+                from_=settings.TWILIO_FROM_NUMBER,
+                body=job.payload["body"],
+            )
+        except TwilioRestException as exc:
+            if exc.status < 500 and exc.status != 429:
+                # e.g. an invalid phone number
+                return PermanentJobError(exc.msg)
+            return exc
+        except Exception as exc:  # pylint: disable=broad-except
+            return exc
+        return None
+
+    with ThreadPoolExecutor(max_workers=settings.OUTBOUND_SMS_CONCURRENCY) as executor:
+        results = list(executor.map(send, jobs))
+    return {job.id: error for (job, error) in zip(jobs, results) if error}
+
+
+def _send_push_messages(jobs: List[OutboundJob]) -> Dict[int, Exception]:
+    # The push outbox retries the messages which fail itself
+    push_tokens = defaultdict(list)
+    for push_token in PushToken.objects.filter(
+        user_id__in={job.payload["user"] for job in jobs}
+    ).order_by("id"):
+        push_tokens[push_token.user_id].append(push_token)  # type: ignore
+
+    with batch_push_messages():
+        for job in jobs:
+            for push_token in push_tokens[job.payload["user"]]:
+                send_push_message_if_valid(push_token, job.payload["message"])
+    return {}
+
+
+JOB_SENDERS = {
+    OutboundJobKind.EMAIL: _send_emails,
+    OutboundJobKind.SMS: _send_sms_messages,
+    OutboundJobKind.PUSH: _send_push_messages,
+}
+
+
+def _claim_jobs(kind: OutboundJobKind, now: datetime) -> List[OutboundJob]:
+    """Claim a batch of the due jobs of a kind, so that other workers don't
+    send them at the same time, unless they still haven't been sent once
+    the lease is up"""
+    with transaction.atomic():
+        jobs = list(
+            OutboundJob.objects.select_for_update(skip_locked=True)
+            .filter(kind=kind, status=OutboundJobStatus.PENDING, next_attempt__lte=now)
+            .order_by("next_attempt", "id")[: settings.OUTBOUND_JOB_BATCH_SIZE]
+        )
+        OutboundJob.objects.filter(id__in=[job.id for job in jobs]).update(
+            attempts=F("attempts") + 1,
+            next_attempt=now + timedelta(seconds=settings.OUTBOUND_JOB_LEASE),
+        )
+
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def _update_job(job: OutboundJob, error: Optional[Exception], now: datetime):
+    if error is None:
+        job.status = OutboundJobStatus.DONE
+        job.next_attempt = None
+        job.last_error = ""
+        job.completed_at = now
+        return
+
+    logger.warning("Outbound job %s failed: %s", job.id, error)
+    job.last_error = str(error)
+    if (
+        isinstance(error, PermanentJobError)
+        or job.attempts >= settings.OUTBOUND_JOB_MAX_ATTEMPTS
+    ):
+        job.status = OutboundJobStatus.FAILED
+        job.next_attempt = None
+    else:
+        job.next_attempt = now + timedelta(
+            seconds=settings.OUTBOUND_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        )
+
+
+def run_outbound_jobs(now: Optional[datetime] = None):
+    """Send the outbound jobs which are due, in batches for each provider"""
+    now = now or timezone.now()
+    for kind in OutboundJobKind:
+        while True:
+            jobs = _claim_jobs(kind, now)
+            if not jobs:
+                break
+
+            errors = JOB_SENDERS[kind](jobs)
+            for job in jobs:
+                _update_job(job, errors.get(job.id), now)
+            OutboundJob.objects.bulk_update(jobs, OUTBOUND_JOB_FIELDS)
@@ -1,69 +1,331 @@
-"""send_notification"""
+"""send_notification
+
+Push messages are written to an outbox (OutgoingPushMessage) and sent to
+the Expo push server in batches using a single pooled HTTP session.
+Transient failures are retried with backoff by `send_queued_push_messages`
+and the push receipts are checked later by `check_push_receipts`, which
+deactivates the push tokens of devices which are no longer registered.
+"""
 
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Optional
 
+import requests
 from dateutil.tz import tzlocal
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from exponent_server_sdk import (  # type: ignore
     DeviceNotRegisteredError,
+    MessageRateExceededError,
     PushClient,
     PushMessage,
     PushServerError,
+    PushTicket,
     PushTicketError,
 )
-from requests.exceptions import ConnectionError, HTTPError
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from notifications.models import OutgoingPushMessage, PushMessageStatus, PushToken
+
+logger = logging.getLogger(__name__)
+
+_batched_messages = threading.local()
+
+OUTBOX_FIELDS = [
+    "status",
+    "attempts",
+    "next_attempt",
+    "ticket_id",
+    "sent_at",
+    "last_error",
+]
+
+
+@lru_cache(maxsize=None)
+def _get_push_client(host: str) -> PushClient:
+    session = requests.Session()
+    session.headers.update(
+        {
+            "accept": "application/json",
+            "accept-encoding": "gzip, deflate",
+            "content-type": "application/json",
+        }
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return PushClient(host=host, session=session, timeout=settings.EXPO_PUSH_TIMEOUT)
 
-from notifications.models import PushToken
+
+def get_push_client() -> PushClient:
+    """Get the push client for the configured push server, which keeps its
+    connections open between batches"""
+    return _get_push_client(settings.EXPO_PUSH_HOST)
+
+
+def push_messages_are_batched() -> bool:
+    """Whether push messages are currently batched by `batch_push_messages`"""
+    return hasattr(_batched_messages, "ids")
+
+
+@contextmanager
+def batch_push_messages():
+    """Queue the push messages sent inside the block and send them
+    together at the end, rather than making a request for each one.
+
+    Useful when sending lots of messages at once (e.g. reminders).
+    """
+    if push_messages_are_batched():
+        yield
+        return
+
+    _batched_messages.ids = []
+    try:
+        yield
+        message_ids = _batched_messages.ids
+    finally:
+        del _batched_messages.ids
+    send_queued_push_messages(message_ids)
 
 
-# TODO - implement some of this recommended error tracking / retry logic
 def send_push_message(push_token: PushToken, message: str, extra=None):
     """Send a push message to the user assigned to the token"""
-    try:
-        response = PushClient().publish(
-            PushMessage(to=push_token.token, body=message, data=extra)
+    queued_message = OutgoingPushMessage.objects.create(
+        push_token=push_token, body=message, data=extra, next_attempt=timezone.now()
+    )
+    if push_messages_are_batched():
+        _batched_messages.ids.append(queued_message.id)
+    else:
+        send_queued_push_messages([queued_message.id])
+
+
+def _retry_later(message: OutgoingPushMessage, now: datetime, error: str):
+    message.last_error = error
+    if message.attempts >= settings.PUSH_MAX_ATTEMPTS:
+        message.status = PushMessageStatus.FAILED
+        message.next_attempt = None
+    else:
+        message.next_attempt = now + timedelta(
+            seconds=settings.PUSH_RETRY_DELAY * 2 ** (message.attempts - 1)
         )
-    except PushServerError as exc:
-        # Encountered some likely formatting/validation error.
-        logging.error(exc)
-        # rollbar.report_exc_info(
-        #     extra_data={
-        #         'token': token,
-        #         'message': message,
-        #         'extra': extra,
-        #         'errors': exc.errors,
-        #         'response_data': exc.response_data,
-        #     })
-        # raise
-    except (ConnectionError, HTTPError) as exc:
-        # Encountered some Connection or HTTP error - retry a few times in
-        # case it is transient.
-        logging.error(exc)
-        # rollbar.report_exc_info(
-        #     extra_data={'token': token, 'message': message, 'extra': extra})
-        # raise self.retry(exc=exc)
 
+
+def _fail(message: OutgoingPushMessage, error: str):
+    message.status = PushMessageStatus.FAILED
+    message.next_attempt = None
+    message.last_error = error
+
+
+def _handle_ticket(
+    message: OutgoingPushMessage, ticket: PushTicket, now: datetime
+) -> bool:
+    """Update the message with the push ticket (or receipt) returned for
+    it, returning whether its device is no longer registered"""
     try:
-        # We got a response back, but we don't know whether it's an error yet.
-        # This call raises errors so we can handle them with normal exception
-        # flows.
-        response.validate_response()
+        ticket.validate_response()
     except DeviceNotRegisteredError:
-        # Mark the push token as inactive
-        push_token.active = False
-        push_token.save()
-    except PushTicketError as exc:
+        _fail(message, ticket.message)
+        return True
+    except MessageRateExceededError:
+        _retry_later(message, now, ticket.message)
+    except PushTicketError:
         # Encountered some other per-notification error.
-        logging.error(exc)
-        # rollbar.report_exc_info(
-        #     extra_data={
-        #         'token': token,
-        #         'message': message,
-        #         'extra': extra,
-        #         'push_response': exc.push_response._asdict(),
-        #     })
-        # raise self.retry(exc=exc)
+        logger.error("Push message %s failed: %s", message.id, ticket.message)
+        _fail(message, ticket.message)
+    return False
+
+
+def _publish(
+    client: PushClient, messages: List[OutgoingPushMessage], now: datetime
+) -> List[int]:
+    """Publish a batch of messages, returning the IDs of the push tokens
+    of devices which are no longer registered"""
+    try:
+        tickets = client.publish_multiple(
+            [
+                PushMessage(
+                    to=message.push_token.token, body=message.body, data=message.data
+                )
+                for message in messages
+            ]
+        )
+    except RequestException as exc:
+        # Encountered some Connection or HTTP error - retry later in
+        # case it is transient.
+        logger.warning("Failed to publish push messages: %s", exc)
+        for message in messages:
+            _retry_later(message, now, str(exc))
+        return []
+    except PushServerError as exc:
+        if exc.response is not None and (
+            exc.response.status_code >= 500 or exc.response.status_code == 429
+        ):
+            logger.warning("Failed to publish push messages: %s", exc)
+            for message in messages:
+                _retry_later(message, now, str(exc))
+        elif len(messages) > 1:
+            # The whole batch is rejected for a single invalid message (or
+            # for messages to different experiences), so the messages are
+            # sent on their own to only fail the ones which are rejected
+            logger.warning("Push messages rejected: %s %s", exc, exc.errors)
+            return [
+                token_id
+                for message in messages
+                for token_id in _publish(client, [message], now)
+            ]
+        else:
+            # Encountered some likely formatting/validation error.
+            logger.error("Push messages rejected: %s %s", exc, exc.errors)
+            for message in messages:
+                _fail(message, str(exc.errors or exc))
+        return []
+
+    unregistered_token_ids = []
+    for (message, ticket) in zip(messages, tickets):
+        message.next_attempt = None
+        if ticket.is_success():
+            message.status = PushMessageStatus.SENT
+            message.ticket_id = ticket.id
+            message.sent_at = now
+            message.last_error = ""
+        elif _handle_ticket(message, ticket, now):
+            unregistered_token_ids.append(message.push_token_id)  # type: ignore
+    return unregistered_token_ids
+
+
+def _claim_push_messages(
+    message_ids: Optional[List[int]], now: datetime
+) -> List[OutgoingPushMessage]:
+    """Claim a batch of the due push messages, so that other workers don't
+    send them at the same time, unless they still haven't been sent once
+    the lease is up"""
+    with transaction.atomic():
+        due_messages = OutgoingPushMessage.objects.select_for_update(
+            skip_locked=True, of=("self",)
+        ).filter(status=PushMessageStatus.PENDING, next_attempt__lte=now)
+        if message_ids is not None:
+            due_messages = due_messages.filter(id__in=message_ids)
+        messages = list(
+            due_messages.select_related("push_token").order_by("next_attempt", "id")[
+                : settings.PUSH_BATCH_SIZE
+            ]
+        )
+        OutgoingPushMessage.objects.filter(
+            id__in=[message.id for message in messages]
+        ).update(
+            attempts=F("attempts") + 1,
+            next_attempt=now + timedelta(seconds=settings.PUSH_LEASE),
+        )
+
+    for message in messages:
+        message.attempts += 1
+    return messages
+
+
+def send_queued_push_messages(
+    message_ids: Optional[Iterable[int]] = None, now: Optional[datetime] = None
+):
+    """Send the pending push messages which are due, in batches.
+
+    Only the messages with the IDs provided are sent, if given.
+    """
+    now = now or timezone.now()
+    if message_ids is not None:
+        message_ids = list(message_ids)
+
+    # Each batch is claimed before it is sent, and is then either sent,
+    # failed or due again after now, so isn't claimed again
+    while messages := _claim_push_messages(message_ids, now):
+        client = get_push_client()
+        unregistered_token_ids = []
+        for start in range(0, len(messages), client.max_message_count):
+            unregistered_token_ids += _publish(
+                client, messages[start : start + client.max_message_count], now
+            )
+
+        OutgoingPushMessage.objects.bulk_update(messages, OUTBOX_FIELDS)
+        if unregistered_token_ids:
+            PushToken.objects.filter(id__in=unregistered_token_ids).update(active=False)
+
+
+def _check_receipts(
+    client: PushClient, messages: List[OutgoingPushMessage], now: datetime
+):
+    """Check the push receipts of a batch of sent messages"""
+    receipts = {}
+    for start in range(0, len(messages), client.max_receipt_count):
+        chunk = messages[start : start + client.max_receipt_count]
+        try:
+            receipts.update(
+                {
+                    receipt.id: receipt
+                    for receipt in client.check_receipts_multiple(
+                        [
+                            PushTicket(
+                                push_message=None,
+                                status=None,
+                                message=None,
+                                details=None,
+                                id=message.ticket_id,
+                            )
+                            for message in chunk
+                        ]
+                    )
+                }
+            )
+        except (RequestException, PushServerError) as exc:
+            # Try again next time
+            logger.warning("Failed to check push receipts: %s", exc)
+
+    expired = now - timedelta(seconds=settings.PUSH_RECEIPT_LIFETIME)
+    unregistered_token_ids = []
+    for message in messages:
+        receipt = receipts.get(message.ticket_id)
+        if not receipt:
+            if message.sent_at <= expired:  # type: ignore
+                _fail(message, "No push receipt")
+        elif receipt.is_success():
+            message.status = PushMessageStatus.DELIVERED
+        elif _handle_ticket(message, receipt, now):
+            unregistered_token_ids.append(message.push_token_id)  # type: ignore
+        elif message.status == PushMessageStatus.SENT:
+            # Rate limited messages are sent again
+            message.status = PushMessageStatus.PENDING
+
+    OutgoingPushMessage.objects.bulk_update(messages, OUTBOX_FIELDS)
+    if unregistered_token_ids:
+        PushToken.objects.filter(id__in=unregistered_token_ids).update(active=False)
+
+
+def check_push_receipts(now: Optional[datetime] = None):
+    """Check the push receipts of the messages sent which are due to have
+    them, in batches, deactivating the push tokens of devices which are
+    no longer registered"""
+    now = now or timezone.now()
+    due_messages = OutgoingPushMessage.objects.filter(
+        status=PushMessageStatus.SENT,
+        sent_at__lte=now - timedelta(seconds=settings.PUSH_RECEIPT_DELAY),
+    ).order_by("sent_at", "id")
+
+    # The messages whose receipts are missing are still due, so each
+    # batch starts after the last one
+    messages = list(due_messages[: settings.PUSH_BATCH_SIZE])
+    while messages:
+        _check_receipts(get_push_client(), messages, now)
+        last_message = messages[-1]
+        messages = list(
+            due_messages.filter(
+                Q(sent_at__gt=last_message.sent_at)
+                | Q(sent_at=last_message.sent_at, id__gt=last_message.id)
+            )[: settings.PUSH_BATCH_SIZE]
+        )
 
 
 def send_push_message_if_valid(push_token: PushToken, message: str, extra=None):
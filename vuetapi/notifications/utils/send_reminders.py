@@ -1,50 +1,70 @@
 import logging
-from typing import List
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 
-from django.db.models import Q
 from django.utils import timezone
 
-from core.models.tasks.base import FixedTask
-from notifications.utils.send_notification import send_push_message_if_valid
+from core.models.tasks.base import Task, TaskReminder
+from core.utils.reminders import update_next_fire_times
+from notifications.models import PushToken
+from notifications.utils.send_notification import (
+    batch_push_messages,
+    send_push_message_if_valid,
+)
 from vuet.settings import REMINDER_JOB_FREQUENCY
 
 logger = logging.getLogger(__name__)
 
 
-def send_due_reminders():
-    """Sends all due reminders"""
+def send_due_reminders(now: Optional[datetime] = None):
+    """Sends all due reminders.
+
+    Each reminder's next fire time is indexed (see core.utils.reminders),
+    so the due reminders - for one-off tasks and occurrences of recurring
+    tasks alike - are found with a single query. Reminders which are
+    overdue by more than the job frequency (e.g. if the job has not been
+    running) are skipped rather than sent late. Every reminder found is
+    then moved on to its next fire time.
+    """
     logger.info("SENDING DUE REMINDERS")
 
-    now = timezone.now()
-    all_potential_one_off_tasks_to_remind: List[FixedTask] = list(
-        FixedTask.objects.all()
-        .filter(
-            Q(
-                Q(recurrence__isnull=True)
-                & (
-                    Q(start_datetime__gte=now)
-                    | Q(start_date__gte=now)
-                    | Q(date__gte=now)
-                )
-            )
-        )
-        .prefetch_related("reminders")
+    now = now or timezone.now()
+    due_reminders: List[TaskReminder] = list(
+        TaskReminder.objects.filter(next_fire_time__lte=now).select_related("task")
     )
+    if not due_reminders:
+        return
+
+    earliest_fire_time = now - timedelta(seconds=REMINDER_JOB_FREQUENCY)
+    reminders_to_send = [
+        reminder
+        for reminder in due_reminders
+        if reminder.next_fire_time > earliest_fire_time  # type: ignore
+    ]
+
+    task_members: Dict[int, List[int]] = defaultdict(list)
+    for (task_id, member_id) in Task.members.through.objects.filter(
+        task_id__in={reminder.task_id for reminder in reminders_to_send}  # type: ignore
+    ).values_list("task_id", "member_id"):
+        task_members[task_id].append(member_id)
+
+    push_tokens: Dict[int, List[PushToken]] = defaultdict(list)
+    for push_token in PushToken.objects.filter(
+        user_id__in={
+            member_id for members in task_members.values() for member_id in members
+        }
+    ):
+        push_tokens[push_token.user_id].append(push_token)  # type: ignore
+
+    with batch_push_messages():
+        for reminder in reminders_to_send:
+            occurrence_start = reminder.next_fire_time + reminder.timedelta  # type: ignore
+            for member_id in task_members[reminder.task_id]:  # type: ignore
+                for push_token in push_tokens[member_id]:
+                    send_push_message_if_valid(
+                        push_token,
+                        f"REMINDER - {reminder.task.title} {occurrence_start.strftime('%H:%M GMT on %d/%m/%Y')}",
+                    )
 
-    for task in all_potential_one_off_tasks_to_remind:
-        reminders = task.reminders.all()
-        for reminder in reminders:
-            if task and task.start_datetime:
-                reminder_due_time = task.start_datetime - reminder.timedelta
-
-                reminder_offset = now - reminder_due_time
-                if (
-                    reminder_offset.seconds >= 0
-                ) and reminder_offset.seconds < REMINDER_JOB_FREQUENCY:
-                    for member in task.members.all():
-                        push_tokens = member.push_tokens.all()
-                        for push_token in push_tokens:
-                            send_push_message_if_valid(
-                                push_token,
-                                f"REMINDER - {task.title} {task.start_datetime.strftime('%H:%M GMT on %d/%m/%Y')}",
-                            )
+    update_next_fire_times([reminder.id for reminder in due_reminders], after=now)
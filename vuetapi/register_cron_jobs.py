@@ -16,7 +16,13 @@ logger.setLevel(logging.DEBUG)
 
 
 if __name__ == "__main__":
+    from core.utils.change_log import prune_change_log
     from external_calendars.utils.sync_icals import sync_icals
+    from notifications.utils.outbound_jobs import run_outbound_jobs
+    from notifications.utils.send_notification import (
+        check_push_receipts,
+        send_queued_push_messages,
+    )
     from notifications.utils.send_reminders import send_due_reminders
 
     cron_enabled = os.environ.get("CRON_ENABLED", "FALSE").lower() == "true"
@@ -32,12 +38,36 @@ if __name__ == "__main__":
             """send_reminders"""
             send_due_reminders()
 
+        @pycron.cron("* * * * *")  # Every minute
+        @sync_to_async
+        def retry_push_messages(timestamp: datetime):
+            """retry_push_messages"""
+            send_queued_push_messages()
+
+        @pycron.cron("* * * * *")  # Every minute
+        @sync_to_async
+        def send_outbound_jobs(timestamp: datetime):
+            """send_outbound_jobs"""
+            run_outbound_jobs()
+
+        @pycron.cron("*/15 * * * *")  # Every 15 minutes
+        @sync_to_async
+        def check_receipts(timestamp: datetime):
+            """check_receipts"""
+            check_push_receipts()
+
         @pycron.cron("*/30 * * * *")  # Every half hour
         @sync_to_async
         def sync_icalendars(timestamp: datetime):
             """sync_icalendars"""
             sync_icals()
 
+        @pycron.cron("0 3 * * *")  # Every day at 3am
+        @sync_to_async
+        def prune_changes(timestamp: datetime):
+            """prune_changes"""
+            prune_change_log()
+
         logger.info("Successfully Registered Cron Jobs")
 
         pycron.start()
@@ -1,9 +1,11 @@
 """A client for sending emails"""
+import json
 import logging
 import os
-from typing import List, Optional, TypedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, TypedDict
 
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.utils.timezone import now
 
@@ -20,6 +22,19 @@ class Attachment(TypedDict):
     content: bytes
 
 
+@dataclass
+class OutgoingEmail:
+    """An email to be sent with `EmailClient.send_many`"""
+
+    title: str
+    template: str
+    to_email: str
+    plaintext_template: Optional[str] = None
+    from_email: str = "Vuet<contact@vuet.app>"
+    data: Optional[dict] = None
+    attachments: Optional[List[Attachment]] = None
+
+
 class EmailClient:
     """EmailClient"""
 
@@ -39,27 +54,92 @@ class EmailClient:
         attachments: Optional[List[Attachment]] = None,
     ):
         """send_email"""
-        content = render_to_string(template, data or {})
+        [error] = self.send_many(
+            [
+                OutgoingEmail(
+                    title,
+                    template,
+                    to_email,
+                    plaintext_template=plaintext_template,
+                    from_email=from_email,
+                    data=data,
+                    attachments=attachments,
+                )
+            ]
+        )
+        if error:
+            raise error
+
+    def _build_message(self, email: OutgoingEmail, content: str, connection):
+        to_email_address = self.redirect_address or email.to_email
+        mail = EmailMultiAlternatives(
+            email.title,
+            email.plaintext_template or content,
+            email.from_email,
+            [to_email_address],
+            connection=connection,
+        )
+        mail.attach_alternative(content, "text/html")
+        if email.attachments:
+            for attachment in email.attachments:
+                mail.attach(attachment["name"], attachment["content"])
+        return mail
+
+    def send_many(self, emails: Sequence[OutgoingEmail]) -> List[Optional[Exception]]:
+        """Send emails over a single SMTP connection, rendering each
+        template once for each set of data it is sent with.
+
+        Returns the error raised sending each email, or None if it was
+        sent. The emails which are sent are logged as Emails.
+        """
+        keys = [
+            (email.template, json.dumps(email.data, sort_keys=True, default=str))
+            for email in emails
+        ]
+        rendered: Dict[Tuple[str, str], str] = {}
+        for email, key in zip(emails, keys):
+            if key not in rendered:
+                rendered[key] = render_to_string(email.template, email.data or {})
+        email_contents = [rendered[key] for key in keys]
 
+        errors: List[Optional[Exception]] = [None] * len(emails)
         if self.enabled:
-            to_email_address = self.redirect_address or to_email
-            mail = EmailMultiAlternatives(
-                title, plaintext_template or content, from_email, [to_email_address]
-            )
-            mail.attach_alternative(content, "text/html")
-            if attachments:
-                for attachment in attachments:
-                    mail.attach(attachment["name"], attachment["content"])
-            mail.send()
-
-        Email.objects.create(  # type: ignore
-            env=os.environ.get("ENV"),
-            time=now(),
-            to=to_email,
-            from_email=from_email,
-            html=content,
-            subject=title,
+            connection = get_connection()
+            try:
+                for i, (email, content) in enumerate(zip(emails, email_contents)):
+                    try:
+                        # Only opens a connection if there isn't one open
+                        connection.open()
+                        connection.send_messages(
+                            [self._build_message(email, content, connection)]
+                        )
+                    except Exception as exc:  # pylint: disable=broad-except
+                        logger.error(
+                            "Failed to send email to %s: %s", email.to_email, exc
+                        )
+                        errors[i] = exc
+                        # The connection may be broken, so the next email
+                        # is sent over a new one
+                        connection.close()
+            finally:
+                connection.close()
+
+        sent_at = now()
+        Email.objects.bulk_create(
+            [
+                Email(
+                    env=os.environ.get("ENV", ""),
+                    time=sent_at,
+                    to=email.to_email,
+                    from_email=email.from_email,
+                    html=content,
+                    subject=email.title,
+                )
+                for (email, content, error) in zip(emails, email_contents, errors)
+                if error is None
+            ]
         )
+        return errors
 
     def send_admin_email(
         self,
@@ -0,0 +1,204 @@
+"""Error reporter
+
+Errors raised by requests are reported to Slack from a background
+thread, so that a slow or failing webhook never holds up a request.
+
+`ErrorReporter.report` only puts the error on a bounded queue, dropping
+(and counting) it if the queue is full. The sender thread fingerprints
+each error by its type and the frames of its traceback. An error is
+posted the first time it is raised, and then not again within the
+window - the number of times it was raised again in the window is
+posted once the window is over. No more than `max_messages` messages
+are posted per window, and the number of reports which were dropped is
+posted with the next message.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Deque, Dict, Optional
+
+from django.conf import settings
+
+from utils.slack_client import SlackClient
+
+logger = logging.getLogger(__name__)
+
+
+def get_fingerprint(exception: BaseException) -> str:
+    """Identify an error by its type and where it was raised from. Its
+    message is ignored as it often contains e.g. IDs"""
+    error_type = type(exception)
+    parts = [f"{error_type.__module__}.{error_type.__qualname__}"] + [
+        f"{frame.filename}:{frame.lineno}:{frame.name}"
+        for frame in traceback.extract_tb(exception.__traceback__)
+    ]
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+@dataclass
+class _ErrorGroup:
+    """The errors with the same fingerprint raised within a window"""
+
+    text: str
+    first_seen: float
+    repeats: int = 0
+
+
+class ErrorReporter:
+    """Reports errors from a background thread"""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        send: Callable[[str], None],
+        queue_size: int,
+        window: float,
+        max_messages: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        # pylint: disable=too-many-arguments
+        self._send = send
+        self._queue_size = queue_size
+        self._window = window
+        self._max_messages = max_messages
+        self._clock = clock
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._dropped = 0
+
+        # Only used by the sender thread
+        self._groups: Dict[str, _ErrorGroup] = {}
+        self._sent: Deque[float] = deque()
+        self._unsent = 0
+
+    def report(self, exception: BaseException):
+        """Queue an error to be reported. Never blocks"""
+        self._start()
+        try:
+            self._queue.put_nowait(exception)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def join(self):
+        """Wait for the queued errors to be processed"""
+        self._queue.join()
+
+    def _start(self):
+        """Start the sender thread if it isn't running in this process,
+        e.g. because the process was forked from one where it was"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._queue = queue.Queue(maxsize=self._queue_size)
+            threading.Thread(
+                target=self._run, name="error-reporter", daemon=True
+            ).start()
+            self._pid = pid
+
+    def _run(self):
+        while True:
+            try:
+                exception = self._queue.get(timeout=self._get_timeout())
+            except queue.Empty:
+                exception = None
+
+            try:
+                if exception is not None:
+                    self._add(exception, self._clock())
+                self._flush(self._clock())
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Failed to report error")
+            finally:
+                if exception is not None:
+                    self._queue.task_done()
+
+    def _get_timeout(self) -> Optional[float]:
+        """The time until there may be something to flush"""
+        flush_times = [
+            group.first_seen + self._window for group in self._groups.values()
+        ]
+        if (self._unsent or self._dropped) and self._sent:
+            flush_times.append(self._sent[0] + self._window)
+        if not flush_times:
+            return None
+        return max(min(flush_times) - self._clock(), 0)
+
+    def _add(self, exception: BaseException, now: float):
+        fingerprint = get_fingerprint(exception)
+        group = self._groups.get(fingerprint)
+        if group:
+            group.repeats += 1
+            return
+
+        group = _ErrorGroup(
+            text="".join(traceback.format_exception(exception)), first_seen=now
+        )
+        self._groups[fingerprint] = group
+        self._post(group.text, now)
+
+    def _flush(self, now: float):
+        """Post the counts of the errors whose windows are over, and the
+        number of reports which were dropped if there is nothing else
+        to post them with"""
+        for fingerprint, group in list(self._groups.items()):
+            if now - group.first_seen < self._window:
+                continue
+            del self._groups[fingerprint]
+            if group.repeats:
+                self._post(
+                    f"Raised {group.repeats} more times in {self._window} seconds:"
+                    f"\n{group.text}",
+                    now,
+                )
+
+        if (self._unsent or self._dropped) and self._queue.empty():
+            self._post("", now)
+
+    def _post(self, text: str, now: float):
+        while self._sent and now - self._sent[0] >= self._window:
+            self._sent.popleft()
+        if len(self._sent) >= self._max_messages:
+            if text:
+                self._unsent += 1
+            return
+
+        with self._lock:
+            dropped = self._dropped + self._unsent
+            self._dropped = 0
+        self._unsent = 0
+        if dropped:
+            text = f"{text}\n\n_{dropped} error reports were dropped_".lstrip()
+        if not text:
+            return
+
+        self._sent.append(now)
+        try:
+            self._send(text)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to send error report")
+
+
+@lru_cache(maxsize=None)
+def get_error_reporter() -> ErrorReporter:
+    """Get the reporter which posts errors to Slack"""
+    return ErrorReporter(
+        SlackClient().send_error_message,
+        queue_size=settings.ERROR_REPORT_QUEUE_SIZE,
+        window=settings.ERROR_REPORT_WINDOW,
+        max_messages=settings.ERROR_REPORT_MAX_MESSAGES,
+    )
@@ -1,8 +1,6 @@
 """A middleware to handle generic server errors"""
 
-import traceback
-
-from utils.slack_client import SlackClient
+from utils.error_reporter import get_error_reporter
 
 
 class HandleErrorsMiddleware:
@@ -15,6 +13,6 @@ class HandleErrorsMiddleware:
         return self.get_response(request)
 
     def process_exception(self, request, exception):
-        """On errors, surface them to Slack"""
-        slack_client = SlackClient()
-        slack_client.send_error_message(traceback.format_exc())
+        """On errors, surface them to Slack. The errors are sent from a
+        background thread so that the request isn't held up"""
+        get_error_reporter().report(exception)
@@ -258,6 +258,8 @@ EMAIL_USE_TLS = True
 ADMIN_EMAIL_ADDRESS = "contact@vuet.app"
 
 CACHE_TIMEOUT = 60 * 60 * 24
+SCHEDULED_TASK_CACHE_TIMEOUT = 60 * 60
+SCHEDULED_TASK_PAGE_DAYS = 7
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
@@ -272,3 +274,63 @@ CACHES = {
 REMINDER_JOB_FREQUENCY = (
     60 * 5
 )  # Every 5 minutes - should match the frequency in register_cron_jobs
+
+# The Expo push server - overridable to point at a local fake server
+EXPO_PUSH_HOST = os.getenv("EXPO_PUSH_HOST", "https://exp.host")
+EXPO_PUSH_TIMEOUT = 10  # seconds
+# Failed push messages are retried after PUSH_RETRY_DELAY seconds,
+# doubling with each attempt, up to PUSH_MAX_ATTEMPTS attempts
+PUSH_RETRY_DELAY = 60
+PUSH_MAX_ATTEMPTS = 5
+# The number of push messages sent, or whose receipts are checked, at a time
+PUSH_BATCH_SIZE = 500
+# Claimed push messages are sent again if they haven't been sent within
+# this many seconds, e.g. because the worker died
+PUSH_LEASE = 60 * 10
+# Expo recommends waiting before checking push receipts,
+# and only keeps them for a day
+PUSH_RECEIPT_DELAY = 60 * 15
+PUSH_RECEIPT_LIFETIME = 60 * 60 * 24
+
+# EXTERNAL CALENDARS
+ICAL_SYNC_CONCURRENCY = 8
+ICAL_FETCH_TIMEOUT = 60  # seconds
+# Feeds larger than this are spooled to disk while they are synced
+ICAL_SPOOL_MAX_SIZE = 1024 * 1024
+# Only events which may have occurrences within this many days
+# of a sync are imported
+ICAL_SYNC_PAST_DAYS = 365
+ICAL_SYNC_FUTURE_DAYS = 2 * 365
+# The number of changed events written to the database at a time
+ICAL_SYNC_BATCH_SIZE = 500
+
+# OUTBOUND JOBS
+# The number of jobs of each kind sent by each run of the worker
+OUTBOUND_JOB_BATCH_SIZE = 100
+# The number of SMS messages sent at once
+OUTBOUND_SMS_CONCURRENCY = 4
+# Failed jobs are retried after OUTBOUND_JOB_RETRY_DELAY seconds,
+# doubling with each attempt, up to OUTBOUND_JOB_MAX_ATTEMPTS attempts
+OUTBOUND_JOB_RETRY_DELAY = 60
+OUTBOUND_JOB_MAX_ATTEMPTS = 5
+# Jobs are sent again if they haven't been sent within this many
+# seconds of being claimed, e.g. because the worker died
+OUTBOUND_JOB_LEASE = 60 * 10
+
+# ERROR REPORTING
+# Errors are dropped if this many are already waiting to be reported
+ERROR_REPORT_QUEUE_SIZE = 100
+# An error is only reported once per window (in seconds), followed
+# by the number of times it was raised again in the window
+ERROR_REPORT_WINDOW = 60 * 5
+# The most error reports posted to Slack per window
+ERROR_REPORT_MAX_MESSAGES = 20
+
+# CHANGE LOG
+# The most change log entries synced by each request
+CHANGE_LOG_PAGE_SIZE = 500
+# Entries are assumed to have been committed this many seconds after
+# they were written, and are sent again until then
+CHANGE_LOG_SETTLE_TIME = 60
+# Clients which haven't synced for this many days fetch everything again
+CHANGE_LOG_RETENTION_DAYS = 30